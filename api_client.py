@@ -0,0 +1,443 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Client de l'API de scraping et file d'envoi persistante
+
+- normalize_for_api : normalisation exigée par l'API (une seule implémentation
+  pour le moniteur et les scripts d'envoi manuels)
+- ApiClient : session `requests` réutilisée (keep-alive), nouvelles tentatives
+  avec délai exponentiel sur erreur réseau / 429 / 5xx
+- ApiOutbox : file SQLite des annonces à envoyer. Le scraping se contente d'y
+  déposer les données ; un thread les envoie en arrière-plan. Les envois en
+  échec restent dans la file (et survivent à un redémarrage) jusqu'à leur
+  acceptation par l'API.
+- Mode lot (optionnel) : la file envoie ses annonces par lots bornés en nombre,
+  en taille et en temps, sous forme de tableau JSON compact compressé (gzip).
+  Le résultat de chaque annonce est relu dans la réponse (par numéro Centris)
+  pour ne renvoyer que celles en échec.
+"""
+
+import gzip
+import json
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from logger_config import setup_logger
+
+logger = setup_logger('monitor', level='INFO')
+
+# Valeur d'exemple de config_api.py : API non configurée
+PLACEHOLDER_ENDPOINT = "https://votre-api.com/api/properties"
+
+DEFAULT_HEADERS = {
+    'Content-Type': 'application/json',
+    'User-Agent': 'CentrisMonitor/1.0'
+}
+
+# Champs que l'API exige sous forme de chaîne (null refusé avec une erreur 400)
+STRING_FIELDS = ('quartier', 'annee_construction', 'statut')
+
+# Statuts HTTP pour lesquels un nouvel essai a un sens
+RETRYABLE_STATUSES = (408, 429, 500, 502, 503, 504)
+
+
+def is_configured(endpoint):
+    """Vrai si l'endpoint est renseigné et n'est pas la valeur d'exemple"""
+    return bool(endpoint) and endpoint != PLACEHOLDER_ENDPOINT
+
+
+def is_retryable(status):
+    """Vrai si un envoi en échec (statut HTTP, None = erreur réseau) peut réussir plus tard"""
+    return status is None or status >= 500 or status in RETRYABLE_STATUSES
+
+
+def _normalize_strings(data):
+    for key in STRING_FIELDS:
+        if key in data and data[key] is None:
+            data[key] = ""
+        elif key in data and not isinstance(data[key], str):
+            data[key] = str(data[key])
+
+
+def normalize_for_api(property_data):
+    """
+    L'API exige des chaînes pour quartier, annee_construction, statut.
+    Convertit null en "" pour éviter les erreurs 400.
+
+    Args:
+        property_data: Données de la propriété (non modifiées)
+
+    Returns:
+        dict: Copie normalisée, prête à être envoyée
+    """
+    payload = dict(property_data)
+    _normalize_strings(payload)
+    if isinstance(payload.get('_donnees_liste'), dict):
+        payload['_donnees_liste'] = dict(payload['_donnees_liste'])
+        _normalize_strings(payload['_donnees_liste'])
+    return payload
+
+
+class ApiClient:
+    """
+    Envoi des annonces à l'API par une session HTTP persistante
+    """
+
+    def __init__(self, endpoint, headers=None, timeout=30, retries=3, backoff_factor=1.0, connect_timeout=5,
+                 batch_endpoint=None, compress=True):
+        """
+        Args:
+            endpoint: URL de l'API
+            headers: En-têtes HTTP (DEFAULT_HEADERS si None)
+            timeout: Délai max de lecture de la réponse (secondes)
+            retries: Nombre de nouvelles tentatives sur erreur réseau / 429 / 5xx
+            backoff_factor: Base du délai exponentiel entre les tentatives (secondes)
+            connect_timeout: Délai max d'établissement de la connexion (secondes)
+            batch_endpoint: URL d'envoi des lots (None = même URL que les envois unitaires)
+            compress: Compresser les lots en gzip
+        """
+        self.endpoint = endpoint
+        self.batch_endpoint = batch_endpoint or endpoint
+        self.compress = compress
+        self.timeout = (connect_timeout, timeout)
+
+        self.http = requests.Session()
+        self.http.headers.update(headers or DEFAULT_HEADERS)
+        retry = Retry(total=retries, backoff_factor=backoff_factor,
+                      status_forcelist=[429, 500, 502, 503, 504],
+                      allowed_methods=['POST'], raise_on_status=False)
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=2, max_retries=retry)
+        self.http.mount('http://', adapter)
+        self.http.mount('https://', adapter)
+
+    def post(self, payload):
+        """
+        Envoie un payload déjà normalisé
+
+        Returns:
+            requests.Response
+
+        Raises:
+            requests.exceptions.RequestException: Erreur réseau après toutes les tentatives
+        """
+        return self.http.post(self.endpoint, json=payload, timeout=self.timeout)
+
+    def send(self, property_data):
+        """
+        Normalise et envoie une annonce
+
+        Returns:
+            tuple: (bool accepté, statut HTTP ou None, message d'erreur)
+        """
+        centris_id = property_data.get('numero_centris', 'N/A')
+        try:
+            response = self.post(normalize_for_api(property_data))
+        except requests.exceptions.Timeout:
+            return False, None, f"timeout (>{self.timeout[1]}s)"
+        except requests.exceptions.RequestException as e:
+            return False, None, f"erreur réseau: {e}"
+
+        if response.status_code in (200, 201):
+            logger.info(f"✓ Données envoyées avec succès (Status: {response.status_code}) - Centris #{centris_id}")
+            return True, response.status_code, ''
+        logger.debug(f"Réponse: {response.text[:200]}")
+        return False, response.status_code, f"statut {response.status_code}: {response.text[:200]}"
+
+    def post_batch(self, payloads):
+        """
+        Envoie un lot de payloads déjà normalisés (tableau JSON compact, gzip si activé)
+
+        Returns:
+            requests.Response
+
+        Raises:
+            requests.exceptions.RequestException: Erreur réseau après toutes les tentatives
+        """
+        body = json.dumps(payloads, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+        headers = {'Content-Type': 'application/json'}
+        if self.compress:
+            body = gzip.compress(body)
+            headers['Content-Encoding'] = 'gzip'
+        return self.http.post(self.batch_endpoint, data=body, headers=headers, timeout=self.timeout)
+
+    def send_batch(self, payloads):
+        """
+        Envoie un lot et relit le résultat de chaque annonce
+
+        La réponse attendue est un tableau (ou {"results": [...]}) d'objets
+        {"numero_centris": ..., "status": 201, "error": ...}, associés aux
+        annonces par numéro Centris (ou par position à défaut). Une réponse
+        2xx sans détail vaut acceptation de tout le lot.
+
+        Args:
+            payloads: Payloads déjà normalisés
+
+        Returns:
+            list: (bool accepté, statut HTTP ou None, message d'erreur) pour chaque payload, dans l'ordre
+        """
+        try:
+            response = self.post_batch(payloads)
+        except requests.exceptions.Timeout:
+            return [(False, None, f"timeout (>{self.timeout[1]}s)")] * len(payloads)
+        except requests.exceptions.RequestException as e:
+            return [(False, None, f"erreur réseau: {e}")] * len(payloads)
+
+        if response.status_code == 413 and len(payloads) > 1:
+            # Lot trop volumineux pour l'API : envoi unitaire
+            logger.warning(f"API: lot de {len(payloads)} annonces refusé (413), envoi une par une")
+            return [self.send(payload) for payload in payloads]
+        if not 200 <= response.status_code < 300:
+            error = f"statut {response.status_code}: {response.text[:200]}"
+            return [(False, response.status_code, error)] * len(payloads)
+
+        try:
+            body = response.json()
+        except ValueError:
+            body = None
+        items = body.get('results') if isinstance(body, dict) else body
+        if not isinstance(items, list):
+            return [(True, response.status_code, '')] * len(payloads)
+
+        by_id = {str(item['numero_centris']): item for item in items
+                 if isinstance(item, dict) and item.get('numero_centris') is not None}
+        results = []
+        for position, payload in enumerate(payloads):
+            item = by_id.get(str(payload.get('numero_centris')))
+            if item is None and not by_id and position < len(items):
+                item = items[position]
+            if not isinstance(item, dict):
+                results.append((False, None, "annonce absente de la réponse du lot"))
+                continue
+            status = item.get('status')
+            if not isinstance(status, int):
+                status = response.status_code if item.get('ok', True) else None
+            if 200 <= (status or 0) < 300:
+                results.append((True, status, ''))
+            else:
+                results.append((False, status, str(item.get('error') or f"statut {status}")[:200]))
+        return results
+
+    def close(self):
+        """Ferme les connexions HTTP"""
+        self.http.close()
+
+
+class ApiOutbox:
+    """
+    File d'envoi persistante (SQLite) vidée en arrière-plan vers l'API
+    """
+
+    def __init__(self, path, client, interval=30, max_delay=3600, base_delay=30,
+                 batch_size=0, batch_interval=10, batch_max_bytes=5000000):
+        """
+        Args:
+            path: Fichier SQLite de la file
+            client: ApiClient utilisé pour les envois
+            interval: Période du vidage en arrière-plan (secondes)
+            max_delay: Délai max avant un nouvel essai d'une annonce en échec (secondes)
+            base_delay: Délai avant le 2e essai, doublé à chaque échec (secondes)
+            batch_size: Nombre max d'annonces par lot (0 = envoi unitaire)
+            batch_interval: Attente max d'une annonce avant l'envoi d'un lot incomplet (secondes)
+            batch_max_bytes: Taille max d'un lot avant compression (octets)
+        """
+        self.path = path
+        self.client = client
+        self.interval = interval
+        self.max_delay = max_delay
+        self.base_delay = base_delay
+        self.batch_size = batch_size
+        self.batch_interval = batch_interval
+        self.batch_max_bytes = batch_max_bytes
+        self.stats = {'queued': 0, 'sent': 0, 'failed': 0, 'rejected': 0, 'batches': 0}
+
+        # Un seul vidage à la fois ; enqueue ne l'attend jamais (SQLite gère les écritures concurrentes)
+        self._drain_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._wake = threading.Event()
+        self._thread = None
+
+        with self._connect() as conn:
+            # WAL : le thread d'envoi ne bloque pas les dépôts du scraping
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS outbox ("
+                " id INTEGER PRIMARY KEY AUTOINCREMENT,"
+                " centris_id TEXT,"
+                " payload TEXT NOT NULL,"
+                " created_at REAL NOT NULL,"
+                " attempts INTEGER NOT NULL DEFAULT 0,"
+                " next_attempt_at REAL NOT NULL,"
+                " last_error TEXT,"
+                " rejected INTEGER NOT NULL DEFAULT 0)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS outbox_ready ON outbox (rejected, next_attempt_at)")
+
+    @contextmanager
+    def _connect(self):
+        """Connexion courte (une par opération et par thread), validée puis fermée"""
+        conn = sqlite3.connect(self.path, timeout=30)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def enqueue(self, property_data):
+        """
+        Dépose une annonce dans la file (écriture durable, sans appel réseau)
+
+        Returns:
+            int: Identifiant de l'entrée
+        """
+        payload = normalize_for_api(property_data)
+        now = time.time()
+        with self._connect() as conn:
+            cursor = conn.execute(
+                "INSERT INTO outbox (centris_id, payload, created_at, next_attempt_at) VALUES (?, ?, ?, ?)",
+                (str(payload.get('numero_centris') or ''),
+                 json.dumps(payload, ensure_ascii=False, separators=(',', ':')), now, now)
+            )
+            entry_id = cursor.lastrowid
+        self.stats['queued'] += 1
+        logger.info(f"Annonce {payload.get('numero_centris', 'N/A')} ajoutée à la file d'envoi API")
+        self._wake.set()
+        return entry_id
+
+    def pending_count(self):
+        """Nombre d'annonces en attente d'envoi (hors rejets définitifs)"""
+        with self._connect() as conn:
+            return conn.execute("SELECT COUNT(*) FROM outbox WHERE rejected = 0").fetchone()[0]
+
+    def rejected_count(self):
+        """Nombre d'annonces refusées définitivement par l'API (4xx), conservées pour analyse"""
+        with self._connect() as conn:
+            return conn.execute("SELECT COUNT(*) FROM outbox WHERE rejected = 1").fetchone()[0]
+
+    def drain(self, max_items=None, force=False):
+        """
+        Envoie les annonces dont le délai d'attente est écoulé, dans l'ordre d'arrivée.
+        En mode lot, un lot incomplet n'est envoyé que si sa plus ancienne annonce
+        attend depuis batch_interval secondes (ou si force=True).
+
+        Returns:
+            int: Nombre d'annonces acceptées par l'API
+        """
+        with self._drain_lock:
+            now = time.time()
+            with self._connect() as conn:
+                rows = conn.execute(
+                    "SELECT id, centris_id, payload, attempts, next_attempt_at FROM outbox "
+                    "WHERE rejected = 0 AND next_attempt_at <= ? ORDER BY id LIMIT ?",
+                    (now, max_items if max_items else -1)
+                ).fetchall()
+            if not rows:
+                return 0
+
+            if not self.batch_size:
+                sent = 0
+                for row in rows:
+                    if self._stop.is_set():
+                        break
+                    ok, status, error = self.client.send(json.loads(row[2]))
+                    sent += self._record_outcome(row, ok, status, error)
+                return sent
+
+            waiting_s = now - min(row[4] for row in rows)
+            if not force and len(rows) < self.batch_size and waiting_s < self.batch_interval:
+                return 0
+
+            sent = 0
+            for batch in self._split_batches(rows):
+                if self._stop.is_set():
+                    break
+                results = self.client.send_batch([json.loads(row[2]) for row in batch])
+                self.stats['batches'] += 1
+                for row, (ok, status, error) in zip(batch, results):
+                    sent += self._record_outcome(row, ok, status, error)
+                logger.info(f"API: lot de {len(batch)} annonce(s) envoyé, "
+                            f"{sum(1 for ok, _, _ in results if ok)} acceptée(s)")
+            return sent
+
+    def _split_batches(self, rows):
+        """Découpe les annonces prêtes en lots bornés en nombre et en taille"""
+        batch, size = [], 0
+        for row in rows:
+            row_size = len(row[2].encode('utf-8'))
+            if batch and (len(batch) >= self.batch_size or size + row_size > self.batch_max_bytes):
+                yield batch
+                batch, size = [], 0
+            batch.append(row)
+            size += row_size
+        if batch:
+            yield batch
+
+    def _record_outcome(self, row, ok, status, error):
+        """
+        Retire l'annonce acceptée, conserve l'annonce refusée, replanifie l'annonce en échec
+
+        Returns:
+            int: 1 si l'annonce a été acceptée, 0 sinon
+        """
+        entry_id, centris_id, _, attempts = row[:4]
+        with self._connect() as conn:
+            if ok:
+                conn.execute("DELETE FROM outbox WHERE id = ?", (entry_id,))
+                self.stats['sent'] += 1
+                return 1
+            if not is_retryable(status):
+                conn.execute("UPDATE outbox SET attempts = ?, last_error = ?, rejected = 1 WHERE id = ?",
+                             (attempts + 1, error, entry_id))
+                self.stats['rejected'] += 1
+                logger.error(f"API: annonce {centris_id} refusée ({error}), conservée dans {self.path}")
+                return 0
+            delay = min(self.base_delay * (2 ** attempts), self.max_delay)
+            conn.execute("UPDATE outbox SET attempts = ?, last_error = ?, next_attempt_at = ? WHERE id = ?",
+                         (attempts + 1, error, time.time() + delay, entry_id))
+            self.stats['failed'] += 1
+            logger.warning(f"API: envoi de l'annonce {centris_id} en échec ({error}), "
+                           f"nouvel essai dans {delay:.0f}s")
+            return 0
+
+    def flush(self, timeout=60):
+        """
+        Vide la file jusqu'à ce qu'il ne reste rien de prêt à envoyer (ou délai dépassé)
+
+        Returns:
+            int: Nombre d'annonces encore en attente
+        """
+        deadline = time.time() + timeout
+        while time.time() < deadline:
+            if not self.drain(max_items=max(50, self.batch_size), force=True):
+                break
+        return self.pending_count()
+
+    def start(self):
+        """Démarre le vidage en arrière-plan (thread démon)"""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name='api-outbox', daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                self.drain()
+            except Exception as e:
+                logger.error(f"File d'envoi API: erreur pendant le vidage: {e}", exc_info=True)
+            # En mode lot, revenir au plus tard quand un lot incomplet doit partir
+            wait_s = min(self.interval, self.batch_interval) if self.batch_size else self.interval
+            self._wake.wait(wait_s)
+            self._wake.clear()
+
+    def stop(self, timeout=10):
+        """Arrête le thread d'envoi (les annonces non envoyées restent dans la file)"""
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
@@ -3,17 +3,21 @@
 """
 Script de nettoyage manuel des fichiers JSON
 Utilisez ce script pour forcer un nettoyage immédiat
+Les annonces restent consultables dans la base PROPERTY_DB (les fichiers
+pas encore importés y sont ajoutés avant la suppression)
 """
 
 import os
 import glob
 from datetime import datetime, timedelta
+from property_store import PropertyStore
 
 try:
-    from config_api import KEEP_CURRENT_WEEK, PROTECTED_FILES
+    from config_api import KEEP_CURRENT_WEEK, PROTECTED_FILES, PROPERTY_DB
 except ImportError:
     KEEP_CURRENT_WEEK = True
     PROTECTED_FILES = ['scraped_properties.json', 'monitoring_stats.json', 'property_with_list_info.json']
+    PROPERTY_DB = 'properties.db'
 
 print("="*80)
 print("NETTOYAGE MANUEL DES FICHIERS JSON")
@@ -29,6 +33,13 @@ if not json_files:
 
 print(f"\n[INFO] {len(json_files)} fichiers JSON trouves")
 
+# Archiver dans la base les fichiers qui n'y sont pas encore
+store = PropertyStore(PROPERTY_DB)
+imported = store.import_json_files(pattern)
+print(f"[INFO] {imported['imported']} fichiers importes dans {PROPERTY_DB} ({store.count()} annonces dans la base)")
+for json_file, error in imported['errors']:
+    print(f"[ERREUR] Import impossible de {json_file}: {error}")
+
 # Calculer la date limite
 now = datetime.now()
 if KEEP_CURRENT_WEEK:
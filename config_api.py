@@ -24,6 +24,27 @@ API_HEADERS = {
 # Timeout pour les requêtes API (en secondes)
 API_TIMEOUT = 30
 
+# Nouvelles tentatives d'un envoi sur erreur réseau / 429 / 5xx (délai exponentiel)
+API_RETRIES = 3
+
+# File d'envoi persistante : les annonces scrapées y sont déposées puis envoyées
+# en arrière-plan ; celles que l'API n'a pas acceptées y restent jusqu'au prochain essai
+API_OUTBOX_FILE = 'api_outbox.db'
+
+# Période du vidage de la file d'envoi en arrière-plan (en secondes)
+API_OUTBOX_INTERVAL = 30
+
+# Envoi par lots (rattrapage d'un arriéré, après reset_scraping.py...) :
+# tableau JSON compact compressé en gzip, résultat relu annonce par annonce.
+# 0 = une requête par annonce (comportement historique)
+API_BATCH_SIZE = 0
+
+# Attente max d'une annonce dans un lot incomplet avant son envoi (en secondes)
+API_BATCH_FLUSH_INTERVAL = 10
+
+# URL d'envoi des lots (None = même URL que API_ENDPOINT)
+API_BATCH_ENDPOINT = None
+
 # ============================================================================
 # CONFIGURATION MONITORING
 # ============================================================================
@@ -34,9 +55,59 @@ MATRIX_URL = "https://matrix.centris.ca/Matrix/Public/Portal.aspx?ID=0-331914303
 # Intervalle de monitoring (en minutes)
 MONITORING_INTERVAL = 60  # 1 heure
 
-# Fichier de stockage des IDs scrapés
+# Planification adaptative : l'intervalle de chaque heure de la semaine suit le taux d'arrivée des
+# nouvelles annonces appris dans STATS_LOG_FILE (plus court aux heures actives, plus long la nuit),
+# avec autant de cycles par semaine qu'avec MONITORING_INTERVAL fixe. False = intervalle fixe.
+# Dans les deux cas, les cycles démarrent sur des créneaux de l'horloge (multiples de l'intervalle).
+ADAPTIVE_SCHEDULING = True
+MONITORING_INTERVAL_MIN = 15   # Intervalle minimal (minutes)
+MONITORING_INTERVAL_MAX = 180  # Intervalle maximal (minutes)
+MONITORING_JITTER_S = 60       # Décalage aléatoire maximal après le créneau (secondes)
+SCHEDULER_HISTORY_DAYS = 28    # Historique utilisé pour apprendre les taux d'arrivée
+
+# Verrou empêchant deux processus de monitoring de lancer un cycle en même temps
+CYCLE_LOCK_FILE = 'monitoring.lock'
+
+# Fichier de stockage des IDs scrapés (ancien format JSON, importé dans SCRAPED_IDS_DB au premier lancement)
 STORAGE_FILE = 'scraped_properties.json'
 
+# Base SQLite des IDs scrapés (un ajout par annonce, sans réécrire tout le fichier)
+SCRAPED_IDS_DB = 'scraped_ids.db'
+
+# Base SQLite des annonces scrapées (consultée par les scripts d'analyse au lieu des property_*.json)
+PROPERTY_DB = 'properties.db'
+
+# Rescraper les annonces déjà scrapées dont la carte a changé dans la liste (prix, statut, date d'envoi)
+REFRESH_CHANGED_LISTINGS = True
+
+# File des annonces à scraper : les plus récentes et les « Nouvelle annonce » / « Nouveau prix » d'abord
+# (MAX_LISTINGS_PER_CYCLE prend les plus prioritaires). Une annonce en échec est réessayée après
+# SCRAPE_RETRY_DELAY secondes, délai doublé à chaque échec (6 h max), puis abandonnée après
+# SCRAPE_MAX_ATTEMPTS échecs (rejets consultables avec python scrape_queue.py).
+SCRAPE_QUEUE_DB = 'scrape_queue.db'
+SCRAPE_MAX_ATTEMPTS = 5
+SCRAPE_RETRY_DELAY = 1800  # 30 minutes
+
+# Terminer le cycle dès la découverte si la liste (numéros, prix, statuts) est identique à celle du
+# dernier cycle terminé : une ligne de log au lieu du traitement complet. Avec DISCOVERY_MODE = 'http',
+# l'empreinte est calculée sur la seule réponse HTTP (même incomplète) et le navigateur n'est démarré
+# que si elle a changé : un tel cycle ne coûte qu'une requête, ce qui permet un MONITORING_INTERVAL
+# de quelques minutes.
+SKIP_UNCHANGED_PAGE = True
+
+# Journal des statistiques de cycle (une ligne JSON par cycle, rotation par taille comme les logs)
+STATS_LOG_FILE = 'monitoring_stats.jsonl'
+STATS_LOG_MAX_BYTES = 5 * 1024 * 1024  # 5 Mo par fichier
+STATS_LOG_BACKUP_COUNT = 10  # Fichiers archivés conservés (.1 à .10)
+
+# Durées des étapes de chaque annonce (démarrage de Chrome, chargement, défilement, panneau, détails,
+# photos, écriture locale, envoi API), agrégées par cycle (p50 / p95 / max) :
+# - une ligne JSON par cycle (agrégats et durées détaillées), rotation comme STATS_LOG_FILE ;
+# - un fichier au format texte Prometheus réécrit à chaque cycle (pointer le collecteur « textfile »
+#   de node_exporter sur ce fichier ou son dossier). None = pas d'export.
+CYCLE_METRICS_FILE = 'cycle_metrics.jsonl'
+CYCLE_METRICS_PROM_FILE = 'cycle_metrics.prom'
+
 # ============================================================================
 # CONFIGURATION AVANCÉE (optionnel)
 # ============================================================================
@@ -51,10 +122,42 @@ HEADLESS_MODE = True
 VERBOSE_LOGS = True
 
 # Sauvegarder les JSON localement (en plus de l'envoi à l'API)
+# Les annonces sont toujours enregistrées dans PROPERTY_DB, ces fichiers ne servent qu'à la consultation
 SAVE_JSON_LOCALLY = True
 
 # Nombre maximum d'annonces à scraper par cycle (0 = illimité)
-MAX_LISTINGS_PER_CYCLE = 0  # 0 = toutes les nouvelles annonces
+MAX_LISTINGS_PER_CYCLE = 0  # 0 = toutes les annonces prêtes de la file de scraping (les plus prioritaires d'abord)
+
+# Navigateur partagé : redémarrer Chrome après ce nombre d'annonces (0 = jamais)
+# Le navigateur est aussi redémarré automatiquement après une erreur
+BROWSER_RECYCLE_AFTER = 25
+
+# Nombre de navigateurs Chrome en parallèle (processus séparés) pour scraper
+# les nouvelles annonces. 1 = scraping séquentiel (comportement historique)
+SCRAPER_WORKERS = 1
+
+# Nombre de navigateurs par machine (nom d'hôte -> nombre), prioritaire sur SCRAPER_WORKERS
+SCRAPER_WORKERS_PER_HOST = {
+    # 'scraper-centris': 3,
+}
+
+# Ouverture du panneau de détail : délai max par tentative de clic (secondes)
+# et durée sans modification du DOM (millisecondes) pour considérer le panneau prêt
+PANEL_READY_TIMEOUT = 10
+PANEL_QUIET_MS = 400
+
+# Découverte des annonces à chaque cycle :
+#   'http'     = simple requête HTTP (sans Chrome), repli automatique sur le navigateur si incomplet ;
+#                tant que le navigateur n'a pas vu la liste complète une fois (nombre d'annonces de
+#                référence, conservé dans SCRAPED_IDS_DB), chaque cycle passe par le navigateur
+#   'selenium' = toujours charger la page dans Chrome (comportement historique)
+DISCOVERY_MODE = 'http'
+
+# Découverte par le navigateur : la liste étant triée de la plus récente à la plus ancienne, le
+# défilement s'arrête dès que ce nombre de cartes consécutives en fin de liste sont déjà scrapées
+# ou antérieures à la date minimale (0 = toujours défiler jusqu'en bas). Les changements de prix
+# des annonces situées plus bas ne sont alors vus qu'au prochain chargement complet.
+DISCOVERY_STOP_RUN = 20
 
 # ============================================================================
 # NETTOYAGE AUTOMATIQUE DES FICHIERS JSON
@@ -75,10 +178,17 @@ KEEP_CURRENT_WEEK = True  # True = garder les JSON de la semaine en cours
 # Fichiers à ne jamais supprimer (CRITIQUE !)
 PROTECTED_FILES = [
     'scraped_properties.json',       # ⚠️ CRITIQUE - Liste des numéros Centris déjà scrapés
-    'monitoring_stats.json',          # Statistiques de monitoring
+    'scraped_ids.db',                # ⚠️ CRITIQUE - Base des numéros Centris déjà scrapés
+    'properties.db',                 # Base des annonces scrapées
+    'monitoring_stats.json',          # Statistiques de monitoring (ancien format)
+    'monitoring_stats.jsonl',         # Journal des statistiques de cycle
+    'cycle_metrics.jsonl',            # Journal des durées des étapes
+    'cycle_metrics.prom',             # Durées du dernier cycle (Prometheus)
+    'monitoring.lock',                # Verrou du cycle en cours
+    'scrape_queue.db',                # File des annonces à scraper (essais et rejets)
     'property_with_list_info.json'    # Fichier de test
 ]
 
-# Créer une sauvegarde du fichier scraped_properties.json
+# Créer une sauvegarde des IDs scrapés (export JSON de scraped_ids.db)
 AUTO_BACKUP_SCRAPED_IDS = True  # Sauvegarde automatique avant nettoyage
 
@@ -0,0 +1,232 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Durée des étapes de chaque annonce, agrégée par cycle (p50 / p95 / max)
+
+Chaque étape mesurée (démarrage de Chrome, chargement de la page, défilement,
+lecture de la liste, ouverture du panneau, extraction des détails, photos,
+écriture locale, dépôt dans la file d'envoi API) donne une durée rattachée au
+numéro Centris de l'annonce traitée (None pour la découverte de début de cycle).
+
+En fin de cycle, les durées sont agrégées par étape puis exportées :
+- une ligne JSON par cycle (agrégats et durées détaillées), même rotation
+  par taille que le journal des statistiques de cycle ;
+- un fichier au format texte Prometheus (collecteur « textfile » de
+  node_exporter), réécrit de façon atomique à chaque cycle.
+
+Usage (étapes des dernières 24 heures):
+    python cycle_metrics.py 24
+"""
+
+import os
+import sys
+import time
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from cycle_stats_log import CycleStatsLog
+
+# Étapes dans l'ordre du traitement d'une annonce (ordre d'affichage et d'export)
+STAGES = (
+    'http_discovery',
+    'driver_start',
+    'page_load',
+    'scroll',
+    'list_parse',
+    'panel_wait',
+    'detail_extraction',
+    'photos',
+    'panel_close',
+    'local_write',
+    'api_send',
+)
+
+METRIC_PREFIX = 'centris_scraper'
+
+
+def percentile(values, q):
+    """
+    Percentile par interpolation linéaire entre les deux rangs voisins
+
+    Args:
+        values: Valeurs (non vide)
+        q: Rang entre 0 et 1 (0.5 = médiane)
+    """
+    ordered = sorted(values)
+    position = (len(ordered) - 1) * q
+    low = int(position)
+    high = min(low + 1, len(ordered) - 1)
+    return ordered[low] + (ordered[high] - ordered[low]) * (position - low)
+
+
+@contextmanager
+def stage_timer(times, stage):
+    """
+    Ajoute la durée du bloc à times[stage] (durées des étapes d'une annonce, en secondes)
+
+    Args:
+        times: dict {étape: secondes}, relevé ensuite par CycleMetrics.record_times
+        stage: Nom de l'étape (voir STAGES)
+    """
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        times[stage] = times.get(stage, 0.0) + time.perf_counter() - start
+
+
+class CycleMetrics:
+    """
+    Durées des étapes d'un cycle de monitoring
+    """
+
+    def __init__(self):
+        self.started_at = time.time()
+        # (étape, secondes, numero_centris)
+        self.spans = []
+
+    def record(self, stage, seconds, centris_id=None):
+        """Enregistre la durée d'une étape"""
+        self.spans.append((stage, round(seconds, 3), centris_id))
+
+    def record_times(self, times, centris_id=None):
+        """Enregistre les durées relevées par stage_timer pour une annonce"""
+        for stage, seconds in times.items():
+            self.record(stage, seconds, centris_id)
+
+    def extend(self, spans):
+        """Ajoute des durées déjà relevées (session navigateur, workers du pool)"""
+        self.spans.extend((stage, seconds, centris_id) for stage, seconds, centris_id in spans)
+
+    @contextmanager
+    def span(self, stage, centris_id=None):
+        """Mesure la durée du bloc comme étape `stage` de l'annonce `centris_id`"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(stage, time.perf_counter() - start, centris_id)
+
+    def summary(self):
+        """
+        Agrégats par étape, dans l'ordre de STAGES (étapes inconnues à la fin)
+
+        Returns:
+            dict: {étape: {count, total_s, p50_s, p95_s, max_s, max_centris_id}}
+        """
+        by_stage = {}
+        for stage, seconds, centris_id in self.spans:
+            by_stage.setdefault(stage, []).append((seconds, centris_id))
+        order = [s for s in STAGES if s in by_stage] + sorted(s for s in by_stage if s not in STAGES)
+        result = {}
+        for stage in order:
+            values = [seconds for seconds, _ in by_stage[stage]]
+            slowest = max(by_stage[stage], key=lambda span: span[0])
+            result[stage] = {
+                'count': len(values),
+                'total_s': round(sum(values), 3),
+                'p50_s': round(percentile(values, 0.5), 3),
+                'p95_s': round(percentile(values, 0.95), 3),
+                'max_s': slowest[0],
+                'max_centris_id': slowest[1]
+            }
+        return result
+
+    def to_record(self, **extra):
+        """
+        Ligne du journal JSONL : agrégats et durées détaillées du cycle
+
+        Args:
+            extra: Champs ajoutés à la ligne (duration_s, listings...)
+        """
+        record = {'timestamp': datetime.fromtimestamp(self.started_at).isoformat()}
+        record.update(extra)
+        record['stages'] = self.summary()
+        record['spans'] = [{'stage': stage, 'centris_id': centris_id, 'duration_s': seconds}
+                           for stage, seconds, centris_id in self.spans]
+        return record
+
+    def prometheus_text(self, duration_s=None, listings=None):
+        """
+        Agrégats du cycle au format texte Prometheus (un « summary » par étape)
+
+        Args:
+            duration_s: Durée totale du cycle (secondes)
+            listings: Nombre d'annonces traitées pendant le cycle
+        """
+        name = f"{METRIC_PREFIX}_stage_duration_seconds"
+        lines = [
+            f"# HELP {name} Durée des étapes par annonce pendant le dernier cycle",
+            f"# TYPE {name} summary",
+        ]
+        summary = self.summary()
+        for stage, agg in summary.items():
+            lines.append(f'{name}{{stage="{stage}",quantile="0.5"}} {agg["p50_s"]}')
+            lines.append(f'{name}{{stage="{stage}",quantile="0.95"}} {agg["p95_s"]}')
+            lines.append(f'{name}_sum{{stage="{stage}"}} {agg["total_s"]}')
+            lines.append(f'{name}_count{{stage="{stage}"}} {agg["count"]}')
+        max_name = f"{METRIC_PREFIX}_stage_max_seconds"
+        lines += [
+            f"# HELP {max_name} Durée maximale de chaque étape pendant le dernier cycle",
+            f"# TYPE {max_name} gauge",
+        ]
+        lines += [f'{max_name}{{stage="{stage}"}} {agg["max_s"]}' for stage, agg in summary.items()]
+        gauges = [
+            ('cycle_timestamp_seconds', "Début du dernier cycle (epoch)", round(self.started_at, 3)),
+            ('cycle_duration_seconds', "Durée du dernier cycle", duration_s),
+            ('cycle_listings', "Annonces traitées pendant le dernier cycle", listings),
+        ]
+        for metric, help_text, value in gauges:
+            if value is None:
+                continue
+            lines += [f"# HELP {METRIC_PREFIX}_{metric} {help_text}",
+                      f"# TYPE {METRIC_PREFIX}_{metric} gauge",
+                      f"{METRIC_PREFIX}_{metric} {value}"]
+        return '\n'.join(lines) + '\n'
+
+    def write_prometheus(self, path, duration_s=None, listings=None):
+        """Écrit le fichier Prometheus (fichier temporaire puis renommage : jamais lu à moitié écrit)"""
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write(self.prometheus_text(duration_s, listings))
+        os.replace(tmp_path, path)
+
+    def format_summary(self):
+        """Lignes de log des étapes, de la plus coûteuse à la moins coûteuse"""
+        summary = self.summary()
+        lines = []
+        for stage in sorted(summary, key=lambda s: summary[s]['total_s'], reverse=True):
+            agg = summary[stage]
+            lines.append(
+                f"{stage}: {agg['count']} mesure(s), {agg['total_s']:.1f}s au total, "
+                f"p50 {agg['p50_s']:.2f}s, p95 {agg['p95_s']:.2f}s, max {agg['max_s']:.2f}s"
+                + (f" (annonce {agg['max_centris_id']})" if agg['max_centris_id'] else "")
+            )
+        return lines
+
+
+def load_window(log, since=None):
+    """
+    Durées détaillées des cycles d'un journal JSONL, réunies en un seul CycleMetrics
+
+    Args:
+        log: CycleStatsLog du journal des étapes
+        since: Début de la fenêtre (datetime, None = tout le journal)
+    """
+    metrics = CycleMetrics()
+    cycles = 0
+    for entry in log.iter_entries(since=since):
+        cycles += 1
+        metrics.extend((span['stage'], span['duration_s'], span.get('centris_id')) for span in entry.get('spans', []))
+    return metrics, cycles
+
+
+if __name__ == "__main__":
+    try:
+        from config_api import CYCLE_METRICS_FILE
+    except ImportError:
+        CYCLE_METRICS_FILE = 'cycle_metrics.jsonl'
+    window = float(sys.argv[1]) if len(sys.argv) > 1 else 24
+    metrics, cycles = load_window(CycleStatsLog(CYCLE_METRICS_FILE), since=datetime.now() - timedelta(hours=window))
+    print(f"Dernières {window:g} heure(s) - {CYCLE_METRICS_FILE}: {cycles} cycle(s)")
+    for line in metrics.format_summary():
+        print(f"  {line}")
@@ -0,0 +1,204 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Journal des statistiques de cycle (JSONL, ajout seul, rotation par taille)
+
+Chaque cycle de monitoring ajoute une ligne JSON au fichier, sans relire ni
+réécrire l'historique. Au-delà de max_bytes, le fichier est renommé en .1
+(.1 en .2, etc.) comme les logs applicatifs, et les backup_count derniers
+fichiers sont conservés.
+
+Lecture : recent() redonne la vue des 100 derniers cycles de l'ancien
+monitoring_stats.json ; aggregate() calcule les débits (annonces/heure,
+erreurs/heure, durée moyenne d'un cycle) sur une fenêtre de temps en ne
+lisant que les fichiers qui la recouvrent.
+
+Usage (résumé des dernières 24 heures):
+    python cycle_stats_log.py 24
+"""
+
+import json
+import os
+import sys
+from collections import deque
+from datetime import datetime, timedelta
+from logger_config import setup_logger
+
+logger = setup_logger('monitor', level='INFO')
+
+
+def _timestamp(entry):
+    return datetime.fromisoformat(entry['timestamp'])
+
+
+def _read_last_line(path, block_size=4096):
+    """Dernière ligne non vide d'un fichier, lue depuis la fin"""
+    with open(path, 'rb') as f:
+        f.seek(0, os.SEEK_END)
+        position = f.tell()
+        data = b''
+        while position > 0:
+            step = min(block_size, position)
+            position -= step
+            f.seek(position)
+            data = f.read(step) + data
+            lines = data.rstrip(b'\n').split(b'\n')
+            if len(lines) > 1 or position == 0:
+                return lines[-1].decode('utf-8')
+    return ''
+
+
+class CycleStatsLog:
+    """
+    Statistiques des cycles de monitoring, une ligne JSON par cycle
+    """
+
+    def __init__(self, path='monitoring_stats.jsonl', max_bytes=5 * 1024 * 1024, backup_count=10,
+                 legacy_json=None):
+        """
+        Args:
+            path: Fichier JSONL courant
+            max_bytes: Taille au-delà de laquelle le fichier est archivé (.1, .2...)
+            backup_count: Nombre de fichiers archivés conservés
+            legacy_json: Ancien monitoring_stats.json importé si le journal n'existe pas encore (optionnel)
+        """
+        self.path = path
+        self.max_bytes = max_bytes
+        self.backup_count = backup_count
+        if legacy_json and os.path.exists(legacy_json) and not self.files():
+            self._import_legacy(legacy_json)
+
+    def _import_legacy(self, legacy_json):
+        try:
+            with open(legacy_json, 'r', encoding='utf-8') as f:
+                entries = json.load(f)
+        except Exception as e:
+            logger.warning(f"Import de {legacy_json} impossible: {e}")
+            return
+        for entry in entries:
+            self.append(entry)
+        logger.info(f"{len(entries)} cycle(s) importé(s) de {legacy_json} dans {self.path}")
+
+    def files(self):
+        """Fichiers existants, du plus ancien au plus récent"""
+        candidates = [f"{self.path}.{i}" for i in range(self.backup_count, 0, -1)] + [self.path]
+        return [path for path in candidates if os.path.exists(path)]
+
+    def _rotate(self):
+        for i in range(self.backup_count - 1, 0, -1):
+            if os.path.exists(f"{self.path}.{i}"):
+                os.replace(f"{self.path}.{i}", f"{self.path}.{i + 1}")
+        if self.backup_count:
+            os.replace(self.path, f"{self.path}.1")
+        else:
+            os.remove(self.path)
+
+    def append(self, stats):
+        """Ajoute les statistiques d'un cycle (doivent contenir 'timestamp' au format ISO)"""
+        line = (json.dumps(stats, ensure_ascii=False, separators=(',', ':')) + '\n').encode('utf-8')
+        if os.path.exists(self.path) and os.path.getsize(self.path) + len(line) > self.max_bytes:
+            self._rotate()
+        with open(self.path, 'ab') as f:
+            f.write(line)
+
+    @staticmethod
+    def _iter_file(path):
+        with open(path, 'r', encoding='utf-8') as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    yield json.loads(line)
+                except ValueError:
+                    # Ligne tronquée (arrêt pendant une écriture) : ignorée
+                    continue
+
+    def iter_entries(self, since=None, until=None):
+        """
+        Cycles entre since et until (datetime, bornes optionnelles), du plus ancien au plus récent
+
+        Les fichiers archivés entièrement antérieurs à since ne sont pas lus.
+        """
+        for path in self.files():
+            if since is not None:
+                try:
+                    if _timestamp(json.loads(_read_last_line(path))) < since:
+                        continue
+                except (ValueError, KeyError):
+                    pass
+            for entry in self._iter_file(path):
+                moment = _timestamp(entry)
+                if since is not None and moment < since:
+                    continue
+                if until is not None and moment > until:
+                    return
+                yield entry
+
+    def recent(self, count=100):
+        """Derniers cycles (vue de l'ancien monitoring_stats.json), du plus ancien au plus récent"""
+        entries = deque(maxlen=count)
+        for path in reversed(self.files()):
+            older = deque(self._iter_file(path), maxlen=count - len(entries))
+            entries.extendleft(reversed(older))
+            if len(entries) >= count:
+                break
+        return list(entries)
+
+    def aggregate(self, since=None, until=None):
+        """
+        Agrégats sur une fenêtre de temps
+
+        Args:
+            since: Début de la fenêtre (datetime, None = premier cycle enregistré)
+            until: Fin de la fenêtre (datetime, None = maintenant si since est donné, sinon dernier cycle)
+
+        Returns:
+            dict: cycles, skipped_cycles (liste inchangée), new_listings, listings (scrapées),
+            errors, hours, listings_per_hour, errors_per_hour, mean_cycle_s (cycles complets)
+        """
+        result = {'cycles': 0, 'skipped_cycles': 0, 'new_listings': 0, 'listings': 0, 'errors': 0,
+                  'hours': 0.0, 'listings_per_hour': 0.0, 'errors_per_hour': 0.0, 'mean_cycle_s': None}
+        first = last = None
+        durations = []
+        for entry in self.iter_entries(since, until):
+            moment = _timestamp(entry)
+            first = first or moment
+            last = moment
+            result['cycles'] += 1
+            result['new_listings'] += entry.get('new_listings', 0)
+            result['listings'] += entry.get('scraped_successfully', 0)
+            result['errors'] += entry.get('errors', 0)
+            if entry.get('skipped'):
+                result['skipped_cycles'] += 1
+            elif entry.get('duration_s') is not None:
+                durations.append(entry['duration_s'])
+        if not result['cycles']:
+            return result
+
+        start = since or first
+        end = until or (datetime.now() if since else last)
+        hours = (end - start).total_seconds() / 3600
+        result['hours'] = round(hours, 2)
+        if hours > 0:
+            result['listings_per_hour'] = round(result['listings'] / hours, 2)
+            result['errors_per_hour'] = round(result['errors'] / hours, 2)
+        if durations:
+            result['mean_cycle_s'] = round(sum(durations) / len(durations), 1)
+        return result
+
+    def aggregate_last(self, hours=24):
+        """Agrégats des dernières heures"""
+        return self.aggregate(since=datetime.now() - timedelta(hours=hours))
+
+
+if __name__ == "__main__":
+    try:
+        from config_api import STATS_LOG_FILE
+    except ImportError:
+        STATS_LOG_FILE = 'monitoring_stats.jsonl'
+    window = float(sys.argv[1]) if len(sys.argv) > 1 else 24
+    summary = CycleStatsLog(STATS_LOG_FILE).aggregate_last(window)
+    print(f"Dernières {window:g} heure(s) - {STATS_LOG_FILE}")
+    for key, value in summary.items():
+        print(f"  {key}: {value}")
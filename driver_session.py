@@ -0,0 +1,430 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Session navigateur persistante pour le moniteur Centris
+
+Un seul Chrome est ouvert et réutilisé pour la découverte des annonces et
+pour chaque scraping détaillé. Le navigateur n'est recyclé qu'en cas
+d'erreur ou après un nombre configurable d'annonces.
+"""
+
+import time
+from scraper_with_list_info import CentrisScraperWithListInfo
+from page_snapshot import new_snapshot_stats
+from listing_index import incremental_scroll
+from cycle_metrics import stage_timer
+from logger_config import setup_logger
+
+logger = setup_logger('monitor', level='INFO')
+
+
+class CentrisDriverSession:
+    """
+    Gère un navigateur Chrome longue durée partagé par tout le démon de monitoring
+    """
+
+    def __init__(self, url, recycle_after=25, page_load_wait=5, panel_ready_timeout=None, panel_quiet_ms=None):
+        """
+        Initialise la session (le navigateur n'est démarré qu'au premier usage)
+
+        Args:
+            url: URL de la page Matrix Centris
+            recycle_after: Nombre d'annonces avant de redémarrer le navigateur (0 = jamais)
+            page_load_wait: Attente (secondes) après le chargement du portail
+            panel_ready_timeout: Délai max (secondes) d'ouverture du panneau de détail (None = défaut du scraper)
+            panel_quiet_ms: Durée de stabilité du DOM (ms) pour déclarer le panneau prêt (None = défaut du scraper)
+        """
+        self.url = url
+        self.recycle_after = recycle_after
+        self.page_load_wait = page_load_wait
+        self.panel_ready_timeout = panel_ready_timeout
+        self.panel_quiet_ms = panel_quiet_ms
+        self.scraper = None
+        self.portal_loaded = False
+        self.listings_since_start = 0
+
+        # Coûts mesurés (secondes), utilisés pour estimer le temps économisé
+        self.last_driver_start_cost = 0.0
+        self.last_page_load_cost = 0.0
+        # Défilements du dernier chargement complet de la liste (estimation des défilements évités)
+        self.full_scroll_steps = None
+        # False si le dernier défilement s'est arrêté avant le bas de la liste
+        self.last_scroll_complete = True
+        # Durées des étapes (étape, secondes, numero_centris) en attente d'être relevées (take_spans)
+        self.spans = []
+        self.current_centris_id = None
+
+        self.cycle_stats = self._new_cycle_stats()
+
+    @staticmethod
+    def _new_cycle_stats():
+        return {
+            'driver_starts': 0,
+            'page_loads': 0,
+            'panels_closed_in_page': 0,
+            'listings_reused': 0,
+            'recycles': 0,
+            'time_saved_s': 0.0,
+            'panel_waits': 0,
+            'panel_ready_total_s': 0.0,
+            'panel_ready_max_s': 0.0,
+            'snapshot_listings': 0,
+            'page_transfers': 0,
+            'page_parses': 0,
+            'page_parse_s': 0.0,
+            'scroll_steps': 0,
+            'scroll_steps_saved': 0
+        }
+
+    @property
+    def driver(self):
+        """Driver Selenium courant (None si le navigateur n'est pas démarré)"""
+        return self.scraper.driver if self.scraper else None
+
+    def is_alive(self):
+        """Vérifie que le navigateur répond encore"""
+        if not self.scraper or not self.scraper.driver:
+            return False
+        try:
+            self.scraper.driver.current_url
+            return True
+        except Exception:
+            return False
+
+    def start(self):
+        """
+        Démarre le navigateur
+
+        Returns:
+            bool: True si le navigateur est prêt
+        """
+        start = time.time()
+        scraper = CentrisScraperWithListInfo()
+        if not scraper.init_driver():
+            logger.error("Session: impossible de démarrer Chrome")
+            return False
+        if self.panel_ready_timeout is not None:
+            scraper.panel_ready_timeout = self.panel_ready_timeout
+        if self.panel_quiet_ms is not None:
+            scraper.panel_quiet_ms = self.panel_quiet_ms
+
+        self.scraper = scraper
+        self.portal_loaded = False
+        self.listings_since_start = 0
+        self.last_driver_start_cost = time.time() - start
+        self.cycle_stats['driver_starts'] += 1
+        self.record_span('driver_start', self.last_driver_start_cost)
+        logger.info(f"Session: navigateur démarré en {self.last_driver_start_cost:.1f}s")
+        return True
+
+    def ensure_started(self):
+        """Démarre le navigateur s'il n'est pas déjà ouvert et fonctionnel"""
+        if self.is_alive():
+            return True
+        if self.scraper:
+            self.close()
+        return self.start()
+
+    def load_portal(self, scroll=True, max_scrolls=10, stop=None):
+        """
+        Charge la page Matrix et fait défiler pour charger toutes les annonces
+
+        Args:
+            scroll: Si True, défile jusqu'en bas de la liste
+            max_scrolls: Nombre maximum de défilements
+            stop: Condition d'arrêt anticipé du défilement (voir listing_index.DiscoveryStop)
+
+        Returns:
+            bool: True si la page a été chargée
+        """
+        if not self.ensure_started():
+            return False
+
+        start = time.time()
+        driver = self.scraper.driver
+        logger.info(f"Chargement de la page: {self.url}")
+        driver.get(self.url)
+        time.sleep(self.page_load_wait)
+        self.record_span('page_load', time.time() - start)
+
+        if scroll:
+            logger.info("Défilement pour charger toutes les annonces...")
+            scroll_start = time.time()
+            scrolls, reason = incremental_scroll(driver, max_scrolls=max_scrolls, stop=stop)
+            self.record_span('scroll', time.time() - scroll_start)
+            self.record_scroll(scrolls, reason, max_scrolls)
+            driver.execute_script("window.scrollTo(0, 0);")
+            time.sleep(1)
+
+        self.last_page_load_cost = time.time() - start
+        self.portal_loaded = True
+        self.cycle_stats['page_loads'] += 1
+        logger.debug(f"Session: portail chargé en {self.last_page_load_cost:.1f}s")
+        return True
+
+    def record_scroll(self, scrolls, reason, max_scrolls):
+        """Comptabilise les défilements d'un chargement de la liste (et ceux évités par un arrêt anticipé)"""
+        self.cycle_stats['scroll_steps'] += scrolls
+        self.last_scroll_complete = reason is None
+        if reason is None:
+            self.full_scroll_steps = scrolls
+            logger.debug(f"Session: liste chargée jusqu'en bas en {scrolls} défilement(s)")
+            return
+        full = self.full_scroll_steps if self.full_scroll_steps is not None else max_scrolls + 1
+        saved = max(0, full - scrolls)
+        self.cycle_stats['scroll_steps_saved'] += saved
+        logger.info(f"Défilement arrêté après {scrolls} défilement(s): {reason} (~{saved} évité(s))")
+
+    def prepare_discovery(self, stop=None):
+        """
+        Charge le portail au début d'un cycle pour la découverte des annonces.
+        Le navigateur déjà ouvert au cycle précédent est réutilisé.
+
+        Args:
+            stop: Condition d'arrêt anticipé du défilement (None = liste chargée jusqu'en bas)
+
+        Returns:
+            Driver Selenium prêt, ou None si le navigateur est indisponible
+        """
+        reused = self.is_alive()
+        if not self.load_portal(stop=stop):
+            return None
+        if reused:
+            self.cycle_stats['time_saved_s'] += self.last_driver_start_cost
+        return self.scraper.driver
+
+    def is_listing_visible(self, centris_id):
+        """
+        Vérifie (côté navigateur, sans transférer le HTML) que l'annonce est dans la liste
+        """
+        try:
+            return bool(self.scraper.driver.execute_script(
+                "return !!document.body && document.body.innerText.indexOf(arguments[0]) !== -1;",
+                str(centris_id)
+            ))
+        except Exception:
+            return False
+
+    def prepare_listing(self, centris_id):
+        """
+        Prépare le navigateur pour scraper une annonce : réutilise la page déjà
+        chargée si l'annonce y est visible, sinon recharge le portail.
+
+        Args:
+            centris_id: Numéro Centris de l'annonce
+
+        Returns:
+            CentrisScraperWithListInfo ou None si le navigateur est indisponible
+        """
+        start = time.time()
+        if not self.ensure_started():
+            return None
+
+        if not self.portal_loaded or not self.is_listing_visible(centris_id):
+            # Le navigateur vient d'être (re)démarré ou la liste n'est pas à jour
+            if not self.load_portal():
+                return None
+        else:
+            # Réutilisation : on économise le démarrage de Chrome et le chargement du portail
+            prep_cost = time.time() - start
+            saved = max(0.0, self.last_driver_start_cost + self.last_page_load_cost - prep_cost)
+            self.cycle_stats['listings_reused'] += 1
+            self.cycle_stats['time_saved_s'] += saved
+
+        return self.scraper
+
+    def scrape_listing(self, centris_id, min_date, skip_photos=False):
+        """
+        Scrape une annonce avec le navigateur de la session, sans rien écrire
+        sur disque : l'appelant décide quoi faire du résultat.
+
+        Args:
+            centris_id: Numéro Centris de l'annonce
+            min_date: Date minimale (YYYY-MM-DD); les annonces plus anciennes sont filtrées
+            skip_photos: Si True, ne pas extraire les URLs des photos
+
+        Returns:
+            tuple: (statut, données) où statut vaut 'ok', 'filtered', 'rejected' ou 'failed'
+        """
+        browser_ok = True
+        self.current_centris_id = centris_id
+        try:
+            # Réutiliser le navigateur de la session (portail déjà chargé si possible)
+            scraper = self.prepare_listing(centris_id)
+            if scraper is None:
+                browser_ok = False
+                logger.error(f"Navigateur indisponible pour l'annonce {centris_id}")
+                return 'failed', None
+
+            # ÉTAPE 1: Extraire d'abord les infos de la LISTE (rapide, pas de clic)
+            logger.info(f"Extraction rapide des infos liste pour Centris ID: {centris_id}")
+            times = {}
+            with stage_timer(times, 'list_parse'):
+                list_info = scraper.extract_info_from_list_by_centris_id(centris_id)
+            self.record_times(times)
+
+            # ÉTAPE 2: FILTRE DE DATE AVANT le scraping complet (économise le temps des photos)
+            date_envoi = list_info.get('date_envoi')
+            if date_envoi:
+                try:
+                    date_trop_ancienne = date_envoi < min_date
+                except Exception as e:
+                    logger.warning(f"Impossible de comparer la date: {e}")
+                    date_trop_ancienne = False
+
+                if date_trop_ancienne:
+                    logger.info(f"Annonce trop ancienne: {date_envoi} < {min_date} (filtré AVANT scraping détail)")
+                    logger.info(f"Annonce {centris_id} ignorée")
+                    return 'filtered', list_info
+                else:
+                    logger.info(f"Date valide: {date_envoi} >= {min_date} → scraping complet")
+            else:
+                logger.warning(f"Pas de date_envoi trouvée pour {centris_id}, scraping complet par précaution")
+
+            # ÉTAPE 3: Scraping complet (détails + photos) seulement si date OK
+            logger.info(f"Scraping complet par Centris ID: {centris_id}")
+            scraper.last_panel_ready_s = None
+            scraper.snapshot_stats = new_snapshot_stats()
+            closes_before = dict(scraper.panel_close_stats)
+            property_data = scraper.scrape_property_by_centris_id(centris_id, skip_photos=skip_photos, list_info=list_info)
+            self.record_panel_latency(centris_id, scraper.last_panel_ready_s)
+            self.record_panel_close(scraper.panel_close_stats, closes_before)
+            self.record_snapshot_stats(scraper.snapshot_stats)
+            self.record_times(scraper.stage_times)
+
+            # Vérifier que le numéro Centris correspond bien
+            if property_data:
+                scraped_centris = property_data.get('numero_centris')
+                if scraped_centris and scraped_centris != centris_id:
+                    logger.error(f"Numéro Centris ne correspond pas! Attendu: {centris_id}, Obtenu: {scraped_centris}")
+                    logger.error(f"Données rejetées pour éviter de mélanger les propriétés")
+                    return 'rejected', None
+                logger.debug(f"Numéro Centris vérifié: {scraped_centris}")
+                return 'ok', property_data
+
+            return 'failed', None
+
+        except Exception as e:
+            logger.error(f"Erreur scraping annonce {centris_id}: {e}", exc_info=True)
+            browser_ok = False
+            return 'failed', None
+        finally:
+            # Recycler le navigateur en cas d'erreur ou après N annonces
+            self.listing_done(success=browser_ok)
+            self.current_centris_id = None
+
+    def record_span(self, stage, seconds):
+        """Enregistre la durée d'une étape, rattachée à l'annonce en cours (None pendant la découverte)"""
+        self.spans.append((stage, round(seconds, 3), self.current_centris_id))
+
+    def record_times(self, times):
+        """Enregistre les durées relevées par cycle_metrics.stage_timer pour l'annonce en cours"""
+        for stage, seconds in times.items():
+            self.record_span(stage, seconds)
+
+    def take_spans(self):
+        """
+        Durées des étapes enregistrées depuis le dernier relevé (voir cycle_metrics.CycleMetrics.extend)
+
+        Returns:
+            list: (étape, secondes, numero_centris)
+        """
+        spans, self.spans = self.spans, []
+        return spans
+
+    def record_panel_latency(self, centris_id, latency):
+        """Enregistre la latence d'ouverture du panneau de détail pour une annonce"""
+        if latency is None:
+            return
+        self.cycle_stats['panel_waits'] += 1
+        self.cycle_stats['panel_ready_total_s'] += latency
+        self.cycle_stats['panel_ready_max_s'] = max(self.cycle_stats['panel_ready_max_s'], latency)
+        logger.info(f"Panneau de l'annonce {centris_id} prêt en {latency:.2f}s")
+
+    def record_panel_close(self, closes_after, closes_before):
+        """Comptabilise la fermeture du panneau (sur place, ou par rechargement de la page)"""
+        self.cycle_stats['panels_closed_in_page'] += closes_after['in_page'] - closes_before['in_page']
+        reloads = closes_after['reloads'] - closes_before['reloads']
+        self.cycle_stats['page_loads'] += reloads
+
+    def record_snapshot_stats(self, snapshot_stats):
+        """Cumule les transferts et analyses du HTML d'une annonce (voir page_snapshot)"""
+        if not snapshot_stats or not snapshot_stats['transfers']:
+            return
+        self.cycle_stats['snapshot_listings'] += 1
+        self.cycle_stats['page_transfers'] += snapshot_stats['transfers']
+        self.cycle_stats['page_parses'] += snapshot_stats['parses']
+        self.cycle_stats['page_parse_s'] += snapshot_stats['parse_s']
+
+    def listing_done(self, success=True):
+        """
+        Signale la fin du traitement d'une annonce. Recycle le navigateur
+        en cas d'erreur ou après `recycle_after` annonces.
+
+        Args:
+            success: False si le scraping a rencontré une erreur navigateur
+        """
+        self.listings_since_start += 1
+        if not success:
+            self.recycle("erreur pendant le scraping")
+        elif self.recycle_after and self.listings_since_start >= self.recycle_after:
+            self.recycle(f"{self.listings_since_start} annonces traitées")
+
+    def recycle(self, reason=""):
+        """Ferme le navigateur; il sera redémarré au prochain usage"""
+        logger.info(f"Session: recyclage du navigateur ({reason})")
+        self.close()
+        self.cycle_stats['recycles'] += 1
+
+    def begin_cycle(self):
+        """Réinitialise les compteurs au début d'un cycle de monitoring"""
+        self.cycle_stats = self._new_cycle_stats()
+        self.spans = []
+
+    def end_cycle(self):
+        """
+        Termine le cycle et journalise le temps économisé
+
+        Returns:
+            dict: Statistiques de la session pour le cycle
+        """
+        stats = dict(self.cycle_stats)
+        stats['time_saved_s'] = round(stats['time_saved_s'], 1)
+        stats['panel_ready_avg_s'] = round(stats['panel_ready_total_s'] / stats['panel_waits'], 2) if stats['panel_waits'] else 0.0
+        stats['panel_ready_total_s'] = round(stats['panel_ready_total_s'], 1)
+        stats['panel_ready_max_s'] = round(stats['panel_ready_max_s'], 2)
+        stats['page_parse_s'] = round(stats['page_parse_s'], 2)
+        logger.info(
+            f"Session: {stats['driver_starts']} démarrage(s) Chrome, {stats['page_loads']} chargement(s) du portail "
+            f"({stats['panels_closed_in_page']} panneau(x) fermé(s) sans rechargement), "
+            f"{stats['listings_reused']} annonce(s) sur navigateur réutilisé, ~{stats['time_saved_s']:.0f}s économisées"
+        )
+        if stats['panel_waits']:
+            logger.info(
+                f"Session: ouverture du panneau {stats['panel_ready_avg_s']:.2f}s en moyenne "
+                f"(max {stats['panel_ready_max_s']:.2f}s, {stats['panel_waits']} annonce(s))"
+            )
+        if stats['scroll_steps_saved']:
+            logger.info(
+                f"Session: {stats['scroll_steps']} défilement(s) de la liste, ~{stats['scroll_steps_saved']} évité(s) "
+                f"par l'arrêt anticipé (~{stats['scroll_steps_saved'] * 2}s)"
+            )
+        if stats['snapshot_listings']:
+            listings = stats['snapshot_listings']
+            logger.info(
+                f"Session: HTML par annonce {stats['page_transfers'] / listings:.1f} transfert(s), "
+                f"{stats['page_parses'] / listings:.1f} analyse(s), "
+                f"{stats['page_parse_s'] / listings:.2f}s d'analyse en moyenne"
+            )
+        return stats
+
+    def close(self):
+        """Ferme le navigateur"""
+        if self.scraper:
+            try:
+                self.scraper.close()
+            except Exception:
+                pass
+        self.scraper = None
+        self.portal_loaded = False
+        self.listings_since_start = 0
@@ -15,7 +15,7 @@ import sys
 import time
 
 try:
-    from config_api import MATRIX_URL, API_ENDPOINT, API_HEADERS, API_TIMEOUT
+    from config_api import MATRIX_URL, API_ENDPOINT, API_HEADERS, API_TIMEOUT, API_RETRIES, API_OUTBOX_FILE
 except ImportError:
     print("Erreur: config_api.py introuvable")
     sys.exit(1)
@@ -28,23 +28,7 @@ except ImportError:
 
 from bs4 import BeautifulSoup
 from scraper_with_list_info import CentrisScraperWithListInfo
-
-
-def _normalize_for_api(data):
-    """Convertit null en "" pour quartier, annee_construction, statut (exigence API)."""
-    for key in ("quartier", "annee_construction", "statut"):
-        if key in data and data[key] is None:
-            data[key] = ""
-        elif key in data and not isinstance(data[key], str):
-            data[key] = str(data[key]) if data[key] is not None else ""
-    if "_donnees_liste" in data and isinstance(data.get("_donnees_liste"), dict):
-        for key in ("quartier", "annee_construction", "statut"):
-            if key in data["_donnees_liste"] and data["_donnees_liste"][key] is None:
-                data["_donnees_liste"][key] = ""
-            elif key in data["_donnees_liste"] and not isinstance(data["_donnees_liste"][key], str):
-                val = data["_donnees_liste"][key]
-                data["_donnees_liste"][key] = str(val) if val is not None else ""
-    return data
+from api_client import ApiClient, ApiOutbox, is_configured, is_retryable, normalize_for_api
 
 
 def envoyer_une_annonce(centris_id=None, index_page=None):
@@ -135,22 +119,30 @@ def envoyer_une_annonce(centris_id=None, index_page=None):
         print()
 
         # Envoyer à l'API
-        if not API_ENDPOINT or API_ENDPOINT == "https://votre-api.com/api/properties":
+        if not is_configured(API_ENDPOINT):
             print("API non configurée dans config_api.py - pas d'envoi.")
             return
 
-        payload = dict(property_data)
-        if "_donnees_liste" in payload and isinstance(payload.get("_donnees_liste"), dict):
-            payload["_donnees_liste"] = dict(payload["_donnees_liste"])
-        payload = _normalize_for_api(payload)
+        payload = normalize_for_api(property_data)
 
         print(f"Envoi à l'API: {API_ENDPOINT}")
-        response = requests.post(API_ENDPOINT, json=payload, headers=API_HEADERS, timeout=API_TIMEOUT)
-        print(f"Réponse: {response.status_code}")
-        if response.status_code in (200, 201):
-            print("OK - Annonce envoyée avec succès.")
-        else:
-            print(f"Body: {response.text[:300]}")
+        client = ApiClient(API_ENDPOINT, headers=API_HEADERS, timeout=API_TIMEOUT, retries=API_RETRIES)
+        try:
+            response = client.post(payload)
+            print(f"Réponse: {response.status_code}")
+            if response.status_code in (200, 201):
+                print("OK - Annonce envoyée avec succès.")
+            else:
+                print(f"Body: {response.text[:300]}")
+                if is_retryable(response.status_code):
+                    ApiOutbox(API_OUTBOX_FILE, client).enqueue(property_data)
+                    print(f"Annonce ajoutée à la file d'envoi ({API_OUTBOX_FILE}) : le moniteur la renverra.")
+        except requests.exceptions.RequestException as e:
+            print(f"Erreur réseau: {e}")
+            ApiOutbox(API_OUTBOX_FILE, client).enqueue(property_data)
+            print(f"Annonce ajoutée à la file d'envoi ({API_OUTBOX_FILE}) : le moniteur la renverra.")
+        finally:
+            client.close()
         print("=" * 60)
 
     except Exception as e:
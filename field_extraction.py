@@ -0,0 +1,776 @@
+"""
+Moteur d'extraction déclaratif des champs d'une annonce Centris
+
+Chaque champ de sortie est décrit une seule fois (FieldSpec) : ses patterns
+compilés au chargement du module, son post-traitement et le message affiché.
+Un seul moteur (FieldExtractor) exécute ces tables pour les trois scrapers de
+détail (complet, fonctionnel, page) et mesure le coût de chaque champ.
+
+Avant les regex, un seul passage sur le texte en minuscules repère les mots-clés
+(ancres) des champs : un champ dont l'ancre est absente n'est pas évalué.
+Le texte du panneau peut être découpé une fois en sections (PanelSections) :
+chaque champ rattaché à une section n'est alors cherché que dans celle-ci.
+"""
+import re
+import time
+
+
+# Caractères pour lesquels re.IGNORECASE et str.lower() divergent (ı, İ, ſ, signe Kelvin, signe Angström) :
+# s'ils sont présents, le préfiltrage par ancres est désactivé pour rester exact
+_CASE_FOLD_EXCEPTIONS_RE = re.compile('[\u0131\u0130\u017f\u212a\u212b]')
+
+
+# Valeur retournée quand l'ancre d'un champ est absente (regex non évaluée)
+SKIPPED = object()
+
+
+def _clean_number(value):
+    """'18 000,' -> '18000' (espaces et virgules retirés)"""
+    return value.replace(' ', '').replace(',', '').strip()
+
+
+def _clean_price(value):
+    """'649 000 ' -> '649000' (espaces retirés)"""
+    return value.replace(' ', '').strip()
+
+
+def _strip(value):
+    return value.strip()
+
+
+class ExtractionContext:
+    """Texte à analyser, avec cache des recherches et version en minuscules (calculée une fois)"""
+
+    def __init__(self, text, prefilter=True):
+        self.text = text
+        self._lower = None
+        self._searches = {}
+        self.case_fold_safe = not _CASE_FOLD_EXCEPTIONS_RE.search(text)
+        self._prefilter = prefilter and self.case_fold_safe
+
+    @property
+    def lower(self):
+        if self._lower is None:
+            self._lower = self.text.lower()
+        return self._lower
+
+    def search(self, pattern):
+        """re.search mis en cache : un pattern partagé par plusieurs champs n'est exécuté qu'une fois"""
+        if pattern not in self._searches:
+            self._searches[pattern] = pattern.search(self.text)
+        return self._searches[pattern]
+
+    def may_contain(self, anchor, ignore_case):
+        """False seulement si l'ancre est certainement absente du texte"""
+        if anchor is None or not self._prefilter:
+            return True
+        if ignore_case:
+            return anchor.lower() in self.lower
+        return anchor in self.text
+
+
+class FieldSpec:
+    """
+    Description d'un champ de sortie
+
+    Args:
+        name: Clé de sortie (chemin pointé pour un sous-dictionnaire, ex: 'pieces.chambres')
+        log: Message affiché quand le champ est trouvé ('{}' = valeur) ou fonction valeur -> message
+        anchor: Mot obligatoirement présent dans toute correspondance (préfiltrage)
+        section: Section du panneau où chercher d'abord (voir PanelSections), None = texte complet
+    """
+
+    ignore_case = False
+
+    def __init__(self, name, log=None, anchor=None, section=None):
+        self.name = name
+        self.log = log
+        self.anchor = anchor
+        self.section = section
+
+    def evaluate(self, ctx):
+        """Retourne la valeur du champ, ou None s'il est absent"""
+        raise NotImplementedError
+
+    def evaluate_in_sections(self, sections):
+        """
+        Valeur du champ cherchée dans sa section, puis dans le texte hors remarques/addenda
+
+        Returns:
+            Valeur, None si absente, ou SKIPPED si l'ancre est absente partout
+        """
+        value = SKIPPED
+        for name in (self.section, STRUCTURED_TEXT):
+            ctx = sections.context(name)
+            if ctx is None or not ctx.may_contain(self.anchor, self.ignore_case):
+                continue
+            value = self.evaluate(ctx)
+            if value is not None:
+                return value
+        return value
+
+    def format_log(self, value):
+        if self.log is None:
+            return None
+        if callable(self.log):
+            return self.log(value)
+        return self.log.format(value)
+
+
+class RegexField(FieldSpec):
+    """
+    Champ extrait par regex : le premier pattern qui correspond l'emporte,
+    puis `post` transforme le groupe capturé (None = champ ignoré)
+    """
+
+    def __init__(self, name, patterns, flags=0, post=None, const=None, log=None, anchor=None, section=None):
+        super().__init__(name, log=log, anchor=anchor, section=section)
+        if isinstance(patterns, str):
+            patterns = [patterns]
+        self.patterns = [re.compile(pattern, flags) for pattern in patterns]
+        self.ignore_case = bool(flags & re.IGNORECASE)
+        self.post = post
+        self.const = const
+
+    def evaluate(self, ctx):
+        for pattern in self.patterns:
+            match = ctx.search(pattern)
+            if match:
+                if self.const is not None:
+                    return self.const
+                value = match.group(1)
+                return self.post(value) if self.post else value
+        return None
+
+
+class KeywordField(FieldSpec):
+    """Premier mot-clé présent dans le texte (sensible à la casse)"""
+
+    def __init__(self, name, keywords, log=None):
+        super().__init__(name, log=log)
+        self.keywords = keywords
+
+    def evaluate(self, ctx):
+        for keyword in self.keywords:
+            if keyword in ctx.text:
+                return keyword
+        return None
+
+
+class KeywordListField(FieldSpec):
+    """Liste de tous les mots-clés présents dans le texte (toujours une liste)"""
+
+    def __init__(self, name, keywords, ignore_case=False, log=None):
+        super().__init__(name, log=log)
+        self.keywords = keywords
+        self.ignore_case = ignore_case
+
+    def evaluate(self, ctx):
+        if self.ignore_case:
+            return [keyword for keyword in self.keywords if keyword.lower() in ctx.lower]
+        return [keyword for keyword in self.keywords if keyword in ctx.text]
+
+
+class ComputedField(FieldSpec):
+    """Champ calculé par une fonction texte -> valeur (logique trop riche pour une regex)"""
+
+    def __init__(self, name, func, log=None, section=None):
+        super().__init__(name, log=log, section=section)
+        self.func = func
+
+    def evaluate(self, ctx):
+        return self.func(ctx.text)
+
+
+class SectionBodyField(RegexField):
+    """
+    Contenu d'une section de texte libre (remarques, addenda)
+
+    Avec PanelSections, le contenu est lu directement entre le titre et la fin de la
+    section, bornes identiques à celles de la regex. Sans sections, la regex est utilisée.
+    """
+
+    def evaluate_in_sections(self, sections):
+        body = sections.body(self.section)
+        if body is None:
+            return None
+        return self.post(body) if self.post else body
+
+
+class FieldExtractor:
+    """
+    Exécute une table de FieldSpec sur un texte et mesure le coût de chaque champ
+    """
+
+    def __init__(self, specs, verbose=True):
+        """
+        Args:
+            specs: Liste de FieldSpec (évalués dans l'ordre)
+            verbose: Si True, affiche le message de chaque champ trouvé
+        """
+        self.specs = specs
+        self.verbose = verbose
+        self.costs = {}  # nom -> {'calls', 'hits', 'skipped', 'total_s'}
+        self.last_costs = {}
+
+    def extract(self, text, into, ctx=None, sections=None):
+        """
+        Remplit `into` avec les champs trouvés dans `text`
+
+        Args:
+            text: Texte de la page (ou d'une section)
+            into: Dictionnaire de sortie (structure et ordre des clés déjà définis)
+            ctx: ExtractionContext partagé avec d'autres tables sur le même texte
+            sections: PanelSections du même texte ; un champ rattaché à une section y est
+                      cherché d'abord, puis dans le texte hors remarques/addenda
+
+        Returns:
+            list: Noms des champs trouvés
+        """
+        ctx = ctx or (sections.context(FULL_TEXT) if sections else ExtractionContext(text))
+        found = []
+        self.last_costs = {}
+
+        for spec in self.specs:
+            stats = self.costs.setdefault(spec.name, {'calls': 0, 'hits': 0, 'skipped': 0, 'total_s': 0.0})
+            stats['calls'] += 1
+            start = time.perf_counter()
+            if sections is not None and spec.section:
+                value = spec.evaluate_in_sections(sections)
+            elif ctx.may_contain(spec.anchor, spec.ignore_case):
+                value = spec.evaluate(ctx)
+            else:
+                value = SKIPPED
+            if value is SKIPPED:
+                stats['skipped'] += 1
+                continue
+            elapsed = time.perf_counter() - start
+            stats['total_s'] += elapsed
+            self.last_costs[spec.name] = elapsed
+
+            if value is None:
+                continue
+            _assign(into, spec.name, value)
+            found.append(spec.name)
+            stats['hits'] += 1
+            if self.verbose:
+                message = spec.format_log(value)
+                if message:
+                    print(message)
+
+        return found
+
+    def cost_report(self, top=None):
+        """
+        Coût cumulé de chaque champ, du plus cher au moins cher
+
+        Returns:
+            list: Dictionnaires {'field', 'calls', 'hits', 'skipped', 'total_ms', 'avg_ms'}
+        """
+        report = []
+        for name, stats in self.costs.items():
+            evaluated = stats['calls'] - stats['skipped']
+            report.append({
+                'field': name,
+                'calls': stats['calls'],
+                'hits': stats['hits'],
+                'skipped': stats['skipped'],
+                'total_ms': round(stats['total_s'] * 1000, 3),
+                'avg_ms': round(stats['total_s'] * 1000 / evaluated, 3) if evaluated else 0.0
+            })
+        report.sort(key=lambda item: item['total_ms'], reverse=True)
+        return report[:top] if top else report
+
+    def reset_costs(self):
+        self.costs = {}
+        self.last_costs = {}
+
+
+def _assign(target, name, value):
+    """Affecte une valeur à un chemin pointé ('pieces.chambres')"""
+    *parents, key = name.split('.')
+    for parent in parents:
+        target = target[parent]
+    target[key] = value
+
+
+# ============================================================================
+# SECTIONS DU PANNEAU
+# ============================================================================
+
+FULL_TEXT = 'texte'
+STRUCTURED_TEXT = 'structure'
+
+# Titres des sections structurées (sensibles à la casse, comme affichés dans le panneau)
+_SECTION_HEADERS_RE = re.compile(
+    r"(?P<financier>Revenus\s+bruts\s+potentiels|Dépenses\s+d['’]exploitation)"
+    r"|(?P<caracteristiques>Caractéristiques)"
+    r"|(?P<inclusions>Inclusions?)"
+    r"|(?P<source>Source)"
+)
+
+# Sections de texte libre : mêmes bornes que les anciennes regex (insensibles à la casse)
+# nom -> (mot du titre, regex du titre, mots de fin)
+_FREE_TEXT_SECTIONS = {
+    'remarques': ('remarque', re.compile(r'Remarques?\s*', re.IGNORECASE), ('addenda', 'source')),
+    'addenda': ('addenda', re.compile(r'Addenda\s*', re.IGNORECASE), ('source',)),
+}
+
+
+class PanelSections:
+    """
+    Texte du panneau découpé une seule fois en sections nommées
+
+    Sections : financier (revenus et dépenses), caracteristiques, inclusions (avec les
+    exclusions), remarques, addenda et source. Une section va de son titre au titre
+    d'une autre section ; remarques et addenda s'arrêtent comme les anciennes regex
+    (au premier "Addenda"/"Source", sans tenir compte de la casse). Les titres écrits
+    dans les remarques et l'addenda ne découpent rien : ce sont du texte libre.
+
+    Les champs d'une section n'ont ainsi plus à parcourir les longs textes libres du
+    reste de la page, et le contenu des remarques et de l'addenda est lu directement.
+    """
+
+    def __init__(self, text):
+        self.text = text
+        self.spans = {}  # nom -> (début, fin)
+        self.bodies = {}  # section de texte libre -> (début du contenu, fin)
+        self._contexts = {}
+        full = self.context(FULL_TEXT)
+
+        for name, (word, header_re, end_words) in _FREE_TEXT_SECTIONS.items():
+            header = self._find_free_text_header(full, word, header_re)
+            if not header or header.end() >= len(text):
+                continue
+            # Le contenu fait au moins un caractère : la fin est cherchée après celui-ci
+            end = self._find_first(full, end_words, header.end() + 1)
+            self.spans[name] = (header.start(), end)
+            self.bodies[name] = (header.end(), end)
+
+        # Zone de texte libre (des remarques à la fin de l'addenda)
+        region = None
+        if self.bodies:
+            region = (min(self.spans[name][0] for name in self.bodies),
+                      max(self.spans[name][1] for name in self.bodies))
+
+        # Titres structurés cherchés hors texte libre, s'ils précèdent celui-ci (ordre du portail)
+        boundaries = [(start, name) for name, (start, _) in self.spans.items()]
+        if region:
+            headers = list(_SECTION_HEADERS_RE.finditer(text, 0, region[0]))
+            if any(match.lastgroup != 'source' for match in headers):
+                headers += _SECTION_HEADERS_RE.finditer(text, region[1])
+                self._free_text_region = region
+            else:
+                headers = list(_SECTION_HEADERS_RE.finditer(text))
+                self._free_text_region = None
+        else:
+            headers = list(_SECTION_HEADERS_RE.finditer(text))
+            self._free_text_region = None
+        boundaries += [(match.start(), match.lastgroup) for match in headers]
+        boundaries.sort()
+
+        for position, (start, name) in enumerate(boundaries):
+            if name in self.spans:
+                continue
+            end = next((pos for pos, other in boundaries[position + 1:] if other != name), len(text))
+            self.spans[name] = (start, end)
+
+    @staticmethod
+    def _find_free_text_header(full, word, header_re):
+        """Premier titre de texte libre (recherche dans le texte en minuscules si elle est exacte)"""
+        if not full.case_fold_safe:
+            return header_re.search(full.text)
+        position = full.lower.find(word)
+        return header_re.match(full.text, position) if position != -1 else None
+
+    @staticmethod
+    def _find_first(full, words, start):
+        """Position du premier des mots (sans tenir compte de la casse) à partir de start, ou fin du texte"""
+        if full.case_fold_safe:
+            positions = [full.lower.find(word, start) for word in words]
+            positions = [position for position in positions if position != -1]
+            return min(positions) if positions else len(full.text)
+        match = re.compile('|'.join(words), re.IGNORECASE).search(full.text, start)
+        return match.start() if match else len(full.text)
+
+    def get(self, name):
+        """Texte de la section (None si absente)"""
+        if name == FULL_TEXT:
+            return self.text
+        if name == STRUCTURED_TEXT:
+            if not self._free_text_region:
+                return self.text
+            start, end = self._free_text_region
+            return self.text[:start] + '\n' + self.text[end:]
+        span = self.spans.get(name)
+        return self.text[span[0]:span[1]] if span else None
+
+    def body(self, name):
+        """Contenu d'une section de texte libre, après son titre (None si absente)"""
+        span = self.bodies.get(name)
+        return self.text[span[0]:span[1]] if span else None
+
+    def context(self, name):
+        """ExtractionContext de la section (créé une fois), None si la section est absente"""
+        if name not in self._contexts:
+            text = self.get(name)
+            self._contexts[name] = ExtractionContext(text) if text is not None else None
+        return self._contexts[name]
+
+    def __contains__(self, name):
+        return name in self.spans
+
+
+# ============================================================================
+# PATTERNS COMMUNS
+# ============================================================================
+
+PATTERN_ANNEE = r'construit\s+en\s+(\d{4})'
+PATTERN_DATE_ENVOI = r"Date\s*d['']envoi\s*[:\-]?\s*(\d{4}-\d{2}-\d{2})"
+PATTERN_CENTRIS = r'(?:No|Numéro)\s*Centris\s*[:\-]?\s*(\d+)'
+PATTERN_EMAIL = r'([a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,})'
+PATTERN_TELEPHONE = r'(\d{3}[-.\s]?\d{3}[-.\s]?\d{4})'
+PATTERN_QUARTIER = r'(?:dans le quartier|quartier)\s+([A-Za-zÀ-ÿ\s\-\/]+?)(?:\s+construit|\s+\d{4}|$)'
+PATTERN_NB_PHOTOS = r'(?:Voir\s+toutes?\s+les?\s+)?photo[s]?\s*\((\d+)\)'
+PATTERN_VILLE_QUEBEC = r'Québec\s*\(([^)]+)\)'
+
+TYPES_PROPRIETE = ['Quintuplex', 'Quadruplex', 'Triplex', 'Duplex', 'Maison', 'Condominium', 'Autre']
+STATUTS = ['Nouvelle annonce', 'Nouveau prix']
+
+
+# ============================================================================
+# SCRAPER COMPLET (scraper_detail_complete.py)
+# ============================================================================
+
+COMPLETE_BASE_FIELDS = [
+    RegexField('prix', r'(\d[\d\s]+)\s*\$', post=_clean_price, log="[OK] Prix: {} $", anchor='$'),
+    RegexField('quartier', PATTERN_QUARTIER, re.IGNORECASE, post=_strip, log="[OK] Quartier: {}", anchor='quartier'),
+    KeywordField('type_propriete', TYPES_PROPRIETE, log="[OK] Type: {}"),
+    RegexField('annee_construction', PATTERN_ANNEE, re.IGNORECASE, log="[OK] Annee: {}", anchor='construit'),
+    RegexField('numero_centris', PATTERN_CENTRIS, re.IGNORECASE, log="[OK] Numero Centris: {}", anchor='Centris'),
+    RegexField('date_envoi', PATTERN_DATE_ENVOI, log="[OK] Date d'envoi: {}", anchor='envoi'),
+    KeywordField('statut', ['Nouvelle annonce'], log="[OK] Statut: {}"),
+    RegexField('superficie_terrain', r'([\d\s,]+)\s*pi²', post=_clean_number,
+               log="[OK] Superficie terrain: {} pi²", anchor='pi²'),
+    RegexField('nb_photos', r'photo[s]?\s*\((\d+)\)', re.IGNORECASE, post=int, log="[OK] Photos: {}", anchor='photo'),
+    RegexField('courtier_email', PATTERN_EMAIL, log="[OK] Email: {}", anchor='@'),
+    RegexField('courtier_telephone', PATTERN_TELEPHONE, log="[OK] Telephone: {}"),
+]
+
+REVENUS_BRUTS_FIELDS = [
+    RegexField('residentiel', r'Résidentiel\s*([\d\s,]+)\s*\$', re.IGNORECASE, post=_clean_number,
+               log="[OK] Revenus residentiel: {} $", anchor='Résidentiel', section='financier'),
+    RegexField('commercial', r'Commercial\s*([\d\s,]+)\s*\$', re.IGNORECASE, post=_clean_number,
+               log="[OK] Revenus commercial: {} $", anchor='Commercial', section='financier'),
+    RegexField('stationnements', r'Stationnements[/]Garages\s*([\d\s,]+)\s*\$', re.IGNORECASE, post=_clean_number,
+               log="[OK] Revenus stationnements: {} $", anchor='Stationnements/Garages', section='financier'),
+]
+
+REVENUS_FIELDS = [
+    RegexField('revenus_bruts_effectifs', r'Revenus?\s+bruts?\s+effectifs?\s*([\d\s,]+)\s*\$', re.IGNORECASE,
+               post=_clean_number, log="[OK] Revenus bruts effectifs: {} $", anchor='effectif', section='financier'),
+    RegexField('revenus_nets_exploitation', r"Revenus?\s+nets?\s+d['']exploitation\s*([\d\s,]+)\s*\$", re.IGNORECASE,
+               post=_clean_number, log="[OK] Revenus nets exploitation: {} $", anchor='exploitation', section='financier'),
+]
+
+DEPENSES_FIELDS = [
+    RegexField(key, pattern, re.IGNORECASE, post=_clean_number, anchor=anchor, section='financier')
+    for key, pattern, anchor in [
+        ('taxes_municipales', r'Taxes?\s+municipales?\s*\([\d]+\)\s*([\d\s,]+)\s*\$', 'municipale'),
+        ('taxe_scolaire', r'Taxe?\s+scolaires?\s*\([\d]+\)\s*([\d\s,]+)\s*\$', 'scolaire'),
+        ('taxes_secteur', r'Taxes?\s+secteur\s*([\d\s,]+)\s*\$', 'secteur'),
+        ('taxes_affaires', r"Taxes?\s+d['']affaires?\s*([\d\s,]+)\s*\$", 'affaire'),
+        ('taxes_eau', r"Taxes?\s+d['']eau\s*([\d\s,]+)\s*\$", 'eau'),
+        ('electricite', r'Énergie\s*-\s*Électricité\s*([\d\s,]+)\s*\$', 'Électricité'),
+        ('mazout', r'Énergie\s*-\s*Mazout\s*([\d\s,]+)\s*\$', 'Mazout'),
+        ('gaz', r'Énergie\s*-\s*Gaz\s*([\d\s,]+)\s*\$', 'Gaz'),
+        ('ascenseur', r'Ascenseur\(s\)\s*([\d\s,]+)\s*\$', 'Ascenseur(s)'),
+        ('assurances', r'Assurances?\s*([\d\s,]+)\s*\$', 'Assurance'),
+        ('cable', r'Câble\s*\(télé\)\s*([\d\s,]+)\s*\$', 'Câble'),
+        ('concierge', r'Concierge\s*([\d\s,]+)\s*\$', 'Concierge'),
+        ('contenant_sanitaire', r'Contenant\s+sanitaire\s*([\d\s,]+)\s*\$', 'sanitaire'),
+        ('deneigement', r'Déneigement\s*([\d\s,]+)\s*\$', 'Déneigement'),
+        ('entretien', r'Entretien\s*([\d\s,]+)\s*\$', 'Entretien'),
+        ('equipement_location', r'Équipement\s*\(location\)\s*([\d\s,]+)\s*\$', 'location)'),
+        ('frais_communs', r'Frais\s+communs?\s*([\d\s,]+)\s*\$', 'commun'),
+        ('gestion_administration', r'Gestion[/]Administration\s*([\d\s,]+)\s*\$', 'Gestion/Administration'),
+        ('ordures', r'Ordures?\s*([\d\s,]+)\s*\$', 'Ordure'),
+        ('pelouse', r'Pelouse\s*([\d\s,]+)\s*\$', 'Pelouse'),
+        ('publicite', r'Publicité\s*([\d\s,]+)\s*\$', 'Publicité'),
+        ('securite', r'Sécurité\s*([\d\s,]+)\s*\$', 'Sécurité'),
+        ('recuperation_depenses', r'Récupération\s+des\s+dépenses?\s*([\d\s,]+)\s*\$', 'Récupération'),
+    ]
+] + [
+    RegexField('total', r'Total\s*([\d\s,]+)\s*\$.*?Revenus\s+nets', re.IGNORECASE | re.DOTALL,
+               post=_clean_number, anchor='Total', section='financier'),
+]
+
+CARACTERISTIQUES_FIELDS = [
+    RegexField('systeme_egouts', r"Système\s+d['']égouts?\s*([A-Za-zÀ-ÿ\s]+?)(?:\n|Approv)", re.IGNORECASE,
+               post=_strip, anchor='égout', section='caracteristiques'),
+    RegexField('approv_eau', r'Approv\.?\s+eau\s*([A-Za-zÀ-ÿ\s]+?)(?:\n|Stationnement)', re.IGNORECASE,
+               post=_strip, anchor='Approv', section='caracteristiques'),
+    # [^\\n] : classe "ni antislash ni n" (comportement historique conservé)
+    RegexField('stationnement_detail', r'Stationnement\s*\(total\)\s*([^\\n]+)', re.IGNORECASE,
+               post=_strip, log="[OK] Stationnement: {}", anchor='(total)', section='caracteristiques'),
+    RegexField('chauffage', r'Chauffage\s*([A-Za-zÀ-ÿ\s]+?)(?:\n|Eau)', re.IGNORECASE,
+               post=_strip, anchor='Chauffage', section='caracteristiques'),
+]
+
+
+_ESPACES_RE = re.compile(r'\s+')
+_SPLIT_EXCLUSIONS_RE = re.compile(r'\s*Exclusions?')
+_SPLIT_REMARQUES_RE = re.compile(r'\s*Remarques?')
+
+
+def _inclusions_post(value):
+    inclusions = _ESPACES_RE.sub(' ', value.strip())
+    # Arrêter avant "Exclusions" si présent
+    inclusions = _SPLIT_EXCLUSIONS_RE.split(inclusions)[0].strip()
+    return inclusions if len(inclusions) > 3 else None
+
+
+def _exclusions_post(value):
+    exclusions = _ESPACES_RE.sub(' ', value.strip())
+    # Arrêter avant "Remarques" si présent
+    exclusions = _SPLIT_REMARQUES_RE.split(exclusions)[0].strip()
+    return exclusions if len(exclusions) > 3 else None
+
+
+def _collapse_spaces(value):
+    return _ESPACES_RE.sub(' ', value.strip())
+
+
+_SOURCE_AGENCE_RE = re.compile(r'Source[^A-ZÀ-Ÿ]*([A-ZÀ-Ÿ][A-Za-zÀ-ÿ0-9\s&\-\',/\.]+?Agence immobilière)', re.IGNORECASE)
+_SOURCE_LIBRE_RE = re.compile(r'Source[^A-ZÀ-Ÿ]*([A-ZÀ-Ÿ][A-Za-zÀ-ÿ0-9\s&\-\',/\.]+)', re.IGNORECASE)
+_SOURCE_STOP_WORDS_RE = re.compile(
+    r'(?:La présente|Inscription|Dernière|Le présent|mguimo|Erreur|Téléchargement|Données|Contact|Avis|Note|Voir)',
+    re.IGNORECASE
+)
+_PONCTUATION_FINALE_RE = re.compile(r'[\.,;:\s]+$')
+_SOURCE_RAY_HARVEY_RE = re.compile(r'(RAY HARVEY\s*&\s*ASSOCIÉS[^a-z]{0,30}Agence immobilière)', re.IGNORECASE)
+_SAUTS_RE = re.compile(r'[\n\r\t]+')
+
+
+def extract_source(text):
+    """
+    Agence source de l'annonce ("... Agence immobilière"), 150 caractères max
+
+    Returns:
+        str: Source nettoyée, ou None si introuvable
+    """
+    source = None
+
+    # Pattern principal: "Source" suivi d'un nom d'agence jusqu'à "Agence immobilière"
+    match = _SOURCE_AGENCE_RE.search(text)
+    if match:
+        source = _ESPACES_RE.sub(' ', match.group(1).strip())
+    else:
+        # Si pas trouvé avec "Agence immobilière", essayer sans (moins robuste)
+        match = _SOURCE_LIBRE_RE.search(text)
+        if match:
+            source = _ESPACES_RE.sub(' ', match.group(1).strip())
+            # Arrêter avant des mots indésirables (texte de la page qui n'est pas la source)
+            source = _SOURCE_STOP_WORDS_RE.split(source)[0].strip()
+            # Nettoyer les caractères de ponctuation en fin de texte
+            source = _PONCTUATION_FINALE_RE.sub('', source)
+
+    # Si pas trouvé ou trop court, chercher directement "RAY HARVEY"
+    if not source or len(source) < 10:
+        match = _SOURCE_RAY_HARVEY_RE.search(text)
+        if match:
+            source = _ESPACES_RE.sub(' ', match.group(1).strip())
+
+    if not source:
+        return None
+
+    # Nettoyer la source finale
+    source = _SAUTS_RE.sub(' ', source)
+    source = _ESPACES_RE.sub(' ', source)
+    source = source.strip()
+    # Limiter à 150 caractères max
+    if len(source) > 150:
+        source = source[:150].strip()
+    return source
+
+
+INCLUSIONS_FIELDS = [
+    RegexField('inclusions', r'Inclusions?\s*[:\-]?\s*([A-ZÀ-Ÿ][^\n]{5,200})', re.IGNORECASE,
+               post=_inclusions_post, log=lambda v: f"[OK] Inclusions: {v[:80]}...", anchor='Inclusion',
+               section='inclusions'),
+    RegexField('exclusions', r'Exclusions?\s*[:\-]?\s*([A-ZÀ-Ÿ][^\n]{5,200})', re.IGNORECASE,
+               post=_exclusions_post, log=lambda v: f"[OK] Exclusions: {v[:80]}...", anchor='Exclusion',
+               section='inclusions'),
+    # DOTALL '.+?' équivaut à l'ancien '(?:.|\n)+?' sans l'alternance évaluée à chaque caractère
+    SectionBodyField('remarques', r'Remarques?\s*(.+?)(?:Addenda|Source|$)', re.IGNORECASE | re.DOTALL,
+               post=_collapse_spaces, log=lambda v: f"[OK] Remarques: {v[:100]}...", anchor='Remarque',
+               section='remarques'),
+    SectionBodyField('addenda', r'Addenda\s*(.+?)(?:Source|$)', re.IGNORECASE | re.DOTALL,
+               post=_collapse_spaces, log=lambda v: f"[OK] Addenda: {v[:100]}...", anchor='Addenda',
+               section='addenda'),
+    ComputedField('source', extract_source, log="[OK] Source: {}", section='source'),
+]
+
+
+_UNIT_PATTERNS = [re.compile(r'(\d)\s*½\s*(\d+)'), re.compile(r'(\d)\s+½\s+(\d+)')]
+_UNIT_COMMERCIAL_RE = re.compile(r'Commercial\s*(\d+)')
+
+
+def extract_units(text):
+    """
+    Unités résidentielles ("3 ½" suivi du nombre) et commerciales
+
+    Returns:
+        dict: {'residentielles', 'commerciales', 'total_residentiel', 'total_commercial'}
+    """
+    units_data = {
+        'residentielles': [],
+        'commerciales': [],
+        'total_residentiel': 0,
+        'total_commercial': 0
+    }
+
+    for pattern in _UNIT_PATTERNS:
+        for match in pattern.findall(text):
+            nombre = match[1]
+            units_data['residentielles'].append({
+                'type': f"{match[0]} 1/2",
+                'nombre': nombre
+            })
+            units_data['total_residentiel'] += int(nombre)
+
+    match = _UNIT_COMMERCIAL_RE.search(text)
+    if match:
+        nombre = match.group(1)
+        units_data['commerciales'].append({
+            'type': 'Commercial',
+            'nombre': nombre
+        })
+        units_data['total_commercial'] = int(nombre)
+
+    return units_data
+
+
+# ============================================================================
+# SCRAPER FONCTIONNEL (scraper_detail_functional.py)
+# ============================================================================
+
+FUNCTIONAL_FIELDS = [
+    RegexField('prix', [r'(\d[\d\s]+)\s*\$\s*(?:\+\s*(?:TPS|TVQ|taxes))?', r'Prix[:\s]+(\d[\d\s]+)\s*\$'],
+               post=_clean_price, log="[OK] Prix: {} $", anchor='$'),
+    RegexField('adresse',
+               r'(\d+[A-Z]?(?:-\d+[A-Z]?)?\s+(?:Boul\.|Av\.|Rue|Ch\.|Route|Chemin)\s+[A-Za-zÀ-ÿ\'\-\s\.]+?)(?:\n|Québec)',
+               post=_strip, log="[OK] Adresse: {}"),
+    RegexField('arrondissement', PATTERN_VILLE_QUEBEC, post=_strip, log="[OK] Ville: Québec ({})", anchor='Québec'),
+    RegexField('ville', PATTERN_VILLE_QUEBEC, const='Québec', anchor='Québec'),
+    RegexField('quartier', PATTERN_QUARTIER, re.IGNORECASE, post=_strip, log="[OK] Quartier: {}", anchor='quartier'),
+    KeywordField('type_propriete', ['Quintuplex', 'Quadruplex', 'Triplex', 'Duplex', 'Maison', 'Condominium',
+                                    'Terrain', 'Autre'], log="[OK] Type: {}"),
+    RegexField('annee_construction', PATTERN_ANNEE, re.IGNORECASE, log="[OK] Année: {}", anchor='construit'),
+    RegexField('numero_centris', PATTERN_CENTRIS, re.IGNORECASE, log="[OK] Numéro Centris: {}", anchor='Centris'),
+    RegexField('date_envoi', PATTERN_DATE_ENVOI, log="[OK] Date d'envoi: {}", anchor='envoi'),
+    KeywordField('statut', STATUTS, log="[OK] Statut: {}"),
+    RegexField('chambres', [r'(\d+)\s+chambre[s]?(?:\s+à\s+coucher)?', r'Chambre[s]?\s*[:\-]\s*(\d+)'], re.IGNORECASE,
+               log="[OK] Chambres: {}", anchor='chambre'),
+    RegexField('salles_bain', [r'(\d+)\s+salle[s]?\s+de\s+bain[s]?', r'Salle[s]?\s+de\s+bain\s*[:\-]\s*(\d+)'],
+               re.IGNORECASE, log="[OK] Salles de bain: {}", anchor='bain'),
+    RegexField('salles_eau', r"(\d+)\s+salle[s]?\s+d['']eau", re.IGNORECASE, log="[OK] Salles d'eau: {}", anchor='eau'),
+    RegexField('stationnements', [r'(\d+)\s+stationnement[s]?', r'Stationnement[s]?\s*[:\-]\s*(\d+)'], re.IGNORECASE,
+               log="[OK] Stationnements: {}", anchor='stationnement'),
+    RegexField('superficie_habitable', [r'Superficie\s+habitable\s*[:\-]?\s*([\d\s,]+)\s*(?:pi²|m²)',
+                                        r'([\d\s,]+)\s*pi²(?:\s+habitable)?'], re.IGNORECASE,
+               post=_clean_number, log="[OK] Superficie: {} pi²"),
+    RegexField('superficie_terrain', [r'(?:Superficie|Terrain)\s*[:\-]?\s*([\d\s,]+)\s*(?:pi²|m²)',
+                                      r'Lot\s*[:\-]?\s*([\d\s,]+)\s*(?:pi²|m²)'], re.IGNORECASE,
+               post=_clean_number, log="[OK] Terrain: {} pi²"),
+    RegexField('nb_photos', PATTERN_NB_PHOTOS, re.IGNORECASE, post=int, log="[OK] Photos: {}", anchor='photo'),
+    RegexField('courtier_email', PATTERN_EMAIL, log="[OK] Email courtier: {}", anchor='@'),
+    RegexField('courtier_telephone', PATTERN_TELEPHONE, log="[OK] Téléphone: {}"),
+    KeywordListField('equipements', ['Garage', 'Stationnement', 'Piscine', 'Spa', 'Climatisation', 'Chauffage',
+                                     'Électroménagers', 'Cuisine', 'Sous-sol', 'Balcon', 'Terrasse', 'Cour',
+                                     'Foyer', 'Cheminée', 'Fenestration', 'Isolation'], ignore_case=True,
+                     log=lambda v: f"[OK] Équipements: {', '.join(v[:5])}..." if v else None),
+]
+
+
+# ============================================================================
+# SCRAPER PAGE DE DÉTAIL (scraper_detail_page.py)
+# ============================================================================
+
+DETAIL_PAGE_FIELDS = [
+    RegexField('prix', [r'(\d[\d\s,]+)\s*\$\s*(?:\+\s*TPS/TVQ)?', r'Prix\s*[:\-]\s*(\d[\d\s,]+)\s*\$'],
+               post=_strip, log="Prix: {}", anchor='$'),
+    RegexField('adresse', r'(\d+[A-Z]?(?:-\d+[A-Z]?)?\s+(?:Boul\.|Av\.|Rue|Ch\.|Route)\s+[A-Za-zÀ-ÿ\s\-\.]+)',
+               post=_strip, log="Adresse: {}"),
+    RegexField('numero_centris', r'No\s*Centris\s*[:\-]?\s*(\d+)', re.IGNORECASE, log="Numéro Centris: {}",
+               anchor='Centris'),
+    RegexField('date_envoi', PATTERN_DATE_ENVOI, log="Date d'envoi: {}", anchor='envoi'),
+    KeywordField('type_propriete', ['Quintuplex', 'Duplex', 'Triplex', 'Quadruplex', 'Autre', 'Maison',
+                                    'Condominium', 'Terrain'], log="Type: {}"),
+    RegexField('annee_construction', PATTERN_ANNEE, re.IGNORECASE, log="Année de construction: {}", anchor='construit'),
+    RegexField('ville', PATTERN_VILLE_QUEBEC, post=_strip, log="Ville/Arrondissement: {}", anchor='Québec'),
+    RegexField('quartier', r'dans\s+le\s+quartier\s+([^c]+?)(?:construit|$)', post=_strip, log="Quartier: {}",
+               anchor='quartier'),
+    KeywordField('statut', STATUTS),
+    RegexField('photos', PATTERN_NB_PHOTOS, re.IGNORECASE,
+               post=lambda v: [f"Photo {i+1}" for i in range(int(v))],
+               log=lambda v: f"Nombre de photos: {len(v)}", anchor='photo'),
+    RegexField('pieces.chambres', [r'(\d+)\s+chambre[s]?', r'Chambre[s]?\s*[:\-]\s*(\d+)'], re.IGNORECASE,
+               log="Chambres: {}", anchor='chambre'),
+    RegexField('pieces.salles_bain', [r'(\d+)\s+salle[s]?\s+de\s+bain[s]?', r'Salle[s]?\s+de\s+bain\s*[:\-]\s*(\d+)'],
+               re.IGNORECASE, log="Salles de bain: {}", anchor='bain'),
+    RegexField('dimensions.superficie', [r'Superficie\s*[:\-]?\s*([\d\s,]+)\s*(?:pi²|m²)', r'([\d\s,]+)\s*(?:pi²|m²)'],
+               post=_strip, log="Superficie: {}"),
+    RegexField('dimensions.terrain', [r'Terrain\s*[:\-]?\s*([\d\s,]+)\s*(?:pi²|m²)', r'Lot\s*[:\-]?\s*([\d\s,]+)\s*(?:pi²|m²)'],
+               post=_strip, log="Terrain: {}"),
+]
+
+# Après la description (extraite du HTML par le scraper)
+DETAIL_PAGE_CONTACT_FIELDS = [
+    RegexField('courtier.nom', [r'(?:Courtier|Agent)\s*[:\-]\s*([A-Za-zÀ-ÿ\s\-]+)', r'([A-Za-zÀ-ÿ\s]+)(?:\s+Courtier|\s+Agent)'],
+               post=_strip),
+    RegexField('courtier.email', PATTERN_EMAIL, anchor='@'),
+    RegexField('courtier.telephone', PATTERN_TELEPHONE),
+    KeywordListField('equipements', ['Garage', 'Stationnement', 'Piscine', 'Climatisation', 'Chauffage',
+                                     'Électroménagers', 'Cuisine', 'Sous-sol', 'Balcon', 'Terrasse'],
+                     log=lambda v: f"Équipements: {', '.join(v)}" if v else None),
+]
+
+
+# Moteurs partagés (un par table)
+complete_base_extractor = FieldExtractor(COMPLETE_BASE_FIELDS)
+revenus_bruts_extractor = FieldExtractor(REVENUS_BRUTS_FIELDS)
+revenus_extractor = FieldExtractor(REVENUS_FIELDS)
+depenses_extractor = FieldExtractor(DEPENSES_FIELDS)
+caracteristiques_extractor = FieldExtractor(CARACTERISTIQUES_FIELDS)
+inclusions_extractor = FieldExtractor(INCLUSIONS_FIELDS)
+functional_extractor = FieldExtractor(FUNCTIONAL_FIELDS)
+detail_page_extractor = FieldExtractor(DETAIL_PAGE_FIELDS)
+detail_page_contact_extractor = FieldExtractor(DETAIL_PAGE_CONTACT_FIELDS)
+
+ALL_EXTRACTORS = {
+    'complet': complete_base_extractor,
+    'revenus_bruts': revenus_bruts_extractor,
+    'revenus': revenus_extractor,
+    'depenses': depenses_extractor,
+    'caracteristiques': caracteristiques_extractor,
+    'inclusions': inclusions_extractor,
+    'fonctionnel': functional_extractor,
+    'page': detail_page_extractor,
+    'page_contact': detail_page_contact_extractor,
+}
+
+
+def field_cost_report(top=15):
+    """
+    Coût cumulé des champs de toutes les tables, du plus cher au moins cher
+
+    Returns:
+        list: Dictionnaires {'table', 'field', 'calls', 'hits', 'skipped', 'total_ms', 'avg_ms'}
+    """
+    report = []
+    for table, extractor in ALL_EXTRACTORS.items():
+        for item in extractor.cost_report():
+            report.append(dict(item, table=table))
+    report.sort(key=lambda item: item['total_ms'], reverse=True)
+    return report[:top] if top else report
@@ -0,0 +1,147 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Découverte des annonces du portail Matrix par simple requête HTTP (sans navigateur)
+
+La page de résultats est récupérée avec une session `requests` réutilisée d'un
+cycle à l'autre (connexions et cookies conservés). Les numéros Centris et les
+informations des cartes sont extraits du HTML. Si le résultat semble incomplet,
+l'appelant se rabat sur la découverte Selenium.
+"""
+
+import re
+import time
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from listing_index import find_property_containers, parse_list_card_text
+from logger_config import setup_logger
+
+logger = setup_logger('monitor', level='INFO')
+
+# Même pattern que la découverte Selenium (get_all_listing_ids)
+CENTRIS_ID_PATTERN = re.compile(r'No Centris\s*:\s*(\d+)')
+
+DEFAULT_HEADERS = {
+    'User-Agent': ('Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 '
+                   '(KHTML, like Gecko) Chrome/120.0 Safari/537.36'),
+    'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8',
+    'Accept-Language': 'fr-CA,fr;q=0.9,en;q=0.8',
+}
+
+
+class HttpDiscoveryResult:
+    """Résultat d'une découverte HTTP"""
+
+    def __init__(self, centris_ids=None, cards=None, complete=False, reason='', duration_s=0.0):
+        self.centris_ids = centris_ids or []
+        self.cards = cards or {}
+        self.complete = complete
+        self.reason = reason
+        self.duration_s = duration_s
+
+
+class HttpListingDiscovery:
+    """
+    Récupère les numéros Centris de la page de résultats Matrix par HTTP
+    """
+
+    def __init__(self, url, timeout=20, min_ratio=0.8, headers=None, retries=2):
+        """
+        Args:
+            url: URL de la page Matrix Centris
+            timeout: Délai max de la requête (secondes)
+            min_ratio: Fraction minimale du dernier nombre d'annonces vu par le navigateur
+                       en dessous de laquelle le résultat HTTP est jugé incomplet
+            headers: En-têtes HTTP supplémentaires
+            retries: Nombre de nouvelles tentatives sur erreur réseau / 5xx
+        """
+        self.url = url
+        self.timeout = timeout
+        self.min_ratio = min_ratio
+        # Nombre d'annonces de la dernière découverte complète par le navigateur (référence de
+        # complétude) ; tant qu'il n'est pas connu, aucun résultat HTTP n'est jugé complet
+        self.reference_count = None
+
+        self.http = requests.Session()
+        self.http.headers.update(DEFAULT_HEADERS)
+        if headers:
+            self.http.headers.update(headers)
+        retry = Retry(total=retries, backoff_factor=0.5, status_forcelist=[500, 502, 503, 504],
+                      allowed_methods=['GET'])
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=2, max_retries=retry)
+        self.http.mount('http://', adapter)
+        self.http.mount('https://', adapter)
+
+    def fetch(self):
+        """
+        Télécharge la page de résultats
+
+        Returns:
+            str: HTML de la page, ou None en cas d'erreur
+        """
+        try:
+            response = self.http.get(self.url, timeout=self.timeout)
+        except requests.exceptions.RequestException as e:
+            logger.warning(f"Découverte HTTP: erreur réseau: {e}")
+            return None
+        if response.status_code != 200:
+            logger.warning(f"Découverte HTTP: statut {response.status_code}")
+            return None
+        if not response.encoding or response.encoding.lower() == 'iso-8859-1':
+            response.encoding = response.apparent_encoding or 'utf-8'
+        return response.text
+
+    @staticmethod
+    def parse(html):
+        """
+        Extrait les numéros Centris et les informations des cartes
+
+        Returns:
+            tuple: (liste des numéros Centris dans l'ordre de la page, {numero: infos de la liste})
+        """
+        centris_ids = list(dict.fromkeys(CENTRIS_ID_PATTERN.findall(html)))
+        cards = {}
+        for container, cid in find_property_containers(html):
+            cards[cid] = parse_list_card_text(container.get_text())
+        return centris_ids, cards
+
+    def check_complete(self, centris_ids, cards):
+        """
+        Vérifie que le résultat HTTP ressemble à la liste complète vue par le navigateur
+
+        Returns:
+            tuple: (bool complet, raison si incomplet)
+        """
+        if not centris_ids:
+            return False, "aucun numéro Centris dans la page"
+        missing_cards = [cid for cid in centris_ids if cid not in cards]
+        if missing_cards:
+            return False, f"{len(missing_cards)} numéro(s) Centris sans carte d'annonce"
+        if not self.reference_count:
+            # Sans référence, rien ne distingue la liste complète du premier lot chargé par la page
+            return False, "aucune découverte complète par le navigateur comme référence"
+        if len(centris_ids) < self.reference_count * self.min_ratio:
+            return False, (f"{len(centris_ids)} annonce(s) contre {self.reference_count} "
+                           f"lors de la dernière découverte par le navigateur")
+        return True, ''
+
+    def discover(self):
+        """
+        Découverte complète : téléchargement, extraction et contrôle de complétude
+
+        Returns:
+            HttpDiscoveryResult
+        """
+        start = time.time()
+        html = self.fetch()
+        if html is None:
+            return HttpDiscoveryResult(reason="page indisponible", duration_s=time.time() - start)
+
+        centris_ids, cards = self.parse(html)
+        complete, reason = self.check_complete(centris_ids, cards)
+        return HttpDiscoveryResult(centris_ids, cards, complete, reason, time.time() - start)
+
+    def close(self):
+        """Ferme les connexions HTTP"""
+        self.http.close()
@@ -0,0 +1,497 @@
+"""
+Index des annonces de la liste Matrix, construit une seule fois par chargement de page
+
+Associe chaque numéro Centris à son conteneur, au texte de la carte, aux champs
+extraits de la liste et à l'adresse servant à retrouver le lien cliquable.
+Fournit aussi le défilement incrémental de la liste, arrêté dès que les cartes
+chargées ne contiennent plus rien à traiter.
+"""
+import hashlib
+import re
+import time
+from bisect import bisect_left
+from bs4 import BeautifulSoup, SoupStrainer
+from bs4.element import CData, NavigableString, Tag
+
+
+# Patterns d'adresse pour retrouver le lien cliquable (priorité: adresse complète type "1209-1213 1re Avenue")
+ADRESSE_CIBLE_PATTERNS = [
+    # Pattern pour "2020 27e Rue" (numero civique + ordinal + type de rue)
+    r'(\d+(?:-\d+[A-Z]*)?\s+\d+(?:e|er|re|ère)\s+(?:Boul\.|Boulevard|Av\.|Avenue|Rue|Ch\.|Chemin|Route)[A-Za-zÀ-ÿ\'\-\.\s]*)(?=\n|Québec|Lévis|$)',
+    # Pattern avec "1re"/"2e"/"1er" avant Avenue/Rue (ex: 1209-1213 1re Avenue)
+    r'(\d+(?:-\d+[A-Z]*)*\s+(?:(?:1re|2e|1er)\s+)?(?:Boul\.|Boulevard|Av\.|Avenue|Rue|Ch\.|Chemin|Route)\s+[A-Za-zÀ-ÿ\'\-\.\s]*?)(?=\n|Québec|Lévis|$)',
+    # Pattern standard (ex: 420 Boul. Pierre-Bertrand)
+    r'(\d+[A-Z]*(?:-\d+[A-Z]*)*\s+(?:Boul\.|Boulevard|Av\.|Avenue|Rue|Ch\.|Chemin|Route)\s+[A-Za-zÀ-ÿ\'\-\.\s]+?)(?=\n|Québec|Lévis|$)',
+]
+
+# Patterns d'adresse pour les données de la liste (les 3 ci-dessus + 2 formats de secours)
+ADRESSE_LISTE_PATTERNS = ADRESSE_CIBLE_PATTERNS + [
+    r'(\d+[A-Z]+-\d+[A-Z]+\s+(?:Boul\.|Av\.|Rue|Ch\.)\s+[^\n]+?)(?=\n)',
+    r'(\d+(?:-\d+)?\s+(?:Boul\.|Av\.|Rue|Ch\.)\s+[^\n]+?)(?=\n)',
+]
+
+# Champs d'une carte dont le changement justifie de rescraper une annonce déjà connue
+FINGERPRINT_FIELDS = ('prix', 'statut', 'date_envoi')
+
+# Champs d'une carte pris en compte dans l'empreinte de toute la liste (cycle ignoré si inchangée)
+PAGE_FINGERPRINT_FIELDS = ('prix', 'statut')
+
+TYPES_PROPRIETE = ['Quintuplex', 'Quadruplex', 'Triplex', 'Duplex', 'Maison', 'Condominium', 'Autre']
+
+_ADRESSE_CIBLE_RE = [re.compile(p, re.IGNORECASE | re.MULTILINE) for p in ADRESSE_CIBLE_PATTERNS]
+_ADRESSE_LISTE_RE = [re.compile(p, re.IGNORECASE | re.MULTILINE) for p in ADRESSE_LISTE_PATTERNS]
+_PRIX_RE = re.compile(r'([\d\s]+)\s*\$\s*(?:\+\s*(?:TPS|TVQ|taxes))?')
+_VILLE_RE = re.compile(r'(Québec|Lévis)\s*\(([^)]+)\)')
+_QUARTIER_RE = re.compile(r'(?:dans le quartier|quartier)\s+([A-Za-zÀ-ÿ\s\-\/]+?)\s+construit', re.IGNORECASE)
+_ANNEE_RE = re.compile(r'construit\s+en\s+(\d{4})', re.IGNORECASE)
+_CENTRIS_RE = re.compile(r'No\s*Centris\s*[:\-]?\s*(\d+)', re.IGNORECASE)
+_DATE_RE = re.compile(r"Date\s*d['']envoi\s*[:\-]?\s*(\d{4}-\d{2}-\d{2})")
+_ESPACES_RE = re.compile(r'\s+')
+_CENTRIS_LABEL_RE = re.compile(r'No\s*Centris', re.IGNORECASE)
+
+# Types de texte pris en compte par Tag.get_text() (commentaires, scripts et styles exclus)
+_TEXT_TYPES = (NavigableString, CData)
+
+# Signature de la liste calculée dans le navigateur : les numéros Centris visibles, dans l'ordre.
+# Seul ce court texte transite par WebDriver (pas le page_source complet).
+LIST_SIGNATURE_SCRIPT = """
+var text = document.body ? document.body.innerText : '';
+var found = text.match(/No\\s*Centris\\s*[:\\-]?\\s*\\d+/gi) || [];
+return found.length + ':' + found.join('|');
+"""
+
+
+def find_property_containers(html, max_levels=8):
+    """
+    Trouve tous les conteneurs d'annonces (cartes) d'une page de résultats, en une passe.
+
+    Même résultat que l'ancienne recherche (depuis chaque texte "No Centris", remonter
+    jusqu'à 8 parents et garder le premier dont le texte contient un prix "$" et
+    "No Centris"), mais sans appeler get_text() à chaque niveau : le texte de la page
+    est concaténé une seule fois et chaque balise ne retient que sa plage [début, fin)
+    dans ce texte. Le test sur un parent devient une recherche dichotomique.
+
+    Seul le <body> est analysé (parseur lxml), l'en-tête et ses scripts sont ignorés.
+
+    Args:
+        html: HTML de la page (driver.page_source)
+        max_levels: Nombre maximum de parents remontés depuis le texte "No Centris"
+
+    Returns:
+        list: Liste de tuples (container, centris_id) dans l'ordre de la page
+    """
+    soup = BeautifulSoup(html, 'lxml', parse_only=SoupStrainer('body'))
+    if not soup.contents:
+        # Fragment sans <body> : analyser tout le document
+        soup = BeautifulSoup(html, 'lxml')
+
+    # Une seule passe : texte concaténé, plage de chaque balise et textes "No Centris"
+    pieces = []
+    offset = 0
+    starts_at = {id(soup): 0}
+    spans = {}
+    label_nodes = []
+    stack = [(soup, iter(soup.contents))]
+    while stack:
+        tag, children = stack[-1]
+        child = next(children, None)
+        if child is None:
+            stack.pop()
+            spans[id(tag)] = (starts_at[id(tag)], offset)
+        elif isinstance(child, Tag):
+            starts_at[id(child)] = offset
+            stack.append((child, iter(child.contents)))
+        else:
+            if type(child) in _TEXT_TYPES:
+                pieces.append(child)
+                offset += len(child)
+            if _CENTRIS_LABEL_RE.search(child):
+                label_nodes.append(child)
+
+    page_text = ''.join(pieces)
+    dollar_positions = [i for i, char in enumerate(page_text) if char == '$']
+    label_positions = []
+    position = page_text.find('No Centris')
+    while position != -1:
+        label_positions.append(position)
+        position = page_text.find('No Centris', position + 1)
+    label_length = len('No Centris')
+
+    def has_in_span(positions, start, end, length):
+        i = bisect_left(positions, start)
+        return i < len(positions) and positions[i] + length <= end
+
+    results = []
+    seen_ids = set()
+
+    for text_node in label_nodes:
+        parent = text_node.parent
+        for _ in range(max_levels):
+            if parent is None:
+                break
+            span = spans.get(id(parent))
+            if span is None or parent.interesting_string_types != _TEXT_TYPES:
+                # <script>, <style>, <template> : get_text() ne suit pas les mêmes règles
+                parent_text = parent.get_text()
+                is_card = '$' in parent_text and 'No Centris' in parent_text
+            else:
+                start, end = span
+                is_card = (has_in_span(dollar_positions, start, end, 1)
+                           and has_in_span(label_positions, start, end, label_length))
+                parent_text = page_text[start:end] if is_card else None
+
+            # Vérifier : contient un prix ($) ET un numéro Centris
+            # Ne PAS filtrer par ville pour supporter Lévis, etc.
+            if is_card:
+                centris_match = _CENTRIS_RE.search(parent_text)
+                if centris_match:
+                    cid = centris_match.group(1)
+                    if cid not in seen_ids:
+                        seen_ids.add(cid)
+                        results.append((parent, cid))
+                break
+            parent = parent.parent
+
+    return results
+
+
+def empty_list_data():
+    """Structure vide des informations extraites de la liste"""
+    return {
+        'prix': None,
+        'adresse': None,
+        'ville': None,
+        'arrondissement': None,
+        'quartier': None,
+        'type_propriete': None,
+        'annee_construction': None,
+        'numero_centris': None,
+        'date_envoi': None,
+        'statut': None
+    }
+
+
+def parse_list_card_text(container_text):
+    """
+    Extrait les informations d'une carte de la liste à partir de son texte
+
+    Args:
+        container_text: Texte du conteneur de l'annonce
+
+    Returns:
+        dict: Informations de base (mêmes clés que empty_list_data())
+    """
+    list_data = empty_list_data()
+
+    prix_match = _PRIX_RE.search(container_text)
+    if prix_match:
+        list_data['prix'] = prix_match.group(1).replace(' ', '').strip()
+
+    for pattern in _ADRESSE_LISTE_RE:
+        match = pattern.search(container_text)
+        if match:
+            adresse = _ESPACES_RE.sub(' ', match.group(1).strip()).strip()
+            if len(adresse) > 5 and any(char.isdigit() for char in adresse):
+                list_data['adresse'] = adresse
+                break
+
+    # Ville et arrondissement - supporter Québec ET Lévis
+    ville_match = _VILLE_RE.search(container_text)
+    if ville_match:
+        list_data['ville'] = ville_match.group(1).strip()
+        list_data['arrondissement'] = ville_match.group(2).strip()
+
+    quartier_match = _QUARTIER_RE.search(container_text)
+    if quartier_match:
+        list_data['quartier'] = quartier_match.group(1).strip()
+
+    for type_prop in TYPES_PROPRIETE:
+        if type_prop in container_text:
+            list_data['type_propriete'] = type_prop
+            break
+
+    year_match = _ANNEE_RE.search(container_text)
+    if year_match:
+        list_data['annee_construction'] = year_match.group(1)
+
+    centris_match = _CENTRIS_RE.search(container_text)
+    if centris_match:
+        list_data['numero_centris'] = centris_match.group(1)
+
+    date_match = _DATE_RE.search(container_text)
+    if date_match:
+        list_data['date_envoi'] = date_match.group(1)
+
+    # Statut (badge)
+    if 'Nouvelle annonce' in container_text:
+        list_data['statut'] = 'Nouvelle annonce'
+    elif 'Nouveau prix' in container_text:
+        list_data['statut'] = 'Nouveau prix'
+
+    return list_data
+
+
+class ListingRecord:
+    """
+    Annonce découverte sur la page de résultats, avec les champs de sa carte
+    utiles au tri avant tout scraping (date d'envoi, prix, statut)
+    """
+
+    __slots__ = ('centris_id', 'date_envoi', 'prix', 'statut', 'card')
+
+    def __init__(self, centris_id, card=None):
+        """
+        Args:
+            centris_id: Numéro Centris
+            card: Informations de la carte (parse_list_card_text), None si la carte n'a pas été lue
+        """
+        self.card = card or {}
+        self.centris_id = centris_id
+        self.date_envoi = self.card.get('date_envoi')
+        self.prix = self.card.get('prix')
+        self.statut = self.card.get('statut')
+
+    def is_before(self, min_date):
+        """Vrai si la date d'envoi de la carte est antérieure à min_date (False si date inconnue)"""
+        return bool(min_date and self.date_envoi and self.date_envoi < min_date)
+
+    def __repr__(self):
+        return (f"ListingRecord({self.centris_id!r}, date_envoi={self.date_envoi!r}, "
+                f"prix={self.prix!r}, statut={self.statut!r})")
+
+
+def listing_records(centris_ids, cards):
+    """
+    Enregistrements des annonces de la page, dans l'ordre de centris_ids
+
+    Args:
+        centris_ids: Numéros Centris trouvés sur la page
+        cards: {numero_centris: informations de la carte}
+
+    Returns:
+        list: ListingRecord
+    """
+    return [ListingRecord(cid, cards.get(cid)) for cid in centris_ids]
+
+
+class DiscoveryStop:
+    """
+    Condition d'arrêt du défilement de la liste pendant la découverte
+
+    La liste est triée de l'annonce la plus récente à la plus ancienne : dès que
+    les `run` dernières cartes chargées sont toutes déjà scrapées ou antérieures
+    à min_date, rien de ce qui se trouve plus bas n'est à traiter.
+    """
+
+    def __init__(self, known_ids, min_date=None, run=20):
+        """
+        Args:
+            known_ids: Numéros déjà scrapés (ScrapedIdStore ou ensemble)
+            min_date: Date minimale des annonces (YYYY-MM-DD)
+            run: Nombre de cartes consécutives en fin de liste qui déclenchent l'arrêt
+        """
+        self.known_ids = known_ids
+        self.min_date = min_date
+        self.run = run
+
+    def settled(self, centris_id, card):
+        """Vrai si l'annonce n'a rien à scraper (déjà scrapée ou trop ancienne)"""
+        return centris_id in self.known_ids or ListingRecord(centris_id, card).is_before(self.min_date)
+
+    def check_cards(self, cards):
+        """
+        Args:
+            cards: Liste ordonnée de (numero_centris, informations de la carte) chargées jusqu'ici
+
+        Returns:
+            str: Raison de l'arrêt, ou None pour continuer à défiler
+        """
+        if self.run <= 0 or len(cards) < self.run:
+            return None
+        if all(self.settled(cid, card) for cid, card in cards[-self.run:]):
+            return (f"les {self.run} dernières annonces chargées sont déjà scrapées"
+                    + (f" ou antérieures au {self.min_date}" if self.min_date else ""))
+        return None
+
+    def __call__(self, page_source):
+        """Analyse le HTML de la page (voir incremental_scroll)"""
+        return self.check_cards([(cid, parse_list_card_text(container.get_text()))
+                                 for container, cid in find_property_containers(page_source)])
+
+
+def incremental_scroll(driver, max_scrolls=10, pause=2.0, stop=None):
+    """
+    Fait défiler la liste jusqu'en bas (hauteur stable ou max_scrolls atteint), ou
+    jusqu'à ce que stop(page_source) retourne une raison d'arrêt ; la condition est
+    vérifiée avant chaque défilement, sur les cartes déjà chargées.
+
+    Args:
+        driver: Driver Selenium sur la page de résultats
+        max_scrolls: Nombre maximum de défilements qui chargent de nouvelles annonces
+        pause: Attente après chaque défilement (secondes)
+        stop: Fonction (page_source) -> raison ou None (None = défilement complet)
+
+    Returns:
+        tuple: (nombre de défilements effectués, raison de l'arrêt anticipé ou None)
+    """
+    last_height = driver.execute_script("return document.body.scrollHeight")
+    scrolls = 0
+    loaded = 0
+    while loaded < max_scrolls:
+        if stop is not None:
+            reason = stop(driver.page_source)
+            if reason:
+                return scrolls, reason
+        driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
+        time.sleep(pause)
+        scrolls += 1
+        new_height = driver.execute_script("return document.body.scrollHeight")
+        if new_height == last_height:
+            break
+        last_height = new_height
+        loaded += 1
+    return scrolls, None
+
+
+def card_fingerprint(card):
+    """
+    Empreinte compacte des champs d'une carte (prix, statut, date d'envoi)
+
+    Args:
+        card: Informations de la carte (parse_list_card_text)
+
+    Returns:
+        str: 16 caractères hexadécimaux, ou None si la carte n'a pas de prix (carte mal lue)
+    """
+    if not card or not card.get('prix'):
+        return None
+    key = '|'.join(str(card.get(field) or '') for field in FINGERPRINT_FIELDS)
+    return hashlib.blake2b(key.encode('utf-8'), digest_size=8).hexdigest()
+
+
+def page_fingerprint(centris_ids, cards):
+    """
+    Empreinte de toute la liste : ensemble trié des (numéro Centris, prix, statut)
+
+    Ne dépend pas de l'ordre des annonces sur la page ; change dès qu'une annonce
+    apparaît, disparaît ou change de prix ou de statut.
+
+    Args:
+        centris_ids: Numéros Centris trouvés sur la page
+        cards: {numero_centris: informations de la carte}
+
+    Returns:
+        str: 32 caractères hexadécimaux
+    """
+    entries = sorted(
+        f"{cid}:" + '|'.join(str((cards.get(cid) or {}).get(field) or '') for field in PAGE_FINGERPRINT_FIELDS)
+        for cid in set(centris_ids)
+    )
+    return hashlib.blake2b('\n'.join(entries).encode('utf-8'), digest_size=16).hexdigest()
+
+
+def extract_target_address(container_text):
+    """
+    Extrait l'adresse qui sert à retrouver le lien cliquable de l'annonce
+
+    Returns:
+        str: Adresse normalisée, ou None si introuvable
+    """
+    for pattern in _ADRESSE_CIBLE_RE:
+        match = pattern.search(container_text)
+        if match:
+            return _ESPACES_RE.sub(' ', match.group(1).strip())
+    return None
+
+
+def _xpath_literal(value):
+    """Chaîne littérale XPath 1.0 (gère les apostrophes des noms de rue)"""
+    if '"' not in value:
+        return f'"{value}"'
+    if "'" not in value:
+        return f"'{value}'"
+    parts = value.split('"')
+    return 'concat(' + ', \'"\', '.join(f'"{part}"' for part in parts) + ')'
+
+
+def link_xpath_for_address(adresse):
+    """XPath du lien <a> dont le texte contient l'adresse"""
+    return f"//a[contains(normalize-space(.), {_xpath_literal(adresse)})]"
+
+
+class CentrisListingIndex:
+    """
+    Index des cartes de la liste, construit en une seule analyse du HTML
+    et réutilisé tant que la liste affichée ne change pas
+    """
+
+    def __init__(self, containers, signature=None):
+        """
+        Args:
+            containers: Liste de tuples (container, centris_id) dans l'ordre de la page
+            signature: Signature de la liste au moment de la construction
+        """
+        self.signature = signature
+        self.entries = []
+        self._by_id = {}
+
+        for position, (container, centris_id) in enumerate(containers):
+            text = container.get_text()
+            adresse_cible = extract_target_address(text)
+            entry = {
+                'centris_id': centris_id,
+                'index': position,
+                'container': container,
+                'text': text,
+                'list_data': parse_list_card_text(text),
+                'adresse_cible': adresse_cible,
+                'link_xpath': link_xpath_for_address(adresse_cible) if adresse_cible else None,
+            }
+            self.entries.append(entry)
+            self._by_id[centris_id] = entry
+
+    @staticmethod
+    def compute_signature(driver):
+        """Signature de la liste actuellement affichée (None si indisponible)"""
+        try:
+            return driver.execute_script(LIST_SIGNATURE_SCRIPT)
+        except Exception:
+            return None
+
+    @classmethod
+    def build(cls, scraper):
+        """
+        Construit l'index à partir de la page courante du scraper
+
+        Args:
+            scraper: Instance de CentrisScraperWithListInfo (driver déjà sur la liste)
+        """
+        signature = cls.compute_signature(scraper.driver)
+        return cls(scraper._find_property_containers(), signature)
+
+    def is_current(self, driver):
+        """True si la liste affichée n'a pas changé depuis la construction de l'index"""
+        if self.signature is None:
+            return False
+        return self.compute_signature(driver) == self.signature
+
+    def get(self, centris_id):
+        """Entrée de l'index pour un numéro Centris (None si absent)"""
+        return self._by_id.get(str(centris_id))
+
+    def at(self, position):
+        """Entrée de l'index à une position de la liste (None si hors limites)"""
+        if 0 <= position < len(self.entries):
+            return self.entries[position]
+        return None
+
+    @property
+    def centris_ids(self):
+        """Numéros Centris dans l'ordre de la page"""
+        return [entry['centris_id'] for entry in self.entries]
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __contains__(self, centris_id):
+        return str(centris_id) in self._by_id
@@ -0,0 +1,311 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Planification adaptative des cycles de monitoring
+
+Remplace l'attente fixe de MONITORING_INTERVAL après chaque cycle (la cadence
+dérive de la durée du cycle, et la page est consultée aussi souvent à 3 h
+qu'à 10 h) :
+
+- ArrivalRates : taux d'arrivée des nouvelles annonces pour chaque heure de la
+  semaine (jour x heure), appris dans le journal des cycles. Les annonces vues
+  par un cycle sont réparties sur l'intervalle écoulé depuis le cycle
+  précédent ; les taux peu observés sont ramenés vers celui de la même heure
+  tous jours confondus, puis vers le taux global.
+- AdaptiveScheduler : fréquence de chaque heure proportionnelle à la racine
+  carrée de son taux (à nombre de cycles égal, c'est la répartition qui
+  minimise le délai moyen de détection), bornée par min/max et arrondie à un
+  intervalle qui divise l'heure ou la journée, sans dépasser le nombre de
+  cycles par semaine de l'intervalle fixe. Les cycles sont alignés sur
+  l'horloge (multiples de l'intervalle depuis minuit), avec une gigue
+  aléatoire.
+- CycleLock : verrou de fichier exclusif ; un second processus ne lance pas de
+  cycle tant que le premier n'a pas terminé le sien.
+
+Usage (intervalles appris sur le journal des cycles):
+    python monitoring_scheduler.py
+"""
+
+import math
+import os
+import random
+from datetime import datetime, timedelta
+from logger_config import setup_logger
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+logger = setup_logger('monitor', level='INFO')
+
+HOURS_PER_WEEK = 7 * 24
+
+# Intervalles qui gardent les créneaux alignés d'une heure à l'autre (diviseurs de 60, multiples de 60 diviseurs de 1440)
+SLOT_MINUTES = (1, 2, 3, 4, 5, 6, 10, 12, 15, 20, 30, 60, 120, 180, 240, 360, 480, 720, 1440)
+JOURS = ('lun', 'mar', 'mer', 'jeu', 'ven', 'sam', 'dim')
+
+
+def week_hour(moment):
+    """Heure de la semaine (0 = lundi 0 h, 167 = dimanche 23 h)"""
+    return moment.weekday() * 24 + moment.hour
+
+
+class ArrivalRates:
+    """
+    Taux d'arrivée des nouvelles annonces (annonces/heure) par heure de la semaine
+    """
+
+    def __init__(self, prior_hours=4.0, max_gap_hours=12.0):
+        """
+        Args:
+            prior_hours: Poids (en heures observées) du taux de repli dans le lissage
+            max_gap_hours: Écart au-delà duquel deux cycles ne sont pas comparés
+                (arrêt du service : les annonces accumulées ne sont pas datables)
+        """
+        self.prior_hours = prior_hours
+        self.max_gap_hours = max_gap_hours
+        self.arrivals = [0.0] * HOURS_PER_WEEK
+        self.exposure = [0.0] * HOURS_PER_WEEK  # heures observées
+
+    def _spread(self, start, end, count):
+        """Répartit count annonces uniformément sur ]start, end], heure par heure"""
+        total_s = (end - start).total_seconds()
+        moment = start
+        while moment < end:
+            boundary = min(moment.replace(minute=0, second=0, microsecond=0) + timedelta(hours=1), end)
+            seconds = (boundary - moment).total_seconds()
+            slot = week_hour(moment)
+            self.exposure[slot] += seconds / 3600
+            self.arrivals[slot] += count * seconds / total_s
+            moment = boundary
+
+    def learn(self, entries):
+        """
+        Apprend les taux à partir des statistiques de cycle (CycleStatsLog.iter_entries, ordre chronologique)
+
+        Returns:
+            int: Nombre d'intervalles entre cycles pris en compte
+        """
+        previous = None
+        used = 0
+        for entry in entries:
+            moment = datetime.fromisoformat(entry['timestamp'])
+            if previous is not None and timedelta(0) < moment - previous <= timedelta(hours=self.max_gap_hours):
+                self._spread(previous, moment, entry.get('new_listings', 0) or 0)
+                used += 1
+            previous = moment
+        return used
+
+    def global_rate(self):
+        exposure = sum(self.exposure)
+        return sum(self.arrivals) / exposure if exposure else None
+
+    def rates(self):
+        """
+        Taux lissés des 168 heures de la semaine (None si aucun historique)
+        """
+        overall = self.global_rate()
+        if overall is None:
+            return None
+        by_hour = []
+        for hour in range(24):
+            arrivals = sum(self.arrivals[day * 24 + hour] for day in range(7))
+            exposure = sum(self.exposure[day * 24 + hour] for day in range(7))
+            by_hour.append((arrivals + self.prior_hours * overall) / (exposure + self.prior_hours))
+        return [(self.arrivals[slot] + self.prior_hours * by_hour[slot % 24]) / (self.exposure[slot] + self.prior_hours)
+                for slot in range(HOURS_PER_WEEK)]
+
+
+class AdaptiveScheduler:
+    """
+    Intervalle entre cycles adapté au taux d'arrivée de chaque heure, cycles alignés sur l'horloge
+    """
+
+    def __init__(self, base_minutes=60, min_minutes=None, max_minutes=None, jitter_s=60, adaptive=True,
+                 prior_hours=4.0, max_gap_hours=12.0):
+        """
+        Args:
+            base_minutes: Intervalle fixe de référence (MONITORING_INTERVAL) : fixe le nombre de cycles par semaine
+            min_minutes: Intervalle minimal (défaut : base_minutes)
+            max_minutes: Intervalle maximal (défaut : base_minutes)
+            jitter_s: Gigue maximale ajoutée au début de chaque créneau (secondes)
+            adaptive: False = intervalle fixe base_minutes (toujours aligné sur l'horloge)
+            prior_hours: Lissage des taux (voir ArrivalRates)
+            max_gap_hours: Écart maximal entre deux cycles comparés (voir ArrivalRates)
+        """
+        self.base_minutes = base_minutes
+        self.min_minutes = min(min_minutes or base_minutes, base_minutes)
+        self.max_minutes = max(max_minutes or base_minutes, base_minutes)
+        self.jitter_s = jitter_s
+        self.adaptive = adaptive
+        self.prior_hours = prior_hours
+        self.max_gap_hours = max_gap_hours
+        self.rates = None
+        self.intervals = [float(base_minutes)] * HOURS_PER_WEEK
+
+    def learn(self, entries):
+        """
+        Recalcule les intervalles à partir de l'historique des cycles
+
+        Returns:
+            list: Intervalle (minutes) de chacune des 168 heures de la semaine
+        """
+        model = ArrivalRates(self.prior_hours, self.max_gap_hours)
+        model.learn(entries)
+        self.rates = model.rates()
+        if not self.adaptive or not self.rates or not any(self.rates):
+            self.intervals = [float(self.base_minutes)] * HOURS_PER_WEEK
+        else:
+            self.intervals = self._allocate(self.rates)
+        return self.intervals
+
+    def _allocate(self, rates):
+        """
+        Fréquences proportionnelles à sqrt(taux), bornées et arrondies à SLOT_MINUTES,
+        de somme au plus égale à celle de l'intervalle fixe
+        """
+        choices = [m for m in SLOT_MINUTES if self.min_minutes <= m <= self.max_minutes] or [self.base_minutes]
+        roots = [math.sqrt(rate) for rate in rates]
+        budget = HOURS_PER_WEEK / self.base_minutes
+
+        def snap(frequency):
+            # Intervalle autorisé le plus proche (échelle logarithmique)
+            return min(choices, key=lambda m: abs(math.log(m * frequency)))
+
+        def intervals(scale):
+            return [snap(scale * root) if root else max(choices) for root in roots]
+
+        # Le nombre de cycles croît avec le facteur : plus grand facteur qui ne dépasse pas le budget
+        lower, upper = 0.0, 2 / (min(choices) * min(root for root in roots if root))
+        for _ in range(60):
+            middle = (lower + upper) / 2
+            if sum(1 / m for m in intervals(middle)) <= budget:
+                lower = middle
+            else:
+                upper = middle
+        return [float(m) for m in intervals(lower)]
+
+    def interval_for(self, moment):
+        """Intervalle (minutes) applicable à l'heure de moment"""
+        return self.intervals[week_hour(moment)]
+
+    def cycles_per_week(self):
+        """Nombre de cycles par semaine avec les intervalles actuels"""
+        return sum(60 / interval for interval in self.intervals)
+
+    def expected_delay_minutes(self, intervals=None):
+        """
+        Délai moyen de détection d'une nouvelle annonce (demi-intervalle pondéré par les taux)
+
+        Args:
+            intervals: Intervalles à évaluer (défaut : intervalles actuels)
+        """
+        intervals = intervals or self.intervals
+        if not self.rates or not sum(self.rates):
+            return intervals[0] / 2
+        return sum(rate * interval / 2 for rate, interval in zip(self.rates, intervals)) / sum(self.rates)
+
+    def next_run(self, now=None):
+        """
+        Début du prochain cycle : prochain créneau de l'horloge après now, plus une gigue
+
+        Les créneaux sont les multiples de l'intervalle de l'heure courante depuis minuit ;
+        un cycle plus long que l'intervalle fait passer les créneaux manqués sans rattrapage.
+        """
+        now = now or datetime.now()
+        interval_s = self.interval_for(now) * 60
+        midnight = now.replace(hour=0, minute=0, second=0, microsecond=0)
+        elapsed_s = (now - midnight).total_seconds()
+        slot = midnight + timedelta(seconds=(math.floor(elapsed_s / interval_s) + 1) * interval_s)
+        if slot <= now:  # arrondi quand now tombe exactement sur un créneau
+            slot += timedelta(seconds=interval_s)
+        jitter = random.uniform(0, min(self.jitter_s, interval_s / 4))
+        return slot + timedelta(seconds=jitter)
+
+    def summary(self):
+        """Résumé des intervalles appris (une ligne)"""
+        fixed_delay = self.expected_delay_minutes([float(self.base_minutes)] * HOURS_PER_WEEK)
+        return (f"intervalle {min(self.intervals):.0f}-{max(self.intervals):.0f} min, "
+                f"{self.cycles_per_week():.0f} cycles/semaine (fixe: {HOURS_PER_WEEK * 60 / self.base_minutes:.0f}), "
+                f"délai moyen de détection {self.expected_delay_minutes():.1f} min (fixe: {fixed_delay:.1f} min)")
+
+
+class CycleLock:
+    """
+    Verrou exclusif entre processus (fichier verrouillé par le système, libéré si le processus meurt)
+    """
+
+    def __init__(self, path='monitoring.lock'):
+        self.path = path
+        self._file = None
+
+    def acquire(self):
+        """
+        Tente de prendre le verrou sans attendre
+
+        Returns:
+            bool: True si le verrou est pris, False si un autre processus le détient
+        """
+        if self._file is not None:
+            return True
+        handle = open(self.path, 'a+')
+        try:
+            handle.seek(0)
+            if fcntl is not None:
+                fcntl.flock(handle.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+            else:
+                msvcrt.locking(handle.fileno(), msvcrt.LK_NBLCK, 1)
+        except OSError:
+            handle.close()
+            return False
+        handle.seek(0)
+        handle.truncate()
+        handle.write(f"{os.getpid()} {datetime.now().isoformat()}\n")
+        handle.flush()
+        self._file = handle
+        return True
+
+    def holder(self):
+        """Contenu du fichier de verrou (pid et heure de prise du verrou)"""
+        try:
+            with open(self.path, 'r') as f:
+                return f.read().strip()
+        except OSError:
+            return ''
+
+    def release(self):
+        if self._file is None:
+            return
+        try:
+            if fcntl is not None:
+                fcntl.flock(self._file.fileno(), fcntl.LOCK_UN)
+            else:
+                self._file.seek(0)
+                msvcrt.locking(self._file.fileno(), msvcrt.LK_UNLCK, 1)
+        finally:
+            self._file.close()
+            self._file = None
+
+    def __enter__(self):
+        return self.acquire()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.release()
+
+
+if __name__ == "__main__":
+    from cycle_stats_log import CycleStatsLog
+    try:
+        from config_api import (STATS_LOG_FILE, MONITORING_INTERVAL, MONITORING_INTERVAL_MIN,
+                                MONITORING_INTERVAL_MAX, SCHEDULER_HISTORY_DAYS)
+    except ImportError:
+        STATS_LOG_FILE, MONITORING_INTERVAL, MONITORING_INTERVAL_MIN = 'monitoring_stats.jsonl', 60, 15
+        MONITORING_INTERVAL_MAX, SCHEDULER_HISTORY_DAYS = 180, 28
+    scheduler = AdaptiveScheduler(MONITORING_INTERVAL, MONITORING_INTERVAL_MIN, MONITORING_INTERVAL_MAX)
+    scheduler.learn(CycleStatsLog(STATS_LOG_FILE).iter_entries(
+        since=datetime.now() - timedelta(days=SCHEDULER_HISTORY_DAYS)))
+    print(f"{STATS_LOG_FILE}: {scheduler.summary()}")
+    for day, name in enumerate(JOURS):
+        print(f"  {name} " + ' '.join(f"{scheduler.intervals[day * 24 + hour]:4.0f}" for hour in range(24)))
@@ -0,0 +1,94 @@
+"""
+Instantané d'un état du DOM : le HTML est transféré une seule fois depuis le
+navigateur (driver.page_source) et analysé au plus une fois (BeautifulSoup,
+parseur lxml), à la demande. Le même instantané sert à l'extraction des
+détails et à celle des photos.
+
+Les transferts et analyses sont comptés dans un dictionnaire de statistiques
+partagé (une annonce = un dictionnaire), pour mesurer le gain par annonce.
+"""
+import time
+from bs4 import BeautifulSoup
+
+
+def new_snapshot_stats():
+    """Compteurs d'une annonce (transferts du HTML, analyses, octets, durées)"""
+    return {
+        'transfers': 0,
+        'parses': 0,
+        'html_chars': 0,
+        'transfer_s': 0.0,
+        'parse_s': 0.0
+    }
+
+
+class PageSnapshot:
+    """
+    HTML d'un état du DOM, avec arbre BeautifulSoup et texte construits à la demande
+    """
+
+    def __init__(self, html, url=None, stats=None):
+        """
+        Args:
+            html: HTML de la page
+            url: URL de la page au moment de la capture
+            stats: Compteurs à incrémenter (voir new_snapshot_stats), None = aucun
+        """
+        self.html = html or ''
+        self.url = url
+        self.stats = stats
+        self._soup = None
+        self._text = None
+
+    @classmethod
+    def capture(cls, driver, stats=None):
+        """
+        Transfère le HTML courant du navigateur (un seul aller-retour WebDriver)
+
+        Returns:
+            PageSnapshot
+        """
+        start = time.perf_counter()
+        html = driver.page_source
+        url = driver.current_url
+        if stats is not None:
+            stats['transfers'] += 1
+            stats['html_chars'] += len(html or '')
+            stats['transfer_s'] += time.perf_counter() - start
+        return cls(html, url, stats)
+
+    @property
+    def soup(self):
+        """Arbre BeautifulSoup (lxml), construit au premier accès puis réutilisé"""
+        if self._soup is None:
+            start = time.perf_counter()
+            self._soup = BeautifulSoup(self.html, 'lxml')
+            if self.stats is not None:
+                self.stats['parses'] += 1
+                self.stats['parse_s'] += time.perf_counter() - start
+        return self._soup
+
+    @property
+    def text(self):
+        """Texte de la page (soup.get_text()), calculé une fois"""
+        if self._text is None:
+            self._text = self.soup.get_text()
+        return self._text
+
+    def img_sources(self, attributes=('src',)):
+        """
+        Valeurs des attributs des balises <img>, dans l'ordre du document
+
+        Args:
+            attributes: Attributs lus dans l'ordre ; le premier non vide l'emporte
+        """
+        sources = []
+        for img in self.soup.find_all('img'):
+            for attribute in attributes:
+                value = img.get(attribute)
+                if value:
+                    sources.append(value)
+                    break
+            else:
+                sources.append('')
+        return sources
@@ -0,0 +1,159 @@
+"""
+Détection de l'ouverture (et de la fermeture) du panneau de détail Centris, sans attente fixe
+
+Un MutationObserver installé dans la page juste avant le clic enregistre les
+modifications du DOM. Une petite sonde JavaScript, interrogée par WebDriverWait,
+déclare le panneau prêt dès que son contenu est présent et que le DOM est resté
+stable pendant `quiet_ms` millisecondes. Seul un petit dictionnaire transite par
+WebDriver (pas le page_source complet).
+
+Le texte comparé est le texte visible (innerText) : un panneau fermé mais
+simplement masqué dans le DOM n'est pas pris pour un panneau ouvert.
+"""
+import time
+from selenium.webdriver.support.ui import WebDriverWait
+from selenium.common.exceptions import TimeoutException
+
+
+# Titres de sections présents uniquement dans le panneau de détail
+PANEL_INDICATORS = [
+    'Caractéristiques du bâtiment',
+    'Dimensions des pièces',
+    'Revenus et dépenses',
+    'Addenda',
+    'Inclusions',
+]
+
+# Écart de longueur du texte de la page à partir duquel on considère que le panneau a été inséré
+MIN_CONTENT_DELTA = 200
+
+# Si seule l'URL a changé (aucun contenu nouveau), délai après lequel on accepte quand même
+# le panneau (équivalent de l'ancienne attente fixe de 3 s)
+URL_ONLY_READY_MS = 3000
+
+INSTALL_WATCH_SCRIPT = """
+var indicators = arguments[0];
+var previous = window.__centrisPanelWatch;
+if (previous && previous.observer) { previous.observer.disconnect(); }
+var watch = {mutations: 0, start: performance.now(), lastMutation: performance.now()};
+watch.observer = new MutationObserver(function (records) {
+    watch.mutations += records.length;
+    watch.lastMutation = performance.now();
+});
+watch.observer.observe(document.documentElement, {childList: true, subtree: true, characterData: true});
+window.__centrisPanelWatch = watch;
+var text = document.body ? document.body.innerText : '';
+return {
+    indicators: indicators.filter(function (indicator) { return text.indexOf(indicator) !== -1; }),
+    length: text.length
+};
+"""
+
+PROBE_SCRIPT = """
+var indicators = arguments[0], baseline = arguments[1], urlBefore = arguments[2];
+var quietMs = arguments[3], minDelta = arguments[4], urlOnlyMs = arguments[5];
+var text = document.body ? document.body.innerText : '';
+var href = window.location.href;
+var urlChanged = href.indexOf('#') !== -1 && href !== urlBefore;
+var newIndicator = indicators.some(function (indicator) {
+    return baseline.indicators.indexOf(indicator) === -1 && text.indexOf(indicator) !== -1;
+});
+var contentChanged = Math.abs(text.length - baseline.length) >= minDelta;
+var detected = newIndicator || (urlChanged && contentChanged);
+var watch = window.__centrisPanelWatch;
+if (!watch) {
+    // Page remplacée par une navigation complète : l'observateur a disparu
+    return {detected: detected || urlChanged, ready: (detected || urlChanged) && document.readyState === 'complete',
+            quiet: 0, mutations: 0};
+}
+var now = performance.now();
+var quiet = now - watch.lastMutation;
+var ready = (detected && watch.mutations > 0 && quiet >= quietMs)
+    || (urlChanged && now - watch.start >= urlOnlyMs && quiet >= quietMs);
+return {detected: detected || urlChanged, ready: ready, quiet: quiet, mutations: watch.mutations};
+"""
+
+STOP_WATCH_SCRIPT = """
+var watch = window.__centrisPanelWatch;
+if (watch && watch.observer) { watch.observer.disconnect(); }
+window.__centrisPanelWatch = null;
+"""
+
+# Bouton du panneau qui ramène à la liste ("Retour aux résultats")
+CLOSE_CONTROL_XPATH = (
+    "//*[self::a or self::button or self::span or self::div]"
+    "[contains(normalize-space(text()), 'Retour aux r')]"
+)
+
+# Liste de nouveau affichée : des numéros Centris visibles et plus aucun titre de section du panneau
+LIST_VISIBLE_SCRIPT = """
+var indicators = arguments[0];
+var text = document.body ? document.body.innerText : '';
+if (!/No\\s*Centris/i.test(text)) { return false; }
+return !indicators.some(function (indicator) { return text.indexOf(indicator) !== -1; });
+"""
+
+
+def start_panel_watch(driver, indicators=None):
+    """
+    Installe l'observateur de mutations juste avant le clic
+
+    Returns:
+        dict: État de référence de la page (indicateurs déjà présents, longueur du texte)
+    """
+    indicators = indicators or PANEL_INDICATORS
+    try:
+        return driver.execute_script(INSTALL_WATCH_SCRIPT, indicators)
+    except Exception:
+        return {'indicators': [], 'length': 0}
+
+
+def stop_panel_watch(driver):
+    """Retire l'observateur de mutations"""
+    try:
+        driver.execute_script(STOP_WATCH_SCRIPT)
+    except Exception:
+        pass
+
+
+def wait_for_panel(driver, url_before, baseline, timeout=15, quiet_ms=400, poll_frequency=0.1,
+                   indicators=None):
+    """
+    Attend que le panneau de détail soit ouvert et que son contenu soit stable
+
+    Args:
+        driver: Driver Selenium
+        url_before: URL de la page avant le clic
+        baseline: Résultat de start_panel_watch()
+        timeout: Délai maximum (secondes)
+        quiet_ms: Durée sans modification du DOM exigée avant de déclarer le panneau prêt
+        poll_frequency: Fréquence d'interrogation de la sonde (secondes)
+        indicators: Titres de sections du panneau (PANEL_INDICATORS par défaut)
+
+    Returns:
+        float: Latence mesurée (secondes) depuis l'appel, ou None si le panneau n'est pas prêt
+    """
+    indicators = indicators or PANEL_INDICATORS
+    start = time.time()
+
+    def probe(d):
+        try:
+            state = d.execute_script(PROBE_SCRIPT, indicators, baseline, url_before, quiet_ms,
+                                     MIN_CONTENT_DELTA, URL_ONLY_READY_MS)
+        except Exception:
+            return False
+        return state if state and state.get('ready') else False
+
+    try:
+        WebDriverWait(driver, timeout, poll_frequency=poll_frequency).until(probe)
+    except TimeoutException:
+        return None
+    return time.time() - start
+
+
+def is_list_visible(driver, indicators=None):
+    """True si la liste des résultats est affichée et qu'aucun panneau de détail n'est visible"""
+    try:
+        return bool(driver.execute_script(LIST_VISIBLE_SCRIPT, indicators or PANEL_INDICATORS))
+    except Exception:
+        return False
@@ -0,0 +1,200 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Résolution des photos haute résolution par simple requête HTTP (sans navigateur)
+
+Chaque lien de galerie publique centris.ca (.../photos?...&seq=N) est
+téléchargé avec une session `requests` partagée (connexions réutilisées),
+par un petit pool de threads. L'URL mspublic haute résolution est extraite
+du HTML. Les liens non résolus sont rendus à l'appelant, qui se rabat sur
+le navigateur pour ceux-là seulement.
+
+Une page de galerie contient aussi la liste ordonnée de toutes les photos
+(vignettes du carrousel) : extract_gallery_photo_urls la lit en une seule
+analyse, sans parcourir le carrousel photo par photo.
+"""
+
+import re
+import time
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+from concurrent.futures import ThreadPoolExecutor
+import requests
+from bs4 import BeautifulSoup, SoupStrainer
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from http_discovery import DEFAULT_HEADERS
+from logger_config import setup_logger
+
+logger = setup_logger('monitor', level='INFO')
+
+MSPUBLIC_MARKER = 'mspublic.centris.ca/media.ashx'
+
+# URLs mspublic présentes hors des balises <img> (scripts, attributs data-*)
+MSPUBLIC_URL_PATTERN = re.compile(r'https?://mspublic\.centris\.ca/media\.ashx\?[^"\'<>\s\\]+')
+
+# Seules les balises <img> sont construites lors de l'analyse
+IMG_ONLY = SoupStrainer('img')
+
+# Taille de la photo affichée par la galerie (img#fullImg), si la page n'en affiche aucune
+FULL_SIZE_URL = 'https://mspublic.centris.ca/media.ashx?id={id}&t=pi&sm=m&w=1260&h=1024'
+
+
+def is_high_res(src):
+    """Vrai pour une photo mspublic qui n'est pas une vignette (même règle que la galerie navigateur)"""
+    return (MSPUBLIC_MARKER in src
+            and 'w=100' not in src and 'h=75' not in src and 'w=50' not in src)
+
+
+def extract_high_res_url(html):
+    """
+    Extrait l'URL de la photo principale d'une page de galerie
+
+    La première balise <img> mspublic qui n'est pas une vignette l'emporte
+    (l'image affichée, img#fullImg). À défaut, la première URL haute
+    résolution présente ailleurs dans le HTML.
+
+    Returns:
+        str: URL de la photo, ou None
+    """
+    soup = BeautifulSoup(html, 'lxml', parse_only=IMG_ONLY)
+    for img in soup.find_all('img'):
+        src = img.get('src') or ''
+        if is_high_res(src):
+            return src
+
+    for url in MSPUBLIC_URL_PATTERN.findall(html):
+        url = url.replace('&amp;', '&')
+        if is_high_res(url):
+            return url
+    return None
+
+
+def _full_size_url(thumb_src, template):
+    """URL grande taille d'une vignette : paramètres de img#fullImg, identifiant de la vignette"""
+    photo_id = dict(parse_qsl(urlsplit(thumb_src).query)).get('id')
+    if not photo_id:
+        return None
+    if not template:
+        return FULL_SIZE_URL.format(id=photo_id)
+    parts = urlsplit(template)
+    query = [(key, photo_id if key == 'id' else value) for key, value in parse_qsl(parts.query)]
+    return urlunsplit(parts._replace(query=urlencode(query, safe='/')))
+
+
+def extract_gallery_photo_urls(soup):
+    """
+    Liste ordonnée de toutes les photos d'une page de galerie, lue dans les
+    vignettes du carrousel (une seule analyse de la page)
+
+    Chaque vignette (w=100&h=75) est convertie à la taille de img#fullImg ;
+    la vignette sélectionnée reprend l'URL affichée par img#fullImg.
+
+    Args:
+        soup: Arbre BeautifulSoup de la page de galerie
+
+    Returns:
+        list: URLs des photos haute résolution, [] si la page n'a pas de carrousel
+    """
+    full_img = soup.find('img', id='fullImg')
+    template = full_img.get('src') if full_img is not None else None
+    if template and not is_high_res(template):
+        template = None
+
+    thumbs = [li for li in soup.select('.carousel li') if li.find('img') is not None]
+    photo_urls = []
+    for li in thumbs:
+        src = li.find('img').get('src') or ''
+        if MSPUBLIC_MARKER not in src:
+            continue
+        if template and 'selected' in (li.get('class') or []):
+            url = template
+        else:
+            url = _full_size_url(src, template)
+        if url and url not in photo_urls:
+            photo_urls.append(url)
+    return photo_urls
+
+
+class GalleryPhotoResolver:
+    """
+    Résout les liens de galerie publique en URLs de photos, en parallèle et par HTTP
+    """
+
+    def __init__(self, max_workers=6, timeout=15, headers=None, retries=2):
+        """
+        Args:
+            max_workers: Nombre maximal de requêtes simultanées
+            timeout: Délai max d'une requête (secondes)
+            headers: En-têtes HTTP supplémentaires
+            retries: Nombre de nouvelles tentatives sur erreur réseau / 5xx
+        """
+        self.max_workers = max(1, max_workers)
+        self.timeout = timeout
+        # Compteurs cumulés (photos résolues par HTTP / laissées au navigateur)
+        self.stats = {'resolved': 0, 'unresolved': 0, 'duration_s': 0.0}
+
+        self.http = requests.Session()
+        self.http.headers.update(DEFAULT_HEADERS)
+        if headers:
+            self.http.headers.update(headers)
+        retry = Retry(total=retries, backoff_factor=0.5, status_forcelist=[500, 502, 503, 504],
+                      allowed_methods=['GET'])
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.max_workers, max_retries=retry)
+        self.http.mount('http://', adapter)
+        self.http.mount('https://', adapter)
+
+    def fetch(self, gallery_url):
+        """
+        Télécharge une page de galerie
+
+        Returns:
+            str: HTML de la page, ou None en cas d'erreur
+        """
+        try:
+            response = self.http.get(gallery_url, timeout=self.timeout)
+        except requests.exceptions.RequestException as e:
+            logger.warning(f"Galerie HTTP: erreur réseau pour {gallery_url}: {e}")
+            return None
+        if response.status_code != 200:
+            logger.warning(f"Galerie HTTP: statut {response.status_code} pour {gallery_url}")
+            return None
+        if not response.encoding or response.encoding.lower() == 'iso-8859-1':
+            response.encoding = response.apparent_encoding or 'utf-8'
+        return response.text
+
+    def resolve_one(self, gallery_url):
+        """
+        Returns:
+            str: URL de la photo haute résolution, ou None si non résolue
+        """
+        html = self.fetch(gallery_url)
+        if html is None:
+            return None
+        return extract_high_res_url(html)
+
+    def resolve(self, gallery_urls):
+        """
+        Résout tous les liens de galerie
+
+        Returns:
+            list: URL de photo (ou None) pour chaque lien, dans l'ordre des liens
+        """
+        if not gallery_urls:
+            return []
+        start = time.time()
+        workers = min(self.max_workers, len(gallery_urls))
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            # map conserve l'ordre des liens quel que soit l'ordre des réponses
+            results = list(pool.map(self.resolve_one, gallery_urls))
+
+        resolved = sum(1 for url in results if url)
+        self.stats['resolved'] += resolved
+        self.stats['unresolved'] += len(results) - resolved
+        self.stats['duration_s'] += time.time() - start
+        logger.info(f"Galerie HTTP: {resolved}/{len(results)} photo(s) résolue(s) "
+                    f"en {time.time() - start:.2f}s")
+        return results
+
+    def close(self):
+        """Ferme les connexions HTTP"""
+        self.http.close()
@@ -0,0 +1,253 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Base locale des annonces scrapées (SQLite)
+
+Remplace la lecture de milliers de fichiers property_*.json pour les scripts
+d'analyse : une ligne par annonce, clé = numéro Centris, index sur
+date_envoi, ville et type_propriete.
+
+- Les champs simples (prix, adresse, statut...) sont stockés en JSON lisible
+  et suffisent aux listes et aux filtres.
+- Les sections volumineuses (données financières, unités, photos, remarques...)
+  sont regroupées dans un bloc JSON compressé (zlib), décompressé seulement
+  quand l'annonce complète est demandée.
+- import_json_files importe les fichiers property_*.json existants (les
+  fichiers inchangés depuis le dernier import sont ignorés, et une annonce
+  plus récente que le fichier n'est jamais écrasée).
+"""
+
+import glob
+import json
+import os
+import re
+import sqlite3
+import time
+import zlib
+from contextlib import contextmanager
+from logger_config import setup_logger
+
+logger = setup_logger('monitor', level='INFO')
+
+# Colonnes indexées (filtres des scripts d'analyse)
+INDEXED_FIELDS = ('date_envoi', 'ville', 'type_propriete')
+
+# Texte au-delà duquel un champ est rangé dans le bloc compressé (caractères)
+SECTION_MIN_CHARS = 200
+
+# Fichiers d'annonce du répertoire de travail : property_<numéro Centris>.json
+PROPERTY_FILE_PATTERN = re.compile(r'property_(\d+)\.json$')
+
+
+def split_sections(property_data):
+    """
+    Sépare les champs simples des sections volumineuses
+
+    Returns:
+        tuple: (champs simples, sections) ; les sections sont remplacées par None
+        dans les champs simples pour conserver l'ordre des clés
+    """
+    core, sections = {}, {}
+    for key, value in property_data.items():
+        if isinstance(value, (dict, list)) or (isinstance(value, str) and len(value) > SECTION_MIN_CHARS):
+            core[key] = None
+            sections[key] = value
+        else:
+            core[key] = value
+    return core, sections
+
+
+def _dumps(data):
+    return json.dumps(data, ensure_ascii=False, separators=(',', ':'))
+
+
+class PropertyStore:
+    """
+    Annonces scrapées indexées par numéro Centris
+    """
+
+    def __init__(self, path='properties.db'):
+        """
+        Args:
+            path: Fichier SQLite de la base des annonces
+        """
+        self.path = path
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS properties ("
+                " centris_id TEXT PRIMARY KEY,"
+                " date_envoi TEXT,"
+                " ville TEXT,"
+                " type_propriete TEXT,"
+                " saved_at REAL NOT NULL,"
+                " core TEXT NOT NULL,"
+                " sections BLOB)"
+            )
+            for field in INDEXED_FIELDS:
+                conn.execute(f"CREATE INDEX IF NOT EXISTS properties_{field} ON properties ({field})")
+
+    @contextmanager
+    def _connect(self):
+        """Connexion courte, validée puis fermée"""
+        conn = sqlite3.connect(self.path, timeout=30)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    @staticmethod
+    def _row(property_data, saved_at):
+        core, sections = split_sections(property_data)
+        return (str(property_data['numero_centris']),
+                *(property_data.get(field) for field in INDEXED_FIELDS),
+                saved_at, _dumps(core),
+                zlib.compress(_dumps(sections).encode('utf-8')) if sections else None)
+
+    @staticmethod
+    def _load(core, sections):
+        data = json.loads(core)
+        if sections:
+            data.update(json.loads(zlib.decompress(sections).decode('utf-8')))
+        return data
+
+    def save(self, property_data, saved_at=None):
+        """
+        Enregistre (ou remplace) une annonce
+
+        Args:
+            property_data: Données de l'annonce (numero_centris obligatoire)
+            saved_at: Horodatage de l'enregistrement (défaut : maintenant)
+        """
+        self.save_many([property_data], saved_at)
+
+    def save_many(self, properties, saved_at=None):
+        """Enregistre plusieurs annonces dans une seule transaction"""
+        saved_at = saved_at or time.time()
+        with self._connect() as conn:
+            conn.executemany("INSERT OR REPLACE INTO properties VALUES (?, ?, ?, ?, ?, ?, ?)",
+                             [self._row(data, saved_at) for data in properties])
+
+    @staticmethod
+    def _where(ville=None, type_propriete=None, date_from=None, date_to=None, saved_before=None):
+        clauses, params = [], []
+        for clause, value in (("ville = ?", ville), ("type_propriete = ?", type_propriete),
+                              ("date_envoi >= ?", date_from), ("date_envoi <= ?", date_to),
+                              ("saved_at < ?", saved_before)):
+            if value is not None:
+                clauses.append(clause)
+                params.append(value)
+        return (" WHERE " + " AND ".join(clauses) if clauses else ""), params
+
+    def get(self, centris_id):
+        """Annonce complète, ou None si elle n'est pas dans la base"""
+        with self._connect() as conn:
+            row = conn.execute("SELECT core, sections FROM properties WHERE centris_id = ?",
+                               (str(centris_id),)).fetchone()
+        return self._load(*row) if row else None
+
+    def __contains__(self, centris_id):
+        with self._connect() as conn:
+            return conn.execute("SELECT 1 FROM properties WHERE centris_id = ?",
+                                (str(centris_id),)).fetchone() is not None
+
+    def count(self, **filters):
+        """Nombre d'annonces (filtres : ville, type_propriete, date_from, date_to, saved_before)"""
+        where, params = self._where(**filters)
+        with self._connect() as conn:
+            return conn.execute(f"SELECT COUNT(*) FROM properties{where}", params).fetchone()[0]
+
+    def saved_times(self):
+        """{numero_centris: horodatage de l'enregistrement}"""
+        with self._connect() as conn:
+            return dict(conn.execute("SELECT centris_id, saved_at FROM properties"))
+
+    def query(self, full=True, limit=None, latest_first=False, **filters):
+        """
+        Annonces correspondant aux filtres
+
+        Args:
+            full: True = annonces complètes, False = champs simples seulement (sans décompression)
+            limit: Nombre max d'annonces
+            latest_first: Annonces les plus récemment enregistrées en premier
+            **filters: ville, type_propriete, date_from, date_to (YYYY-MM-DD), saved_before
+
+        Returns:
+            list: Dictionnaires des annonces
+        """
+        where, params = self._where(**filters)
+        order = " ORDER BY saved_at DESC, centris_id" if latest_first else " ORDER BY centris_id"
+        if limit:
+            order += " LIMIT ?"
+            params.append(limit)
+        columns = "core, sections" if full else "core, NULL"
+        with self._connect() as conn:
+            rows = conn.execute(f"SELECT {columns} FROM properties{where}{order}", params).fetchall()
+        return [self._load(core, sections) for core, sections in rows]
+
+    def latest(self, count=5):
+        """Dernières annonces enregistrées (complètes)"""
+        return self.query(limit=count, latest_first=True)
+
+    def import_json_files(self, pattern='property_*.json'):
+        """
+        Importe les fichiers d'annonce existants
+
+        Chaque fichier est rangé sous le numero_centris qu'il contient (pas celui
+        de son nom). Pour un même numéro, seul le fichier modifié le plus
+        récemment est retenu, et il n'est importé que s'il est plus récent que
+        l'annonce déjà en base : une annonce enregistrée après la dernière
+        modification du fichier n'est jamais écrasée.
+
+        Returns:
+            dict: {'imported', 'unchanged', 'errors': [(fichier, erreur)],
+                   'duplicates': {numero_centris: [fichiers]}}
+        """
+        result = {'imported': 0, 'unchanged': 0, 'errors': [], 'duplicates': {}}
+        files_by_id = {}
+        newest = {}
+        for path in sorted(glob.glob(pattern)):
+            name_match = PROPERTY_FILE_PATTERN.search(os.path.basename(path))
+            if not name_match:
+                continue
+            try:
+                mtime = os.path.getmtime(path)
+                with open(path, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+                if not data.get('numero_centris'):
+                    raise ValueError("numero_centris manquant")
+            except Exception as e:
+                result['errors'].append((path, str(e)))
+                continue
+            centris_id = str(data['numero_centris'])
+            files_by_id.setdefault(centris_id, []).append(os.path.basename(path))
+            # À date égale, le fichier nommé d'après son numéro l'emporte
+            rank = (mtime, name_match.group(1) == centris_id)
+            if centris_id not in newest or rank > newest[centris_id][0]:
+                newest[centris_id] = (rank, data)
+
+        saved = self.saved_times()
+        batch = []
+        for centris_id, ((mtime, _), data) in newest.items():
+            if saved.get(centris_id, 0) >= mtime:
+                result['unchanged'] += 1
+            else:
+                batch.append(self._row(data, mtime))
+
+        columns = ('date_envoi', 'ville', 'type_propriete', 'saved_at', 'core', 'sections')
+        with self._connect() as conn:
+            before = conn.total_changes
+            # Garde-fou si l'annonce a été enregistrée entre-temps : la ligne la plus récente reste
+            conn.executemany(
+                "INSERT INTO properties VALUES (?, ?, ?, ?, ?, ?, ?)"
+                " ON CONFLICT(centris_id) DO UPDATE SET "
+                + ", ".join(f"{column} = excluded.{column}" for column in columns)
+                + " WHERE excluded.saved_at > properties.saved_at",
+                batch)
+            result['imported'] = conn.total_changes - before
+        result['unchanged'] += len(batch) - result['imported']
+        result['duplicates'] = {cid: files for cid, files in files_by_id.items() if len(files) > 1}
+        if result['imported']:
+            logger.info(f"{result['imported']} fichier(s) d'annonce importé(s) dans {self.path}")
+        return result
@@ -11,7 +11,7 @@ import sys
 import time
 
 try:
-    from config_api import API_ENDPOINT, API_HEADERS, API_TIMEOUT
+    from config_api import API_ENDPOINT, API_HEADERS, API_TIMEOUT, API_RETRIES
 except ImportError:
     print("Erreur: config_api.py introuvable")
     sys.exit(1)
@@ -22,25 +22,7 @@ except ImportError:
     print("Erreur: pip install requests")
     sys.exit(1)
 
-
-def _normalize_for_api(data):
-    """
-    L'API exige des chaînes pour quartier, annee_construction, statut.
-    Convertit null en "" pour éviter les erreurs 400.
-    """
-    for key in ("quartier", "annee_construction", "statut"):
-        if key in data and data[key] is None:
-            data[key] = ""
-        elif key in data and not isinstance(data[key], str):
-            data[key] = str(data[key]) if data[key] is not None else ""
-    if "_donnees_liste" in data and isinstance(data.get("_donnees_liste"), dict):
-        for key in ("quartier", "annee_construction", "statut"):
-            if key in data["_donnees_liste"] and data["_donnees_liste"][key] is None:
-                data["_donnees_liste"][key] = ""
-            elif key in data["_donnees_liste"] and not isinstance(data["_donnees_liste"][key], str):
-                val = data["_donnees_liste"][key]
-                data["_donnees_liste"][key] = str(val) if val is not None else ""
-    return data
+from api_client import ApiClient, normalize_for_api
 
 
 def renvoyer_annonce(numero_centris):
@@ -63,21 +45,16 @@ def renvoyer_annonce(numero_centris):
     time.sleep(5)
 
     # Normalisation pour l'API (quartier, annee_construction, statut en string, pas null)
-    payload = dict(data)
-    if "_donnees_liste" in payload and isinstance(payload.get("_donnees_liste"), dict):
-        payload["_donnees_liste"] = dict(payload["_donnees_liste"])
-    payload = _normalize_for_api(payload)
+    payload = normalize_for_api(data)
 
+    client = ApiClient(API_ENDPOINT, headers=API_HEADERS, timeout=API_TIMEOUT, retries=API_RETRIES)
     try:
-        response = requests.post(
-            API_ENDPOINT,
-            json=payload,
-            headers=API_HEADERS,
-            timeout=API_TIMEOUT,
-        )
+        response = client.post(payload)
     except Exception as e:
         print(f"Erreur requete: {e}")
         sys.exit(1)
+    finally:
+        client.close()
 
     print()
     print("=" * 60)
@@ -13,30 +13,32 @@ import sys
 import time
 
 try:
-    from config_api import MATRIX_URL, API_ENDPOINT, API_HEADERS, API_TIMEOUT
+    from config_api import MATRIX_URL, API_ENDPOINT, API_HEADERS, API_TIMEOUT, API_RETRIES, API_OUTBOX_FILE
 except ImportError:
     print("Erreur: config_api.py introuvable")
     sys.exit(1)
 
 from bs4 import BeautifulSoup
 from scraper_with_list_info import CentrisScraperWithListInfo
+from api_client import ApiClient, ApiOutbox, is_configured, is_retryable
 
 
-def _normalize_for_api(data):
-    """Convertit null en "" pour quartier, annee_construction, statut (exigence API)."""
-    for key in ("quartier", "annee_construction", "statut"):
-        if key in data and data[key] is None:
-            data[key] = ""
-        elif key in data and not isinstance(data[key], str):
-            data[key] = str(data[key]) if data[key] is not None else ""
-    if "_donnees_liste" in data and isinstance(data.get("_donnees_liste"), dict):
-        for key in ("quartier", "annee_construction", "statut"):
-            if key in data["_donnees_liste"] and data["_donnees_liste"][key] is None:
-                data["_donnees_liste"][key] = ""
-            elif key in data["_donnees_liste"] and not isinstance(data["_donnees_liste"][key], str):
-                val = data["_donnees_liste"][key]
-                data["_donnees_liste"][key] = str(val) if val is not None else ""
-    return data
+def _envoyer_api(property_data):
+    """Envoie l'annonce à l'API ; en cas d'échec temporaire, la dépose dans la file d'envoi du moniteur"""
+    client = ApiClient(API_ENDPOINT, headers=API_HEADERS, timeout=API_TIMEOUT, retries=API_RETRIES)
+    try:
+        ok, status, error = client.send(property_data)
+        if ok:
+            print(f"[OK] Envoyé à l'API (status {status})")
+        elif not is_retryable(status):
+            print(f"[WARNING] API a retourné {error}")
+        else:
+            ApiOutbox(API_OUTBOX_FILE, client).enqueue(property_data)
+            print(f"[WARNING] Envoi API en échec ({error}) - annonce ajoutée à la file d'envoi ({API_OUTBOX_FILE})")
+    except Exception as e:
+        print(f"[ERREUR] Envoi API: {e}")
+    finally:
+        client.close()
 
 
 def rescrape_annonce(centris_id, envoyer_api=False):
@@ -120,20 +122,8 @@ def rescrape_annonce(centris_id, envoyer_api=False):
         print(f"Fichier sauvegardé: {filename}")
 
         # Envoyer à l'API si demandé
-        if envoyer_api and has_detail and API_ENDPOINT and API_ENDPOINT != "https://votre-api.com/api/properties":
-            try:
-                import requests
-                payload = dict(property_data)
-                if "_donnees_liste" in payload and isinstance(payload.get("_donnees_liste"), dict):
-                    payload["_donnees_liste"] = dict(payload["_donnees_liste"])
-                payload = _normalize_for_api(payload)
-                response = requests.post(API_ENDPOINT, json=payload, headers=API_HEADERS, timeout=API_TIMEOUT)
-                if response.status_code in (200, 201):
-                    print(f"[OK] Envoyé à l'API (status {response.status_code})")
-                else:
-                    print(f"[WARNING] API a retourné {response.status_code}: {response.text[:200]}")
-            except Exception as e:
-                print(f"[ERREUR] Envoi API: {e}")
+        if envoyer_api and has_detail and is_configured(API_ENDPOINT):
+            _envoyer_api(property_data)
         elif envoyer_api and not has_detail:
             print("[INFO] Non envoyé à l'API (détails manquants)")
 
@@ -2,7 +2,8 @@
 # -*- coding: utf-8 -*-
 """
 Réinitialise le scraping : supprime tous les property_*.json et vide la liste
-des annonces déjà scrapées (scraped_properties.json) pour relancer de zéro.
+des annonces déjà scrapées (scraped_ids.db et scraped_properties.json) ainsi
+que la file de scraping (scrape_queue.db) pour relancer de zéro.
 
 Usage: python reset_scraping.py
 """
@@ -11,6 +12,15 @@ import json
 import os
 import glob
 
+from scraped_id_store import ScrapedIdStore
+from scrape_queue import ScrapeQueue
+
+try:
+    from config_api import SCRAPED_IDS_DB, SCRAPE_QUEUE_DB
+except ImportError:
+    SCRAPED_IDS_DB = 'scraped_ids.db'
+    SCRAPE_QUEUE_DB = 'scrape_queue.db'
+
 # Dossier du projet (où se trouve le script)
 SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
 os.chdir(SCRIPT_DIR)
@@ -39,6 +49,22 @@ def main():
         print(f"\nErreur écriture {storage_file}: {e}")
         return
     
+    # 3. Vider la base des IDs scrapés (l'ancien JSON n'y est pas réimporté)
+    try:
+        ScrapedIdStore(SCRAPED_IDS_DB).clear()
+        print(f"{SCRAPED_IDS_DB} réinitialisé (base vide).")
+    except Exception as e:
+        print(f"\nErreur réinitialisation {SCRAPED_IDS_DB}: {e}")
+        return
+    
+    # 4. Vider la file de scraping (essais en cours et rejets)
+    try:
+        ScrapeQueue(SCRAPE_QUEUE_DB).clear()
+        print(f"{SCRAPE_QUEUE_DB} réinitialisé (file vide).")
+    except Exception as e:
+        print(f"\nErreur réinitialisation {SCRAPE_QUEUE_DB}: {e}")
+        return
+    
     print("\n" + "=" * 60)
     print("RÉINITIALISATION TERMINÉE - Vous pouvez relancer le scraping.")
     print("=" * 60)
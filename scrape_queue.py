@@ -0,0 +1,262 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+File persistante des annonces à scraper (SQLite), par priorité
+
+Les annonces nouvelles ou modifiées découvertes sur la page sont déposées dans
+la file ; chaque cycle prend les plus intéressantes d'abord (MAX_LISTINGS_PER_CYCLE
+s'applique à cet ordre et non plus à l'ordre de la page) :
+
+- priorité = date d'envoi de la carte (annonce la plus récente d'abord), plus
+  un bonus de statut : « Nouvelle annonce » vaut un jour de plus, « Nouveau
+  prix » une demi-journée ;
+- une annonce en échec (panneau jamais ouvert, Chrome instable) attend avant
+  le prochain essai, délai doublé à chaque échec ;
+- après max_attempts échecs, l'annonce passe dans les rejets (dead letters) :
+  elle n'est plus proposée mais reste dans la base pour analyse, et peut être
+  remise dans la file à la main.
+
+Usage:
+    python scrape_queue.py                 (file et rejets)
+    python scrape_queue.py --retry 12345678 (remet un rejet dans la file)
+"""
+
+import sqlite3
+import sys
+import time
+from contextlib import contextmanager
+from datetime import date
+from logger_config import setup_logger
+
+logger = setup_logger('monitor', level='INFO')
+
+# Bonus de priorité (en jours d'ancienneté) selon le badge de la carte
+STATUS_BONUS = {'Nouvelle annonce': 1.0, 'Nouveau prix': 0.5}
+
+
+def job_priority(card):
+    """
+    Priorité d'une annonce d'après sa carte dans la liste (plus grand = scrapée en premier)
+
+    Args:
+        card: Informations de la carte (parse_list_card_text), None si inconnue
+    """
+    card = card or {}
+    try:
+        days = date.fromisoformat(card.get('date_envoi') or '').toordinal()
+    except ValueError:
+        # Date illisible : derrière toutes les annonces datées
+        days = 0
+    return days + STATUS_BONUS.get(card.get('statut'), 0.0)
+
+
+class ScrapeQueue:
+    """
+    File des annonces à scraper, avec nouvelles tentatives espacées et rejets
+    """
+
+    def __init__(self, path, max_attempts=5, base_delay=1800, max_delay=6 * 3600):
+        """
+        Args:
+            path: Fichier SQLite de la file
+            max_attempts: Nombre d'échecs avant le passage dans les rejets
+            base_delay: Délai avant le 2e essai, doublé à chaque échec (secondes)
+            max_delay: Délai max avant un nouvel essai (secondes)
+        """
+        self.path = path
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS jobs ("
+                " centris_id TEXT PRIMARY KEY,"
+                " priority REAL NOT NULL,"
+                " reason TEXT,"
+                " date_envoi TEXT,"
+                " statut TEXT,"
+                " enqueued_at REAL NOT NULL,"
+                " attempts INTEGER NOT NULL DEFAULT 0,"
+                " next_attempt_at REAL NOT NULL,"
+                " last_error TEXT,"
+                " dead INTEGER NOT NULL DEFAULT 0)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS jobs_ready ON jobs (dead, priority)")
+
+    @contextmanager
+    def _connect(self):
+        """Connexion courte, validée puis fermée"""
+        conn = sqlite3.connect(self.path, timeout=30)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def push_many(self, jobs, now=None):
+        """
+        Dépose des annonces dans la file (une transaction). Une annonce déjà présente garde
+        ses essais ; sa priorité suit sa carte actuelle. Un rejet reste un rejet.
+
+        Args:
+            jobs: Itérable de (numero_centris, carte, raison) ; raison = 'new' ou 'changed'
+
+        Returns:
+            list: Numéros qui n'étaient pas encore dans la file
+        """
+        now = now or time.time()
+        rows = [(str(cid), job_priority(card), reason, (card or {}).get('date_envoi'), (card or {}).get('statut'),
+                 now, now) for cid, card, reason in jobs]
+        if not rows:
+            return []
+        with self._connect() as conn:
+            known = {row[0] for row in conn.execute("SELECT centris_id FROM jobs")}
+            conn.executemany(
+                "INSERT INTO jobs (centris_id, priority, reason, date_envoi, statut, enqueued_at, next_attempt_at)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?)"
+                " ON CONFLICT(centris_id) DO UPDATE SET priority = excluded.priority, reason = excluded.reason,"
+                " date_envoi = excluded.date_envoi, statut = excluded.statut",
+                rows
+            )
+        return [row[0] for row in rows if row[0] not in known]
+
+    def push(self, centris_id, card=None, reason='new'):
+        """Dépose une annonce dans la file (voir push_many)"""
+        return bool(self.push_many([(centris_id, card, reason)]))
+
+    def take(self, limit=None, now=None):
+        """
+        Annonces prêtes (hors rejets, délai d'attente écoulé), de la plus prioritaire à la moins prioritaire
+
+        Args:
+            limit: Nombre max d'annonces (None ou 0 = toutes)
+
+        Returns:
+            list: Numéros Centris
+        """
+        now = now or time.time()
+        with self._connect() as conn:
+            return [row[0] for row in conn.execute(
+                "SELECT centris_id FROM jobs WHERE dead = 0 AND next_attempt_at <= ?"
+                " ORDER BY priority DESC, enqueued_at, centris_id LIMIT ?",
+                (now, limit or -1))]
+
+    def done(self, centris_id):
+        """Retire une annonce scrapée (ou écartée par le filtre de date)"""
+        with self._connect() as conn:
+            conn.execute("DELETE FROM jobs WHERE centris_id = ?", (str(centris_id),))
+
+    def failed(self, centris_id, error=None, now=None):
+        """
+        Enregistre l'échec d'une annonce : nouvel essai après un délai doublé à chaque échec,
+        passage dans les rejets après max_attempts échecs
+
+        Returns:
+            bool: True si l'annonce vient de passer dans les rejets
+        """
+        centris_id = str(centris_id)
+        now = now or time.time()
+        with self._connect() as conn:
+            row = conn.execute("SELECT attempts FROM jobs WHERE centris_id = ? AND dead = 0",
+                               (centris_id,)).fetchone()
+            if row is None:
+                return False
+            attempts = row[0] + 1
+            if attempts >= self.max_attempts:
+                conn.execute("UPDATE jobs SET attempts = ?, last_error = ?, dead = 1 WHERE centris_id = ?",
+                             (attempts, error, centris_id))
+                logger.error(f"Annonce {centris_id} abandonnée après {attempts} échecs ({error}), "
+                             f"conservée dans les rejets de {self.path}")
+                return True
+            delay = min(self.base_delay * (2 ** (attempts - 1)), self.max_delay)
+            conn.execute("UPDATE jobs SET attempts = ?, last_error = ?, next_attempt_at = ? WHERE centris_id = ?",
+                         (attempts, error, now + delay, centris_id))
+        logger.warning(f"Échec n°{attempts} pour l'annonce {centris_id}, nouvel essai dans {delay / 60:.0f} min")
+        return False
+
+    def prune(self, current_ids):
+        """
+        Retire les annonces en attente qui ne sont plus sur la page (vendues, retirées) ;
+        les rejets sont conservés
+
+        Returns:
+            int: Nombre d'annonces retirées
+        """
+        current = {str(cid) for cid in current_ids}
+        with self._connect() as conn:
+            gone = [(row[0],) for row in conn.execute("SELECT centris_id FROM jobs WHERE dead = 0")
+                    if row[0] not in current]
+            conn.executemany("DELETE FROM jobs WHERE centris_id = ?", gone)
+        return len(gone)
+
+    def retry(self, centris_id):
+        """
+        Remet un rejet dans la file (essais remis à zéro)
+
+        Returns:
+            bool: True si l'annonce était dans les rejets
+        """
+        with self._connect() as conn:
+            cursor = conn.execute(
+                "UPDATE jobs SET dead = 0, attempts = 0, next_attempt_at = ? WHERE centris_id = ? AND dead = 1",
+                (time.time(), str(centris_id)))
+            return cursor.rowcount > 0
+
+    def clear(self):
+        """Vide la file et les rejets"""
+        with self._connect() as conn:
+            conn.execute("DELETE FROM jobs")
+
+    def is_dead(self, centris_id):
+        """Vrai si l'annonce est dans les rejets"""
+        with self._connect() as conn:
+            return conn.execute("SELECT 1 FROM jobs WHERE centris_id = ? AND dead = 1",
+                                (str(centris_id),)).fetchone() is not None
+
+    def dead_ids(self):
+        """Numéros des annonces dans les rejets"""
+        with self._connect() as conn:
+            return {row[0] for row in conn.execute("SELECT centris_id FROM jobs WHERE dead = 1")}
+
+    def pending_count(self):
+        """Nombre d'annonces en attente (prêtes ou en attente d'un nouvel essai)"""
+        with self._connect() as conn:
+            return conn.execute("SELECT COUNT(*) FROM jobs WHERE dead = 0").fetchone()[0]
+
+    def dead_count(self):
+        """Nombre d'annonces dans les rejets"""
+        with self._connect() as conn:
+            return conn.execute("SELECT COUNT(*) FROM jobs WHERE dead = 1").fetchone()[0]
+
+    def jobs(self, dead=False):
+        """
+        Contenu de la file (ou des rejets), du plus prioritaire au moins prioritaire
+
+        Returns:
+            list: dicts (centris_id, reason, date_envoi, statut, attempts, next_attempt_at, last_error)
+        """
+        with self._connect() as conn:
+            conn.row_factory = sqlite3.Row
+            return [dict(row) for row in conn.execute(
+                "SELECT centris_id, reason, date_envoi, statut, attempts, next_attempt_at, last_error"
+                " FROM jobs WHERE dead = ? ORDER BY priority DESC, enqueued_at", (1 if dead else 0,))]
+
+
+if __name__ == "__main__":
+    try:
+        from config_api import SCRAPE_QUEUE_DB
+    except ImportError:
+        SCRAPE_QUEUE_DB = 'scrape_queue.db'
+    queue = ScrapeQueue(SCRAPE_QUEUE_DB)
+    if len(sys.argv) > 2 and sys.argv[1] == '--retry':
+        for centris_id in sys.argv[2:]:
+            print(f"{centris_id}: {'remise dans la file' if queue.retry(centris_id) else 'absente des rejets'}")
+        sys.exit(0)
+    print(f"{SCRAPE_QUEUE_DB}: {queue.pending_count()} annonce(s) en attente, {queue.dead_count()} rejet(s)")
+    for job in queue.jobs():
+        wait_s = max(0, job['next_attempt_at'] - time.time())
+        print(f"  {job['centris_id']} ({job['reason']}, {job['date_envoi']}, {job['statut'] or 'sans statut'}) "
+              f"{job['attempts']} échec(s)" + (f", prochain essai dans {wait_s / 60:.0f} min" if wait_s else ''))
+    for job in queue.jobs(dead=True):
+        print(f"  REJET {job['centris_id']} ({job['attempts']} échecs): {job['last_error']}")
@@ -0,0 +1,73 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Résultats du scraping au fil de l'eau (générateur)
+
+Les annonces sont scrapées une à une, à la demande du consommateur :
+
+- contre-pression : l'annonce suivante n'est scrapée que lorsque le consommateur
+  demande le résultat suivant ; un seul résultat est en mémoire, quelle que soit
+  la taille de la liste ;
+- la pause entre deux annonces court depuis la remise du résultat précédent : le
+  temps passé par le consommateur (sauvegarde, file d'envoi API, validation) est
+  déduit de la pause au lieu de s'y ajouter ;
+- annulation : l'événement `cancel` est vérifié avant chaque annonce, et fermer
+  le générateur (sortie de boucle, close()) n'en scrape aucune autre.
+"""
+
+import time
+from logger_config import setup_logger
+
+logger = setup_logger('monitor', level='INFO')
+
+
+def new_stream_stats():
+    """Compteurs d'un flux de scraping (voir stream_listings)"""
+    return {
+        'listings': 0,
+        'errors': 0,
+        'cancelled': False,
+        'consumer_s': 0.0,
+        'pause_saved_s': 0.0
+    }
+
+
+def stream_listings(centris_ids, scrape_one, delay=0.0, cancel=None, stats=None,
+                    sleep=time.sleep, clock=time.monotonic):
+    """
+    Scrape les annonces une à une et renvoie chaque résultat dès qu'il est prêt
+
+    Args:
+        centris_ids: Itérable des numéros Centris (lu au fur et à mesure)
+        scrape_one: Fonction (numero_centris) -> résultat ; une exception donne le résultat None
+        delay: Pause minimale entre la remise d'un résultat et le scraping de l'annonce suivante (secondes)
+        cancel: Événement d'annulation (threading.Event), vérifié avant chaque annonce
+        stats: Compteurs mis à jour pendant l'itération (new_stream_stats)
+
+    Yields:
+        tuple: (numero_centris, résultat)
+    """
+    stats = stats if stats is not None else new_stream_stats()
+    handed_at = None
+    for centris_id in centris_ids:
+        if cancel is not None and cancel.is_set():
+            stats['cancelled'] = True
+            logger.info(f"Scraping interrompu après {stats['listings']} annonce(s) (arrêt demandé)")
+            return
+        if handed_at is not None and delay:
+            # Le temps passé par le consommateur sur le résultat précédent compte dans la pause
+            elapsed = clock() - handed_at
+            stats['pause_saved_s'] += min(elapsed, delay)
+            if elapsed < delay:
+                sleep(delay - elapsed)
+        try:
+            result = scrape_one(centris_id)
+        except Exception as e:
+            logger.error(f"Erreur lors du scraping de {centris_id}: {e}", exc_info=True)
+            result = None
+        stats['listings'] += 1
+        if result is None:
+            stats['errors'] += 1
+        handed_at = clock()
+        yield centris_id, result
+        stats['consumer_s'] += clock() - handed_at
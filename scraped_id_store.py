@@ -0,0 +1,262 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Mémoire des annonces déjà scrapées (SQLite)
+
+Remplace la réécriture complète de scraped_properties.json après chaque
+annonce : chaque ajout est une seule ligne validée dans une base SQLite en
+mode WAL (coût constant, pas de fichier corrompu si le processus s'arrête
+pendant une écriture). Les numéros sont gardés en mémoire pour les tests
+d'appartenance de identify_new_listings.
+
+Au premier lancement, le contenu de l'ancien fichier JSON (dict ou liste)
+est importé une seule fois ; le fichier est conservé tel quel.
+
+Chaque numéro peut aussi porter l'empreinte de sa carte dans la liste
+(prix, statut, date d'envoi) pour détecter les annonces modifiées. Les
+annonces antérieures à la date minimale sont marquées en bloc dès la
+découverte, sans être scrapées.
+"""
+
+import json
+import os
+import sqlite3
+from collections.abc import MutableMapping
+from contextlib import contextmanager
+from datetime import datetime
+from listing_index import card_fingerprint
+from logger_config import setup_logger
+
+logger = setup_logger('monitor', level='INFO')
+
+
+def read_legacy_ids(path):
+    """
+    Lit un ancien fichier scraped_properties.json
+
+    Returns:
+        dict: {numero_centris: date_scraping} (une liste est convertie avec des dates vides)
+    """
+    with open(path, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    if isinstance(data, list):
+        return {str(sid): "" for sid in data}
+    if isinstance(data, dict):
+        return {str(sid): value or "" for sid, value in data.items()}
+    raise ValueError(f"format inattendu ({type(data).__name__})")
+
+
+class ScrapedIdStore(MutableMapping):
+    """
+    Dictionnaire persistant {numero_centris: date_scraping}
+    """
+
+    def __init__(self, path, legacy_json=None):
+        """
+        Args:
+            path: Fichier SQLite de la mémoire des annonces
+            legacy_json: Ancien fichier JSON à importer au premier lancement (optionnel)
+        """
+        self.path = path
+        with self._connect() as conn:
+            # WAL : un ajout = une ligne écrite, jamais de réécriture du fichier
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("CREATE TABLE IF NOT EXISTS scraped_ids"
+                         " (centris_id TEXT PRIMARY KEY, scraped_at TEXT, fingerprint TEXT)")
+            conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)")
+            columns = [row[1] for row in conn.execute("PRAGMA table_info(scraped_ids)")]
+            if 'fingerprint' not in columns:
+                conn.execute("ALTER TABLE scraped_ids ADD COLUMN fingerprint TEXT")
+        if legacy_json:
+            self._migrate(legacy_json)
+        self._ids = {}
+        self._fingerprints = {}
+        with self._connect() as conn:
+            for centris_id, scraped_at, fingerprint in conn.execute(
+                    "SELECT centris_id, scraped_at, fingerprint FROM scraped_ids"):
+                self._ids[centris_id] = scraped_at
+                if fingerprint:
+                    self._fingerprints[centris_id] = fingerprint
+
+    @contextmanager
+    def _connect(self):
+        """Connexion courte, validée puis fermée"""
+        conn = sqlite3.connect(self.path, timeout=30)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def _migrate(self, legacy_json):
+        """Importe l'ancien fichier JSON une seule fois (les lancements suivants l'ignorent)"""
+        with self._connect() as conn:
+            if conn.execute("SELECT 1 FROM meta WHERE key = 'migrated_from'").fetchone():
+                return
+        if not os.path.exists(legacy_json):
+            return
+        try:
+            legacy = read_legacy_ids(legacy_json)
+        except Exception as e:
+            logger.warning(f"Import de {legacy_json} impossible: {e}")
+            return
+        with self._connect() as conn:
+            conn.executemany("INSERT OR IGNORE INTO scraped_ids (centris_id, scraped_at) VALUES (?, ?)",
+                             legacy.items())
+            conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('migrated_from', ?)",
+                         (f"{legacy_json} {datetime.now().isoformat()}",))
+        logger.info(f"{len(legacy)} annonces importées de {legacy_json} dans {self.path}")
+
+    def __getitem__(self, centris_id):
+        return self._ids[str(centris_id)]
+
+    def __setitem__(self, centris_id, scraped_at):
+        self.mark(centris_id, scraped_at)
+
+    def mark(self, centris_id, scraped_at, fingerprint=None):
+        """Enregistre une annonce scrapée (l'empreinte existante est conservée si fingerprint est None)"""
+        centris_id = str(centris_id)
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT INTO scraped_ids (centris_id, scraped_at, fingerprint) VALUES (?, ?, ?)"
+                " ON CONFLICT(centris_id) DO UPDATE SET scraped_at = excluded.scraped_at,"
+                " fingerprint = COALESCE(excluded.fingerprint, fingerprint)",
+                (centris_id, scraped_at, fingerprint)
+            )
+        self._ids[centris_id] = scraped_at
+        if fingerprint:
+            self._fingerprints[centris_id] = fingerprint
+
+    def mark_many(self, fingerprints, scraped_at):
+        """
+        Enregistre plusieurs annonces en une transaction (annonces écartées sans scraping)
+
+        Args:
+            fingerprints: {numero_centris: empreinte de la carte ou None}
+            scraped_at: Date d'enregistrement (ISO)
+        """
+        rows = [(str(cid), scraped_at, fingerprint) for cid, fingerprint in fingerprints.items()]
+        if not rows:
+            return
+        with self._connect() as conn:
+            conn.executemany(
+                "INSERT INTO scraped_ids (centris_id, scraped_at, fingerprint) VALUES (?, ?, ?)"
+                " ON CONFLICT(centris_id) DO UPDATE SET scraped_at = excluded.scraped_at,"
+                " fingerprint = COALESCE(excluded.fingerprint, fingerprint)",
+                rows
+            )
+        for centris_id, _, fingerprint in rows:
+            self._ids[centris_id] = scraped_at
+            if fingerprint:
+                self._fingerprints[centris_id] = fingerprint
+
+    def mark_before(self, records, min_date):
+        """
+        Marque en bloc les annonces pas encore scrapées dont la carte est antérieure à min_date
+
+        Args:
+            records: ListingRecord de la découverte
+            min_date: Date minimale des annonces (YYYY-MM-DD)
+
+        Returns:
+            list: Numéros marqués (une carte sans date n'est jamais marquée)
+        """
+        old = {record.centris_id: card_fingerprint(record.card) for record in records
+               if record.centris_id not in self._ids and record.is_before(min_date)}
+        self.mark_many(old, datetime.now().isoformat())
+        return list(old)
+
+    def fingerprint(self, centris_id):
+        """Empreinte de la carte lors du dernier scraping (None si inconnue)"""
+        return self._fingerprints.get(str(centris_id))
+
+    def set_fingerprints(self, fingerprints):
+        """Enregistre les empreintes {numero_centris: empreinte} d'annonces déjà connues (une transaction)"""
+        rows = [(fingerprint, str(centris_id)) for centris_id, fingerprint in fingerprints.items()
+                if str(centris_id) in self._ids]
+        if not rows:
+            return
+        with self._connect() as conn:
+            conn.executemany("UPDATE scraped_ids SET fingerprint = ? WHERE centris_id = ?", rows)
+        self._fingerprints.update({centris_id: fingerprint for fingerprint, centris_id in rows})
+
+    def find_changed(self, cards, min_date=None):
+        """
+        Compare les cartes de la liste aux empreintes enregistrées
+
+        Args:
+            cards: {numero_centris: informations de la carte} (parse_list_card_text)
+            min_date: Date minimale des annonces (YYYY-MM-DD) ; une annonce plus ancienne n'est pas rescrapée
+
+        Returns:
+            tuple: (numéros des annonces scrapées dont la carte a changé,
+                    {numero_centris: empreinte} à enregistrer sans rescraper : première
+                    empreinte d'une annonce déjà scrapée ou annonce hors du filtre de date)
+        """
+        changed_ids = []
+        updated = {}
+        for centris_id, card in cards.items():
+            if centris_id not in self._ids:
+                continue
+            fingerprint = card_fingerprint(card)
+            if fingerprint is None:
+                continue
+            previous = self._fingerprints.get(centris_id)
+            if previous == fingerprint:
+                continue
+            if previous is None or (min_date and card.get('date_envoi') and card['date_envoi'] < min_date):
+                updated[centris_id] = fingerprint
+            else:
+                changed_ids.append(centris_id)
+        return changed_ids, updated
+
+    def get_meta(self, key):
+        """Valeur enregistrée sous key dans la base (None si absente)"""
+        with self._connect() as conn:
+            row = conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def set_meta(self, key, value):
+        """Enregistre une valeur (None = suppression)"""
+        with self._connect() as conn:
+            if value is None:
+                conn.execute("DELETE FROM meta WHERE key = ?", (key,))
+            else:
+                conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, value))
+
+    def __delitem__(self, centris_id):
+        centris_id = str(centris_id)
+        if centris_id not in self._ids:
+            raise KeyError(centris_id)
+        with self._connect() as conn:
+            conn.execute("DELETE FROM scraped_ids WHERE centris_id = ?", (centris_id,))
+        del self._ids[centris_id]
+        self._fingerprints.pop(centris_id, None)
+
+    def __contains__(self, centris_id):
+        return str(centris_id) in self._ids
+
+    def __iter__(self):
+        return iter(list(self._ids))
+
+    def __len__(self):
+        return len(self._ids)
+
+    def clear(self):
+        """
+        Vide la mémoire (l'ancien fichier JSON n'est pas réimporté) et oublie l'empreinte
+        de la liste : le cycle suivant la traite en entier même si elle n'a pas changé
+        """
+        with self._connect() as conn:
+            conn.execute("DELETE FROM scraped_ids")
+            conn.execute("DELETE FROM meta WHERE key = 'page_fingerprint'")
+        self._ids.clear()
+        self._fingerprints.clear()
+
+    def export_json(self, path):
+        """Écrit le contenu au format de scraped_properties.json (sauvegardes, consultation)"""
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self._ids, f, indent=2, ensure_ascii=False)
+        os.replace(tmp_path, path)
+        return path
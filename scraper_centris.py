@@ -14,6 +14,7 @@ from selenium.webdriver.chrome.options import Options
 from webdriver_manager.chrome import ChromeDriverManager
 from bs4 import BeautifulSoup
 import pandas as pd
+from listing_index import incremental_scroll
 
 
 class CentrisScraper:
@@ -56,27 +57,24 @@ class CentrisScraper:
         except Exception as e:
             print(f"Erreur lors du chargement de la page: {e}")
     
-    def scroll_to_load_all(self):
-        """Fait défiler la page pour charger toutes les propriétés"""
-        last_height = self.driver.execute_script("return document.body.scrollHeight")
-        scroll_attempts = 0
-        max_scrolls = 10
-        
-        while scroll_attempts < max_scrolls:
-            # Scroll jusqu'en bas
-            self.driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
-            time.sleep(2)
+    def scroll_to_load_all(self, stop=None):
+        """
+        Fait défiler la page pour charger toutes les propriétés
+        
+        Args:
+            stop: Condition d'arrêt anticipé (listing_index.DiscoveryStop), None = jusqu'en bas
             
-            # Vérifier si de nouveaux éléments ont été chargés
-            new_height = self.driver.execute_script("return document.body.scrollHeight")
-            if new_height == last_height:
-                break
-            last_height = new_height
-            scroll_attempts += 1
+        Returns:
+            tuple: (nombre de défilements, raison de l'arrêt anticipé ou None)
+        """
+        scrolls, reason = incremental_scroll(self.driver, max_scrolls=10, stop=stop)
+        if reason:
+            print(f"Défilement arrêté après {scrolls} défilement(s): {reason}")
         
         # Scroll vers le haut pour revenir au début
         self.driver.execute_script("window.scrollTo(0, 0);")
         time.sleep(1)
+        return scrolls, reason
     
     def extract_property_data(self, element):
         """
@@ -7,16 +7,43 @@ from selenium import webdriver
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
-from bs4 import BeautifulSoup
 import json
-import re
+from panel_readiness import (
+    CLOSE_CONTROL_XPATH,
+    is_list_visible,
+    start_panel_watch,
+    stop_panel_watch,
+    wait_for_panel,
+)
+from page_snapshot import PageSnapshot, new_snapshot_stats
+from field_extraction import (
+    PanelSections,
+    caracteristiques_extractor,
+    complete_base_extractor,
+    depenses_extractor,
+    extract_units,
+    inclusions_extractor,
+    revenus_bruts_extractor,
+    revenus_extractor,
+)
 
 
 class CentrisDetailScraperComplete:
+    # Détection de l'ouverture du panneau de détail (voir panel_readiness.py)
+    PANEL_READY_TIMEOUT = 10  # secondes (par tentative de clic)
+    PANEL_QUIET_MS = 400  # DOM stable pendant ce délai = panneau prêt
+    PANEL_CLOSE_TIMEOUT = 5  # secondes pour retrouver la liste après fermeture sur place
+    
     def __init__(self):
         """Initialise le scraper pour les pages de détail"""
         self.driver = None
         self.current_property = {}
+        self.panel_ready_timeout = self.PANEL_READY_TIMEOUT
+        self.panel_quiet_ms = self.PANEL_QUIET_MS
+        self.last_panel_ready_s = None  # Latence mesurée pour la dernière annonce
+        self.panel_close_stats = {'in_page': 0, 'reloads': 0}
+        self.snapshot_stats = new_snapshot_stats()  # Transferts/analyses du HTML (annonce courante)
+        self.stage_times = {}  # Durées des étapes de l'annonce courante (voir cycle_metrics)
     
     def init_driver(self):
         """Initialise le driver Chrome"""
@@ -45,9 +72,8 @@ class CentrisDetailScraperComplete:
         try:
             print(f"\n=== Clic sur la propriete #{index+1} ===")
             
-            time.sleep(3)
+            self.wait_for_page_ready()
             self.driver.execute_script("window.scrollTo(0, 1000);")
-            time.sleep(2)
             
             # Chercher les liens vers les adresses
             property_links = self.driver.find_elements(
@@ -73,16 +99,14 @@ class CentrisDetailScraperComplete:
             
             url_before = self.driver.current_url
             self.driver.execute_script("arguments[0].scrollIntoView({block: 'center'});", target_link)
-            time.sleep(0.5)
+            
+            baseline = start_panel_watch(self.driver)
             target_link.click()
             
-            # Attendre que l'URL change
-            for i in range(10):
-                time.sleep(0.5)
-                if '#' in self.driver.current_url and self.driver.current_url != url_before:
-                    print(f"Panneau charge! URL: {self.driver.current_url}")
-                    time.sleep(3)  # Attente pour le chargement complet
-                    return True
+            # Attendre que le panneau soit ouvert et son contenu stable
+            if self.wait_for_panel_ready(url_before, baseline):
+                print(f"Panneau charge en {self.last_panel_ready_s:.2f}s! URL: {self.driver.current_url}")
+                return True
             
             return False
             
@@ -90,6 +114,38 @@ class CentrisDetailScraperComplete:
             print(f"Erreur lors du clic: {e}")
             return False
     
+    def wait_for_page_ready(self, timeout=10):
+        """Attend la fin du chargement du document (au lieu d'une pause fixe)"""
+        try:
+            WebDriverWait(self.driver, timeout, poll_frequency=0.1).until(
+                lambda d: d.execute_script("return document.readyState") == 'complete'
+            )
+            return True
+        except Exception:
+            return False
+    
+    def wait_for_panel_ready(self, url_before, baseline, timeout=None):
+        """
+        Attend que le panneau de détail soit ouvert et que son contenu ne change plus.
+        La latence mesurée est conservée dans self.last_panel_ready_s.
+        
+        Args:
+            url_before: URL de la page avant le clic
+            baseline: État de référence retourné par start_panel_watch() avant le clic
+            timeout: Délai maximum en secondes (self.panel_ready_timeout par défaut)
+            
+        Returns:
+            bool: True si le panneau est prêt
+        """
+        latency = wait_for_panel(
+            self.driver, url_before, baseline,
+            timeout=timeout if timeout is not None else self.panel_ready_timeout,
+            quiet_ms=self.panel_quiet_ms
+        )
+        stop_panel_watch(self.driver)
+        self.last_panel_ready_s = latency
+        return latency is not None
+    
     def scroll_in_panel(self):
         """Fait défiler dans le panneau de détail pour charger tout le contenu"""
         try:
@@ -112,7 +168,7 @@ class CentrisDetailScraperComplete:
             print(f"Erreur lors du defilement: {e}")
             return False
     
-    def extract_financial_data(self, soup, page_text):
+    def extract_financial_data(self, soup, page_text, sections=None):
         """Extrait les données financières complètes"""
         financial_data = {
             'revenus_bruts_potentiels': {
@@ -160,71 +216,15 @@ class CentrisDetailScraperComplete:
         }
         
         try:
-            # Revenus bruts potentiels
-            patterns = {
-                'residentiel': r'Résidentiel\s*([\d\s,]+)\s*\$',
-                'commercial': r'Commercial\s*([\d\s,]+)\s*\$',
-                'stationnements': r'Stationnements[/]Garages\s*([\d\s,]+)\s*\$',
-            }
-            
-            for key, pattern in patterns.items():
-                match = re.search(pattern, page_text, re.IGNORECASE)
-                if match:
-                    value = match.group(1).replace(' ', '').replace(',', '').strip()
-                    financial_data['revenus_bruts_potentiels'][key] = value
-                    print(f"[OK] Revenus {key}: {value} $")
-            
-            # Revenus bruts effectifs
-            match = re.search(r'Revenus?\s+bruts?\s+effectifs?\s*([\d\s,]+)\s*\$', page_text, re.IGNORECASE)
-            if match:
-                financial_data['revenus_bruts_effectifs'] = match.group(1).replace(' ', '').replace(',', '').strip()
-                print(f"[OK] Revenus bruts effectifs: {financial_data['revenus_bruts_effectifs']} $")
-            
-            # Revenus nets d'exploitation
-            match = re.search(r"Revenus?\s+nets?\s+d['']exploitation\s*([\d\s,]+)\s*\$", page_text, re.IGNORECASE)
-            if match:
-                financial_data['revenus_nets_exploitation'] = match.group(1).replace(' ', '').replace(',', '').strip()
-                print(f"[OK] Revenus nets exploitation: {financial_data['revenus_nets_exploitation']} $")
-            
-            # Dépenses d'exploitation - patterns pour TOUS les champs
-            depenses_patterns = {
-                'taxes_municipales': r'Taxes?\s+municipales?\s*\([\d]+\)\s*([\d\s,]+)\s*\$',
-                'taxe_scolaire': r'Taxe?\s+scolaires?\s*\([\d]+\)\s*([\d\s,]+)\s*\$',
-                'taxes_secteur': r'Taxes?\s+secteur\s*([\d\s,]+)\s*\$',
-                'taxes_affaires': r"Taxes?\s+d['']affaires?\s*([\d\s,]+)\s*\$",
-                'taxes_eau': r"Taxes?\s+d['']eau\s*([\d\s,]+)\s*\$",
-                'electricite': r'Énergie\s*-\s*Électricité\s*([\d\s,]+)\s*\$',
-                'mazout': r'Énergie\s*-\s*Mazout\s*([\d\s,]+)\s*\$',
-                'gaz': r'Énergie\s*-\s*Gaz\s*([\d\s,]+)\s*\$',
-                'ascenseur': r'Ascenseur\(s\)\s*([\d\s,]+)\s*\$',
-                'assurances': r'Assurances?\s*([\d\s,]+)\s*\$',
-                'cable': r'Câble\s*\(télé\)\s*([\d\s,]+)\s*\$',
-                'concierge': r'Concierge\s*([\d\s,]+)\s*\$',
-                'contenant_sanitaire': r'Contenant\s+sanitaire\s*([\d\s,]+)\s*\$',
-                'deneigement': r'Déneigement\s*([\d\s,]+)\s*\$',
-                'entretien': r'Entretien\s*([\d\s,]+)\s*\$',
-                'equipement_location': r'Équipement\s*\(location\)\s*([\d\s,]+)\s*\$',
-                'frais_communs': r'Frais\s+communs?\s*([\d\s,]+)\s*\$',
-                'gestion_administration': r'Gestion[/]Administration\s*([\d\s,]+)\s*\$',
-                'ordures': r'Ordures?\s*([\d\s,]+)\s*\$',
-                'pelouse': r'Pelouse\s*([\d\s,]+)\s*\$',
-                'publicite': r'Publicité\s*([\d\s,]+)\s*\$',
-                'securite': r'Sécurité\s*([\d\s,]+)\s*\$',
-                'recuperation_depenses': r'Récupération\s+des\s+dépenses?\s*([\d\s,]+)\s*\$',
-            }
-            
-            depenses_found = 0
-            for key, pattern in depenses_patterns.items():
-                match = re.search(pattern, page_text, re.IGNORECASE)
-                if match:
-                    financial_data['depenses_exploitation'][key] = match.group(1).replace(' ', '').replace(',', '').strip()
-                    depenses_found += 1
-            
-            # Total des dépenses
-            match = re.search(r'Total\s*([\d\s,]+)\s*\$.*?Revenus\s+nets', page_text, re.IGNORECASE | re.DOTALL)
-            if match:
-                financial_data['depenses_exploitation']['total'] = match.group(1).replace(' ', '').replace(',', '').strip()
-                depenses_found += 1
+            sections = sections or PanelSections(page_text)
+            
+            # Revenus bruts potentiels, effectifs et nets d'exploitation
+            revenus_bruts_extractor.extract(page_text, financial_data['revenus_bruts_potentiels'], sections=sections)
+            revenus_extractor.extract(page_text, financial_data, sections=sections)
+            
+            # Dépenses d'exploitation (tous les champs + total)
+            depenses_found = len(depenses_extractor.extract(page_text, financial_data['depenses_exploitation'],
+                                                            sections=sections))
             
             if depenses_found > 0:
                 print(f"[OK] Depenses d'exploitation: {depenses_found} elements remplis sur {len(financial_data['depenses_exploitation'])}")
@@ -244,32 +244,7 @@ class CentrisDetailScraperComplete:
         }
         
         try:
-            # Unités résidentielles (format: "3 ½" "3", "4 ½" "2")
-            unit_patterns = [
-                r'(\d)\s*½\s*(\d+)',
-                r'(\d)\s+½\s+(\d+)',
-            ]
-            
-            for pattern in unit_patterns:
-                matches = re.findall(pattern, page_text)
-                for match in matches:
-                    type_unit = f"{match[0]} 1/2"
-                    nombre = match[1]
-                    units_data['residentielles'].append({
-                        'type': type_unit,
-                        'nombre': nombre
-                    })
-                    units_data['total_residentiel'] += int(nombre)
-            
-            # Commercial
-            match = re.search(r'Commercial\s*(\d+)', page_text)
-            if match:
-                nombre = match.group(1)
-                units_data['commerciales'].append({
-                    'type': 'Commercial',
-                    'nombre': nombre
-                })
-                units_data['total_commercial'] = int(nombre)
+            units_data = extract_units(page_text)
             
             if units_data['residentielles'] or units_data['commerciales']:
                 print(f"[OK] Unites: {units_data['total_residentiel']} resid., {units_data['total_commercial']} comm.")
@@ -279,7 +254,7 @@ class CentrisDetailScraperComplete:
         
         return units_data
     
-    def extract_caracteristiques(self, page_text):
+    def extract_caracteristiques(self, page_text, sections=None):
         """Extrait les caractéristiques détaillées"""
         caracteristiques = {
             'systeme_egouts': None,
@@ -293,34 +268,14 @@ class CentrisDetailScraperComplete:
         }
         
         try:
-            # Système d'égouts
-            match = re.search(r"Système\s+d['']égouts?\s*([A-Za-zÀ-ÿ\s]+?)(?:\n|Approv)", page_text, re.IGNORECASE)
-            if match:
-                caracteristiques['systeme_egouts'] = match.group(1).strip()
-            
-            # Approvisionnement eau
-            match = re.search(r'Approv\.?\s+eau\s*([A-Za-zÀ-ÿ\s]+?)(?:\n|Stationnement)', page_text, re.IGNORECASE)
-            if match:
-                caracteristiques['approv_eau'] = match.group(1).strip()
-            
-            # Stationnement détaillé
-            match = re.search(r'Stationnement\s*\(total\)\s*([^\\n]+)', page_text, re.IGNORECASE)
-            if match:
-                caracteristiques['stationnement_detail'] = match.group(1).strip()
-                print(f"[OK] Stationnement: {caracteristiques['stationnement_detail']}")
-            
-            # Chauffage
-            match = re.search(r'Chauffage\s*([A-Za-zÀ-ÿ\s]+?)(?:\n|Eau)', page_text, re.IGNORECASE)
-            if match:
-                caracteristiques['chauffage'] = match.group(1).strip()
-            
+            caracteristiques_extractor.extract(page_text, caracteristiques, sections=sections or PanelSections(page_text))
         except Exception as e:
             print(f"Erreur extraction caracteristiques: {e}")
         
         return caracteristiques
     
-    def extract_inclusions_exclusions(self, page_text):
-        """Extrait les inclusions, exclusions, remarques et addenda"""
+    def extract_inclusions_exclusions(self, page_text, sections=None):
+        """Extrait les inclusions, exclusions, remarques, addenda et la source"""
         data = {
             'inclusions': None,
             'exclusions': None,
@@ -330,102 +285,63 @@ class CentrisDetailScraperComplete:
         }
         
         try:
-            # Inclusions - Pattern amélioré
-            incl_match = re.search(r'Inclusions?\s*[:\-]?\s*([A-ZÀ-Ÿ][^\n]{5,200})', page_text, re.IGNORECASE)
-            if incl_match:
-                inclusions = incl_match.group(1).strip()
-                inclusions = re.sub(r'\s+', ' ', inclusions)
-                # Arrêter avant "Exclusions" si présent
-                inclusions = re.split(r'\s*Exclusions?', inclusions)[0].strip()
-                if len(inclusions) > 3:
-                    data['inclusions'] = inclusions
-                    print(f"[OK] Inclusions: {data['inclusions'][:80]}...")
-            
-            # Exclusions - Pattern amélioré
-            excl_match = re.search(r'Exclusions?\s*[:\-]?\s*([A-ZÀ-Ÿ][^\n]{5,200})', page_text, re.IGNORECASE)
-            if excl_match:
-                exclusions = excl_match.group(1).strip()
-                exclusions = re.sub(r'\s+', ' ', exclusions)
-                # Arrêter avant "Remarques" si présent
-                exclusions = re.split(r'\s*Remarques?', exclusions)[0].strip()
-                if len(exclusions) > 3:
-                    data['exclusions'] = exclusions
-                    print(f"[OK] Exclusions: {data['exclusions'][:80]}...")
-            
-            # Remarques
-            match = re.search(r'Remarques?\s*((?:.|\n)+?)(?:Addenda|Source|$)', page_text, re.IGNORECASE)
-            if match:
-                remarques = match.group(1).strip()
-                # Nettoyer les remarques
-                remarques = re.sub(r'\s+', ' ', remarques)
-                data['remarques'] = remarques
-                print(f"[OK] Remarques: {remarques[:100]}...")
-            
-            # Addenda
-            match = re.search(r'Addenda\s*((?:.|\n)+?)(?:Source|$)', page_text, re.IGNORECASE)
-            if match:
-                addenda = match.group(1).strip()
-                addenda = re.sub(r'\s+', ' ', addenda)
-                data['addenda'] = addenda
-                print(f"[OK] Addenda: {addenda[:100]}...")
-            
-            # Source - Utiliser le Pattern 3 qui fonctionne !
-            source = None
-            
-            # Pattern principal: Cherche "Source" suivi d'un nom d'agence jusqu'à "Agence immobilière"
-            # Pattern robuste qui s'arrête à "Agence immobilière"
-            match = re.search(r'Source[^A-ZÀ-Ÿ]*([A-ZÀ-Ÿ][A-Za-zÀ-ÿ0-9\s&\-\',/\.]+?Agence immobilière)', page_text, re.IGNORECASE)
-            if match:
-                source = match.group(1).strip()
-                source = re.sub(r'\s+', ' ', source)
-            else:
-                # Si pas trouvé avec "Agence immobilière", essayer sans (moins robuste)
-                match = re.search(r'Source[^A-ZÀ-Ÿ]*([A-ZÀ-Ÿ][A-Za-zÀ-ÿ0-9\s&\-\',/\.]+)', page_text, re.IGNORECASE)
-                if match:
-                    source = match.group(1).strip()
-                    source = re.sub(r'\s+', ' ', source)
-                    # Arrêter avant des mots indésirables (texte de la page qui n'est pas la source)
-                    stop_words = r'(?:La présente|Inscription|Dernière|Le présent|mguimo|Erreur|Téléchargement|Données|Contact|Avis|Note|Voir)'
-                    source = re.split(stop_words, source, flags=re.IGNORECASE)[0].strip()
-                    # Nettoyer les caractères de ponctuation en fin de texte
-                    source = re.sub(r'[\.,;:\s]+$', '', source)
-                
-            # Si pas trouvé ou trop court, chercher directement "RAY HARVEY"
-            if not source or len(source) < 10:
-                match = re.search(r'(RAY HARVEY\s*&\s*ASSOCIÉS[^a-z]{0,30}Agence immobilière)', page_text, re.IGNORECASE)
-                if match:
-                    source = match.group(1).strip()
-                    source = re.sub(r'\s+', ' ', source)
-            
-            # Nettoyer la source finale
-            if source:
-                source = re.sub(r'[\n\r\t]+', ' ', source)
-                source = re.sub(r'\s+', ' ', source)
-                source = source.strip()
-                # Limiter à 150 caractères max
-                if len(source) > 150:
-                    source = source[:150].strip()
-                data['source'] = source
-                print(f"[OK] Source: {data['source']}")
-            else:
+            inclusions_extractor.extract(page_text, data, sections=sections or PanelSections(page_text))
+            if not data['source']:
                 print(f"[WARNING] Source non trouvee")
-            
         except Exception as e:
             print(f"Erreur extraction inclusions/exclusions: {e}")
         
         return data
     
-    def extract_all_info_complete(self):
-        """Extrait TOUTES les informations disponibles (version complète)"""
+    def capture_snapshot(self):
+        """Instantané du DOM courant (un seul transfert du HTML, comptabilisé)"""
+        return PageSnapshot.capture(self.driver, self.snapshot_stats)
+    
+    def capture_panel_snapshot(self):
+        """Fait défiler le panneau pour charger tout le contenu, puis capture le DOM"""
+        self.scroll_in_panel()
+        return self.capture_snapshot()
+    
+    def extract_all_info_complete(self, snapshot=None):
+        """
+        Extrait TOUTES les informations disponibles (version complète)
+        
+        Args:
+            snapshot: Instantané du panneau déjà capturé (None = défilement puis capture)
+        """
         print("\n=== EXTRACTION COMPLETE DES INFORMATIONS ===")
         
-        # Faire défiler pour charger tout le contenu
-        self.scroll_in_panel()
+        # Faire défiler pour charger tout le contenu, puis obtenir le HTML complet
+        if snapshot is None:
+            snapshot = self.capture_panel_snapshot()
+        return self.extract_info_from_snapshot(snapshot)
+    
+    def extract_info_from_html(self, html, url=None):
+        """
+        Extrait toutes les informations d'un HTML de panneau déjà récupéré (sans navigateur)
+        
+        Args:
+            html: HTML de la page avec le panneau de détail ouvert
+            url: URL de l'annonce
+        
+        Returns:
+            dict: Informations de la propriété
+        """
+        return self.extract_info_from_snapshot(PageSnapshot(html, url))
+    
+    def extract_info_from_snapshot(self, snapshot):
+        """
+        Extrait toutes les informations d'un instantané du panneau
+        
+        Args:
+            snapshot: PageSnapshot de la page avec le panneau de détail ouvert
         
-        # Obtenir le HTML complet
-        html = self.driver.page_source
-        soup = BeautifulSoup(html, 'html.parser')
-        page_text = soup.get_text()
+        Returns:
+            dict: Informations de la propriété
+        """
+        soup = snapshot.soup
+        page_text = snapshot.text
+        url = snapshot.url
         
         # Structure de données complète
         property_data = {
@@ -462,79 +378,28 @@ class CentrisDetailScraperComplete:
             'addenda': None,
             'source': None,
             
-            'url': self.driver.current_url
+            'url': url
         }
         
         try:
+            # Texte découpé une fois en sections ; chaque table cherche dans sa section
+            sections = PanelSections(page_text)
+            
             # === INFORMATIONS DE BASE (comme avant) ===
-            prix_match = re.search(r'(\d[\d\s]+)\s*\$', page_text)
-            if prix_match:
-                property_data['prix'] = prix_match.group(1).replace(' ', '').strip()
-                print(f"[OK] Prix: {property_data['prix']} $")
-            
-            quartier_match = re.search(r'(?:dans le quartier|quartier)\s+([A-Za-zÀ-ÿ\s\-\/]+?)(?:\s+construit|\s+\d{4}|$)', page_text, re.IGNORECASE)
-            if quartier_match:
-                property_data['quartier'] = quartier_match.group(1).strip()
-                print(f"[OK] Quartier: {property_data['quartier']}")
-            
-            types = ['Quintuplex', 'Quadruplex', 'Triplex', 'Duplex', 'Maison', 'Condominium', 'Autre']
-            for type_prop in types:
-                if type_prop in page_text:
-                    property_data['type_propriete'] = type_prop
-                    print(f"[OK] Type: {type_prop}")
-                    break
-            
-            year_match = re.search(r'construit\s+en\s+(\d{4})', page_text, re.IGNORECASE)
-            if year_match:
-                property_data['annee_construction'] = year_match.group(1)
-                print(f"[OK] Annee: {property_data['annee_construction']}")
-            
-            centris_match = re.search(r'(?:No|Numéro)\s*Centris\s*[:\-]?\s*(\d+)', page_text, re.IGNORECASE)
-            if centris_match:
-                property_data['numero_centris'] = centris_match.group(1)
-                print(f"[OK] Numero Centris: {property_data['numero_centris']}")
-            
-            date_match = re.search(r"Date\s*d['']envoi\s*[:\-]?\s*(\d{4}-\d{2}-\d{2})", page_text)
-            if date_match:
-                property_data['date_envoi'] = date_match.group(1)
-                print(f"[OK] Date d'envoi: {property_data['date_envoi']}")
-            
-            if 'Nouvelle annonce' in page_text:
-                property_data['statut'] = 'Nouvelle annonce'
-                print(f"[OK] Statut: Nouvelle annonce")
-            
-            sup_match = re.search(r'([\d\s,]+)\s*pi²', page_text)
-            if sup_match:
-                property_data['superficie_terrain'] = sup_match.group(1).replace(' ', '').replace(',', '').strip()
-                print(f"[OK] Superficie terrain: {property_data['superficie_terrain']} pi²")
-            
-            photo_match = re.search(r'photo[s]?\s*\((\d+)\)', page_text, re.IGNORECASE)
-            if photo_match:
-                property_data['nb_photos'] = int(photo_match.group(1))
-                print(f"[OK] Photos: {property_data['nb_photos']}")
-            
-            email_match = re.search(r'([a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,})', page_text)
-            if email_match:
-                property_data['courtier_email'] = email_match.group(1)
-                print(f"[OK] Email: {property_data['courtier_email']}")
-            
-            tel_match = re.search(r'(\d{3}[-.\s]?\d{3}[-.\s]?\d{4})', page_text)
-            if tel_match:
-                property_data['courtier_telephone'] = tel_match.group(1)
-                print(f"[OK] Telephone: {property_data['courtier_telephone']}")
+            complete_base_extractor.extract(page_text, property_data, sections=sections)
             
             # === NOUVELLES EXTRACTIONS COMPLÈTES ===
             print("\n--- Extraction des donnees financieres ---")
-            property_data['donnees_financieres'] = self.extract_financial_data(soup, page_text)
+            property_data['donnees_financieres'] = self.extract_financial_data(soup, page_text, sections)
             
             print("\n--- Extraction des unites ---")
             property_data['unites'] = self.extract_units_info(page_text)
             
             print("\n--- Extraction des caracteristiques detaillees ---")
-            property_data['caracteristiques_detaillees'] = self.extract_caracteristiques(page_text)
+            property_data['caracteristiques_detaillees'] = self.extract_caracteristiques(page_text, sections)
             
             print("\n--- Extraction inclusions/exclusions/remarques ---")
-            inclusions_data = self.extract_inclusions_exclusions(page_text)
+            inclusions_data = self.extract_inclusions_exclusions(page_text, sections)
             property_data['inclusions'] = inclusions_data['inclusions']
             property_data['exclusions'] = inclusions_data['exclusions']
             property_data['remarques'] = inclusions_data['remarques']
@@ -550,6 +415,7 @@ class CentrisDetailScraperComplete:
         
         return property_data
     
+    
     def scrape_property_complete(self, index=0):
         """Fonction principale: scrape complet d'une propriété"""
         if self.click_on_property_by_index(index):
@@ -557,15 +423,70 @@ class CentrisDetailScraperComplete:
         return None
     
     def close_panel(self):
-        """Ferme le panneau de détail"""
+        """
+        Ferme le panneau de détail et revient à la liste déjà chargée (sans recharger la page).
+        Le rechargement complet de la page n'est utilisé qu'en dernier recours.
+        """
         try:
+            if self._close_panel_in_page():
+                self.panel_close_stats['in_page'] += 1
+                return True
+            
+            print("[INFO] Liste non retrouvee apres fermeture sur place, rechargement de la page")
             current_url = self.driver.current_url.split('#')[0]
             self.driver.get(current_url)
             time.sleep(2)
+            self.panel_close_stats['reloads'] += 1
             return True
         except:
             return False
     
+    def _close_panel_in_page(self):
+        """
+        Ferme le panneau sans quitter la page : bouton "Retour aux résultats",
+        sinon retour arrière dans l'historique (le panneau ajoute un #N à l'URL)
+        
+        Returns:
+            bool: True si la liste est de nouveau affichée et intacte
+        """
+        # 1. Bouton du panneau
+        try:
+            controls = [c for c in self.driver.find_elements(By.XPATH, CLOSE_CONTROL_XPATH) if c.is_displayed()]
+        except Exception:
+            controls = []
+        if controls:
+            try:
+                self.driver.execute_script("arguments[0].click();", controls[0])
+                if self._wait_list_restored():
+                    return True
+            except Exception:
+                pass
+        
+        # 2. Historique du navigateur (retire le fragment #N ajouté à l'ouverture)
+        if '#' in self.driver.current_url:
+            try:
+                self.driver.execute_script("window.history.back();")
+                if self._wait_list_restored():
+                    return True
+            except Exception:
+                pass
+        
+        return False
+    
+    def _wait_list_restored(self, timeout=None):
+        """Attend que la liste soit de nouveau affichée et intacte"""
+        try:
+            WebDriverWait(self.driver, timeout or self.PANEL_CLOSE_TIMEOUT, poll_frequency=0.1).until(
+                lambda d: self.is_list_restored()
+            )
+            return True
+        except Exception:
+            return False
+    
+    def is_list_restored(self):
+        """Vérifie que la liste des résultats est affichée (aucun panneau de détail visible)"""
+        return is_list_visible(self.driver)
+    
     def close(self):
         """Ferme le navigateur"""
         if self.driver:
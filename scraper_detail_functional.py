@@ -9,7 +9,7 @@ from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from bs4 import BeautifulSoup
 import json
-import re
+from field_extraction import functional_extractor
 
 
 class CentrisDetailScraperFunctional:
@@ -143,7 +143,19 @@ class CentrisDetailScraperFunctional:
             dict: Dictionnaire avec toutes les informations
         """
         print("\n=== EXTRACTION DES INFORMATIONS ===")
+        return self.extract_info_from_html(self.driver.page_source, self.driver.current_url)
+    
+    def extract_info_from_html(self, html, url=None):
+        """
+        Extrait les informations d'un HTML de panneau déjà récupéré (sans navigateur)
+        
+        Args:
+            html: HTML de la page avec le panneau de détail ouvert
+            url: URL de l'annonce
         
+        Returns:
+            dict: Dictionnaire avec toutes les informations
+        """
         property_data = {
             'prix': None,
             'adresse': None,
@@ -176,200 +188,19 @@ class CentrisDetailScraperFunctional:
             'taxes_scolaires': None,
             'evaluation_municipale': None,
             'prix_par_pi2': None,
-            'url': self.driver.current_url,
+            'url': url,
             'raw_text': None
         }
         
         try:
-            # Obtenir tout le HTML
-            html = self.driver.page_source
             soup = BeautifulSoup(html, 'html.parser')
             
             # Obtenir tout le texte visible
             page_text = soup.get_text()
             property_data['raw_text'] = page_text[:1000]  # Sauvegarder les 1000 premiers caractères
             
-            # === INFORMATIONS DE BASE ===
-            
-            # Prix
-            prix_patterns = [
-                r'(\d[\d\s]+)\s*\$\s*(?:\+\s*(?:TPS|TVQ|taxes))?',
-                r'Prix[:\s]+(\d[\d\s]+)\s*\$',
-            ]
-            for pattern in prix_patterns:
-                match = re.search(pattern, page_text)
-                if match:
-                    prix = match.group(1).replace(' ', '').strip()
-                    property_data['prix'] = prix
-                    print(f"[OK] Prix: {prix} $")
-                    break
-            
-            # Adresse
-            adresse_patterns = [
-                r'(\d+[A-Z]?(?:-\d+[A-Z]?)?\s+(?:Boul\.|Av\.|Rue|Ch\.|Route|Chemin)\s+[A-Za-zÀ-ÿ\'\-\s\.]+?)(?:\n|Québec)',
-            ]
-            for pattern in adresse_patterns:
-                match = re.search(pattern, page_text)
-                if match:
-                    property_data['adresse'] = match.group(1).strip()
-                    print(f"[OK] Adresse: {property_data['adresse']}")
-                    break
-            
-            # Ville et Arrondissement
-            ville_pattern = r'Québec\s*\(([^)]+)\)'
-            match = re.search(ville_pattern, page_text)
-            if match:
-                property_data['arrondissement'] = match.group(1).strip()
-                property_data['ville'] = 'Québec'
-                print(f"[OK] Ville: Québec ({property_data['arrondissement']})")
-            
-            # Quartier
-            quartier_pattern = r'(?:dans le quartier|quartier)\s+([A-Za-zÀ-ÿ\s\-\/]+?)(?:\s+construit|\s+\d{4}|$)'
-            match = re.search(quartier_pattern, page_text, re.IGNORECASE)
-            if match:
-                property_data['quartier'] = match.group(1).strip()
-                print(f"[OK] Quartier: {property_data['quartier']}")
-            
-            # Type de propriété
-            types = ['Quintuplex', 'Quadruplex', 'Triplex', 'Duplex', 'Maison', 'Condominium', 'Terrain', 'Autre']
-            for type_prop in types:
-                if type_prop in page_text:
-                    property_data['type_propriete'] = type_prop
-                    print(f"[OK] Type: {type_prop}")
-                    break
-            
-            # Année de construction
-            year_match = re.search(r'construit\s+en\s+(\d{4})', page_text, re.IGNORECASE)
-            if year_match:
-                property_data['annee_construction'] = year_match.group(1)
-                print(f"[OK] Année: {property_data['annee_construction']}")
-            
-            # Numéro Centris
-            centris_match = re.search(r'(?:No|Numéro)\s*Centris\s*[:\-]?\s*(\d+)', page_text, re.IGNORECASE)
-            if centris_match:
-                property_data['numero_centris'] = centris_match.group(1)
-                print(f"[OK] Numéro Centris: {property_data['numero_centris']}")
-            
-            # Date d'envoi
-            date_match = re.search(r"Date\s*d['']envoi\s*[:\-]?\s*(\d{4}-\d{2}-\d{2})", page_text)
-            if date_match:
-                property_data['date_envoi'] = date_match.group(1)
-                print(f"[OK] Date d'envoi: {property_data['date_envoi']}")
-            
-            # Statut
-            if 'Nouvelle annonce' in page_text:
-                property_data['statut'] = 'Nouvelle annonce'
-                print(f"[OK] Statut: Nouvelle annonce")
-            elif 'Nouveau prix' in page_text:
-                property_data['statut'] = 'Nouveau prix'
-                print(f"[OK] Statut: Nouveau prix")
-            
-            # === CARACTÉRISTIQUES ===
-            
-            # Chambres
-            chambres_patterns = [
-                r'(\d+)\s+chambre[s]?(?:\s+à\s+coucher)?',
-                r'Chambre[s]?\s*[:\-]\s*(\d+)',
-            ]
-            for pattern in chambres_patterns:
-                match = re.search(pattern, page_text, re.IGNORECASE)
-                if match:
-                    property_data['chambres'] = match.group(1)
-                    print(f"[OK] Chambres: {property_data['chambres']}")
-                    break
-            
-            # Salles de bain
-            sdb_patterns = [
-                r'(\d+)\s+salle[s]?\s+de\s+bain[s]?',
-                r'Salle[s]?\s+de\s+bain\s*[:\-]\s*(\d+)',
-            ]
-            for pattern in sdb_patterns:
-                match = re.search(pattern, page_text, re.IGNORECASE)
-                if match:
-                    property_data['salles_bain'] = match.group(1)
-                    print(f"[OK] Salles de bain: {property_data['salles_bain']}")
-                    break
-            
-            # Salles d'eau
-            sde_patterns = [
-                r"(\d+)\s+salle[s]?\s+d['']eau",
-            ]
-            for pattern in sde_patterns:
-                match = re.search(pattern, page_text, re.IGNORECASE)
-                if match:
-                    property_data['salles_eau'] = match.group(1)
-                    print(f"[OK] Salles d'eau: {property_data['salles_eau']}")
-                    break
-            
-            # Stationnements
-            stat_patterns = [
-                r'(\d+)\s+stationnement[s]?',
-                r'Stationnement[s]?\s*[:\-]\s*(\d+)',
-            ]
-            for pattern in stat_patterns:
-                match = re.search(pattern, page_text, re.IGNORECASE)
-                if match:
-                    property_data['stationnements'] = match.group(1)
-                    print(f"[OK] Stationnements: {property_data['stationnements']}")
-                    break
-            
-            # Superficie habitable
-            sup_patterns = [
-                r'Superficie\s+habitable\s*[:\-]?\s*([\d\s,]+)\s*(?:pi²|m²)',
-                r'([\d\s,]+)\s*pi²(?:\s+habitable)?',
-            ]
-            for pattern in sup_patterns:
-                match = re.search(pattern, page_text, re.IGNORECASE)
-                if match:
-                    property_data['superficie_habitable'] = match.group(1).replace(' ', '').replace(',', '').strip()
-                    print(f"[OK] Superficie: {property_data['superficie_habitable']} pi²")
-                    break
-            
-            # Superficie terrain
-            terrain_patterns = [
-                r'(?:Superficie|Terrain)\s*[:\-]?\s*([\d\s,]+)\s*(?:pi²|m²)',
-                r'Lot\s*[:\-]?\s*([\d\s,]+)\s*(?:pi²|m²)',
-            ]
-            for pattern in terrain_patterns:
-                match = re.search(pattern, page_text, re.IGNORECASE)
-                if match:
-                    property_data['superficie_terrain'] = match.group(1).replace(' ', '').replace(',', '').strip()
-                    print(f"[OK] Terrain: {property_data['superficie_terrain']} pi²")
-                    break
-            
-            # Photos
-            photo_match = re.search(r'(?:Voir\s+toutes?\s+les?\s+)?photo[s]?\s*\((\d+)\)', page_text, re.IGNORECASE)
-            if photo_match:
-                property_data['nb_photos'] = int(photo_match.group(1))
-                print(f"[OK] Photos: {property_data['nb_photos']}")
-            
-            # === INFORMATIONS COURTIER ===
-            
-            # Email du courtier
-            email_match = re.search(r'([a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,})', page_text)
-            if email_match:
-                property_data['courtier_email'] = email_match.group(1)
-                print(f"[OK] Email courtier: {property_data['courtier_email']}")
-            
-            # Téléphone
-            tel_match = re.search(r'(\d{3}[-.\s]?\d{3}[-.\s]?\d{4})', page_text)
-            if tel_match:
-                property_data['courtier_telephone'] = tel_match.group(1)
-                print(f"[OK] Téléphone: {property_data['courtier_telephone']}")
-            
-            # === ÉQUIPEMENTS ===
-            equipements_keywords = [
-                'Garage', 'Stationnement', 'Piscine', 'Spa', 'Climatisation', 'Chauffage',
-                'Électroménagers', 'Cuisine', 'Sous-sol', 'Balcon', 'Terrasse', 'Cour',
-                'Foyer', 'Cheminée', 'Fenestration', 'Isolation'
-            ]
-            
-            for keyword in equipements_keywords:
-                if keyword.lower() in page_text.lower():
-                    property_data['equipements'].append(keyword)
-            
-            if property_data['equipements']:
-                print(f"[OK] Équipements: {', '.join(property_data['equipements'][:5])}...")
+            # Informations de base, caractéristiques, courtier et équipements (voir field_extraction.py)
+            functional_extractor.extract(page_text, property_data)
             
             print("\n=== FIN DE L'EXTRACTION ===")
             
@@ -380,6 +211,7 @@ class CentrisDetailScraperFunctional:
         
         return property_data
     
+    
     def close_panel(self):
         """Ferme le panneau de détail"""
         try:
@@ -11,7 +11,7 @@ from selenium.webdriver.chrome.options import Options
 from webdriver_manager.chrome import ChromeDriverManager
 from bs4 import BeautifulSoup
 import json
-import re
+from field_extraction import ExtractionContext, detail_page_contact_extractor, detail_page_extractor
 
 
 class CentrisDetailScraper:
@@ -87,6 +87,19 @@ class CentrisDetailScraper:
         """
         Extrait toutes les informations de la page de détail
         
+        Returns:
+            dict: Dictionnaire contenant toutes les informations extraites
+        """
+        return self.extract_info_from_html(self.driver.page_source, self.driver.current_url)
+    
+    def extract_info_from_html(self, html, url=None):
+        """
+        Extrait les informations d'un HTML de page de détail déjà récupéré (sans navigateur)
+        
+        Args:
+            html: HTML de la page de détail
+            url: URL de l'annonce
+        
         Returns:
             dict: Dictionnaire contenant toutes les informations extraites
         """
@@ -109,140 +122,20 @@ class CentrisDetailScraper:
             'courtier': {},
             'communaute': {},
             'financier': {},
-            'url': self.driver.current_url
+            'url': url
         }
         
         try:
-            # Obtenir le HTML de la page
-            html = self.driver.page_source
             soup = BeautifulSoup(html, 'html.parser')
             
             # Extraire le texte complet de la page
             page_text = soup.get_text()
+            ctx = ExtractionContext(page_text)
             
             print("\n=== EXTRACTION DES INFORMATIONS ===")
             
-            # 1. Extraire le prix
-            prix_patterns = [
-                r'(\d[\d\s,]+)\s*\$\s*(?:\+\s*TPS/TVQ)?',
-                r'Prix\s*[:\-]\s*(\d[\d\s,]+)\s*\$',
-            ]
-            for pattern in prix_patterns:
-                prix_match = re.search(pattern, page_text)
-                if prix_match:
-                    property_data['prix'] = prix_match.group(1).strip()
-                    print(f"Prix: {property_data['prix']}")
-                    break
-            
-            # 2. Extraire l'adresse (chercher dans les éléments en gras ou les liens)
-            try:
-                # Chercher les adresses dans le texte (format typique: numéro + nom de rue)
-                adresse_pattern = r'(\d+[A-Z]?(?:-\d+[A-Z]?)?\s+(?:Boul\.|Av\.|Rue|Ch\.|Route)\s+[A-Za-zÀ-ÿ\s\-\.]+)'
-                adresse_matches = re.findall(adresse_pattern, page_text)
-                if adresse_matches:
-                    property_data['adresse'] = adresse_matches[0].strip()
-                    print(f"Adresse: {property_data['adresse']}")
-            except Exception as e:
-                print(f"Erreur extraction adresse: {e}")
-            
-            # 3. Extraire le numéro Centris
-            centris_match = re.search(r'No\s*Centris\s*[:\-]?\s*(\d+)', page_text, re.IGNORECASE)
-            if centris_match:
-                property_data['numero_centris'] = centris_match.group(1)
-                print(f"Numéro Centris: {property_data['numero_centris']}")
-            
-            # 4. Extraire la date d'envoi
-            date_match = re.search(r"Date\s*d['']envoi\s*[:\-]?\s*(\d{4}-\d{2}-\d{2})", page_text)
-            if date_match:
-                property_data['date_envoi'] = date_match.group(1)
-                print(f"Date d'envoi: {property_data['date_envoi']}")
-            
-            # 5. Extraire le type de propriété
-            types = ['Quintuplex', 'Duplex', 'Triplex', 'Quadruplex', 'Autre', 'Maison', 'Condominium', 'Terrain']
-            for type_prop in types:
-                if type_prop in page_text:
-                    property_data['type_propriete'] = type_prop
-                    print(f"Type: {property_data['type_propriete']}")
-                    break
-            
-            # 6. Extraire l'année de construction
-            year_match = re.search(r'construit\s+en\s+(\d{4})', page_text, re.IGNORECASE)
-            if year_match:
-                property_data['annee_construction'] = year_match.group(1)
-                print(f"Année de construction: {property_data['annee_construction']}")
-            
-            # 7. Extraire le quartier et la ville
-            ville_match = re.search(r'Québec\s*\(([^)]+)\)', page_text)
-            if ville_match:
-                property_data['ville'] = ville_match.group(1).strip()
-                print(f"Ville/Arrondissement: {property_data['ville']}")
-            
-            quartier_match = re.search(r'dans\s+le\s+quartier\s+([^c]+?)(?:construit|$)', page_text)
-            if quartier_match:
-                property_data['quartier'] = quartier_match.group(1).strip()
-                print(f"Quartier: {property_data['quartier']}")
-            
-            # 8. Extraire le statut
-            if 'Nouvelle annonce' in page_text:
-                property_data['statut'] = 'Nouvelle annonce'
-            elif 'Nouveau prix' in page_text:
-                property_data['statut'] = 'Nouveau prix'
-            
-            # 9. Extraire le nombre de photos
-            photo_match = re.search(r'(?:Voir\s+toutes?\s+les?\s+)?photo[s]?\s*\((\d+)\)', page_text, re.IGNORECASE)
-            if photo_match:
-                nb_photos = int(photo_match.group(1))
-                property_data['photos'] = [f"Photo {i+1}" for i in range(nb_photos)]
-                print(f"Nombre de photos: {nb_photos}")
-            
-            # 10. Extraire les caractéristiques principales
-            # Chambres
-            chambres_patterns = [
-                r'(\d+)\s+chambre[s]?',
-                r'Chambre[s]?\s*[:\-]\s*(\d+)',
-            ]
-            for pattern in chambres_patterns:
-                chambres_match = re.search(pattern, page_text, re.IGNORECASE)
-                if chambres_match:
-                    property_data['pieces']['chambres'] = chambres_match.group(1)
-                    print(f"Chambres: {property_data['pieces']['chambres']}")
-                    break
-            
-            # Salles de bain
-            sdb_patterns = [
-                r'(\d+)\s+salle[s]?\s+de\s+bain[s]?',
-                r'Salle[s]?\s+de\s+bain\s*[:\-]\s*(\d+)',
-            ]
-            for pattern in sdb_patterns:
-                sdb_match = re.search(pattern, page_text, re.IGNORECASE)
-                if sdb_match:
-                    property_data['pieces']['salles_bain'] = sdb_match.group(1)
-                    print(f"Salles de bain: {property_data['pieces']['salles_bain']}")
-                    break
-            
-            # Superficie
-            superficie_patterns = [
-                r'Superficie\s*[:\-]?\s*([\d\s,]+)\s*(?:pi²|m²)',
-                r'([\d\s,]+)\s*(?:pi²|m²)',
-            ]
-            for pattern in superficie_patterns:
-                superficie_match = re.search(pattern, page_text)
-                if superficie_match:
-                    property_data['dimensions']['superficie'] = superficie_match.group(1).strip()
-                    print(f"Superficie: {property_data['dimensions']['superficie']}")
-                    break
-            
-            # Terrain
-            terrain_patterns = [
-                r'Terrain\s*[:\-]?\s*([\d\s,]+)\s*(?:pi²|m²)',
-                r'Lot\s*[:\-]?\s*([\d\s,]+)\s*(?:pi²|m²)',
-            ]
-            for pattern in terrain_patterns:
-                terrain_match = re.search(pattern, page_text)
-                if terrain_match:
-                    property_data['dimensions']['terrain'] = terrain_match.group(1).strip()
-                    print(f"Terrain: {property_data['dimensions']['terrain']}")
-                    break
+            # 1-10. Prix, adresse, numéro Centris, type, ville, quartier, photos, pièces, dimensions
+            detail_page_extractor.extract(page_text, property_data, ctx)
             
             # 11. Extraire la description (si disponible dans un élément spécifique)
             description_elements = soup.find_all(['div', 'p'], class_=lambda x: x and ('description' in x.lower() or 'remarque' in x.lower()))
@@ -252,37 +145,8 @@ class CentrisDetailScraper:
                     property_data['description'] = description_text[:500]
                     print(f"Description: {description_text[:100]}...")
             
-            # 12. Extraire les informations du courtier
-            courtier_patterns = [
-                r'(?:Courtier|Agent)\s*[:\-]\s*([A-Za-zÀ-ÿ\s\-]+)',
-                r'([A-Za-zÀ-ÿ\s]+)(?:\s+Courtier|\s+Agent)',
-            ]
-            for pattern in courtier_patterns:
-                courtier_match = re.search(pattern, page_text)
-                if courtier_match:
-                    property_data['courtier']['nom'] = courtier_match.group(1).strip()
-                    break
-            
-            # Email et téléphone
-            email_match = re.search(r'([a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,})', page_text)
-            if email_match:
-                property_data['courtier']['email'] = email_match.group(1)
-            
-            tel_match = re.search(r'(\d{3}[-.\s]?\d{3}[-.\s]?\d{4})', page_text)
-            if tel_match:
-                property_data['courtier']['telephone'] = tel_match.group(1)
-            
-            # 13. Chercher des équipements/caractéristiques supplémentaires
-            equipements_keywords = [
-                'Garage', 'Stationnement', 'Piscine', 'Climatisation', 'Chauffage',
-                'Électroménagers', 'Cuisine', 'Sous-sol', 'Balcon', 'Terrasse'
-            ]
-            for keyword in equipements_keywords:
-                if keyword in page_text:
-                    property_data['equipements'].append(keyword)
-            
-            if property_data['equipements']:
-                print(f"Équipements: {', '.join(property_data['equipements'])}")
+            # 12-13. Courtier et équipements
+            detail_page_contact_extractor.extract(page_text, property_data, ctx)
             
             print("\n=== FIN DE L'EXTRACTION ===\n")
             
@@ -293,6 +157,7 @@ class CentrisDetailScraper:
         
         return property_data
     
+    
     def scrape_property_detail(self, property_link_element):
         """
         Fonction principale: clique sur une propriété et extrait toutes les informations
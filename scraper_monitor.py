@@ -6,17 +6,20 @@ Scraper Monitor - Détecte et scrape les nouvelles annonces Centris
 
 import time
 import json
-import os
 import re
+import threading
 from datetime import datetime
-from selenium import webdriver
-from selenium.webdriver.common.by import By
-from selenium.webdriver.chrome.options import Options
-from webdriver_manager.chrome import ChromeDriverManager
-from selenium.webdriver.chrome.service import Service
-import requests
-from bs4 import BeautifulSoup
-from scraper_with_list_info import CentrisScraperWithListInfo
+from driver_session import CentrisDriverSession
+from http_discovery import HttpListingDiscovery
+from api_client import ApiClient, ApiOutbox, is_configured
+from scraped_id_store import ScrapedIdStore
+from property_store import PropertyStore
+from scrape_queue import ScrapeQueue
+from scrape_stream import stream_listings, new_stream_stats
+from cycle_metrics import CycleMetrics
+from cycle_stats_log import CycleStatsLog
+from listing_index import (find_property_containers, parse_list_card_text, card_fingerprint, page_fingerprint,
+                           listing_records, DiscoveryStop)
 from logger_config import setup_logger, log_extraction_result, log_scraping_stats
 
 # Configuration du logger
@@ -28,140 +31,246 @@ class CentrisMonitor:
     Moniteur pour détecter les nouvelles annonces et les scraper automatiquement
     """
     
-    def __init__(self, url, api_endpoint=None, storage_file='scraped_properties.json', min_date='2025-12-20', skip_photos=False):
+    def __init__(self, url, api_endpoint=None, storage_file='scraped_properties.json', min_date='2025-12-20', skip_photos=False,
+                 recycle_after=25, panel_ready_timeout=None, panel_quiet_ms=None, discovery_mode='selenium',
+                 api_headers=None, api_timeout=30, api_retries=3, outbox_file='api_outbox.db', outbox_interval=30,
+                 batch_size=0, batch_interval=10, batch_endpoint=None, ids_db_file='scraped_ids.db',
+                 property_db_file='properties.db', refresh_changed=True, skip_unchanged_page=True,
+                 queue_db_file='scrape_queue.db', max_attempts=5, retry_delay=1800, discovery_stop_run=20,
+                 metrics_file=None, metrics_prom_file=None):
         """
         Initialise le moniteur
         
         Args:
             url: URL de la page Matrix Centris à surveiller
             api_endpoint: URL de l'API où envoyer les données (optionnel)
-            storage_file: Fichier pour stocker les numéros Centris déjà scrapés
+            storage_file: Ancien fichier JSON des numéros Centris déjà scrapés (importé au premier lancement)
             min_date: Date minimale pour les annonces (format: YYYY-MM-DD)
             skip_photos: Si True, ne pas extraire les URLs des photos (plus rapide)
+            recycle_after: Nombre d'annonces avant de redémarrer le navigateur partagé (0 = jamais)
+            panel_ready_timeout: Délai max (secondes) d'ouverture du panneau de détail
+            panel_quiet_ms: Durée de stabilité du DOM (ms) pour déclarer le panneau prêt
+            discovery_mode: 'http' (requête HTTP, repli sur le navigateur si incomplet) ou 'selenium'
+            api_headers: En-têtes HTTP de l'API (None = en-têtes par défaut)
+            api_timeout: Délai max de réponse de l'API (secondes)
+            api_retries: Nouvelles tentatives d'un envoi sur erreur réseau / 429 / 5xx
+            outbox_file: Fichier SQLite de la file d'envoi API
+            outbox_interval: Période du vidage de la file d'envoi en arrière-plan (secondes)
+            batch_size: Nombre max d'annonces par lot envoyé à l'API (0 = une requête par annonce)
+            batch_interval: Attente max (secondes) d'une annonce dans un lot incomplet
+            batch_endpoint: URL d'envoi des lots (None = api_endpoint)
+            ids_db_file: Fichier SQLite des numéros Centris déjà scrapés
+            property_db_file: Fichier SQLite de la base des annonces scrapées
+            refresh_changed: Rescraper les annonces déjà scrapées dont la carte a changé (prix, statut, date d'envoi)
+            skip_unchanged_page: Terminer le cycle dès la découverte si la liste est identique à celle
+                du dernier cycle terminé sans annonce en attente
+            queue_db_file: Fichier SQLite de la file des annonces à scraper
+            max_attempts: Nombre d'échecs de scraping avant l'abandon d'une annonce (rejets)
+            retry_delay: Délai avant le 2e essai d'une annonce en échec, doublé à chaque échec (secondes)
+            discovery_stop_run: Découverte par le navigateur : arrêt du défilement dès que ce nombre de
+                cartes consécutives en fin de liste sont déjà scrapées ou antérieures à min_date (0 = jusqu'en bas)
+            metrics_file: Journal JSONL des durées des étapes de chaque cycle (None = pas de journal)
+            metrics_prom_file: Fichier Prometheus (format texte) des durées du dernier cycle (None = pas d'export)
         """
         self.url = url
         self.api_endpoint = api_endpoint
         self.storage_file = storage_file
+        self.ids_db_file = ids_db_file
         self.min_date = min_date
         self.skip_photos = skip_photos
+        self.refresh_changed = refresh_changed
+        self.skip_unchanged_page = skip_unchanged_page
+        # Empreinte de la liste du cycle en cours (réponse HTTP si disponible, sinon liste complète)
+        self.last_page_fingerprint = None
         self.scraped_ids = self.load_scraped_ids()
+        self.property_store = PropertyStore(property_db_file)
+        self.scrape_queue = ScrapeQueue(queue_db_file, max_attempts=max_attempts, base_delay=retry_delay)
+        self.session = CentrisDriverSession(
+            url,
+            recycle_after=recycle_after,
+            panel_ready_timeout=panel_ready_timeout,
+            panel_quiet_ms=panel_quiet_ms
+        )
+        self.http_discovery = HttpListingDiscovery(url) if discovery_mode == 'http' else None
+        if self.http_discovery is not None:
+            # Nombre d'annonces de la dernière liste complète vue par le navigateur (conservé entre deux lancements)
+            reference = self.scraped_ids.get_meta('http_reference_count')
+            self.http_discovery.reference_count = int(reference) if reference else None
+        self.discovery_stop_run = discovery_stop_run
+        self.last_discovery_mode = None
+        # False si la dernière découverte s'est arrêtée avant le bas de la liste
+        self.last_discovery_complete = True
+        # Informations des cartes de la liste lors de la dernière découverte {numero_centris: infos}
+        self.last_listing_cards = {}
+        # Durées des étapes du cycle en cours (démarrage de Chrome, panneau, photos, écriture, API...)
+        self.metrics = CycleMetrics()
+        self.metrics_log = CycleStatsLog(metrics_file) if metrics_file else None
+        self.metrics_prom_file = metrics_prom_file
+        # Arrêt demandé (request_stop) : le scraping s'interrompt avant l'annonce suivante
+        self.stop_event = threading.Event()
+        # Envoi à l'API découplé du scraping : dépôt dans la file, envoi en arrière-plan
+        self.api_client = None
+        self.api_outbox = None
+        if is_configured(api_endpoint):
+            self.api_client = ApiClient(api_endpoint, headers=api_headers, timeout=api_timeout, retries=api_retries,
+                                        batch_endpoint=batch_endpoint)
+            self.api_outbox = ApiOutbox(outbox_file, self.api_client, interval=outbox_interval,
+                                        batch_size=batch_size, batch_interval=batch_interval)
+            if batch_size:
+                logger.info(f"Envoi API par lots de {batch_size} annonce(s) max (gzip), "
+                            f"lot incomplet envoyé après {batch_interval}s")
+            pending = self.api_outbox.pending_count()
+            if pending:
+                logger.info(f"File d'envoi API: {pending} annonce(s) en attente d'un précédent lancement")
+            self.api_outbox.start()
         logger.info(f"Filtre de date actif: annonces >= {self.min_date}")
         if self.skip_photos:
             logger.info("Mode skip_photos activé: extraction des photos désactivée")
         
     def load_scraped_ids(self):
         """
-        Charge la liste des numéros Centris déjà scrapés
+        Ouvre la mémoire des numéros Centris déjà scrapés (importe storage_file au premier lancement)
         
         Returns:
-            dict: Dictionnaire {numero_centris: date_scraping}
+            ScrapedIdStore: Dictionnaire persistant {numero_centris: date_scraping},
+            chaque ajout est écrit immédiatement
         """
-        if os.path.exists(self.storage_file):
-            try:
-                with open(self.storage_file, 'r', encoding='utf-8') as f:
-                    data = json.load(f)
-                    # S'assurer que c'est un dict, pas une liste
-                    if isinstance(data, list):
-                        logger.warning(f"Format liste détecté dans {self.storage_file}, conversion en dict")
-                        data = {str(sid): "" for sid in data}
-                    elif not isinstance(data, dict):
-                        logger.warning(f"Format inattendu dans {self.storage_file}, réinitialisation")
-                        data = {}
-                    logger.info(f"{len(data)} annonces déjà scrapées chargées depuis {self.storage_file}")
-                    return data
-            except Exception as e:
-                logger.warning(f"Erreur lecture {self.storage_file}: {e}")
-                return {}
-        else:
-            logger.info(f"Nouveau fichier {self.storage_file} sera créé")
-            return {}
+        store = ScrapedIdStore(self.ids_db_file, legacy_json=self.storage_file)
+        logger.info(f"{len(store)} annonces déjà scrapées chargées depuis {self.ids_db_file}")
+        return store
     
-    def save_scraped_ids(self):
+    def discover_http(self):
         """
-        Sauvegarde la liste des numéros Centris scrapés
+        Découverte HTTP sans navigateur
+        
+        Returns:
+            HttpDiscoveryResult, ou None si la découverte HTTP n'est pas configurée
         """
-        try:
-            with open(self.storage_file, 'w', encoding='utf-8') as f:
-                json.dump(self.scraped_ids, f, indent=2, ensure_ascii=False)
-            logger.debug(f"{len(self.scraped_ids)} IDs sauvegardés dans {self.storage_file}")
-        except Exception as e:
-            logger.error(f"Impossible de sauvegarder {self.storage_file}: {e}")
+        if self.http_discovery is None:
+            return None
+        result = self.http_discovery.discover()
+        self.metrics.record('http_discovery', result.duration_s)
+        return result
     
-    def get_all_listing_ids(self):
+    def discover_page(self, stats):
         """
-        Récupère tous les numéros Centris disponibles sur la page
+        Découverte du cycle en deux étages
         
+        1. Requête HTTP seule : si l'empreinte de la liste reçue est celle du dernier
+           cycle terminé, le cycle s'arrête là (aucun navigateur démarré).
+        2. Sinon, découverte complète (HTTP si le résultat est complet, navigateur
+           sinon). Sans résultat HTTP exploitable, l'empreinte est calculée sur la
+           liste complète.
+        
+        Args:
+            stats: Statistiques du cycle (total_listings mis à jour)
+            
         Returns:
-            list: Liste des numéros Centris trouvés
+            list: ListingRecord de la page, ou None si la liste est inchangée (cycle à ignorer)
         """
-        logger.info("=== RÉCUPÉRATION DE TOUS LES NUMÉROS CENTRIS ===")
+        http_result = self.discover_http()
+        if http_result is not None:
+            stats['total_listings'] = len(http_result.centris_ids)
+            if self.page_unchanged(http_result.centris_ids, http_result.cards):
+                self.last_discovery_mode = 'http'
+                return None
+        else:
+            self.last_page_fingerprint = None
         
-        # Configurer Chrome (même config que scraper_with_list_info.py)
-        import platform
-        chrome_options = Options()
-        chrome_options.add_argument('--headless')
-        chrome_options.add_argument('--disable-gpu')
-        chrome_options.add_argument('--no-sandbox')
-        chrome_options.add_argument('--disable-dev-shm-usage')
-        chrome_options.add_argument('--window-size=1920,1080')
-        chrome_options.add_argument('--disable-blink-features=AutomationControlled')
-        chrome_options.add_experimental_option('excludeSwitches', ['enable-logging', 'enable-automation'])
-        chrome_options.add_experimental_option('useAutomationExtension', False)
-        
-        # Spécifier le chemin Chrome uniquement sur Linux
-        if platform.system() == 'Linux':
-            chrome_options.binary_location = "/usr/bin/google-chrome"
-
-        try:
-            driver = webdriver.Chrome(options=chrome_options)
-        except:
-            # Fallback avec service explicite
-            from selenium.webdriver.chrome.service import Service as ChromeService
-            service = ChromeService()
-            driver = webdriver.Chrome(service=service, options=chrome_options)
+        records = self.get_all_listing_ids(http_result)
+        current_ids = [record.centris_id for record in records]
+        stats['total_listings'] = len(current_ids)
+        if self.last_page_fingerprint is None and self.page_unchanged(current_ids, self.last_listing_cards):
+            return None
+        return records
+    
+    def get_all_listing_ids(self, http_result=None):
+        """
+        Récupère toutes les annonces de la page, avec les champs de leur carte
+        (date d'envoi, prix, statut) lus dans la même passe
+        
+        Args:
+            http_result: Découverte HTTP déjà faite pendant ce cycle (None = la faire ici si configurée)
+        
+        Returns:
+            list: ListingRecord, dans l'ordre de la page (self.last_listing_cards contient les cartes complètes)
+        """
+        logger.info("=== RÉCUPÉRATION DE TOUS LES NUMÉROS CENTRIS ===")
         
         listing_ids = []
+        self.last_listing_cards = {}
+        self.last_discovery_complete = True
+        
+        # Découverte HTTP sans navigateur (repli sur Selenium si le résultat semble incomplet)
+        result = http_result or self.discover_http()
+        if result is not None:
+            if result.complete:
+                self.last_discovery_mode = 'http'
+                self.last_listing_cards = result.cards
+                logger.info(f"✓ {len(result.centris_ids)} annonces trouvées par HTTP en {result.duration_s:.1f}s")
+                return listing_records(result.centris_ids, result.cards)
+            logger.warning(f"Découverte HTTP incomplète ({result.reason}), repli sur le navigateur")
         
         try:
-            logger.info(f"Chargement de la page: {self.url}")
-            driver.get(self.url)
-            time.sleep(5)
-            
-            # Faire défiler pour charger toutes les annonces
-            logger.info("Défilement pour charger toutes les annonces...")
-            last_height = driver.execute_script("return document.body.scrollHeight")
-            scroll_attempts = 0
-            max_scrolls = 10
-            
-            while scroll_attempts < max_scrolls:
-                driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
-                time.sleep(2)
-                
-                new_height = driver.execute_script("return document.body.scrollHeight")
-                if new_height == last_height:
-                    break
-                last_height = new_height
-                scroll_attempts += 1
-                logger.debug(f"Scroll {scroll_attempts}/{max_scrolls}...")
+            # Le navigateur de la session est réutilisé d'un cycle à l'autre
+            # La liste est triée de la plus récente à la plus ancienne : défilement arrêté
+            # dès que les dernières cartes chargées n'ont plus rien à scraper, sauf s'il faut
+            # encore une liste complète comme référence pour la découverte HTTP
+            needs_reference = self.http_discovery is not None and not self.http_discovery.reference_count
+            stop = DiscoveryStop(self.scraped_ids, self.min_date, self.discovery_stop_run) \
+                if self.discovery_stop_run and not needs_reference else None
+            driver = self.session.prepare_discovery(stop=stop)
+            if driver is None:
+                logger.error("Navigateur indisponible, découverte impossible")
+                return []
             
             # Extraire tous les numéros Centris
-            import re
+            parse_start = time.time()
             page_source = driver.page_source
             
             # Pattern pour trouver "No Centris : XXXXXXXX"
             pattern = r'No Centris\s*:\s*(\d+)'
             matches = re.findall(pattern, page_source)
             
-            listing_ids = list(set(matches))  # Enlever les doublons
+            listing_ids = list(dict.fromkeys(matches))  # Enlever les doublons (ordre de la page conservé)
             
-            logger.info(f"✓ {len(listing_ids)} annonces trouvées sur la page")
+            self.last_listing_cards = {
+                cid: parse_list_card_text(container.get_text())
+                for container, cid in find_property_containers(page_source)
+            }
+            self.metrics.record('list_parse', time.time() - parse_start)
+            self.last_discovery_mode = 'selenium'
+            self.last_discovery_complete = self.session.last_scroll_complete
+            if self.http_discovery is not None and self.last_discovery_complete and listing_ids:
+                # Référence pour juger de la complétude des prochaines découvertes HTTP
+                self.http_discovery.reference_count = len(listing_ids)
+                self.scraped_ids.set_meta('http_reference_count', str(len(listing_ids)))
+            
+            logger.info(f"✓ {len(listing_ids)} annonces trouvées sur la page"
+                        + ("" if self.last_discovery_complete else " (haut de la liste)"))
             
         except Exception as e:
             logger.error(f"Erreur lors de la récupération des IDs: {e}", exc_info=True)
-        finally:
-            driver.quit()
+            self.session.recycle("erreur pendant la découverte")
         
-        return listing_ids
+        return listing_records(listing_ids, self.last_listing_cards)
+    
+    def filter_old_listings(self, records):
+        """
+        Marque en bloc comme scrapées les annonces dont la carte est antérieure à min_date
+        (aucun navigateur n'est ouvert pour elles ; une carte sans date reste vérifiée au scraping)
+        
+        Args:
+            records: ListingRecord de la découverte
+            
+        Returns:
+            int: Nombre d'annonces écartées
+        """
+        old = self.scraped_ids.mark_before(records, self.min_date)
+        if old:
+            logger.info(f"{len(old)} annonce(s) antérieure(s) au {self.min_date} écartée(s) dès la découverte "
+                        f"(marquées comme scrapées)")
+        return len(old)
     
     def identify_new_listings(self, current_ids):
         """
@@ -173,8 +282,13 @@ class CentrisMonitor:
         Returns:
             list: Liste des nouveaux IDs à scraper
         """
-        new_ids = [id for id in current_ids if id not in self.scraped_ids]
+        dead_ids = self.scrape_queue.dead_ids()
+        new_ids = [id for id in current_ids if id not in self.scraped_ids and id not in dead_ids]
         
+        abandoned = sum(1 for id in current_ids if id in dead_ids and id not in self.scraped_ids)
+        if abandoned:
+            logger.info(f"{abandoned} annonce(s) abandonnée(s) après échecs répétés ignorée(s) "
+                        f"(voir python scrape_queue.py)")
         if new_ids:
             logger.info(f"{len(new_ids)} nouvelle(s) annonce(s) détectée(s):")
             for id in new_ids:
@@ -184,51 +298,179 @@ class CentrisMonitor:
         
         return new_ids
     
+    def identify_changed_listings(self, current_ids):
+        """
+        Identifie les annonces déjà scrapées dont la carte a changé depuis leur scraping
+        (empreinte prix / statut / date d'envoi différente de celle enregistrée)
+        
+        Les annonces sans empreinte (scrapées avant la détection des changements)
+        reçoivent celle de leur carte actuelle, sans être rescrapées.
+        
+        Args:
+            current_ids: Liste des IDs actuellement sur la page
+            
+        Returns:
+            list: IDs à rescraper
+        """
+        if not self.refresh_changed:
+            return []
+        
+        cards = {cid: self.last_listing_cards[cid] for cid in current_ids if cid in self.last_listing_cards}
+        changed_ids, updated = self.scraped_ids.find_changed(cards, self.min_date)
+        
+        if updated:
+            self.scraped_ids.set_fingerprints(updated)
+            logger.info(f"Empreinte de la carte enregistrée pour {len(updated)} annonce(s) déjà scrapée(s)")
+        if changed_ids:
+            logger.info(f"{len(changed_ids)} annonce(s) modifiée(s) à rescraper:")
+            for centris_id in changed_ids:
+                card = self.last_listing_cards[centris_id]
+                logger.info(f"  - No Centris: {centris_id} (prix {card.get('prix')}, statut {card.get('statut') or 'aucun'})")
+        
+        return changed_ids
+    
+    def plan_scraping(self, current_ids, new_ids, changed_ids, stats, limit=None):
+        """
+        Dépose les annonces nouvelles et modifiées dans la file de scraping et
+        retourne celles à scraper pendant ce cycle, les plus prioritaires d'abord
+        (date d'envoi récente, « Nouvelle annonce », « Nouveau prix »)
+        
+        Les annonces en échec attendent leur prochain essai ; stats['new_listings']
+        ne compte que les annonces vues pour la première fois.
+        
+        Args:
+            current_ids: Liste des IDs actuellement sur la page
+            new_ids: Annonces jamais scrapées (identify_new_listings)
+            changed_ids: Annonces dont la carte a changé (identify_changed_listings)
+            stats: Statistiques du cycle (new_listings, queue_pending, dead_letters mis à jour)
+            limit: Nombre max d'annonces pour ce cycle (None ou 0 = toutes)
+            
+        Returns:
+            list: IDs à scraper, dans l'ordre de priorité
+        """
+        cards = self.last_listing_cards
+        if current_ids and self.last_discovery_complete:
+            # Annonces disparues de la page (vendues, retirées) : plus rien à scraper
+            self.scrape_queue.prune(current_ids)
+        first_seen = self.scrape_queue.push_many(
+            [(cid, cards.get(cid), 'new') for cid in new_ids] +
+            [(cid, cards.get(cid), 'changed') for cid in changed_ids]
+        )
+        stats['new_listings'] = len(set(first_seen) & set(new_ids))
+        
+        ready = self.scrape_queue.take(limit)
+        stats['queue_pending'] = self.scrape_queue.pending_count()
+        stats['dead_letters'] = self.scrape_queue.dead_count()
+        waiting = stats['queue_pending'] - len(ready)
+        if waiting:
+            logger.info(f"File de scraping: {len(ready)} annonce(s) pour ce cycle, {waiting} en attente "
+                        f"({'limite de ' + str(limit) + ' par cycle, ' if limit else ''}nouvel essai différé)")
+        return ready
+    
+    def page_unchanged(self, centris_ids, cards):
+        """
+        Calcule l'empreinte de la liste et la compare à celle du dernier cycle terminé
+        
+        Args:
+            centris_ids: Numéros Centris de la liste
+            cards: {numero_centris: informations de la carte}
+            
+        Returns:
+            bool: True si la liste est identique (cycle sans travail à faire)
+        """
+        self.last_page_fingerprint = page_fingerprint(centris_ids, cards) if centris_ids else None
+        if not self.skip_unchanged_page or self.last_page_fingerprint is None:
+            return False
+        return self.scraped_ids.get_meta('page_fingerprint') == self.last_page_fingerprint
+    
+    def remember_page(self, current_ids):
+        """
+        Enregistre l'empreinte de la liste si toutes ses annonces sont à jour ;
+        sinon l'efface, pour que le prochain cycle reprenne les annonces en attente
+        (échec, limite par cycle, annonce modifiée non rescrapée). Les annonces
+        rejetées (nouvelles ou modifiées) ne sont plus en attente.
+        
+        Args:
+            current_ids: Liste des IDs actuellement sur la page
+        """
+        if not self.skip_unchanged_page or self.last_page_fingerprint is None:
+            return
+        dead_ids = self.scrape_queue.dead_ids()
+        pending = [cid for cid in current_ids if cid not in self.scraped_ids and cid not in dead_ids]
+        if self.refresh_changed and not pending:
+            cards = {cid: self.last_listing_cards[cid] for cid in current_ids if cid in self.last_listing_cards}
+            pending = [cid for cid in self.scraped_ids.find_changed(cards, self.min_date)[0] if cid not in dead_ids]
+        self.scraped_ids.set_meta('page_fingerprint', None if pending else self.last_page_fingerprint)
+    
+    def skipped_cycle_stats(self, stats, cycle_start):
+        """
+        Termine un cycle sans changement sur la liste (une seule ligne de log)
+        
+        Returns:
+            dict: Statistiques du cycle, marqué 'skipped'
+        """
+        stats['skipped'] = True
+        stats['discovery'] = self.last_discovery_mode
+        stats['duration_s'] = round(time.time() - cycle_start, 1)
+        self.finish_metrics(stats)
+        logger.info(
+            f"Cycle ignoré: liste inchangée ({stats['total_listings']} annonces, "
+            f"empreinte {self.last_page_fingerprint[:12]}, {stats['duration_s']:.1f}s)"
+        )
+        return stats
+    
+    def finish_metrics(self, stats):
+        """
+        Relève les durées des étapes du cycle, les journalise (de la plus coûteuse à la moins
+        coûteuse) et les exporte : une ligne dans metrics_file, le fichier metrics_prom_file
+        
+        Args:
+            stats: Statistiques du cycle (duration_s, scraped_successfully, errors)
+        """
+        self.metrics.extend(self.session.take_spans())
+        for line in self.metrics.format_summary():
+            logger.info(f"Étape {line}")
+        duration_s = stats.get('duration_s')
+        if duration_s is None:
+            duration_s = round(time.time() - self.metrics.started_at, 1)
+        listings = stats.get('scraped_successfully', 0) + stats.get('errors', 0)
+        try:
+            if self.metrics_log is not None:
+                self.metrics_log.append(self.metrics.to_record(duration_s=duration_s, listings=listings,
+                                                               skipped=stats.get('skipped', False)))
+            if self.metrics_prom_file:
+                self.metrics.write_prometheus(self.metrics_prom_file, duration_s=duration_s, listings=listings)
+        except Exception as e:
+            logger.warning(f"Impossible d'exporter les durées des étapes: {e}")
+    
     def send_to_api(self, property_data):
         """
-        Envoie les données d'une propriété à l'API
+        Dépose les données d'une propriété dans la file d'envoi API.
+        L'envoi a lieu en arrière-plan ; une annonce non acceptée par l'API
+        reste dans la file (même après un redémarrage) jusqu'au prochain essai.
         
         Args:
             property_data: Dictionnaire contenant les données de la propriété
             
         Returns:
-            bool: True si l'envoi a réussi, False sinon
+            bool: True si l'annonce est dans la file (ou si aucune API n'est configurée), False sinon
         """
-        if not self.api_endpoint:
+        if self.api_outbox is None:
             logger.info("Pas d'endpoint API configuré, données non envoyées")
             return True
         
         try:
-            centris_id = property_data.get('numero_centris', 'N/A')
-            logger.info(f"Envoi des données à l'API - Centris #{centris_id}")
-            
-            headers = {
-                'Content-Type': 'application/json',
-                'User-Agent': 'CentrisMonitor/1.0'
-            }
-            
-            response = requests.post(
-                self.api_endpoint,
-                json=property_data,
-                headers=headers,
-                timeout=30
-            )
-            
-            if response.status_code in [200, 201]:
-                logger.info(f"✓ Données envoyées avec succès (Status: {response.status_code}) - Centris #{centris_id}")
-                return True
-            else:
-                logger.warning(f"API a retourné le status {response.status_code} - Centris #{centris_id}")
-                logger.debug(f"Réponse: {response.text[:200]}")
-                return False
-                
-        except requests.exceptions.Timeout:
-            logger.error(f"Timeout lors de l'envoi à l'API - Centris #{centris_id}")
-            return False
+            self.api_outbox.enqueue(property_data)
+            return True
         except Exception as e:
-            logger.error(f"Erreur lors de l'envoi à l'API - Centris #{centris_id}: {e}")
+            centris_id = property_data.get('numero_centris', 'N/A')
+            logger.error(f"Impossible d'ajouter l'annonce {centris_id} à la file d'envoi API: {e}", exc_info=True)
             return False
     
+    def api_pending_count(self):
+        """Nombre d'annonces en attente dans la file d'envoi API"""
+        return self.api_outbox.pending_count() if self.api_outbox is not None else 0
+    
     def scrape_new_listing(self, centris_id):
         """
         Scrape une nouvelle annonce par son numéro Centris.
@@ -244,82 +486,71 @@ class CentrisMonitor:
         logger.info(f"SCRAPING DE L'ANNONCE No Centris: {centris_id}")
         logger.info("="*80)
         
-        try:
-            # Utiliser le scraper existant
-            scraper = CentrisScraperWithListInfo()
-            scraper.init_driver()
-            
-            # Charger la page
-            logger.info("Chargement de la page...")
-            scraper.driver.get(self.url)
-            time.sleep(5)
-            
-            # Faire défiler pour charger toutes les annonces
-            logger.info("Défilement de la page...")
-            scraper.driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
-            time.sleep(2)
-            scraper.driver.execute_script("window.scrollTo(0, 0);")
-            time.sleep(1)
-            
-            # ÉTAPE 1: Extraire d'abord les infos de la LISTE (rapide, pas de clic)
-            logger.info(f"Extraction rapide des infos liste pour Centris ID: {centris_id}")
-            list_info = scraper.extract_info_from_list_by_centris_id(centris_id)
-            
-            # ÉTAPE 2: FILTRE DE DATE AVANT le scraping complet (économise le temps des photos)
-            date_envoi = list_info.get('date_envoi')
-            if date_envoi:
-                try:
-                    date_trop_ancienne = date_envoi < self.min_date
-                except Exception as e:
-                    logger.warning(f"Impossible de comparer la date: {e}")
-                    date_trop_ancienne = False
-                
-                if date_trop_ancienne:
-                    logger.info(f"Annonce trop ancienne: {date_envoi} < {self.min_date} (filtré AVANT scraping détail)")
-                    logger.info(f"Annonce {centris_id} ignorée")
-                    
-                    # Marquer comme scrapée pour éviter la boucle infinie
-                    try:
-                        if isinstance(self.scraped_ids, list):
-                            self.scraped_ids = {str(sid): "" for sid in self.scraped_ids}
-                        self.scraped_ids[centris_id] = datetime.now().isoformat()
-                        self.save_scraped_ids()
-                        logger.info(f"✓ Annonce {centris_id} marquée comme scrapée (filtrée)")
-                    except Exception as e:
-                        logger.warning(f"Erreur sauvegarde scraped_ids: {e}")
-                    
-                    scraper.close()
-                    return None
-                else:
-                    logger.info(f"Date valide: {date_envoi} >= {self.min_date} → scraping complet")
-            else:
-                logger.warning(f"Pas de date_envoi trouvée pour {centris_id}, scraping complet par précaution")
-            
-            # ÉTAPE 3: Scraping complet (détails + photos) seulement si date OK
-            logger.info(f"Scraping complet par Centris ID: {centris_id}")
-            property_data = scraper.scrape_property_by_centris_id(centris_id, skip_photos=self.skip_photos)
-            
-            # Vérifier que le numéro Centris correspond bien
-            if property_data:
-                scraped_centris = property_data.get('numero_centris')
-                if scraped_centris and scraped_centris != centris_id:
-                    logger.error(f"Numéro Centris ne correspond pas! Attendu: {centris_id}, Obtenu: {scraped_centris}")
-                    logger.error(f"Données rejetées pour éviter de mélanger les propriétés")
-                    scraper.close()
-                    return None
-                else:
-                    logger.debug(f"Numéro Centris vérifié: {scraped_centris}")
-            
-            scraper.close()
-            return property_data
+        status, property_data = self.session.scrape_listing(centris_id, self.min_date, skip_photos=self.skip_photos)
+        
+        if status == 'filtered':
+            # Marquer comme scrapée pour éviter la boucle infinie
+            self.mark_filtered(centris_id)
+            return None
+        
+        return property_data if status == 'ok' else None
+    
+    def iter_scrape(self, centris_ids, delay=0, stats=None):
+        """
+        Scrape les annonces une à une et renvoie chacune dès qu'elle est terminée
+        (voir scrape_stream.stream_listings) : l'annonce suivante n'est scrapée que
+        lorsque le consommateur a traité la précédente, et pas après request_stop().
+        
+        Args:
+            centris_ids: Numéros Centris à scraper, dans l'ordre
+            delay: Pause minimale entre deux annonces (secondes), temps du consommateur compris
+            stats: Compteurs du flux (scrape_stream.new_stream_stats)
             
+        Yields:
+            tuple: (centris_id, données de la propriété ou None si erreur ou filtrée)
+        """
+        return stream_listings(centris_ids, self.scrape_new_listing, delay=delay, cancel=self.stop_event, stats=stats)
+    
+    def request_stop(self):
+        """Demande l'arrêt : l'annonce en cours se termine, les suivantes restent dans la file de scraping"""
+        self.stop_event.set()
+    
+    def mark_scraped(self, centris_id):
+        """
+        Marque une annonce comme scrapée, avec l'empreinte de sa carte dans la liste
+        
+        Args:
+            centris_id: Numéro Centris de l'annonce
+        """
+        fingerprint = card_fingerprint(self.last_listing_cards.get(centris_id))
+        self.scraped_ids.mark(centris_id, datetime.now().isoformat(), fingerprint)
+        self.scrape_queue.done(centris_id)
+    
+    def mark_failed(self, centris_id, error=None):
+        """
+        Enregistre l'échec du scraping d'une annonce (nouvel essai différé, abandon après max_attempts échecs)
+        
+        Args:
+            centris_id: Numéro Centris de l'annonce
+            error: Description de l'erreur
+        """
+        try:
+            self.scrape_queue.failed(centris_id, error or "échec du scraping")
         except Exception as e:
-            logger.error(f"Erreur scraping annonce {centris_id}: {e}", exc_info=True)
-            try:
-                scraper.close()
-            except:
-                pass
-            return None
+            logger.warning(f"Erreur sauvegarde de la file de scraping: {e}")
+    
+    def mark_filtered(self, centris_id):
+        """
+        Marque une annonce filtrée par date comme scrapée (elle ne sera plus proposée)
+        
+        Args:
+            centris_id: Numéro Centris de l'annonce
+        """
+        try:
+            self.mark_scraped(centris_id)
+            logger.info(f"✓ Annonce {centris_id} marquée comme scrapée (filtrée)")
+        except Exception as e:
+            logger.warning(f"Erreur sauvegarde scraped_ids: {e}")
     
     def run_monitoring_cycle(self):
         """
@@ -339,58 +570,87 @@ class CentrisMonitor:
             'new_listings': 0,
             'scraped_successfully': 0,
             'sent_to_api': 0,
-            'errors': 0
+            'errors': 0,
+            'changed_listings': 0
         }
         
-        # 1. Récupérer tous les IDs actuels
-        current_ids = self.get_all_listing_ids()
-        stats['total_listings'] = len(current_ids)
+        cycle_start = time.time()
+        self.session.begin_cycle()
+        self.metrics = CycleMetrics()
+        
+        # 1. Récupérer toutes les annonces de la page (cycle ignoré si la liste est inchangée),
+        #    écarter celles antérieures à min_date
+        records = self.discover_page(stats)
+        if records is None:
+            return self.skipped_cycle_stats(stats, cycle_start)
+        current_ids = [record.centris_id for record in records]
+        stats['filtered_by_date'] = self.filter_old_listings(records)
         
-        # 2. Identifier les nouvelles annonces
+        # 2. Identifier les nouvelles annonces, puis les annonces modifiées (rescrapées à la suite)
         new_ids = self.identify_new_listings(current_ids)
         stats['new_listings'] = len(new_ids)
+        changed_ids = self.identify_changed_listings(current_ids)
+        stats['changed_listings'] = len(changed_ids)
+        new_ids = self.plan_scraping(current_ids, new_ids, changed_ids, stats)
         
-        # 3. Scraper chaque nouvelle annonce
-        for centris_id in new_ids:
+        # 3. Scraper chaque annonce de la file, la plus prioritaire d'abord ; chaque résultat
+        #    est sauvegardé et déposé dans la file d'envoi API dès qu'il est prêt
+        stream_stats = new_stream_stats()
+        for centris_id, property_data in self.iter_scrape(new_ids, delay=5, stats=stream_stats):
             try:
-                # Scraper l'annonce
-                property_data = self.scrape_new_listing(centris_id)
-                
                 if property_data:
                     stats['scraped_successfully'] += 1
                     
                     # Sauvegarder dans un fichier individuel
                     filename = f"property_{centris_id}.json"
-                    with open(filename, 'w', encoding='utf-8') as f:
-                        json.dump(property_data, f, indent=2, ensure_ascii=False)
+                    with self.metrics.span('local_write', centris_id):
+                        with open(filename, 'w', encoding='utf-8') as f:
+                            json.dump(property_data, f, indent=2, ensure_ascii=False)
+                        self.property_store.save(property_data)
                     logger.info(f"✓ Données sauvegardées dans {filename}")
                     
                     # Envoyer à l'API
-                    if self.send_to_api(property_data):
+                    with self.metrics.span('api_send', centris_id):
+                        sent = self.send_to_api(property_data)
+                    if sent:
                         stats['sent_to_api'] += 1
                     
                     # Marquer comme scrapé
-                    self.scraped_ids[centris_id] = datetime.now().isoformat()
-                    self.save_scraped_ids()
+                    self.mark_scraped(centris_id)
                     
                 else:
                     stats['errors'] += 1
+                    self.mark_failed(centris_id)
                     
             except Exception as e:
                 logger.error(f"Erreur lors du traitement de {centris_id}: {e}", exc_info=True)
                 stats['errors'] += 1
-            
-            # Pause entre chaque scraping pour ne pas surcharger le serveur
-            time.sleep(5)
+                self.mark_failed(centris_id, str(e))
+        stats['interrupted'] = stream_stats['cancelled']
+        
+        self.remember_page(current_ids)
+        stats['session'] = self.session.end_cycle()
+        stats['discovery'] = self.last_discovery_mode
+        stats['api_pending'] = self.api_pending_count()
+        stats['duration_s'] = round(time.time() - cycle_start, 1)
+        self.finish_metrics(stats)
         
         # Résumé
         summary_stats = {
             'Total annonces sur la page': stats['total_listings'],
             'Nouvelles annonces': stats['new_listings'],
+            'Écartées par date (sans navigateur)': stats['filtered_by_date'],
+            'Annonces modifiées (rescrapées)': stats['changed_listings'],
             'Scrapées avec succès': stats['scraped_successfully'],
-            'Envoyées à l\'API': stats['sent_to_api'],
+            'Ajoutées à la file d\'envoi API': stats['sent_to_api'],
+            'En attente d\'envoi API': stats['api_pending'],
             'Erreurs': stats['errors'],
-            'Total annonces en mémoire': len(self.scraped_ids)
+            'File de scraping (en attente)': stats['queue_pending'],
+            'Abandonnées (rejets)': stats['dead_letters'],
+            'Total annonces en mémoire': len(self.scraped_ids),
+            'Temps économisé (navigateur partagé)': f"{stats['session']['time_saved_s']:.0f}s",
+            'Défilements de la liste évités': stats['session']['scroll_steps_saved'],
+            'Découverte': stats['discovery'] or 'échec'
         }
         log_scraping_stats(logger, summary_stats)
         
@@ -417,15 +677,34 @@ class CentrisMonitor:
                 
                 self.run_monitoring_cycle()
                 
+                if self.stop_event.is_set():
+                    logger.info("Arrêt du monitoring demandé")
+                    break
                 logger.info(f"Prochain cycle dans {interval_minutes} minutes...")
                 logger.info(f"Appuyez sur Ctrl+C pour arrêter le monitoring")
                 
-                time.sleep(interval_minutes * 60)
+                if self.stop_event.wait(interval_minutes * 60):
+                    logger.info("Arrêt du monitoring demandé")
+                    break
                 
         except KeyboardInterrupt:
             logger.info("Arrêt du monitoring demandé par l'utilisateur")
             logger.info(f"Total de {cycle_number} cycles exécutés")
             logger.info(f"{len(self.scraped_ids)} annonces en mémoire")
+        finally:
+            self.close_session()
+    
+    def close_session(self):
+        """
+        Ferme le navigateur partagé du moniteur
+        """
+        self.session.close()
+        if self.http_discovery is not None:
+            self.http_discovery.close()
+        if self.api_outbox is not None:
+            # Les annonces non envoyées restent dans la file pour le prochain lancement
+            self.api_outbox.stop()
+            self.api_client.close()
 
 
 def main():
@@ -446,7 +725,10 @@ def main():
     
     # Option 1: Exécuter un seul cycle
     logger.info("=== MODE: CYCLE UNIQUE ===")
-    monitor.run_monitoring_cycle()
+    try:
+        monitor.run_monitoring_cycle()
+    finally:
+        monitor.close_session()
     
     # Option 2: Monitoring continu (décommenter pour activer)
     # logger.info("=== MODE: MONITORING CONTINU ===")
@@ -10,8 +10,15 @@ import time
 import json
 import os
 import glob
+import signal
 from datetime import datetime, timedelta
 from scraper_monitor import CentrisMonitor
+from scrape_stream import new_stream_stats
+from api_client import normalize_for_api
+from scraper_worker_pool import ScraperWorkerPool, get_worker_count
+from cycle_stats_log import CycleStatsLog
+from cycle_metrics import CycleMetrics
+from monitoring_scheduler import AdaptiveScheduler, CycleLock
 from logger_config import setup_logger, log_scraping_stats
 
 # Configuration du logger (doit être fait en premier)
@@ -26,12 +33,43 @@ try:
         API_ENDPOINT,
         API_HEADERS,
         API_TIMEOUT,
+        API_RETRIES,
+        API_OUTBOX_FILE,
+        API_OUTBOX_INTERVAL,
+        API_BATCH_SIZE,
+        API_BATCH_FLUSH_INTERVAL,
+        API_BATCH_ENDPOINT,
         MATRIX_URL,
         MONITORING_INTERVAL,
+        ADAPTIVE_SCHEDULING,
+        MONITORING_INTERVAL_MIN,
+        MONITORING_INTERVAL_MAX,
+        MONITORING_JITTER_S,
+        SCHEDULER_HISTORY_DAYS,
+        CYCLE_LOCK_FILE,
         STORAGE_FILE,
+        SCRAPED_IDS_DB,
+        PROPERTY_DB,
+        REFRESH_CHANGED_LISTINGS,
+        SCRAPE_QUEUE_DB,
+        SCRAPE_MAX_ATTEMPTS,
+        SCRAPE_RETRY_DELAY,
+        SKIP_UNCHANGED_PAGE,
+        STATS_LOG_FILE,
+        STATS_LOG_MAX_BYTES,
+        STATS_LOG_BACKUP_COUNT,
+        CYCLE_METRICS_FILE,
+        CYCLE_METRICS_PROM_FILE,
         DELAY_BETWEEN_LISTINGS,
         SAVE_JSON_LOCALLY,
         MAX_LISTINGS_PER_CYCLE,
+        BROWSER_RECYCLE_AFTER,
+        SCRAPER_WORKERS,
+        SCRAPER_WORKERS_PER_HOST,
+        PANEL_READY_TIMEOUT,
+        PANEL_QUIET_MS,
+        DISCOVERY_MODE,
+        DISCOVERY_STOP_RUN,
         AUTO_CLEANUP_ENABLED,
         CLEANUP_DAY,
         CLEANUP_HOUR,
@@ -54,14 +92,37 @@ class CentrisProductionMonitor(CentrisMonitor):
             url=MATRIX_URL,
             api_endpoint=API_ENDPOINT,
             storage_file=STORAGE_FILE,
+            ids_db_file=SCRAPED_IDS_DB,
+            property_db_file=PROPERTY_DB,
+            refresh_changed=REFRESH_CHANGED_LISTINGS,
+            discovery_stop_run=DISCOVERY_STOP_RUN,
+            queue_db_file=SCRAPE_QUEUE_DB,
+            max_attempts=SCRAPE_MAX_ATTEMPTS,
+            retry_delay=SCRAPE_RETRY_DELAY,
+            skip_unchanged_page=SKIP_UNCHANGED_PAGE,
             min_date=min_date,
-            skip_photos=skip_photos
+            skip_photos=skip_photos,
+            recycle_after=BROWSER_RECYCLE_AFTER,
+            panel_ready_timeout=PANEL_READY_TIMEOUT,
+            panel_quiet_ms=PANEL_QUIET_MS,
+            discovery_mode=DISCOVERY_MODE,
+            api_headers=API_HEADERS,
+            api_timeout=API_TIMEOUT,
+            api_retries=API_RETRIES,
+            outbox_file=API_OUTBOX_FILE,
+            outbox_interval=API_OUTBOX_INTERVAL,
+            batch_size=API_BATCH_SIZE,
+            batch_interval=API_BATCH_FLUSH_INTERVAL,
+            batch_endpoint=API_BATCH_ENDPOINT,
+            metrics_file=CYCLE_METRICS_FILE,
+            metrics_prom_file=CYCLE_METRICS_PROM_FILE
         )
         self.api_headers = API_HEADERS
         self.api_timeout = API_TIMEOUT
         self.delay_between_listings = DELAY_BETWEEN_LISTINGS
         self.save_json_locally = SAVE_JSON_LOCALLY
         self.max_listings_per_cycle = MAX_LISTINGS_PER_CYCLE
+        self.worker_count = get_worker_count(SCRAPER_WORKERS, SCRAPER_WORKERS_PER_HOST)
         self.auto_cleanup_enabled = AUTO_CLEANUP_ENABLED
         self.cleanup_day = CLEANUP_DAY
         self.cleanup_hour = CLEANUP_HOUR
@@ -69,77 +130,17 @@ class CentrisProductionMonitor(CentrisMonitor):
         self.protected_files = PROTECTED_FILES
         self.auto_backup_scraped_ids = AUTO_BACKUP_SCRAPED_IDS
         self.last_cleanup_date = None
+        # Historique des cycles (l'ancien monitoring_stats.json est importé au premier lancement)
+        self.stats_log = CycleStatsLog(STATS_LOG_FILE, max_bytes=STATS_LOG_MAX_BYTES,
+                                       backup_count=STATS_LOG_BACKUP_COUNT, legacy_json='monitoring_stats.json')
+        self.cycle_lock = CycleLock(CYCLE_LOCK_FILE)
         
     def _normalize_for_api(self, data):
         """
         L'API exige des chaînes pour quartier, annee_construction, statut.
-        Convertit null en "" pour éviter les erreurs 400.
+        Voir api_client.normalize_for_api (retourne une copie normalisée).
         """
-        for key in ('quartier', 'annee_construction', 'statut'):
-            if key in data and data[key] is None:
-                data[key] = ""
-            elif key in data and not isinstance(data[key], str):
-                data[key] = str(data[key]) if data[key] is not None else ""
-        if '_donnees_liste' in data and isinstance(data['_donnees_liste'], dict):
-            for key in ('quartier', 'annee_construction', 'statut'):
-                if key in data['_donnees_liste'] and data['_donnees_liste'][key] is None:
-                    data['_donnees_liste'][key] = ""
-                elif key in data['_donnees_liste'] and not isinstance(data['_donnees_liste'][key], str):
-                    val = data['_donnees_liste'][key]
-                    data['_donnees_liste'][key] = str(val) if val is not None else ""
-        return data
-    
-    def send_to_api(self, property_data):
-        """
-        Envoie les données d'une propriété à l'API (version personnalisée)
-        """
-        if not self.api_endpoint or self.api_endpoint == "https://votre-api.com/api/properties":
-            logger.warning("API non configurée! Configurez config_api.py")
-            logger.info("Données sauvegardées localement uniquement")
-            return True
-        
-        try:
-            import requests
-            
-            # Copie pour ne pas modifier l'original, puis normalisation pour l'API
-            payload = dict(property_data)
-            if '_donnees_liste' in payload and isinstance(payload.get('_donnees_liste'), dict):
-                payload['_donnees_liste'] = dict(payload['_donnees_liste'])
-            payload = self._normalize_for_api(payload)
-            
-            centris_id = property_data.get('numero_centris', 'N/A')
-            logger.info(f"Envoi des données à l'API - Centris #{centris_id}")
-            logger.debug(f"Endpoint: {self.api_endpoint}")
-            
-            response = requests.post(
-                self.api_endpoint,
-                json=payload,
-                headers=self.api_headers,
-                timeout=self.api_timeout
-            )
-            
-            if response.status_code in [200, 201]:
-                logger.info(f"✓ Données envoyées avec succès (Status: {response.status_code}) - Centris #{centris_id}")
-                try:
-                    response_data = response.json()
-                    logger.debug(f"Réponse API: {response_data}")
-                except:
-                    pass
-                return True
-            else:
-                logger.warning(f"API a retourné le status {response.status_code} - Centris #{centris_id}")
-                logger.debug(f"Réponse: {response.text[:200]}")
-                return False
-                
-        except requests.exceptions.Timeout:
-            logger.error(f"Timeout lors de l'envoi à l'API (>{self.api_timeout}s) - Centris #{centris_id}")
-            return False
-        except requests.exceptions.ConnectionError:
-            logger.error(f"Impossible de se connecter à l'API: {self.api_endpoint}")
-            return False
-        except Exception as e:
-            logger.error(f"Erreur lors de l'envoi à l'API: {e}", exc_info=True)
-            return False
+        return normalize_for_api(data)
     
     def run_monitoring_cycle(self):
         """
@@ -150,145 +151,216 @@ class CentrisProductionMonitor(CentrisMonitor):
         logger.info(f"CYCLE DE MONITORING - {cycle_time}")
         logger.info("="*80)
         
+        cycle_start = time.time()
         stats = {
             'timestamp': datetime.now().isoformat(),
             'total_listings': 0,
             'new_listings': 0,
             'scraped_successfully': 0,
             'sent_to_api': 0,
-            'errors': 0
+            'errors': 0,
+            'changed_listings': 0
         }
         
+        self.session.begin_cycle()
+        self.metrics = CycleMetrics()
+        
         try:
-            # 1. Récupérer tous les IDs actuels
-            current_ids = self.get_all_listing_ids()
-            stats['total_listings'] = len(current_ids)
+            # 1. Récupérer toutes les annonces de la page (cycle ignoré si la liste est inchangée),
+            #    écarter celles antérieures à min_date
+            records = self.discover_page(stats)
+            if records is None:
+                self.save_stats(self.skipped_cycle_stats(stats, cycle_start))
+                return stats
+            current_ids = [record.centris_id for record in records]
+            stats['filtered_by_date'] = self.filter_old_listings(records)
             
-            # 2. Identifier les nouvelles annonces
+            # 2. Identifier les nouvelles annonces, puis les annonces modifiées (rescrapées à la suite)
             new_ids = self.identify_new_listings(current_ids)
             stats['new_listings'] = len(new_ids)
+            changed_ids = self.identify_changed_listings(current_ids)
+            stats['changed_listings'] = len(changed_ids)
+            # File de scraping : les plus prioritaires d'abord, limitées à MAX_LISTINGS_PER_CYCLE si configuré
+            new_ids = self.plan_scraping(current_ids, new_ids, changed_ids, stats, limit=self.max_listings_per_cycle)
             
-            # Limiter le nombre d'annonces si configuré
-            if self.max_listings_per_cycle > 0:
-                new_ids = new_ids[:self.max_listings_per_cycle]
-                if len(new_ids) < stats['new_listings']:
-                    logger.info(f"Limite à {self.max_listings_per_cycle} annonces pour ce cycle")
-            
-            # 3. Scraper chaque nouvelle annonce
-            for idx, centris_id in enumerate(new_ids, 1):
-                try:
-                    logger.info(f"[{idx}/{len(new_ids)}] Traitement de l'annonce {centris_id}")
-                    
-                    # Scraper l'annonce
-                    property_data = self.scrape_new_listing(centris_id)
-                    
-                    if property_data:
-                        stats['scraped_successfully'] += 1
-                        
-                        # Vérifier si on a les détails (panneau ouvert) ou seulement la liste
-                        has_detail = bool(
-                            property_data.get('donnees_financieres') or
-                            property_data.get('source') or
-                            (not self.skip_photos and property_data.get('photo_urls') and len(property_data.get('photo_urls', [])) > 0)
-                        )
-                        if not has_detail:
-                            logger.warning(
-                                f"Données détail manquantes pour Centris #{centris_id} "
-                                "(panneau non ouvert?) - non envoyé à l'API"
-                            )
-                        
-                        # Sauvegarder localement si configuré
-                        if self.save_json_locally:
-                            filename = f"property_{centris_id}.json"
-                            with open(filename, 'w', encoding='utf-8') as f:
-                                json.dump(property_data, f, indent=2, ensure_ascii=False)
-                            logger.info(f"✓ Données sauvegardées dans {filename}")
-                        
-                        # Envoyer à l'API seulement si on a les détails
-                        if has_detail and self.send_to_api(property_data):
-                            stats['sent_to_api'] += 1
-                        
-                        # Marquer comme scrapé
-                        if isinstance(self.scraped_ids, list):
-                            # Convertir la liste en dict si nécessaire
-                            self.scraped_ids = {str(sid): "" for sid in self.scraped_ids}
-                        self.scraped_ids[centris_id] = datetime.now().isoformat()
-                        self.save_scraped_ids()
-                        
-                    else:
+            # 3. Scraper chaque annonce de la file ; chaque résultat est sauvegardé et déposé
+            #    dans la file d'envoi API dès qu'il est prêt (la pause absorbe ce traitement)
+            if self.worker_count > 1 and len(new_ids) > 1:
+                self._scrape_with_worker_pool(new_ids, stats)
+            else:
+                stream_stats = new_stream_stats()
+                results = self.iter_scrape(new_ids, delay=self.delay_between_listings, stats=stream_stats)
+                for idx, (centris_id, property_data) in enumerate(results, 1):
+                    try:
+                        logger.info(f"[{idx}/{len(new_ids)}] Résultat de l'annonce {centris_id}")
+                        self._process_listing_result(centris_id, property_data, stats)
+                    except Exception as e:
+                        logger.error(f"Erreur lors du traitement de {centris_id}: {e}", exc_info=True)
                         stats['errors'] += 1
-                        logger.warning(f"Échec du scraping pour {centris_id}")
-                    
-                except Exception as e:
-                    logger.error(f"Erreur lors du traitement de {centris_id}: {e}", exc_info=True)
-                    stats['errors'] += 1
-                
-                # Pause entre chaque scraping
-                if idx < len(new_ids):
-                    logger.info(f"Pause de {self.delay_between_listings} secondes...")
-                    time.sleep(self.delay_between_listings)
+                        self.mark_failed(centris_id, str(e))
+                stats['interrupted'] = stream_stats['cancelled']
+                stats['consumer_s'] = round(stream_stats['consumer_s'], 1)
+            
+            self.remember_page(current_ids)
+            stats['session'] = self.session.end_cycle()
+            stats['discovery'] = self.last_discovery_mode
+            stats['api_pending'] = self.api_pending_count()
+            stats['duration_s'] = round(time.time() - cycle_start, 1)
+            self.finish_metrics(stats)
             
             # Résumé
             summary_stats = {
                 'Total annonces sur la page': stats['total_listings'],
                 'Nouvelles annonces': stats['new_listings'],
+                'Écartées par date (sans navigateur)': stats['filtered_by_date'],
+                'Annonces modifiées (rescrapées)': stats['changed_listings'],
                 'Scrapées avec succès': stats['scraped_successfully'],
-                'Envoyées à l\'API': stats['sent_to_api'],
+                'Ajoutées à la file d\'envoi API': stats['sent_to_api'],
+                'En attente d\'envoi API': stats['api_pending'],
                 'Erreurs': stats['errors'],
-                'Total annonces en mémoire': len(self.scraped_ids)
+                'File de scraping (en attente)': stats['queue_pending'],
+                'Abandonnées (rejets)': stats['dead_letters'],
+                'Total annonces en mémoire': len(self.scraped_ids),
+                'Temps économisé (navigateur partagé)': f"{stats['session']['time_saved_s']:.0f}s",
+                'Défilements de la liste évités': stats['session']['scroll_steps_saved'],
+                'Découverte': stats['discovery'] or 'échec'
             }
+            for worker_id, worker in stats.get('workers', {}).items():
+                summary_stats[f'Worker {worker_id}'] = (
+                    f"{worker['listings']} annonces, {worker['errors']} erreurs, {worker['listings_per_min']} annonces/min"
+                )
             log_scraping_stats(logger, summary_stats)
             
             # Sauvegarder les statistiques
             self.save_stats(stats)
+            self.log_rolling_stats()
             
             return stats
             
         except Exception as e:
             logger.critical(f"Erreur durant le cycle: {e}", exc_info=True)
             stats['errors'] += 1
+            stats['session'] = self.session.end_cycle()
+            stats['duration_s'] = round(time.time() - cycle_start, 1)
+            self.finish_metrics(stats)
+            self.save_stats(stats)
+            self.session.recycle("erreur durant le cycle")
             return stats
     
-    def save_stats(self, stats):
-        """Sauvegarde les statistiques du cycle"""
-        try:
-            stats_file = 'monitoring_stats.json'
+    def _process_listing_result(self, centris_id, property_data, stats):
+        """
+        Sauvegarde, envoie à l'API et marque comme scrapée une annonce
+        (toujours exécuté dans le processus principal). Une annonce sans les
+        détails du panneau est un échec : nouvel essai différé, rejet après max_attempts.
+        """
+        # Vérifier si on a les détails (panneau ouvert) ou seulement la liste
+        has_detail = bool(property_data) and bool(
+            property_data.get('donnees_financieres') or
+            property_data.get('source') or
+            (not self.skip_photos and property_data.get('photo_urls') and len(property_data.get('photo_urls', [])) > 0)
+        )
+        if property_data and not has_detail:
+            # Échec comme un panneau jamais ouvert : nouvel essai différé, rejet après max_attempts
+            stats['errors'] += 1
+            logger.warning(
+                f"Données détail manquantes pour Centris #{centris_id} "
+                "(panneau non ouvert?) - nouvel essai au prochain cycle"
+            )
+            self.mark_failed(centris_id, "données détail manquantes (panneau non ouvert?)")
+        elif property_data:
+            stats['scraped_successfully'] += 1
             
-            # Charger les stats existantes
-            if os.path.exists(stats_file):
-                with open(stats_file, 'r', encoding='utf-8') as f:
-                    all_stats = json.load(f)
-            else:
-                all_stats = []
+            # Sauvegarder localement si configuré
+            with self.metrics.span('local_write', centris_id):
+                if self.save_json_locally:
+                    filename = f"property_{centris_id}.json"
+                    with open(filename, 'w', encoding='utf-8') as f:
+                        json.dump(property_data, f, indent=2, ensure_ascii=False)
+                    logger.info(f"✓ Données sauvegardées dans {filename}")
+                self.property_store.save(property_data)
             
-            # Ajouter les nouvelles stats
-            all_stats.append(stats)
+            # Envoyer à l'API
+            with self.metrics.span('api_send', centris_id):
+                sent = self.send_to_api(property_data)
+            if sent:
+                stats['sent_to_api'] += 1
             
-            # Garder seulement les 100 derniers cycles
-            all_stats = all_stats[-100:]
+            # Marquer comme scrapé
+            self.mark_scraped(centris_id)
             
-            # Sauvegarder
-            with open(stats_file, 'w', encoding='utf-8') as f:
-                json.dump(all_stats, f, indent=2, ensure_ascii=False)
-                
+        else:
+            stats['errors'] += 1
+            logger.warning(f"Échec du scraping pour {centris_id}")
+            self.mark_failed(centris_id)
+    
+    def _scrape_with_worker_pool(self, new_ids, stats):
+        """
+        Scrape les nouvelles annonces avec plusieurs navigateurs en parallèle.
+        Les workers ne font que scraper; toutes les écritures restent ici.
+        """
+        pool = ScraperWorkerPool(
+            self.url,
+            self.worker_count,
+            self.min_date,
+            skip_photos=self.skip_photos,
+            recycle_after=self.session.recycle_after,
+            delay_between_listings=self.delay_between_listings,
+            session_options={
+                'panel_ready_timeout': self.session.panel_ready_timeout,
+                'panel_quiet_ms': self.session.panel_quiet_ms
+            }
+        )
+        
+        # Arrêt demandé : les workers terminent l'annonce en cours, dont le résultat est encore traité ici
+        for idx, (centris_id, status, property_data) in enumerate(pool.scrape(new_ids, cancel=self.stop_event), 1):
+            try:
+                logger.info(f"[{idx}/{len(new_ids)}] Résultat reçu pour l'annonce {centris_id} ({status})")
+                if status == 'filtered':
+                    self.mark_filtered(centris_id)
+                self._process_listing_result(centris_id, property_data if status == 'ok' else None, stats)
+            except Exception as e:
+                logger.error(f"Erreur lors du traitement de {centris_id}: {e}", exc_info=True)
+                stats['errors'] += 1
+                self.mark_failed(centris_id, str(e))
+        stats['interrupted'] = pool.cancelled
+        
+        stats['workers'] = pool.worker_stats
+        self.metrics.extend(pool.spans)
+    
+    def save_stats(self, stats):
+        """Ajoute les statistiques du cycle au journal (une ligne, sans réécrire l'historique)"""
+        try:
+            self.stats_log.append(stats)
         except Exception as e:
             logger.warning(f"Impossible de sauvegarder les stats: {e}")
     
+    def log_rolling_stats(self, hours=24):
+        """Journalise les débits des dernières heures (lus dans le journal des cycles)"""
+        try:
+            rolling = self.stats_log.aggregate_last(hours)
+        except Exception as e:
+            logger.warning(f"Impossible de lire le journal des cycles: {e}")
+            return
+        mean_cycle = f"{rolling['mean_cycle_s']:.0f}s" if rolling['mean_cycle_s'] is not None else "n/d"
+        logger.info(
+            f"Dernières {hours}h: {rolling['cycles']} cycle(s), {rolling['listings_per_hour']} annonce(s)/h, "
+            f"{rolling['errors_per_hour']} erreur(s)/h, cycle moyen {mean_cycle}"
+        )
+    
     def backup_scraped_ids(self):
         """
-        Crée une sauvegarde du fichier scraped_properties.json
+        Crée une sauvegarde des IDs scrapés (export au format de scraped_properties.json)
         """
         if not self.auto_backup_scraped_ids:
             return
         
         try:
-            if os.path.exists(self.storage_file):
+            if len(self.scraped_ids):
                 # Créer un nom de fichier avec la date
                 backup_name = f"scraped_properties_backup_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
                 
-                # Copier le fichier
-                import shutil
-                shutil.copy2(self.storage_file, backup_name)
+                # Exporter la base
+                self.scraped_ids.export_json(backup_name)
                 
                 logger.info(f"Backup: Sauvegarde créée: {backup_name}")
                 
@@ -308,6 +380,7 @@ class CentrisProductionMonitor(CentrisMonitor):
     def cleanup_json_files(self):
         """
         Supprime les fichiers JSON des propriétés selon la configuration
+        (les annonces restent dans la base PROPERTY_DB)
         ⚠️ NE SUPPRIME JAMAIS scraped_properties.json
         """
         if not self.auto_cleanup_enabled:
@@ -334,6 +407,11 @@ class CentrisProductionMonitor(CentrisMonitor):
         self.backup_scraped_ids()
         
         try:
+            # Archiver dans la base les fichiers qui n'y sont pas encore (avant la mise en place de la base)
+            imported = self.property_store.import_json_files()
+            for json_file, error in imported['errors']:
+                logger.warning(f"Import impossible de {json_file}: {error}")
+            
             # Trouver tous les fichiers property_*.json
             pattern = "property_*.json"
             json_files = glob.glob(pattern)
@@ -399,54 +477,107 @@ class CentrisProductionMonitor(CentrisMonitor):
         except Exception as e:
             logger.error(f"Erreur durant le nettoyage: {e}", exc_info=True)
     
+    def update_schedule(self, scheduler):
+        """Réapprend les intervalles du planificateur sur l'historique des cycles"""
+        try:
+            scheduler.learn(self.stats_log.iter_entries(since=datetime.now() - timedelta(days=SCHEDULER_HISTORY_DAYS)))
+        except Exception as e:
+            logger.warning(f"Impossible de lire le journal des cycles pour la planification: {e}")
+            return
+        if scheduler.adaptive:
+            logger.info(f"Planification: {scheduler.summary()}")
+    
     def run_continuous_monitoring(self, interval_minutes=None):
         """
         Exécute le monitoring en continu
+        
+        Les cycles démarrent sur des créneaux de l'horloge ; avec ADAPTIVE_SCHEDULING,
+        l'intervalle de chaque heure suit le taux d'arrivée des nouvelles annonces.
+        Un cycle n'est pas lancé si un autre processus détient le verrou CYCLE_LOCK_FILE.
+        SIGTERM (ou request_stop) termine l'annonce en cours puis arrête le monitoring ;
+        les annonces non scrapées restent dans la file pour le prochain lancement.
         """
         if interval_minutes is None:
             interval_minutes = MONITORING_INTERVAL
+        scheduler = AdaptiveScheduler(
+            base_minutes=interval_minutes,
+            min_minutes=MONITORING_INTERVAL_MIN,
+            max_minutes=MONITORING_INTERVAL_MAX,
+            jitter_s=MONITORING_JITTER_S,
+            adaptive=ADAPTIVE_SCHEDULING
+        )
         
         logger.info("="*80)
         logger.info("DÉMARRAGE DU MONITORING CONTINU")
         logger.info(f"URL: {MATRIX_URL}")
         logger.info(f"API: {API_ENDPOINT}")
-        logger.info(f"Intervalle: {interval_minutes} minutes")
+        if ADAPTIVE_SCHEDULING:
+            logger.info(f"Intervalle: adaptatif entre {scheduler.min_minutes} et {scheduler.max_minutes} minutes "
+                        f"(référence {interval_minutes} minutes)")
+        else:
+            logger.info(f"Intervalle: {interval_minutes} minutes")
         if self.auto_cleanup_enabled:
             days = ['Lundi', 'Mardi', 'Mercredi', 'Jeudi', 'Vendredi', 'Samedi', 'Dimanche']
             logger.info(f"Nettoyage auto: {days[self.cleanup_day]} à {self.cleanup_hour}h")
         logger.info("="*80)
         
         cycle_number = 0
+        self.update_schedule(scheduler)
         
+        # SIGTERM (arrêt du service) : l'annonce en cours se termine, le cycle s'achève, puis arrêt
         try:
-            while True:
-                cycle_number += 1
-                logger.info(f">>> CYCLE #{cycle_number} <<<")
-                
-                # Vérifier si c'est l'heure du nettoyage
-                if self.auto_cleanup_enabled:
-                    self.cleanup_json_files()
-                
-                start_time = time.time()
-                
-                # Exécuter le cycle
-                stats = self.run_monitoring_cycle()
-                
-                elapsed_time = time.time() - start_time
+            signal.signal(signal.SIGTERM, lambda signum, frame: self.request_stop())
+        except ValueError:
+            # Pas dans le thread principal : arrêt par request_stop() uniquement
+            pass
+        
+        try:
+            while not self.stop_event.is_set():
+                if not self.cycle_lock.acquire():
+                    logger.warning(f"Cycle non lancé: un autre processus exécute déjà un cycle "
+                                   f"({CYCLE_LOCK_FILE}: {self.cycle_lock.holder()})")
+                else:
+                    try:
+                        cycle_number += 1
+                        logger.info(f">>> CYCLE #{cycle_number} <<<")
+                        
+                        # Vérifier si c'est l'heure du nettoyage
+                        if self.auto_cleanup_enabled:
+                            self.cleanup_json_files()
+                        
+                        start_time = time.time()
+                        
+                        # Exécuter le cycle
+                        stats = self.run_monitoring_cycle()
+                        
+                        elapsed_time = time.time() - start_time
+                        logger.info(f"Cycle terminé en {elapsed_time:.0f} secondes")
+                    finally:
+                        self.cycle_lock.release()
+                    self.update_schedule(scheduler)
+                if self.stop_event.is_set():
+                    break
                 
-                logger.info(f"Cycle terminé en {elapsed_time:.0f} secondes")
-                logger.info(f"Prochain cycle dans {interval_minutes} minutes...")
+                # Attendre le prochain créneau (la durée du cycle ne décale pas la cadence)
+                next_run = scheduler.next_run()
+                logger.info(f"Prochain cycle à {next_run.strftime('%H:%M:%S')} "
+                            f"(intervalle {scheduler.interval_for(datetime.now()):.0f} minutes)")
                 logger.info(f"Appuyez sur Ctrl+C pour arrêter le monitoring")
-                
-                # Attendre avant le prochain cycle
-                time.sleep(interval_minutes * 60)
+                self.stop_event.wait(max(0.0, (next_run - datetime.now()).total_seconds()))
+            
+            logger.info("Arrêt du monitoring demandé")
+            logger.info(f"Total de {cycle_number} cycles exécutés")
+            logger.info(f"{self.scrape_queue.pending_count()} annonce(s) restent dans la file de scraping")
+            logger.info("✓ Monitoring arrêté proprement")
                 
         except KeyboardInterrupt:
             logger.info("Arrêt du monitoring demandé par l'utilisateur")
             logger.info(f"Total de {cycle_number} cycles exécutés")
             logger.info(f"{len(self.scraped_ids)} annonces en mémoire")
             logger.info("✓ Monitoring arrêté proprement")
-
+        finally:
+            self.cycle_lock.release()
+            self.close_session()
 
 def main():
     """
@@ -474,8 +605,13 @@ def main():
         logger.info(f"✓ API configurée: {API_ENDPOINT}")
     
     logger.info(f"✓ URL Matrix: {MATRIX_URL}")
-    logger.info(f"✓ Intervalle: {MONITORING_INTERVAL} minutes")
-    logger.info(f"✓ Fichier de stockage: {STORAGE_FILE}")
+    if ADAPTIVE_SCHEDULING:
+        logger.info(f"✓ Intervalle: adaptatif, {MONITORING_INTERVAL_MIN}-{MONITORING_INTERVAL_MAX} minutes "
+                    f"(référence {MONITORING_INTERVAL} minutes)")
+    else:
+        logger.info(f"✓ Intervalle: {MONITORING_INTERVAL} minutes")
+    logger.info(f"✓ Fichier de stockage: {SCRAPED_IDS_DB}")
+    logger.info(f"✓ Navigateurs en parallèle: {get_worker_count(SCRAPER_WORKERS, SCRAPER_WORKERS_PER_HOST)}")
     logger.info(f"✓ Date minimale: 2026-02-10 (annonces antérieures ignorées)")
     
     # Créer le moniteur
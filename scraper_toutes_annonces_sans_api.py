@@ -8,7 +8,6 @@ Usage: python scraper_toutes_annonces_sans_api.py
 """
 
 import json
-import re
 import sys
 import time
 
@@ -18,7 +17,6 @@ except ImportError:
     print("Erreur: config_api.py introuvable")
     sys.exit(1)
 
-from bs4 import BeautifulSoup
 from scraper_with_list_info import CentrisScraperWithListInfo
 
 
@@ -43,24 +41,8 @@ def main():
         scraper.driver.execute_script("window.scrollTo(0, 0);")
         time.sleep(1)
 
-        html = scraper.driver.page_source
-        soup = BeautifulSoup(html, "html.parser")
-        all_text_blocks = soup.find_all(string=re.compile(r"No\s*Centris", re.IGNORECASE))
-
-        centris_to_index = {}
-        index = 0
-        for text_block in all_text_blocks:
-            parent = text_block.parent
-            if parent:
-                parent_text = parent.get_text()
-                match = re.search(r"No\s*Centris\s*[:\-]?\s*(\d+)", parent_text, re.IGNORECASE)
-                if match:
-                    found_id = match.group(1)
-                    if found_id not in centris_to_index:
-                        centris_to_index[found_id] = index
-                        index += 1
-
-        n = len(centris_to_index)
+        centris_ids = scraper.get_listing_index().centris_ids
+        n = len(centris_ids)
         if n == 0:
             print("[ERREUR] Aucune annonce trouvée sur la page")
             scraper.close()
@@ -68,13 +50,13 @@ def main():
 
         print(f"\n{n} annonce(s) trouvée(s) sur la page. Scraping sans photos, sans envoi API.\n")
 
+        # Chaque annonce est sauvegardée dès qu'elle est scrapée (rien n'est accumulé en mémoire)
         saved = 0
         errors = 0
-        for idx in range(n):
-            centris_id = next(id for id, i in centris_to_index.items() if i == idx)
-            print(f"\n--- Annonce {idx + 1}/{n} : No Centris {centris_id} ---")
-            try:
-                property_data = scraper.scrape_property_with_list_info(index=idx, skip_photos=True)
+        try:
+            for idx, (centris_id, property_data) in enumerate(
+                    scraper.iter_scrape(centris_ids, skip_photos=True, delay=2), 1):
+                print(f"\n--- Annonce {idx}/{n} : No Centris {centris_id} ---")
                 if property_data:
                     filename = f"property_{centris_id}.json"
                     with open(filename, "w", encoding="utf-8") as f:
@@ -84,13 +66,9 @@ def main():
                 else:
                     errors += 1
                     print(f"[WARNING] Aucune donnée pour {centris_id}")
-            except Exception as e:
-                errors += 1
-                print(f"[ERREUR] {centris_id}: {e}")
-
-            # Pause entre chaque annonce (sauf après la dernière)
-            if idx < n - 1:
-                time.sleep(2)
+        except KeyboardInterrupt:
+            # Les annonces déjà scrapées sont sauvegardées, aucune autre n'est ouverte
+            print(f"\n[INFO] Interrompu par l'utilisateur après {saved + errors}/{n} annonce(s)")
 
         scraper.close()
 
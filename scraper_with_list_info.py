@@ -6,11 +6,16 @@ from selenium import webdriver
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
-from bs4 import BeautifulSoup
 import json
 import re
 import requests
 from scraper_detail_complete import CentrisDetailScraperComplete
+from panel_readiness import start_panel_watch
+from listing_index import CentrisListingIndex, empty_list_data, find_property_containers
+from page_snapshot import new_snapshot_stats
+from scrape_stream import stream_listings
+from cycle_metrics import stage_timer
+from photo_resolver import GalleryPhotoResolver, extract_gallery_photo_urls, is_high_res
 
 
 class CentrisScraperWithListInfo(CentrisDetailScraperComplete):
@@ -24,35 +29,52 @@ class CentrisScraperWithListInfo(CentrisDetailScraperComplete):
         Returns:
             list: Liste de tuples (container, centris_id)
         """
-        html = self.driver.page_source
-        soup = BeautifulSoup(html, 'html.parser')
+        # Recherche en une passe (parseur lxml), voir listing_index.find_property_containers
+        return find_property_containers(self.driver.page_source)
+    
+    def get_listing_index(self):
+        """
+        Index des annonces de la liste (CentrisListingIndex).
+        Construit une seule fois par chargement de page : il n'est reconstruit
+        que si la liste affichée a changé (signature calculée dans le navigateur).
         
-        all_text_blocks = soup.find_all(string=re.compile(r'No\s*Centris', re.IGNORECASE))
+        Returns:
+            CentrisListingIndex: Index de la liste courante
+        """
+        if not hasattr(self, 'listing_index_stats'):
+            self.listing_index_stats = {'builds': 0, 'reused': 0}
         
-        results = []
-        seen_ids = set()
+        index = getattr(self, '_listing_index', None)
+        if index is not None and index.is_current(self.driver):
+            self.listing_index_stats['reused'] += 1
+            return index
         
-        for text_block in all_text_blocks:
-            parent = text_block.parent
-            for _ in range(8):
-                if parent:
-                    parent_text = parent.get_text()
-                    # Vérifier : contient un prix ($) ET un numéro Centris
-                    # Ne PAS filtrer par ville pour supporter Lévis, etc.
-                    if '$' in parent_text and 'No Centris' in parent_text:
-                        centris_match = re.search(r'No\s*Centris\s*[:\-]?\s*(\d+)', parent_text, re.IGNORECASE)
-                        if centris_match:
-                            cid = centris_match.group(1)
-                            if cid not in seen_ids:
-                                seen_ids.add(cid)
-                                results.append((parent, cid))
-                        break
-                    try:
-                        parent = parent.parent
-                    except:
-                        break
+        # Attendre que la page soit chargée et faire défiler pour rendre les éléments visibles
+        time.sleep(2)
+        self.driver.execute_script("window.scrollTo(0, 1000);")
+        time.sleep(1)
         
-        return results
+        index = CentrisListingIndex.build(self)
+        self._listing_index = index
+        self.listing_index_stats['builds'] += 1
+        print(f"[INDEX] Liste indexee: {len(index)} annonce(s)")
+        return index
+    
+    def is_list_restored(self):
+        """
+        Vérifie que la liste est de nouveau affichée après fermeture du panneau.
+        Si la liste a été indexée, elle doit être identique (mêmes numéros Centris, même ordre).
+        """
+        if not super().is_list_restored():
+            return False
+        index = getattr(self, '_listing_index', None)
+        if index is None or index.signature is None:
+            return True
+        return index.is_current(self.driver)
+    
+    def invalidate_listing_index(self):
+        """Force la reconstruction de l'index au prochain accès"""
+        self._listing_index = None
     
     def find_container_by_centris_id(self, centris_id):
         """
@@ -64,11 +86,71 @@ class CentrisScraperWithListInfo(CentrisDetailScraperComplete):
         Returns:
             tuple: (container, index) ou (None, -1) si non trouvé
         """
-        containers = self._find_property_containers()
-        for idx, (container, cid) in enumerate(containers):
-            if cid == centris_id:
-                return container, idx
-        return None, -1
+        entry = self.get_listing_index().get(centris_id)
+        if entry is None:
+            return None, -1
+        return entry['container'], entry['index']
+    
+    def _find_link_for_entry(self, entry):
+        """
+        Retrouve le lien cliquable d'une annonce de l'index à partir de son adresse.
+        Essaie d'abord le localisateur XPath de l'index (une seule requête WebDriver),
+        puis la recherche parmi tous les liens de propriété.
+        
+        Args:
+            entry: Entrée de CentrisListingIndex
+            
+        Returns:
+            WebElement du lien, ou None si introuvable
+        """
+        adresse_cible = entry['adresse_cible']
+        
+        if not adresse_cible:
+            print("[ERREUR] Impossible d'extraire l'adresse du conteneur")
+            return None
+        
+        print(f"Adresse cible: {adresse_cible}")
+        
+        # Localisateur direct (sans lire le texte de chaque lien)
+        try:
+            direct_links = self.driver.find_elements(By.XPATH, entry['link_xpath'])
+        except Exception:
+            direct_links = []
+        if direct_links:
+            print(f"Lien correspondant trouve (index): {direct_links[0].text[:60]}")
+            return direct_links[0]
+        
+        # Chercher TOUS les liens de propriété (inclure "Avenue" en entier pour 1re Avenue, etc.)
+        property_links = self.driver.find_elements(
+            By.XPATH, 
+            "//a[contains(text(), 'Boul.') or contains(text(), 'Boulevard') or contains(text(), 'Rue') or contains(text(), 'Av.') or contains(text(), 'Avenue') or contains(text(), 'Ch.') or contains(text(), 'Chemin') or contains(text(), 'Route') or contains(text(), 'Place') or contains(text(), 'Allée') or contains(text(), 'Rang') or contains(text(), 'Côte') or contains(text(), 'Montée')]"
+        )
+        
+        if not property_links:
+            all_links = self.driver.find_elements(By.TAG_NAME, "a")
+            property_links = [link for link in all_links 
+                            if link.text and len(link.text) > 10 
+                            and any(char.isdigit() for char in link.text)
+                            and ('Boul' in link.text or 'Rue' in link.text or 'Av.' in link.text or 'Avenue' in link.text or 'Ch.' in link.text or 'Chemin' in link.text or 'Route' in link.text or 'Place' in link.text or 'Allée' in link.text or 'Rang' in link.text or 'Côte' in link.text or 'Montée' in link.text)]
+        
+        print(f"Liens de proprietes trouves: {len(property_links)}")
+        
+        # Chercher le lien qui correspond à l'adresse cible
+        adresse_clean = re.sub(r'\s+', ' ', adresse_cible)
+        for link in property_links:
+            link_text = link.text.strip()
+            link_text_clean = re.sub(r'\s+', ' ', link_text)
+            
+            if adresse_clean in link_text_clean or link_text_clean in adresse_clean:
+                print(f"Lien correspondant trouve: {link_text[:60]}")
+                return link
+        
+        print(f"[ERREUR] Aucun lien ne correspond a l'adresse: {adresse_cible}")
+        # Debug : afficher les liens trouvés
+        print("Liens disponibles:")
+        for i, link in enumerate(property_links[:10]):
+            print(f"  {i}: {link.text[:60]}")
+        return None
     
     def click_on_property_by_centris_id(self, centris_id):
         """
@@ -82,73 +164,17 @@ class CentrisScraperWithListInfo(CentrisDetailScraperComplete):
         """
         try:
             print(f"\n=== Clic sur la propriete Centris #{centris_id} ===")
-            time.sleep(2)
             
-            container, idx = self.find_container_by_centris_id(centris_id)
+            entry = self.get_listing_index().get(centris_id)
             
-            if container is None:
+            if entry is None:
                 print(f"[ERREUR] Annonce Centris #{centris_id} non trouvée sur la page")
                 return False
             
-            container_text = container.get_text()
-            print(f"[OK] Conteneur trouvé (index {idx}) pour Centris #{centris_id}")
-            
-            # Extraire l'adresse du conteneur
-            adresse_patterns = [
-                # Pattern pour "2020 27e Rue" (numero civique + ordinal + type de rue)
-                r'(\d+(?:-\d+[A-Z]*)?\s+\d+(?:e|er|re|ère)\s+(?:Boul\.|Boulevard|Av\.|Avenue|Rue|Ch\.|Chemin|Route)[A-Za-zÀ-ÿ\'\-\.\s]*)(?=\n|Québec|Lévis|$)',
-                r'(\d+(?:-\d+[A-Z]*)*\s+(?:(?:1re|2e|1er)\s+)?(?:Boul\.|Boulevard|Av\.|Avenue|Rue|Ch\.|Chemin|Route)\s+[A-Za-zÀ-ÿ\'\-\.\s]*?)(?=\n|Québec|Lévis|$)',
-                r'(\d+[A-Z]*(?:-\d+[A-Z]*)*\s+(?:Boul\.|Boulevard|Av\.|Avenue|Rue|Ch\.|Chemin|Route)\s+[A-Za-zÀ-ÿ\'\-\.\s]+?)(?=\n|Québec|Lévis|$)',
-            ]
-            adresse_match = None
-            for pattern in adresse_patterns:
-                adresse_match = re.search(pattern, container_text, re.IGNORECASE | re.MULTILINE)
-                if adresse_match:
-                    break
-            
-            if not adresse_match:
-                print("[ERREUR] Impossible d'extraire l'adresse du conteneur")
-                return False
-            
-            adresse_cible = adresse_match.group(1).strip()
-            adresse_cible = re.sub(r'\s+', ' ', adresse_cible)
-            print(f"Adresse cible: {adresse_cible}")
-            
-            # Chercher les liens de propriété cliquables
-            self.driver.execute_script("window.scrollTo(0, 1000);")
-            time.sleep(1)
-            
-            property_links = self.driver.find_elements(
-                By.XPATH, 
-                "//a[contains(text(), 'Boul.') or contains(text(), 'Boulevard') or contains(text(), 'Rue') or contains(text(), 'Av.') or contains(text(), 'Avenue') or contains(text(), 'Ch.') or contains(text(), 'Chemin') or contains(text(), 'Route') or contains(text(), 'Place') or contains(text(), 'Allée') or contains(text(), 'Rang') or contains(text(), 'Côte') or contains(text(), 'Montée')]"
-            )
-            
-            if not property_links:
-                all_links = self.driver.find_elements(By.TAG_NAME, "a")
-                property_links = [link for link in all_links 
-                                if link.text and len(link.text) > 10 
-                                and any(char.isdigit() for char in link.text)
-                                and ('Boul' in link.text or 'Rue' in link.text or 'Av.' in link.text or 'Avenue' in link.text or 'Ch.' in link.text or 'Chemin' in link.text or 'Route' in link.text or 'Place' in link.text or 'Allée' in link.text or 'Rang' in link.text or 'Côte' in link.text or 'Montée' in link.text)]
-            
-            print(f"Liens de proprietes trouves: {len(property_links)}")
-            
-            # Chercher le lien qui correspond à l'adresse cible
-            target_link = None
-            for link in property_links:
-                link_text = link.text.strip()
-                link_text_clean = re.sub(r'\s+', ' ', link_text)
-                adresse_clean = re.sub(r'\s+', ' ', adresse_cible)
-                
-                if adresse_clean in link_text_clean or link_text_clean in adresse_clean:
-                    target_link = link
-                    print(f"Lien correspondant trouve: {link_text[:60]}")
-                    break
+            print(f"[OK] Conteneur trouvé (index {entry['index']}) pour Centris #{centris_id}")
             
+            target_link = self._find_link_for_entry(entry)
             if not target_link:
-                print(f"[ERREUR] Aucun lien ne correspond a l'adresse: {adresse_cible}")
-                print("Liens disponibles:")
-                for i, link in enumerate(property_links[:10]):
-                    print(f"  {i}: {link.text[:60]}")
                 return False
             
             # Cliquer sur le lien et attendre le panneau
@@ -160,6 +186,35 @@ class CentrisScraperWithListInfo(CentrisDetailScraperComplete):
             traceback.print_exc()
             return False
     
+    def _print_list_data(self, entry):
+        """Affiche les informations de la liste extraites pour une annonce de l'index"""
+        list_data = entry['list_data']
+        
+        print(f"\nTexte du conteneur (premiers 300 chars):")
+        print(entry['text'][:300])
+        print()
+        
+        if list_data['prix']:
+            print(f"[OK] Prix (liste): {list_data['prix']} $")
+        if list_data['adresse']:
+            print(f"[OK] Adresse (liste): {list_data['adresse']}")
+        if list_data['ville']:
+            print(f"[OK] Ville/Arrondissement (liste): {list_data['ville']} ({list_data['arrondissement']})")
+        if list_data['quartier']:
+            print(f"[OK] Quartier (liste): {list_data['quartier']}")
+        if list_data['type_propriete']:
+            print(f"[OK] Type (liste): {list_data['type_propriete']}")
+        if list_data['annee_construction']:
+            print(f"[OK] Annee (liste): {list_data['annee_construction']}")
+        if list_data['numero_centris']:
+            print(f"[OK] Numero Centris (liste): {list_data['numero_centris']}")
+        if list_data['date_envoi']:
+            print(f"[OK] Date d'envoi (liste): {list_data['date_envoi']}")
+        if list_data['statut']:
+            print(f"[OK] Statut (liste): {list_data['statut']}")
+        
+        print("\n=== Fin extraction liste ===")
+    
     def extract_info_from_list_by_centris_id(self, centris_id):
         """
         Extrait les informations de la liste pour une propriété identifiée par son numéro Centris.
@@ -172,153 +227,71 @@ class CentrisScraperWithListInfo(CentrisDetailScraperComplete):
         """
         print(f"\n=== Extraction des infos depuis la liste (Centris #{centris_id}) ===")
         
-        list_data = {
-            'prix': None,
-            'adresse': None,
-            'ville': None,
-            'arrondissement': None,
-            'quartier': None,
-            'type_propriete': None,
-            'annee_construction': None,
-            'numero_centris': None,
-            'date_envoi': None,
-            'statut': None
-        }
-        
         try:
-            time.sleep(2)
-            self.driver.execute_script("window.scrollTo(0, 1000);")
-            time.sleep(1)
+            entry = self.get_listing_index().get(centris_id)
             
-            container, idx = self.find_container_by_centris_id(centris_id)
-            
-            if container is None:
+            if entry is None:
                 print(f"[ATTENTION] Conteneur pour Centris #{centris_id} non trouvé")
-                return list_data
-            
-            container_text = container.get_text()
-            
-            print(f"\nTexte du conteneur (premiers 300 chars):")
-            print(container_text[:300])
-            print()
-            
-            # Extraire le prix
-            prix_match = re.search(r'([\d\s]+)\s*\$\s*(?:\+\s*(?:TPS|TVQ|taxes))?', container_text)
-            if prix_match:
-                list_data['prix'] = prix_match.group(1).replace(' ', '').strip()
-                print(f"[OK] Prix (liste): {list_data['prix']} $")
-            
-            # Extraire l'adresse
-            adresse_patterns = [
-                # Pattern pour "2020 27e Rue" (numero civique + ordinal + type de rue)
-                r'(\d+(?:-\d+[A-Z]*)?\s+\d+(?:e|er|re|ère)\s+(?:Boul\.|Boulevard|Av\.|Avenue|Rue|Ch\.|Chemin|Route)[A-Za-zÀ-ÿ\'\-\.\s]*)(?=\n|Québec|Lévis|$)',
-                r'(\d+(?:-\d+[A-Z]*)*\s+(?:(?:1re|2e|1er)\s+)?(?:Boul\.|Boulevard|Av\.|Avenue|Rue|Ch\.|Chemin|Route)\s+[A-Za-zÀ-ÿ\'\-\.\s]*?)(?=\n|Québec|Lévis|$)',
-                r'(\d+[A-Z]*(?:-\d+[A-Z]*)*\s+(?:Boul\.|Boulevard|Av\.|Avenue|Rue|Ch\.|Chemin|Route)\s+[A-Za-zÀ-ÿ\'\-\.\s]+?)(?=\n|Québec|Lévis|$)',
-                r'(\d+[A-Z]+-\d+[A-Z]+\s+(?:Boul\.|Av\.|Rue|Ch\.)\s+[^\n]+?)(?=\n)',
-                r'(\d+(?:-\d+)?\s+(?:Boul\.|Av\.|Rue|Ch\.)\s+[^\n]+?)(?=\n)',
-            ]
-            
-            for i, pattern in enumerate(adresse_patterns):
-                match = re.search(pattern, container_text, re.IGNORECASE | re.MULTILINE)
-                if match:
-                    adresse = match.group(1).strip()
-                    adresse = re.sub(r'\s+', ' ', adresse)
-                    adresse = adresse.strip()
-                    if len(adresse) > 5 and any(char.isdigit() for char in adresse):
-                        list_data['adresse'] = adresse
-                        print(f"[OK] Adresse (liste, pattern {i+1}): {list_data['adresse']}")
-                        break
-            
-            # Extraire ville et arrondissement - supporter Québec ET Lévis
-            ville_match = re.search(r'(Québec|Lévis)\s*\(([^)]+)\)', container_text)
-            if ville_match:
-                list_data['ville'] = ville_match.group(1).strip()
-                list_data['arrondissement'] = ville_match.group(2).strip()
-                print(f"[OK] Ville/Arrondissement (liste): {list_data['ville']} ({list_data['arrondissement']})")
-            
-            # Extraire le quartier
-            quartier_match = re.search(r'(?:dans le quartier|quartier)\s+([A-Za-zÀ-ÿ\s\-\/]+?)\s+construit', container_text, re.IGNORECASE)
-            if quartier_match:
-                list_data['quartier'] = quartier_match.group(1).strip()
-                print(f"[OK] Quartier (liste): {list_data['quartier']}")
-            
-            # Extraire le type de propriété
-            types = ['Quintuplex', 'Quadruplex', 'Triplex', 'Duplex', 'Maison', 'Condominium', 'Autre']
-            for type_prop in types:
-                if type_prop in container_text:
-                    list_data['type_propriete'] = type_prop
-                    print(f"[OK] Type (liste): {type_prop}")
-                    break
+                return empty_list_data()
             
-            # Extraire l'année de construction
-            year_match = re.search(r'construit\s+en\s+(\d{4})', container_text, re.IGNORECASE)
-            if year_match:
-                list_data['annee_construction'] = year_match.group(1)
-                print(f"[OK] Annee (liste): {list_data['annee_construction']}")
-            
-            # Extraire le numéro Centris
-            centris_match = re.search(r'No\s*Centris\s*[:\-]?\s*(\d+)', container_text, re.IGNORECASE)
-            if centris_match:
-                list_data['numero_centris'] = centris_match.group(1)
-                print(f"[OK] Numero Centris (liste): {list_data['numero_centris']}")
-            
-            # Extraire la date d'envoi
-            date_match = re.search(r"Date\s*d['']envoi\s*[:\-]?\s*(\d{4}-\d{2}-\d{2})", container_text)
-            if date_match:
-                list_data['date_envoi'] = date_match.group(1)
-                print(f"[OK] Date d'envoi (liste): {list_data['date_envoi']}")
-            
-            # Extraire le statut
-            if 'Nouvelle annonce' in container_text:
-                list_data['statut'] = 'Nouvelle annonce'
-                print(f"[OK] Statut (liste): Nouvelle annonce")
-            elif 'Nouveau prix' in container_text:
-                list_data['statut'] = 'Nouveau prix'
-                print(f"[OK] Statut (liste): Nouveau prix")
-            
-            print("\n=== Fin extraction liste ===")
+            self._print_list_data(entry)
+            return dict(entry['list_data'])
             
         except Exception as e:
             print(f"[ERREUR] Erreur extraction liste: {e}")
             import traceback
             traceback.print_exc()
         
-        return list_data
+        return empty_list_data()
     
-    def scrape_property_by_centris_id(self, centris_id, skip_photos=False):
+    def scrape_property_by_centris_id(self, centris_id, skip_photos=False, list_info=None):
         """
         Scrape complet d'une propriété identifiée par son numéro Centris.
         
         Args:
             centris_id: Numéro Centris de la propriété
             skip_photos: Si True, ne pas extraire les URLs des photos
+            list_info: Infos de la liste déjà extraites (évite une seconde extraction)
             
         Returns:
-            dict: Données complètes combinées
+            dict: Données complètes combinées, ou None si le panneau de détail ne s'est pas ouvert
         """
         print("\n" + "="*80)
         print(f"SCRAPING COMPLET PROPRIETE CENTRIS #{centris_id}" + (" [sans photos]" if skip_photos else ""))
         print("="*80)
         
+        # Durées des étapes de cette annonce (relevées par la session, voir cycle_metrics)
+        self.stage_times = {}
+        
         # Étape 1: Extraire les infos de la liste par Centris ID
-        list_info = self.extract_info_from_list_by_centris_id(centris_id)
+        if list_info is None:
+            with stage_timer(self.stage_times, 'list_parse'):
+                list_info = self.extract_info_from_list_by_centris_id(centris_id)
         
         # Étape 2: Cliquer sur la propriété par Centris ID
-        if not self.click_on_property_by_centris_id(centris_id):
+        with stage_timer(self.stage_times, 'panel_wait'):
+            clicked = self.click_on_property_by_centris_id(centris_id)
+        if not clicked:
+            # Les seules infos de la liste ne sont pas une annonce scrapée : échec (nouvel essai différé)
             print("[ERREUR] Impossible de cliquer sur la propriete")
-            return list_info  # Retourner au moins les infos de la liste
+            return None
         
-        # Étape 3: Extraire les détails du panneau
-        detail_info = self.extract_all_info_complete()
+        # Étape 3: Extraire les détails du panneau (un seul instantané pour détails et photos)
+        self.snapshot_stats = new_snapshot_stats()
+        with stage_timer(self.stage_times, 'detail_extraction'):
+            panel = self.capture_panel_snapshot()
+            detail_info = self.extract_all_info_complete(panel)
         
         # Étape 3.5: Photos
         if skip_photos:
             detail_info['photo_urls'] = []
             detail_info['nb_photos'] = 0
         else:
-            photo_urls = self.extract_photo_urls()
+            with stage_timer(self.stage_times, 'photos'):
+                photo_urls = self.extract_photo_urls(panel)
             detail_info['photo_urls'] = photo_urls
             detail_info['nb_photos'] = len(photo_urls)
+        self._print_snapshot_stats()
         
         # Étape 4: Fusionner les données (priorité aux infos de la liste)
         combined_data = detail_info.copy()
@@ -339,13 +312,111 @@ class CentrisScraperWithListInfo(CentrisDetailScraperComplete):
         
         # Fermer le panneau de détail
         print("\n=== Fermeture du panneau ===")
-        if self.close_panel():
+        with stage_timer(self.stage_times, 'panel_close'):
+            closed = self.close_panel()
+        if closed:
             print("[OK] Panneau ferme, retour a la liste")
         else:
             print("[WARNING] Echec fermeture panneau")
         
         return combined_data
     
+    def iter_scrape(self, centris_ids=None, skip_photos=False, delay=0, cancel=None, stats=None):
+        """
+        Scrape les propriétés une à une et renvoie chacune dès qu'elle est terminée,
+        sans accumuler les résultats (voir scrape_stream.stream_listings) :
+        la suivante n'est scrapée que lorsque le consommateur la demande.
+        
+        Args:
+            centris_ids: Numéros Centris à scraper (None = toutes les annonces de la liste affichée)
+            skip_photos: Si True, ne pas extraire les URLs des photos
+            delay: Pause minimale entre deux propriétés (secondes), temps du consommateur compris
+            cancel: Événement d'annulation (threading.Event), vérifié avant chaque propriété
+            stats: Compteurs du flux (scrape_stream.new_stream_stats)
+            
+        Yields:
+            tuple: (centris_id, données combinées ou None si erreur)
+        """
+        if centris_ids is None:
+            centris_ids = self.get_listing_index().centris_ids
+        yield from stream_listings(
+            centris_ids,
+            lambda centris_id: self.scrape_property_by_centris_id(centris_id, skip_photos=skip_photos),
+            delay=delay, cancel=cancel, stats=stats
+        )
+    
+    def _print_snapshot_stats(self):
+        """Affiche les transferts et analyses du HTML pour l'annonce courante"""
+        stats = self.snapshot_stats
+        print(f"[INFO] HTML: {stats['transfers']} transfert(s) ({stats['html_chars'] / 1024:.0f} Ko, "
+              f"{stats['transfer_s']:.2f}s), {stats['parses']} analyse(s) ({stats['parse_s']:.2f}s)")
+    
+    def get_photo_resolver(self):
+        """Résolveur HTTP des liens de galerie (créé au premier usage, session réutilisée)"""
+        resolver = getattr(self, '_photo_resolver', None)
+        if resolver is None:
+            resolver = GalleryPhotoResolver()
+            self._photo_resolver = resolver
+        return resolver
+    
+    def _resolve_gallery_photo_in_browser(self, gallery_url, current_window, i):
+        """
+        Ouvre un lien de galerie dans un nouvel onglet et en extrait la photo principale
+        (repli quand la résolution HTTP a échoué)
+        
+        Returns:
+            str: URL de la photo haute résolution, ou None
+        """
+        try:
+            # Ouvrir dans un nouvel onglet
+            self.driver.execute_script(f"window.open('{gallery_url}', '_blank');")
+            time.sleep(4)
+            
+            # Basculer vers le nouvel onglet
+            for window in self.driver.window_handles:
+                if window != current_window:
+                    self.driver.switch_to.window(window)
+                    break
+            
+            time.sleep(2)
+            
+            # Extraire l'image principale (grande, pas vignette) mspublic
+            gallery = self.capture_snapshot()
+            photo_url = None
+            for src in gallery.img_sources():
+                if is_high_res(src):
+                    photo_url = src
+                    print(f"    [OK] Photo {i+1}: {src[:80]}...")
+                    break
+            
+            if not photo_url:
+                print(f"    [WARN] Photo {i+1}: aucune URL mspublic haute résolution trouvée")
+            
+            # Fermer l'onglet et revenir
+            self.driver.close()
+            self.driver.switch_to.window(current_window)
+            time.sleep(1)
+            return photo_url
+            
+        except Exception as e:
+            print(f"    [ERREUR] Photo {i+1}: {e}")
+            # S'assurer de revenir à la fenêtre principale
+            try:
+                if len(self.driver.window_handles) > 1:
+                    self.driver.close()
+                self.driver.switch_to.window(current_window)
+            except:
+                pass
+            return None
+    
+    def close(self):
+        """Ferme le navigateur et les connexions HTTP de la galerie"""
+        resolver = getattr(self, '_photo_resolver', None)
+        if resolver is not None:
+            resolver.close()
+            self._photo_resolver = None
+        super().close()
+    
     def _click_and_wait_panel(self, target_link):
         """
         Clique sur un lien et attend que le panneau de détail s'ouvre.
@@ -359,59 +430,26 @@ class CentrisScraperWithListInfo(CentrisDetailScraperComplete):
         try:
             url_before = self.driver.current_url
             self.driver.execute_script("arguments[0].scrollIntoView({block: 'center'});", target_link)
-            time.sleep(0.5)
             
+            baseline = start_panel_watch(self.driver)
             target_link.click()
             print("[INFO] Clic effectue, attente de l'ouverture du panneau...")
             
-            panel_opened = False
-            for i in range(15):
-                time.sleep(0.5)
-                url_changed = '#' in self.driver.current_url and self.driver.current_url != url_before
-                try:
-                    html = self.driver.page_source
-                    panel_indicators = [
-                        'Caractéristiques du bâtiment',
-                        'Dimensions des pièces',
-                        'Revenus et dépenses',
-                        'Addenda',
-                        'Inclusions',
-                    ]
-                    panel_present = any(indicator in html for indicator in panel_indicators)
-                except:
-                    panel_present = False
-                
-                if url_changed or panel_present:
-                    print(f"[OK] Panneau detecte! (tentative {i+1})")
-                    if url_changed:
-                        print(f"     URL: {self.driver.current_url}")
-                    if panel_present:
-                        print(f"     Elements de detail detectes dans le DOM")
-                    time.sleep(3)
-                    panel_opened = True
-                    break
-            
-            if panel_opened:
+            # Retour dès que le contenu du panneau est présent et stable (MutationObserver)
+            if self.wait_for_panel_ready(url_before, baseline):
+                print(f"[OK] Panneau pret en {self.last_panel_ready_s:.2f}s")
+                if self.driver.current_url != url_before:
+                    print(f"     URL: {self.driver.current_url}")
                 return True
             
             # Fallback JavaScript
             print("[INFO] Tentative avec clic JavaScript...")
+            baseline = start_panel_watch(self.driver)
             self.driver.execute_script("arguments[0].click();", target_link)
             
-            for i in range(15):
-                time.sleep(0.5)
-                url_changed = '#' in self.driver.current_url and self.driver.current_url != url_before
-                try:
-                    html = self.driver.page_source
-                    panel_indicators = ['Caractéristiques du bâtiment', 'Dimensions des pièces', 'Revenus et dépenses', 'Addenda', 'Inclusions']
-                    panel_present = any(indicator in html for indicator in panel_indicators)
-                except:
-                    panel_present = False
-                
-                if url_changed or panel_present:
-                    print(f"[OK] Panneau detecte (JS)! (tentative {i+1})")
-                    time.sleep(3)
-                    return True
+            if self.wait_for_panel_ready(url_before, baseline):
+                print(f"[OK] Panneau pret (JS) en {self.last_panel_ready_s:.2f}s")
+                return True
             
             print("[ERREUR] Le panneau ne s'est pas ouvert apres toutes les tentatives")
             return False
@@ -425,87 +463,23 @@ class CentrisScraperWithListInfo(CentrisDetailScraperComplete):
     def click_on_property_by_index(self, index=0):
         """
         Version synchronisée avec extract_info_from_list()
-        Utilise la MÊME logique pour trouver les conteneurs
+        Utilise le MÊME index pour trouver les conteneurs
         """
         try:
             print(f"\n=== Clic sur la propriete #{index+1} ===")
-            time.sleep(2)
             
-            # Utiliser la méthode centralisée pour trouver les conteneurs
-            containers = self._find_property_containers()
-            property_containers = [c[0] for c in containers]
+            # Utiliser l'index de la liste (construit une seule fois par page)
+            listing_index = self.get_listing_index()
             
-            print(f"Conteneurs de proprietes trouves: {len(property_containers)}")
+            print(f"Conteneurs de proprietes trouves: {len(listing_index)}")
             
-            if not property_containers or index >= len(property_containers):
+            entry = listing_index.at(index)
+            if entry is None:
                 print("Index invalide ou aucun conteneur trouve")
                 return False
             
-            # Extraire l'adresse du conteneur à l'index voulu
-            target_container = property_containers[index]
-            container_text = target_container.get_text()
-            
-            # Patterns d'extraction d'adresse (priorité: adresse complète type "1209-1213 1re Avenue")
-            adresse_patterns = [
-                # Pattern pour "2020 27e Rue" (numero civique + ordinal + type de rue)
-                r'(\d+(?:-\d+[A-Z]*)?\s+\d+(?:e|er|re|ère)\s+(?:Boul\.|Boulevard|Av\.|Avenue|Rue|Ch\.|Chemin|Route)[A-Za-zÀ-ÿ\'\-\.\s]*)(?=\n|Québec|Lévis|$)',
-                # Pattern avec "1re"/"2e"/"1er" avant Avenue/Rue (ex: 1209-1213 1re Avenue)
-                r'(\d+(?:-\d+[A-Z]*)*\s+(?:(?:1re|2e|1er)\s+)?(?:Boul\.|Boulevard|Av\.|Avenue|Rue|Ch\.|Chemin|Route)\s+[A-Za-zÀ-ÿ\'\-\.\s]*?)(?=\n|Québec|Lévis|$)',
-                # Pattern standard (ex: 420 Boul. Pierre-Bertrand)
-                r'(\d+[A-Z]*(?:-\d+[A-Z]*)*\s+(?:Boul\.|Boulevard|Av\.|Avenue|Rue|Ch\.|Chemin|Route)\s+[A-Za-zÀ-ÿ\'\-\.\s]+?)(?=\n|Québec|Lévis|$)',
-            ]
-            adresse_match = None
-            for pattern in adresse_patterns:
-                adresse_match = re.search(pattern, container_text, re.IGNORECASE | re.MULTILINE)
-                if adresse_match:
-                    break
-            
-            if not adresse_match:
-                print("[ERREUR] Impossible d'extraire l'adresse du conteneur")
-                return False
-            
-            adresse_cible = adresse_match.group(1).strip()
-            adresse_cible = re.sub(r'\s+', ' ', adresse_cible)
-            print(f"Adresse cible: {adresse_cible}")
-            
-            # Chercher TOUS les liens de propriété (inclure "Avenue" en entier pour 1re Avenue, etc.)
-            self.driver.execute_script("window.scrollTo(0, 1000);")
-            time.sleep(1)
-            
-            property_links = self.driver.find_elements(
-                By.XPATH, 
-                "//a[contains(text(), 'Boul.') or contains(text(), 'Boulevard') or contains(text(), 'Rue') or contains(text(), 'Av.') or contains(text(), 'Avenue') or contains(text(), 'Ch.') or contains(text(), 'Chemin') or contains(text(), 'Route') or contains(text(), 'Place') or contains(text(), 'Allée') or contains(text(), 'Rang') or contains(text(), 'Côte') or contains(text(), 'Montée')]"
-            )
-            
-            if not property_links:
-                all_links = self.driver.find_elements(By.TAG_NAME, "a")
-                property_links = [link for link in all_links 
-                                if link.text and len(link.text) > 10 
-                                and any(char.isdigit() for char in link.text)
-                                and ('Boul' in link.text or 'Rue' in link.text or 'Av.' in link.text or 'Avenue' in link.text or 'Ch.' in link.text or 'Chemin' in link.text or 'Route' in link.text or 'Place' in link.text or 'Allée' in link.text or 'Rang' in link.text or 'Côte' in link.text or 'Montée' in link.text)]
-            
-            print(f"Liens de proprietes trouves: {len(property_links)}")
-            
-            # Chercher le lien qui correspond à l'adresse cible
-            target_link = None
-            for link in property_links:
-                link_text = link.text.strip()
-                # Nettoyer et normaliser
-                link_text_clean = re.sub(r'\s+', ' ', link_text)
-                adresse_clean = re.sub(r'\s+', ' ', adresse_cible)
-                
-                # Vérifier si c'est le bon lien
-                if adresse_clean in link_text_clean or link_text_clean in adresse_clean:
-                    target_link = link
-                    print(f"Lien correspondant trouve: {link_text[:60]}")
-                    break
-            
+            target_link = self._find_link_for_entry(entry)
             if not target_link:
-                print(f"[ERREUR] Aucun lien ne correspond a l'adresse: {adresse_cible}")
-                # Debug : afficher tous les liens trouvés
-                print("Liens disponibles:")
-                for i, link in enumerate(property_links[:10]):
-                    print(f"  {i}: {link.text[:60]}")
                 return False
             
             # Cliquer sur le lien et attendre le panneau
@@ -529,132 +503,35 @@ class CentrisScraperWithListInfo(CentrisDetailScraperComplete):
         """
         print(f"\n=== Extraction des infos depuis la liste (propriete #{index+1}) ===")
         
-        list_data = {
-            'prix': None,
-            'adresse': None,
-            'ville': None,
-            'arrondissement': None,
-            'quartier': None,
-            'type_propriete': None,
-            'annee_construction': None,
-            'numero_centris': None,
-            'date_envoi': None,
-            'statut': None
-        }
-        
         try:
-            # Attendre que la page soit chargée
-            time.sleep(2)
-            
-            # Faire défiler pour s'assurer que les éléments sont visibles
-            self.driver.execute_script("window.scrollTo(0, 1000);")
-            time.sleep(1)
-            
-            # Utiliser la méthode centralisée pour trouver les conteneurs
-            containers = self._find_property_containers()
-            property_containers = [c[0] for c in containers]
+            # Utiliser l'index de la liste (construit une seule fois par page)
+            listing_index = self.get_listing_index()
             
-            print(f"Conteneurs de proprietes trouves: {len(property_containers)}")
+            print(f"Conteneurs de proprietes trouves: {len(listing_index)}")
             
-            if not property_containers or index >= len(property_containers):
+            entry = listing_index.at(index)
+            if entry is None:
                 print(f"[ATTENTION] Conteneur {index} non trouve, extraction limitee")
-                return list_data
-            
-            # Extraire les infos du conteneur ciblé
-            target_container = property_containers[index]
-            container_text = target_container.get_text()
-            
-            print(f"\nTexte du conteneur (premiers 300 chars):")
-            print(container_text[:300])
-            print()
-            
-            # Extraire le prix (toujours en premier)
-            prix_match = re.search(r'([\d\s]+)\s*\$\s*(?:\+\s*(?:TPS|TVQ|taxes))?', container_text)
-            if prix_match:
-                list_data['prix'] = prix_match.group(1).replace(' ', '').strip()
-                print(f"[OK] Prix (liste): {list_data['prix']} $")
-            
-            # Extraire l'adresse (format: numéro + type de rue + nom)
-            adresse_patterns = [
-                # Pattern pour "2020 27e Rue" (numero civique + ordinal + type de rue)
-                r'(\d+(?:-\d+[A-Z]*)?\s+\d+(?:e|er|re|ère)\s+(?:Boul\.|Boulevard|Av\.|Avenue|Rue|Ch\.|Chemin|Route)[A-Za-zÀ-ÿ\'\-\.\s]*)(?=\n|Québec|Lévis|$)',
-                r'(\d+(?:-\d+[A-Z]*)*\s+(?:(?:1re|2e|1er)\s+)?(?:Boul\.|Boulevard|Av\.|Avenue|Rue|Ch\.|Chemin|Route)\s+[A-Za-zÀ-ÿ\'\-\.\s]*?)(?=\n|Québec|Lévis|$)',
-                r'(\d+[A-Z]*(?:-\d+[A-Z]*)*\s+(?:Boul\.|Boulevard|Av\.|Avenue|Rue|Ch\.|Chemin|Route)\s+[A-Za-zÀ-ÿ\'\-\.\s]+?)(?=\n|Québec|Lévis|$)',
-                r'(\d+[A-Z]+-\d+[A-Z]+\s+(?:Boul\.|Av\.|Rue|Ch\.)\s+[^\n]+?)(?=\n)',
-                r'(\d+(?:-\d+)?\s+(?:Boul\.|Av\.|Rue|Ch\.)\s+[^\n]+?)(?=\n)',
-            ]
-            
-            for i, pattern in enumerate(adresse_patterns):
-                match = re.search(pattern, container_text, re.IGNORECASE | re.MULTILINE)
-                if match:
-                    adresse = match.group(1).strip()
-                    adresse = re.sub(r'\s+', ' ', adresse)
-                    adresse = adresse.strip()
-                    if len(adresse) > 5 and any(char.isdigit() for char in adresse):
-                        list_data['adresse'] = adresse
-                        print(f"[OK] Adresse (liste, pattern {i+1}): {list_data['adresse']}")
-                        break
+                return empty_list_data()
             
-            # Extraire ville et arrondissement - supporter Québec ET Lévis
-            ville_match = re.search(r'(Québec|Lévis)\s*\(([^)]+)\)', container_text)
-            if ville_match:
-                list_data['ville'] = ville_match.group(1).strip()
-                list_data['arrondissement'] = ville_match.group(2).strip()
-                print(f"[OK] Ville/Arrondissement (liste): {list_data['ville']} ({list_data['arrondissement']})")
-            
-            # Extraire le quartier (format: "dans le quartier XXX construit")
-            quartier_match = re.search(r'(?:dans le quartier|quartier)\s+([A-Za-zÀ-ÿ\s\-\/]+?)\s+construit', container_text, re.IGNORECASE)
-            if quartier_match:
-                list_data['quartier'] = quartier_match.group(1).strip()
-                print(f"[OK] Quartier (liste): {list_data['quartier']}")
-            
-            # Extraire le type de propriété
-            types = ['Quintuplex', 'Quadruplex', 'Triplex', 'Duplex', 'Maison', 'Condominium', 'Autre']
-            for type_prop in types:
-                if type_prop in container_text:
-                    list_data['type_propriete'] = type_prop
-                    print(f"[OK] Type (liste): {type_prop}")
-                    break
-            
-            # Extraire l'année de construction
-            year_match = re.search(r'construit\s+en\s+(\d{4})', container_text, re.IGNORECASE)
-            if year_match:
-                list_data['annee_construction'] = year_match.group(1)
-                print(f"[OK] Annee (liste): {list_data['annee_construction']}")
-            
-            # Extraire le numéro Centris
-            centris_match = re.search(r'No\s*Centris\s*[:\-]?\s*(\d+)', container_text, re.IGNORECASE)
-            if centris_match:
-                list_data['numero_centris'] = centris_match.group(1)
-                print(f"[OK] Numero Centris (liste): {list_data['numero_centris']}")
-            
-            # Extraire la date d'envoi
-            date_match = re.search(r"Date\s*d['']envoi\s*[:\-]?\s*(\d{4}-\d{2}-\d{2})", container_text)
-            if date_match:
-                list_data['date_envoi'] = date_match.group(1)
-                print(f"[OK] Date d'envoi (liste): {list_data['date_envoi']}")
-            
-            # Extraire le statut (badge)
-            if 'Nouvelle annonce' in container_text:
-                list_data['statut'] = 'Nouvelle annonce'
-                print(f"[OK] Statut (liste): Nouvelle annonce")
-            elif 'Nouveau prix' in container_text:
-                list_data['statut'] = 'Nouveau prix'
-                print(f"[OK] Statut (liste): Nouveau prix")
-            
-            print("\n=== Fin extraction liste ===")
+            self._print_list_data(entry)
+            return dict(entry['list_data'])
             
         except Exception as e:
             print(f"[ERREUR] Erreur extraction liste: {e}")
             import traceback
             traceback.print_exc()
         
-        return list_data
+        return empty_list_data()
     
-    def extract_photo_urls(self):
+    def extract_photo_urls(self, snapshot=None):
         """
         Extrait les URLs de toutes les photos de la propriété
         
+        Args:
+            snapshot: Instantané du panneau déjà capturé pour l'extraction des détails
+                      (None = nouvelle capture)
+        
         Returns:
             list: Liste des URLs des photos
         """
@@ -665,21 +542,21 @@ class CentrisScraperWithListInfo(CentrisDetailScraperComplete):
         try:
             # AVANT de cliquer, extraire les URLs de photos depuis les balises <img> du panneau
             print("Extraction des URLs de photos depuis le panneau actuel...")
-            html_before = self.driver.page_source
-            soup_panel = BeautifulSoup(html_before, 'html.parser')
+            # Même instantané que l'extraction des détails : ni nouveau transfert ni nouvelle analyse
+            panel = snapshot or self.capture_snapshot()
+            html_before = panel.html
+            panel_img_sources = panel.img_sources()
             
             # Extraire les vraies URLs complètes depuis les balises <img> (inclut le paramètre exk)
             import re
             matrixmedia_img_urls = []
-            for img in soup_panel.find_all('img'):
-                src = img.get('src') or ''
+            for src in panel_img_sources:
                 if 'matrixmedia.centris.ca/MediaServer/GetMedia.ashx' in src:
                     matrixmedia_img_urls.append(src)
             
             # Aussi chercher les URLs mspublic dans les balises <img>
             mspublic_img_urls = []
-            for img in soup_panel.find_all('img'):
-                src = img.get('src') or ''
+            for src in panel_img_sources:
                 if 'mspublic.centris.ca/media.ashx' in src:
                     mspublic_img_urls.append(src)
             
@@ -730,55 +607,21 @@ class CentrisScraperWithListInfo(CentrisDetailScraperComplete):
                 
                 if gallery_links:
                     print(f"[OK] {len(gallery_links)} liens de galerie publique trouvés")
-                    current_window = self.driver.current_window_handle
                     
-                    for i, gallery_url in enumerate(gallery_links):
-                        print(f"  Navigation galerie photo {i+1}/{len(gallery_links)}...")
-                        try:
-                            # Ouvrir dans un nouvel onglet
-                            self.driver.execute_script(f"window.open('{gallery_url}', '_blank');")
-                            time.sleep(4)
-                            
-                            # Basculer vers le nouvel onglet
-                            for window in self.driver.window_handles:
-                                if window != current_window:
-                                    self.driver.switch_to.window(window)
-                                    break
-                            
-                            time.sleep(2)
-                            
-                            # Extraire l'image principale (grande, pas vignette) mspublic
-                            gallery_html = self.driver.page_source
-                            gallery_soup = BeautifulSoup(gallery_html, 'html.parser')
-                            found_photo = False
-                            for img in gallery_soup.find_all('img'):
-                                src = img.get('src') or ''
-                                if 'mspublic.centris.ca/media.ashx' in src:
-                                    # Vérifier que c'est la grande image (pas une vignette)
-                                    if 'w=100' not in src and 'h=75' not in src and 'w=50' not in src:
-                                        if src not in photo_urls:
-                                            photo_urls.append(src)
-                                            print(f"    [OK] Photo {i+1}: {src[:80]}...")
-                                            found_photo = True
-                                            break
-                            
-                            if not found_photo:
-                                print(f"    [WARN] Photo {i+1}: aucune URL mspublic haute résolution trouvée")
-                            
-                            # Fermer l'onglet et revenir
-                            self.driver.close()
-                            self.driver.switch_to.window(current_window)
-                            time.sleep(1)
-                            
-                        except Exception as e:
-                            print(f"    [ERREUR] Photo {i+1}: {e}")
-                            # S'assurer de revenir à la fenêtre principale
-                            try:
-                                if len(self.driver.window_handles) > 1:
-                                    self.driver.close()
-                                self.driver.switch_to.window(current_window)
-                            except:
-                                pass
+                    # Résolution HTTP en parallèle ; le navigateur ne sert que pour les liens non résolus
+                    resolved_urls = self.get_photo_resolver().resolve(gallery_links)
+                    current_window = None
+                    
+                    for i, (gallery_url, src) in enumerate(zip(gallery_links, resolved_urls)):
+                        if src:
+                            print(f"    [OK] Photo {i+1} (HTTP): {src[:80]}...")
+                        else:
+                            print(f"  Navigation galerie photo {i+1}/{len(gallery_links)}...")
+                            if current_window is None:
+                                current_window = self.driver.current_window_handle
+                            src = self._resolve_gallery_photo_in_browser(gallery_url, current_window, i)
+                        if src and src not in photo_urls:
+                            photo_urls.append(src)
                     
                     if photo_urls:
                         print(f"[OK] {len(photo_urls)} photos extraites depuis la galerie publique centris.ca")
@@ -803,10 +646,12 @@ class CentrisScraperWithListInfo(CentrisDetailScraperComplete):
             # Extraire le nombre total de photos depuis le bouton
             import re
             total_photos = 9  # Valeur par défaut
+            total_announced = False
             if photo_button:
                 match = re.search(r'\((\d+)\)', photo_button.text)
                 if match:
                     total_photos = int(match.group(1))
+                    total_announced = True
                     print(f"[OK] Nombre total de photos annoncé: {total_photos}")
             
             # Cliquer sur le bouton pour ouvrir la galerie (nouvelle page)
@@ -822,7 +667,8 @@ class CentrisScraperWithListInfo(CentrisDetailScraperComplete):
             
             # Vérifier si un nouvel onglet s'est ouvert
             all_windows = self.driver.window_handles
-            if len(all_windows) > 1:
+            gallery_in_new_tab = len(all_windows) > 1
+            if gallery_in_new_tab:
                 # Basculer vers le nouvel onglet
                 for window in all_windows:
                     if window != current_window:
@@ -834,14 +680,27 @@ class CentrisScraperWithListInfo(CentrisDetailScraperComplete):
                 # C'est la même fenêtre, peut-être un overlay/modal
                 print("[INFO] Galerie ouverte dans la même fenêtre")
             
-            # MÉTHODE: Naviguer manuellement dans le carrousel photo par photo
-            print(f"Navigation dans le carrousel pour extraire les {total_photos} photos...")
             high_res_photos = []
             
             # Attendre que la première photo se charge
             time.sleep(4)
             
-            for photo_num in range(total_photos):
+            # MÉTHODE 1: Liste complète lue dans les vignettes du carrousel (une seule analyse)
+            gallery = self.capture_snapshot()
+            for src in extract_gallery_photo_urls(gallery.soup):
+                if 'w=100' not in src and 'h=75' not in src and ('t=pi' in src or 'sm=' in src):
+                    if src not in high_res_photos:
+                        high_res_photos.append(src)
+            if high_res_photos and (not total_announced or len(high_res_photos) >= total_photos):
+                print(f"[OK] {len(high_res_photos)} photos lues dans le carrousel (sans navigation)")
+                carousel_steps = 0
+            else:
+                # MÉTHODE 2 (repli): Naviguer manuellement dans le carrousel photo par photo
+                print(f"Navigation dans le carrousel pour extraire les {total_photos} photos...")
+                high_res_photos = []
+                carousel_steps = total_photos
+            
+            for photo_num in range(carousel_steps):
                 print(f"  Extraction photo {photo_num + 1}/{total_photos}...")
                 
                 try:
@@ -849,15 +708,11 @@ class CentrisScraperWithListInfo(CentrisDetailScraperComplete):
                     time.sleep(2)
                     
                     # Extraire l'URL de la photo actuellement affichée
-                    html = self.driver.page_source
-                    soup = BeautifulSoup(html, 'html.parser')
+                    step = self.capture_snapshot()
                     
                     # Chercher l'image principale affichée (plusieurs patterns)
                     # La photo active est généralement dans un élément avec une classe spécifique
-                    all_imgs = soup.find_all('img')
-                    
-                    for img in all_imgs:
-                        src = img.get('src') or img.get('data-src')
+                    for src in step.img_sources(('src', 'data-src')):
                         if src and 'mspublic.centris.ca/media.ashx' in src:
                             # Vérifier que c'est une grande image (pas une vignette)
                             if 'w=100' not in src and 'h=75' not in src:
@@ -977,7 +832,8 @@ class CentrisScraperWithListInfo(CentrisDetailScraperComplete):
                     print(f"[INFO] Recherche de {total_photos_expected - len(filtered_urls)} photos supplémentaires dans le code source...")
                     
                     # Chercher dans le code source toutes les URLs de photos avec le pattern
-                    page_source = self.driver.page_source
+                    # (galerie dans un autre onglet : la page principale n'a pas changé depuis la capture)
+                    page_source = panel.html if gallery_in_new_tab else self.capture_snapshot().html
                     
                     # Pattern pour trouver les URLs complètes (avec & ou &amp;)
                     # Chercher toutes les URLs qui contiennent GetMedia.ashx
@@ -1065,20 +921,24 @@ class CentrisScraperWithListInfo(CentrisDetailScraperComplete):
         
         # Étape 2: Cliquer et extraire les détails
         if not self.click_on_property_by_index(index):
+            # Les seules infos de la liste ne sont pas une annonce scrapée : échec (nouvel essai différé)
             print("[ERREUR] Impossible de cliquer sur la propriete")
-            return list_info  # Retourner au moins les infos de la liste
+            return None
         
-        # Étape 3: Extraire les détails du panneau
-        detail_info = self.extract_all_info_complete()
+        # Étape 3: Extraire les détails du panneau (un seul instantané pour détails et photos)
+        self.snapshot_stats = new_snapshot_stats()
+        panel = self.capture_panel_snapshot()
+        detail_info = self.extract_all_info_complete(panel)
         
         # Étape 3.5: Extraire les URLs des photos (sauf si skip_photos=True pour gagner du temps)
         if skip_photos:
             detail_info['photo_urls'] = []
             detail_info['nb_photos'] = 0
         else:
-            photo_urls = self.extract_photo_urls()
+            photo_urls = self.extract_photo_urls(panel)
             detail_info['photo_urls'] = photo_urls
             detail_info['nb_photos'] = len(photo_urls)
+        self._print_snapshot_stats()
         
         # Étape 4: Fusionner les données (priorité aux infos de la liste pour certains champs)
         combined_data = detail_info.copy()
@@ -0,0 +1,252 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Pool de navigateurs en parallèle pour scraper les nouvelles annonces
+
+Chaque worker est un processus séparé avec son propre Chrome headless
+(CentrisDriverSession). Les workers tirent les numéros Centris d'une file
+partagée et renvoient les données au processus parent, qui reste le seul
+à écrire dans scraped_ids, les fichiers JSON et l'API.
+
+Arrêt demandé (événement `cancel` de scrape, ou SIGTERM reçu par un worker) :
+chaque worker termine l'annonce en cours, ne prend plus d'annonce dans la file,
+ferme son navigateur et le signale ; les résultats déjà envoyés sont tous remis.
+"""
+
+import multiprocessing
+import queue
+import signal
+import socket
+import time
+from logger_config import setup_logger
+
+logger = setup_logger('monitor', level='INFO')
+
+
+def get_worker_count(default=1, per_host=None):
+    """
+    Nombre de workers configuré pour la machine courante
+
+    Args:
+        default: Valeur par défaut (SCRAPER_WORKERS)
+        per_host: Dictionnaire {nom_d_hôte: nombre de workers} (SCRAPER_WORKERS_PER_HOST)
+
+    Returns:
+        int: Nombre de workers (minimum 1)
+    """
+    count = default
+    if per_host:
+        count = per_host.get(socket.gethostname(), default)
+    try:
+        return max(1, int(count))
+    except (TypeError, ValueError):
+        return 1
+
+
+def _worker_main(worker_id, url, min_date, skip_photos, recycle_after, delay, session_options,
+                 task_queue, result_queue, stop_event):
+    """
+    Boucle d'un worker : un navigateur, des annonces tirées de la file jusqu'à la sentinelle None
+    ou jusqu'à l'arrêt demandé (stop_event, vérifié avant chaque annonce)
+    """
+    # Import local : le module est chargé dans le processus enfant (spawn)
+    from driver_session import CentrisDriverSession
+
+    # SIGTERM (arrêt du service, terminate()) : finir l'annonce en cours puis fermer Chrome proprement
+    signal.signal(signal.SIGTERM, lambda signum, frame: stop_event.set())
+
+    session = CentrisDriverSession(url, recycle_after=recycle_after, **session_options)
+    try:
+        while not stop_event.is_set():
+            centris_id = task_queue.get()
+            if centris_id is None:
+                break
+
+            result_queue.put({'type': 'start', 'worker': worker_id, 'centris_id': centris_id})
+            start = time.time()
+            try:
+                status, data = session.scrape_listing(centris_id, min_date, skip_photos=skip_photos)
+            except Exception as e:
+                logger.error(f"Worker {worker_id}: erreur sur {centris_id}: {e}", exc_info=True)
+                status, data = 'failed', None
+
+            result_queue.put({
+                'type': 'result',
+                'worker': worker_id,
+                'centris_id': centris_id,
+                'status': status,
+                'data': data,
+                'duration_s': time.time() - start,
+                'spans': session.take_spans()
+            })
+
+            # Pause entre deux annonces (par worker) pour ne pas surcharger le serveur ; interrompue par l'arrêt
+            if delay and status != 'filtered':
+                stop_event.wait(delay)
+    finally:
+        session_stats = session.end_cycle()
+        session.close()
+        result_queue.put({'type': 'done', 'worker': worker_id, 'session': session_stats})
+
+
+class ScraperWorkerPool:
+    """
+    Exécute le scraping des annonces dans N processus Chrome indépendants
+    """
+
+    def __init__(self, url, worker_count, min_date, skip_photos=False, recycle_after=25,
+                 delay_between_listings=0, result_timeout=900, session_options=None, shutdown_timeout=30):
+        """
+        Args:
+            url: URL de la page Matrix Centris
+            worker_count: Nombre de processus (navigateurs) en parallèle
+            min_date: Date minimale des annonces (YYYY-MM-DD)
+            skip_photos: Si True, ne pas extraire les photos
+            recycle_after: Recyclage du navigateur de chaque worker après N annonces
+            delay_between_listings: Pause (secondes) entre deux annonces d'un même worker
+            result_timeout: Délai max (secondes) sans nouvelle d'un worker avant de l'abandonner
+            session_options: Options supplémentaires de CentrisDriverSession pour chaque worker
+            shutdown_timeout: Délai max (secondes) de fermeture des workers avant terminate()
+        """
+        self.url = url
+        self.worker_count = max(1, int(worker_count))
+        self.min_date = min_date
+        self.skip_photos = skip_photos
+        self.recycle_after = recycle_after
+        self.delay_between_listings = delay_between_listings
+        self.result_timeout = result_timeout
+        self.session_options = dict(session_options or {})
+        self.shutdown_timeout = shutdown_timeout
+        self.worker_stats = {}
+        # True si le dernier scrape() a été interrompu par l'événement d'annulation
+        self.cancelled = False
+        # Durées des étapes remontées par les workers (étape, secondes, numero_centris)
+        self.spans = []
+
+    def _new_worker_stats(self):
+        return {'listings': 0, 'errors': 0, 'busy_s': 0.0, 'listings_per_min': 0.0, 'session': None}
+
+    def scrape(self, centris_ids, cancel=None):
+        """
+        Scrape les annonces en parallèle et renvoie les résultats au fil de l'eau
+
+        Args:
+            centris_ids: Liste des numéros Centris à scraper
+            cancel: Événement d'annulation (threading.Event) : les workers terminent l'annonce en cours
+                et s'arrêtent ; les annonces jamais commencées ne sont pas renvoyées
+
+        Yields:
+            tuple: (centris_id, statut, données) avec statut 'ok', 'filtered', 'rejected' ou 'failed'
+        """
+        centris_ids = list(centris_ids)
+        self.worker_stats = {}
+        self.spans = []
+        self.cancelled = False
+        if not centris_ids:
+            return
+
+        worker_count = min(self.worker_count, len(centris_ids))
+        ctx = multiprocessing.get_context('spawn')
+        task_queue = ctx.Queue()
+        result_queue = ctx.Queue()
+        stop_event = ctx.Event()
+
+        for centris_id in centris_ids:
+            task_queue.put(centris_id)
+        for _ in range(worker_count):
+            task_queue.put(None)
+
+        processes = {}
+        for worker_id in range(1, worker_count + 1):
+            process = ctx.Process(
+                target=_worker_main,
+                args=(worker_id, self.url, self.min_date, self.skip_photos, self.recycle_after,
+                      self.delay_between_listings, self.session_options, task_queue, result_queue, stop_event),
+                name=f"centris-worker-{worker_id}",
+                daemon=True
+            )
+            process.start()
+            processes[worker_id] = process
+            self.worker_stats[worker_id] = self._new_worker_stats()
+
+        logger.info(f"Pool: {worker_count} navigateur(s) en parallèle pour {len(centris_ids)} annonce(s)")
+
+        in_flight = {}  # worker_id -> centris_id en cours
+        pending = set(centris_ids)
+        finished_workers = set()
+        pool_start = time.time()
+        last_activity = pool_start
+
+        try:
+            while len(finished_workers) < worker_count:
+                if cancel is not None and cancel.is_set() and not stop_event.is_set():
+                    logger.info("Pool: arrêt demandé, les workers terminent l'annonce en cours")
+                    stop_event.set()
+                    self.cancelled = True
+                try:
+                    message = result_queue.get(timeout=5)
+                except queue.Empty:
+                    message = None
+
+                if message is None:
+                    # Pas de message : repérer les workers morts (crash de Chrome/Python)
+                    dead = [w for w, p in processes.items() if w not in finished_workers and not p.is_alive()]
+                    if not dead and time.time() - last_activity > self.result_timeout:
+                        logger.error("Pool: aucun résultat reçu dans le délai imparti, arrêt des workers")
+                        dead = [w for w in processes if w not in finished_workers]
+                    for worker_id in dead:
+                        logger.warning(f"Pool: worker {worker_id} arrêté de façon inattendue")
+                        finished_workers.add(worker_id)
+                        centris_id = in_flight.pop(worker_id, None)
+                        if centris_id is not None:
+                            pending.discard(centris_id)
+                            self.worker_stats[worker_id]['errors'] += 1
+                            yield centris_id, 'failed', None
+                    continue
+
+                last_activity = time.time()
+                worker_id = message['worker']
+                if message['type'] == 'start':
+                    in_flight[worker_id] = message['centris_id']
+                elif message['type'] == 'result':
+                    in_flight.pop(worker_id, None)
+                    pending.discard(message['centris_id'])
+                    stats = self.worker_stats[worker_id]
+                    stats['listings'] += 1
+                    stats['busy_s'] += message['duration_s']
+                    if message['status'] == 'failed':
+                        stats['errors'] += 1
+                    self.spans.extend(message.get('spans', []))
+                    yield message['centris_id'], message['status'], message['data']
+                elif message['type'] == 'done':
+                    finished_workers.add(worker_id)
+                    self.worker_stats[worker_id]['session'] = message.get('session')
+        finally:
+            # Générateur fermé avant la fin : plus aucune annonce n'est commencée
+            stop_event.set()
+            # Les annonces restées dans la file ne seront pas lues : ne pas bloquer à la sortie sur leur envoi
+            task_queue.cancel_join_thread()
+            deadline = time.time() + self.shutdown_timeout
+            for worker_id, process in processes.items():
+                process.join(timeout=max(0.0, deadline - time.time()))
+                if process.is_alive():
+                    logger.warning(f"Pool: worker {worker_id} toujours actif après {self.shutdown_timeout}s, arrêt forcé")
+                    process.terminate()
+
+            elapsed_min = max((time.time() - pool_start) / 60, 1e-6)
+            for worker_id, stats in self.worker_stats.items():
+                stats['busy_s'] = round(stats['busy_s'], 1)
+                stats['listings_per_min'] = round(stats['listings'] / elapsed_min, 2)
+                logger.info(
+                    f"Pool: worker {worker_id} → {stats['listings']} annonce(s), {stats['errors']} erreur(s), "
+                    f"{stats['listings_per_min']} annonces/min"
+                )
+
+        if self.cancelled:
+            # Annonces jamais commencées : elles restent dans la file de scraping, sans compter d'échec
+            logger.info(f"Pool: {len(pending)} annonce(s) non commencée(s) à cause de l'arrêt")
+            return
+
+        # Annonces jamais traitées (tous les workers sont morts)
+        for centris_id in pending:
+            yield centris_id, 'failed', None
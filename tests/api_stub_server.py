@@ -0,0 +1,99 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+API de scraping factice pour les tests (envoi unitaire et envoi par lots)
+
+- POST d'un objet JSON : une annonce, réponse 201
+- POST d'un tableau JSON (gzip accepté) : un lot, réponse 200 avec le
+  résultat de chaque annonce {"results": [{"numero_centris", "status", "error"}]}
+
+Les statuts peuvent être programmés par numéro Centris (ApiStubHandler.statuses)
+et toutes les requêtes reçues sont enregistrées (ApiStubHandler.requests).
+
+Usage (serveur local pour essayer le moniteur, API_ENDPOINT = http://127.0.0.1:8765/robot/api/scraping):
+    python tests/api_stub_server.py 8765
+"""
+
+import gzip
+import json
+import sys
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+
+class ApiStubHandler(BaseHTTPRequestHandler):
+    """API factice : statuts programmés par numéro Centris, accepté par défaut"""
+    # {numero_centris: [statut du 1er envoi, statut du 2e envoi, ...]}
+    statuses = {}
+    # Requêtes reçues : {'path', 'gzip', 'bytes', 'items', 'batch'}
+    requests = []
+    lock = threading.Lock()
+
+    def log_message(self, format, *args):
+        pass
+
+    @classmethod
+    def reset(cls, statuses=None):
+        with cls.lock:
+            cls.statuses = statuses or {}
+            cls.requests = []
+
+    def _next_status(self, centris_id, default):
+        planned = self.statuses.get(centris_id, [])
+        return planned.pop(0) if planned else default
+
+    def _reply(self, status, body):
+        data = json.dumps(body).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_POST(self):
+        raw = self.rfile.read(int(self.headers.get('Content-Length', 0)))
+        compressed = self.headers.get('Content-Encoding') == 'gzip'
+        body = gzip.decompress(raw) if compressed else raw
+        try:
+            payload = json.loads(body)
+        except ValueError:
+            self._reply(400, {'error': 'JSON invalide'})
+            return
+
+        cls = ApiStubHandler
+        with cls.lock:
+            if isinstance(payload, list):
+                results = []
+                for item in payload:
+                    centris_id = item.get('numero_centris')
+                    status = self._next_status(centris_id, 201)
+                    results.append({'numero_centris': centris_id, 'status': status,
+                                    'error': None if status == 201 else f"refus simulé ({status})"})
+                cls.requests.append({'path': self.path, 'gzip': compressed, 'bytes': len(raw),
+                                     'items': results, 'batch': True})
+                status, response = 200, {'results': results}
+            else:
+                centris_id = payload.get('numero_centris')
+                status = self._next_status(centris_id, 201)
+                cls.requests.append({'path': self.path, 'gzip': compressed, 'bytes': len(raw),
+                                     'items': [{'numero_centris': centris_id, 'status': status}], 'batch': False})
+                response = {'ok': status == 201}
+        self._reply(status, response)
+
+
+def start_api_stub(port=0):
+    """Démarre l'API factice (port libre choisi par le système par défaut)"""
+    server = ThreadingHTTPServer(('127.0.0.1', port), ApiStubHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}/robot/api/scraping"
+
+
+if __name__ == "__main__":
+    port = int(sys.argv[1]) if len(sys.argv) > 1 else 8765
+    server, endpoint = start_api_stub(port)
+    print(f"API factice: {endpoint} (Ctrl+C pour arrêter)")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
@@ -0,0 +1,119 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Benchmark de la recherche des conteneurs d'annonces (_find_property_containers)
+
+Compare l'ancienne recherche (html.parser + get_text() sur chaque parent) avec
+listing_index.find_property_containers (lxml, une passe) sur des pages
+synthétiques de 50, 500 et 5000 annonces, et vérifie que les résultats sont identiques.
+
+Usage:
+    python tests/bench_find_containers.py
+    python tests/bench_find_containers.py 50 500 5000 20000
+"""
+
+import os
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bs4 import BeautifulSoup
+from listing_index import find_property_containers
+
+
+def find_property_containers_legacy(html):
+    """Ancienne implémentation de CentrisScraperWithListInfo._find_property_containers"""
+    soup = BeautifulSoup(html, 'html.parser')
+
+    all_text_blocks = soup.find_all(string=re.compile(r'No\s*Centris', re.IGNORECASE))
+
+    results = []
+    seen_ids = set()
+
+    for text_block in all_text_blocks:
+        parent = text_block.parent
+        for _ in range(8):
+            if parent:
+                parent_text = parent.get_text()
+                if '$' in parent_text and 'No Centris' in parent_text:
+                    centris_match = re.search(r'No\s*Centris\s*[:\-]?\s*(\d+)', parent_text, re.IGNORECASE)
+                    if centris_match:
+                        cid = centris_match.group(1)
+                        if cid not in seen_ids:
+                            seen_ids.add(cid)
+                            results.append((parent, cid))
+                    break
+                try:
+                    parent = parent.parent
+                except:
+                    break
+
+    return results
+
+
+def build_synthetic_page(nb_cards):
+    """
+    Page de résultats Matrix synthétique : une table de cartes, avec une annonce
+    sur dix sans prix affiché ("Prix sur demande") comme sur le vrai portail
+    """
+    cards = []
+    for i in range(nb_cards):
+        centris_id = 10000000 + i
+        prix = "Prix sur demande" if i % 10 == 9 else f"{350000 + i * 100:,} $".replace(',', ' ')
+        cards.append(
+            f'<tr><td><div class="multiLineDisplay">'
+            f'<div class="d-fontSize--largest"><span>{prix}</span></div>'
+            f'<div><a href="#" data-mtx-track="Results - Address">{100 + i} Rue de l\'Église</a></div>'
+            f'<div>Québec (Charlesbourg)</div>'
+            f'<div>Triplex à vendre dans le quartier Trait-Carré construit en {1950 + i % 70}</div>'
+            f'<div><span>No Centris : {centris_id}</span></div>'
+            f'<div><span>Date d\'envoi : 2025-11-{i % 28 + 1:02d}</span></div>'
+            f'<!-- carte {i} -->'
+            f'</div></td></tr>'
+        )
+    return (
+        '<!DOCTYPE html><html><head><title>Matrix</title>'
+        '<script>var config = {"label": "No Centris", "devise": "$"};</script>'
+        '<style>.d-fontSize--largest { font-size: 2em; }</style></head>'
+        '<body><form><div id="m_pnlDisplay"><table><tbody>'
+        + ''.join(cards) +
+        '</tbody></table></div></form></body></html>'
+    )
+
+
+def run_benchmark(sizes):
+    print("=" * 80)
+    print("BENCHMARK _find_property_containers")
+    print("=" * 80)
+    print(f"{'Annonces':>10} {'Ancienne (s)':>14} {'Nouvelle (s)':>14} {'Gain':>8}  Résultats")
+
+    all_ok = True
+    for nb_cards in sizes:
+        html = build_synthetic_page(nb_cards)
+
+        start = time.perf_counter()
+        legacy = find_property_containers_legacy(html)
+        legacy_s = time.perf_counter() - start
+
+        start = time.perf_counter()
+        fast = find_property_containers(html)
+        fast_s = time.perf_counter() - start
+
+        identical = (
+            [cid for _, cid in legacy] == [cid for _, cid in fast]
+            and [c.get_text() for c, _ in legacy] == [c.get_text() for c, _ in fast]
+        )
+        all_ok = all_ok and identical
+        status = "[OK] identiques" if identical else "[ERREUR] différents"
+        print(f"{nb_cards:>10} {legacy_s:>14.3f} {fast_s:>14.3f} {legacy_s / fast_s:>7.1f}x  "
+              f"{status} ({len(fast)} conteneurs)")
+
+    print("=" * 80)
+    return all_ok
+
+
+if __name__ == "__main__":
+    sizes = [int(arg) for arg in sys.argv[1:]] or [50, 500, 5000]
+    sys.exit(0 if run_benchmark(sizes) else 1)
@@ -0,0 +1,124 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Benchmark de l'extraction par sections du panneau (field_extraction.PanelSections)
+
+Compare l'extraction des tables du scraper complet (financier, caractéristiques,
+inclusions/remarques/addenda/source) sur le texte complet du panneau avec
+l'extraction limitée à chaque section, sur des panneaux synthétiques dont
+l'addenda fait 10 000, 100 000 et 1 000 000 caractères, et vérifie que les
+résultats sont identiques.
+
+Usage:
+    python tests/bench_sections.py
+    python tests/bench_sections.py 10000 100000 1000000 5000000
+"""
+
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from field_extraction import (
+    FieldExtractor,
+    PanelSections,
+    CARACTERISTIQUES_FIELDS,
+    DEPENSES_FIELDS,
+    INCLUSIONS_FIELDS,
+    REVENUS_BRUTS_FIELDS,
+    REVENUS_FIELDS,
+)
+
+TABLES = [REVENUS_BRUTS_FIELDS, REVENUS_FIELDS, DEPENSES_FIELDS, CARACTERISTIQUES_FIELDS, INCLUSIONS_FIELDS]
+
+# Phrases d'addenda contenant les mots-clés des champs (ancres présentes, regex sans correspondance)
+ADDENDA_PHRASES = [
+    "Entretien régulier de la toiture par le propriétaire.",
+    "Chauffage au gaz naturel dans deux logements",
+    "Assurance du propriétaire occupant à confirmer.",
+    "Le total des loyers est indexé chaque année au 1er juillet.",
+    "Stationnement dans la rue en hiver.",
+    "Taxes municipales à vérifier auprès de la ville.",
+    "Concierge sur place, Déneigement et Pelouse à la charge des locataires.",
+    "Approv. eau par la ville; Système d'égouts municipal",
+    "Local Commercial au rez-de-chaussée, usage Résidentiel aux étages.",
+    "Inclusions et Exclusions selon les baux en vigueur.",
+]
+
+
+def build_panel_text(addenda_size):
+    """Texte de panneau synthétique (ordre du portail) avec un long addenda"""
+    phrases = []
+    length = 0
+    i = 0
+    while length < addenda_size:
+        phrase = ADDENDA_PHRASES[i % len(ADDENDA_PHRASES)]
+        phrases.append(phrase)
+        length += len(phrase) + 1
+        i += 1
+    return "\n".join([
+        "649 000 $", "1209-1213 1re Avenue", "Québec (La Cité-Limoilou)",
+        "Triplex à vendre dans le quartier Limoilou construit en 1948",
+        "No Centris : 12345678", "Date d'envoi : 2026-02-10",
+        "Caractéristiques du bâtiment",
+        "Système d'égouts Municipalité", "Approv. eau Municipalité",
+        "Stationnement (total) Allée (3)", "Chauffage Plinthes électriques", "Eau (accès) Aucun",
+        "Revenus bruts potentiels", "Résidentiel 41 400 $", "Revenus bruts effectifs 42 600 $",
+        "Dépenses d'exploitation", "Taxes municipales (2026) 4 512 $", "Taxe scolaire (2025) 402 $",
+        "Assurances 2 875 $", "Total 7 789 $", "Revenus nets d'exploitation 34 811 $",
+        "Inclusions", "Inclusions : Réfrigérateur et cuisinière du logement 1",
+        "Exclusions : Laveuse et sécheuse des locataires",
+        "Remarques", "Triplex bien entretenu au coeur de Limoilou.",
+        "Addenda", " ".join(phrases),
+        "Source", "RAY HARVEY & ASSOCIÉS INC., Agence immobilière",
+    ])
+
+
+def extract_tables(page_text, sections=None):
+    """Exécute les tables du scraper complet (texte complet si sections est None)"""
+    data = {}
+    for table in TABLES:
+        extractor = FieldExtractor(table, verbose=False)
+        for spec in table:
+            data.setdefault(spec.name, None)
+        extractor.extract(page_text, data, sections=sections)
+    return data
+
+
+def best_of(func, repeat):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def run_benchmark(sizes):
+    print("=" * 80)
+    print("BENCHMARK EXTRACTION PAR SECTIONS")
+    print("=" * 80)
+    print(f"{'Addenda':>10} {'Texte complet (s)':>18} {'Sections (s)':>14} {'Gain':>8}  Résultats")
+
+    all_ok = True
+    for size in sizes:
+        page_text = build_panel_text(size)
+        repeat = 5 if size <= 100000 else 1
+
+        full_s, full = best_of(lambda: extract_tables(page_text), repeat)
+        scoped_s, scoped = best_of(lambda: extract_tables(page_text, PanelSections(page_text)), repeat)
+
+        identical = full == scoped
+        all_ok = all_ok and identical
+        status = "[OK] identiques" if identical else "[ERREUR] différents"
+        print(f"{size:>10} {full_s:>18.4f} {scoped_s:>14.4f} {full_s / scoped_s:>7.1f}x  {status}")
+
+    print("=" * 80)
+    return all_ok
+
+
+if __name__ == "__main__":
+    sizes = [int(arg) for arg in sys.argv[1:]] or [10000, 100000, 1000000]
+    sys.exit(0 if run_benchmark(sizes) else 1)
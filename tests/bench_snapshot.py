@@ -0,0 +1,114 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Benchmark de l'instantané partagé du panneau (page_snapshot.PageSnapshot)
+
+Compare, pour une annonce, l'ancien enchaînement (détails puis photos : deux
+transferts de driver.page_source et deux analyses html.parser) avec un seul
+instantané partagé (un transfert, une analyse lxml), sur le panneau de
+tests/fixtures/panel_detail.html complété par 20, 200 et 2000 vignettes.
+Vérifie que le texte et les sources des images sont identiques.
+
+Usage:
+    python tests/bench_snapshot.py
+    python tests/bench_snapshot.py 20 200 2000 10000
+"""
+
+import os
+import sys
+import time
+from bs4 import BeautifulSoup
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from page_snapshot import PageSnapshot, new_snapshot_stats
+
+FIXTURE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures', 'panel_detail.html')
+
+THUMB = ('<li class="thumb"><img src="https://mspublic.centris.ca/media.ashx?id={i}&amp;t=pi'
+         '&amp;sm=c&amp;w=100&amp;h=75" alt="Photo {i}"></li>')
+
+
+class CountingDriver:
+    """Driver factice : compte les lectures de page_source"""
+
+    def __init__(self, html):
+        self.html = html
+        self.current_url = 'https://matrix.centris.ca/Matrix/Public/Portal.aspx'
+        self.transfers = 0
+
+    @property
+    def page_source(self):
+        self.transfers += 1
+        return self.html
+
+
+def build_panel_html(nb_thumbs):
+    """Panneau de la fixture suivi d'une bande de vignettes"""
+    with open(FIXTURE, encoding='utf-8') as f:
+        html = f.read()
+    thumbs = '<ul class="carousel">' + ''.join(THUMB.format(i=i) for i in range(nb_thumbs)) + '</ul>'
+    return html.replace('</body>', thumbs + '</body>')
+
+
+def legacy_listing(driver):
+    """Ancien enchaînement : une capture et une analyse par étape"""
+    soup = BeautifulSoup(driver.page_source, 'html.parser')
+    page_text = soup.get_text()
+    soup_panel = BeautifulSoup(driver.page_source, 'html.parser')
+    sources = [img.get('src') or '' for img in soup_panel.find_all('img')]
+    return page_text, sources, 2
+
+
+def snapshot_listing(driver):
+    """Instantané partagé entre détails et photos"""
+    stats = new_snapshot_stats()
+    panel = PageSnapshot.capture(driver, stats)
+    page_text = panel.text
+    sources = panel.img_sources()
+    return page_text, sources, stats['parses']
+
+
+def best_of(func, repeat):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def run_benchmark(sizes):
+    print("=" * 80)
+    print("BENCHMARK INSTANTANÉ PARTAGÉ DU PANNEAU")
+    print("=" * 80)
+    print(f"{'Vignettes':>10} {'Ko':>6} {'Ancien (s)':>11} {'Instantané (s)':>15} {'Gain':>6} "
+          f"{'Transferts':>11} {'Analyses':>9}  Résultats")
+
+    all_ok = True
+    for size in sizes:
+        html = build_panel_html(size)
+        repeat = 5 if size <= 2000 else 1
+
+        legacy_driver = CountingDriver(html)
+        legacy_s, legacy = best_of(lambda: legacy_listing(legacy_driver), repeat)
+        snapshot_driver = CountingDriver(html)
+        snapshot_s, snapshot = best_of(lambda: snapshot_listing(snapshot_driver), repeat)
+
+        # lxml et html.parser ne diffèrent que par le saut de ligne après le DOCTYPE
+        identical = legacy[0].strip() == snapshot[0].strip() and legacy[1] == snapshot[1]
+        all_ok = all_ok and identical
+        status = "[OK] identiques" if identical else "[ERREUR] différents"
+        transfers = f"{legacy_driver.transfers // repeat} -> {snapshot_driver.transfers // repeat}"
+        parses = f"{legacy[2]} -> {snapshot[2]}"
+        print(f"{size:>10} {len(html) / 1024:>6.0f} {legacy_s:>11.4f} {snapshot_s:>15.4f} "
+              f"{legacy_s / snapshot_s:>5.1f}x {transfers:>11} {parses:>9}  {status}")
+
+    print("=" * 80)
+    return all_ok
+
+
+if __name__ == "__main__":
+    sizes = [int(arg) for arg in sys.argv[1:]] or [20, 200, 2000]
+    sys.exit(0 if run_benchmark(sizes) else 1)
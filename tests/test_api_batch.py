@@ -0,0 +1,145 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Test de l'envoi par lots à l'API (api_client.py, mode lot de la file d'envoi)
+
+Les annonces sont construites à partir de tests/fixtures/panel_detail.expected.json
+et envoyées à l'API factice de tests/api_stub_server.py.
+
+Usage:
+    python tests/test_api_batch.py
+"""
+
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+TESTS_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(TESTS_DIR))
+
+from api_client import ApiClient, ApiOutbox, normalize_for_api
+from api_stub_server import ApiStubHandler, start_api_stub
+
+FIXTURE = os.path.join(TESTS_DIR, 'fixtures', 'panel_detail.expected.json')
+
+
+def make_listings(count, first_id=20000000):
+    """Annonces réalistes (données du panneau de la fixture) avec des numéros Centris distincts"""
+    with open(FIXTURE, encoding='utf-8') as f:
+        template = json.load(f)['complet']
+    listings = []
+    for i in range(count):
+        listing = dict(template)
+        listing['numero_centris'] = str(first_id + i)
+        listings.append(listing)
+    return listings
+
+
+def batch_requests():
+    return [request for request in ApiStubHandler.requests if request['batch']]
+
+
+def check(label, condition, details=''):
+    print(f"{'[OK]' if condition else '[ERREUR]'} {label}" + (f" ({details})" if details else ''))
+    return condition
+
+
+def main():
+    print("=" * 80)
+    print("TEST DE L'ENVOI PAR LOTS À L'API")
+    print("=" * 80)
+
+    results = []
+    workdir = tempfile.mkdtemp(prefix='api_batch_')
+    server, endpoint = start_api_stub()
+    client = ApiClient(endpoint, retries=0)
+    try:
+        # 1. Arriéré de 120 annonces : 3 lots (50, 50, 20) compressés au lieu de 120 requêtes
+        ApiStubHandler.reset()
+        outbox = ApiOutbox(os.path.join(workdir, 'lots.db'), client, base_delay=0, batch_size=50)
+        listings = make_listings(120)
+        for listing in listings:
+            outbox.enqueue(listing)
+        remaining = outbox.flush(timeout=30)
+        batches = batch_requests()
+        results.append(check("120 annonces en 3 lots",
+                             remaining == 0 and [len(b['items']) for b in batches] == [50, 50, 20],
+                             f"{len(ApiStubHandler.requests)} requête(s)"))
+        results.append(check("Lots compressés en gzip", all(b['gzip'] for b in batches)))
+        sent_bytes = sum(b['bytes'] for b in batches)
+        pretty_bytes = sum(len(json.dumps(normalize_for_api(l), indent=2, ensure_ascii=False).encode('utf-8'))
+                           for l in listings)
+        results.append(check("Volume envoyé réduit", sent_bytes * 5 < pretty_bytes,
+                             f"{sent_bytes / 1024:.0f} Ko contre {pretty_bytes / 1024:.0f} Ko en JSON indenté unitaire"))
+        delivered = [item['numero_centris'] for b in batches for item in b['items']]
+        results.append(check("Ordre d'arrivée conservé", delivered == [l['numero_centris'] for l in listings]))
+
+        # 2. Résultat relu annonce par annonce : seule l'annonce en 503 est renvoyée
+        ApiStubHandler.reset({'20000003': [503], '20000005': [400]})
+        outbox = ApiOutbox(os.path.join(workdir, 'resultats.db'), client, base_delay=0, batch_size=50)
+        for listing in make_listings(8):
+            outbox.enqueue(listing)
+        outbox.drain(force=True)
+        results.append(check("Échec temporaire replanifié, refus conservé",
+                             outbox.pending_count() == 1 and outbox.rejected_count() == 1,
+                             f"{outbox.pending_count()} en attente, {outbox.rejected_count()} refusée(s)"))
+        outbox.drain(force=True)
+        retried = batch_requests()[-1]['items']
+        results.append(check("Seule l'annonce en échec est renvoyée",
+                             [item['numero_centris'] for item in retried] == ['20000003']
+                             and outbox.pending_count() == 0))
+
+        # 3. Lot incomplet : envoyé seulement après l'attente maximale
+        ApiStubHandler.reset()
+        outbox = ApiOutbox(os.path.join(workdir, 'attente.db'), client, base_delay=0,
+                           batch_size=50, batch_interval=0.3)
+        for listing in make_listings(3):
+            outbox.enqueue(listing)
+        early = outbox.drain()
+        time.sleep(0.35)
+        late = outbox.drain()
+        results.append(check("Lot incomplet retenu puis envoyé après l'attente",
+                             early == 0 and late == 3 and len(batch_requests()) == 1))
+
+        # 4. Lots bornés en taille
+        ApiStubHandler.reset()
+        listing_size = len(json.dumps(normalize_for_api(make_listings(1)[0]), ensure_ascii=False,
+                                      separators=(',', ':')).encode('utf-8'))
+        outbox = ApiOutbox(os.path.join(workdir, 'taille.db'), client, base_delay=0,
+                           batch_size=50, batch_max_bytes=listing_size * 4)
+        for listing in make_listings(10):
+            outbox.enqueue(listing)
+        outbox.flush(timeout=30)
+        results.append(check("Lots limités en taille",
+                             [len(b['items']) for b in batch_requests()] == [4, 4, 2],
+                             str([len(b['items']) for b in batch_requests()])))
+
+        # 5. Vidage en arrière-plan en mode lot
+        ApiStubHandler.reset()
+        outbox = ApiOutbox(os.path.join(workdir, 'fond.db'), client, base_delay=0,
+                           batch_size=50, batch_interval=0.2, interval=0.1)
+        outbox.start()
+        for listing in make_listings(5):
+            outbox.enqueue(listing)
+        deadline = time.time() + 5
+        while outbox.pending_count() and time.time() < deadline:
+            time.sleep(0.05)
+        outbox.stop()
+        results.append(check("Envoi en arrière-plan en un seul lot",
+                             outbox.pending_count() == 0 and [len(b['items']) for b in batch_requests()] == [5],
+                             str([len(b['items']) for b in batch_requests()])))
+    finally:
+        client.close()
+        server.shutdown()
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    print("=" * 80)
+    print(f"{sum(results)}/{len(results)} vérifications réussies")
+    return all(results)
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
@@ -0,0 +1,162 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Test du client API et de la file d'envoi persistante (api_client.py)
+
+Un serveur HTTP local remplace l'API : il enregistre les annonces reçues et
+renvoie les statuts programmés par le test (503 temporaire, 400 définitif...).
+
+Usage:
+    python tests/test_api_client.py
+"""
+
+import json
+import os
+import shutil
+import socket
+import sys
+import tempfile
+import threading
+import time
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from api_client import ApiClient, ApiOutbox, normalize_for_api
+
+
+class ApiStubHandler(BaseHTTPRequestHandler):
+    """API factice : statuts programmés par numéro Centris, 201 par défaut"""
+    received = []
+    statuses = {}
+    lock = threading.Lock()
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers.get('Content-Length', 0)))
+        payload = json.loads(body)
+        cls = ApiStubHandler
+        with cls.lock:
+            planned = cls.statuses.get(payload.get('numero_centris'), [])
+            status = planned.pop(0) if planned else 201
+            cls.received.append((payload.get('numero_centris'), status))
+        data = json.dumps({'ok': status == 201}).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+
+def start_api_stub():
+    """Démarre l'API factice (port libre choisi par le système)"""
+    server = ThreadingHTTPServer(('127.0.0.1', 0), ApiStubHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}/robot/api/scraping"
+
+
+def unused_endpoint():
+    """URL d'un port local sans serveur (API injoignable)"""
+    sock = socket.socket()
+    sock.bind(('127.0.0.1', 0))
+    port = sock.getsockname()[1]
+    sock.close()
+    return f"http://127.0.0.1:{port}/robot/api/scraping"
+
+
+def received_ids():
+    return [centris_id for centris_id, status in ApiStubHandler.received if status == 201]
+
+
+def check(label, condition, details=''):
+    print(f"{'[OK]' if condition else '[ERREUR]'} {label}" + (f" ({details})" if details else ''))
+    return condition
+
+
+def main():
+    print("=" * 80)
+    print("TEST DU CLIENT API ET DE LA FILE D'ENVOI")
+    print("=" * 80)
+
+    results = []
+
+    # 1. Normalisation : copie, null -> "" pour les champs exigés en chaîne
+    data = {'numero_centris': '1', 'quartier': None, 'annee_construction': 1948,
+            '_donnees_liste': {'statut': None}}
+    payload = normalize_for_api(data)
+    results.append(check("Normalisation des champs texte",
+                         payload['quartier'] == '' and payload['annee_construction'] == '1948'
+                         and payload['_donnees_liste']['statut'] == ''))
+    results.append(check("Données d'origine non modifiées",
+                         data['quartier'] is None and data['_donnees_liste']['statut'] is None))
+
+    workdir = tempfile.mkdtemp(prefix='api_outbox_')
+    outbox_file = os.path.join(workdir, 'api_outbox.db')
+    server, endpoint = start_api_stub()
+    try:
+        # 2. Nouvelles tentatives sur 503 avec la même session
+        ApiStubHandler.statuses = {'11111111': [503, 503]}
+        client = ApiClient(endpoint, retries=3, backoff_factor=0.01)
+        ok, status, error = client.send({'numero_centris': '11111111'})
+        attempts = [s for cid, s in ApiStubHandler.received if cid == '11111111']
+        results.append(check("Envoi réussi après deux 503", ok and attempts == [503, 503, 201], str(attempts)))
+
+        # 3. API injoignable : les annonces restent dans la file, même après un redémarrage
+        down_client = ApiClient(unused_endpoint(), retries=0)
+        outbox = ApiOutbox(outbox_file, down_client, base_delay=0)
+        for centris_id in ('22222222', '33333333', '44444444'):
+            outbox.enqueue({'numero_centris': centris_id, 'statut': None})
+        sent = outbox.drain()
+        results.append(check("Rien n'est perdu si l'API est injoignable",
+                             sent == 0 and outbox.pending_count() == 3, f"{outbox.pending_count()} en attente"))
+        down_client.close()
+
+        restarted = ApiOutbox(outbox_file, client, base_delay=0)
+        results.append(check("File retrouvée après redémarrage", restarted.pending_count() == 3))
+
+        # 4. Vidage dans l'ordre d'arrivée ; 400 = refus définitif conservé, 503 = nouvel essai
+        ApiStubHandler.received = []
+        ApiStubHandler.statuses = {'33333333': [400], '44444444': [503, 503, 503, 503]}
+        restarted.drain()
+        results.append(check("Envoi dans l'ordre d'arrivée",
+                             [cid for cid, _ in ApiStubHandler.received][:2] == ['22222222', '33333333'],
+                             ', '.join(cid for cid, _ in ApiStubHandler.received)))
+        results.append(check("Refus 400 conservé sans nouvel essai",
+                             restarted.rejected_count() == 1 and restarted.pending_count() == 1,
+                             f"{restarted.rejected_count()} refusée(s), {restarted.pending_count()} en attente"))
+        restarted.drain()
+        results.append(check("Annonce en 503 renvoyée au vidage suivant",
+                             restarted.pending_count() == 0 and '44444444' in received_ids()))
+        results.append(check("Compteurs de la file",
+                             restarted.stats['sent'] == 2 and restarted.stats['rejected'] == 1, str(restarted.stats)))
+
+        # 5. Vidage en arrière-plan : enqueue ne bloque pas sur la latence de l'API
+        ApiStubHandler.received = []
+        restarted.interval = 0.2
+        restarted.start()
+        start = time.time()
+        for centris_id in ('55555555', '66666666'):
+            restarted.enqueue({'numero_centris': centris_id})
+        enqueue_s = time.time() - start
+        deadline = time.time() + 5
+        while restarted.pending_count() and time.time() < deadline:
+            time.sleep(0.05)
+        restarted.stop()
+        results.append(check("Envoi en arrière-plan",
+                             restarted.pending_count() == 0 and received_ids() == ['55555555', '66666666'],
+                             f"dépôt en {enqueue_s * 1000:.0f} ms"))
+        client.close()
+    finally:
+        server.shutdown()
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    print("=" * 80)
+    print(f"{sum(results)}/{len(results)} vérifications réussies")
+    return all(results)
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
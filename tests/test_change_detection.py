@@ -0,0 +1,153 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Test de la détection des annonces modifiées (empreinte des cartes de la liste)
+
+Les cartes sont lues dans tests/fixtures/portal_resultats.html, puis la page
+est modifiée (nouveau prix, nouveau statut) pour vérifier que seules les
+annonces changées sont proposées au rescraping, et que l'empreinte de toute
+la page permet d'ignorer un cycle sans changement.
+
+Usage:
+    python tests/test_change_detection.py
+"""
+
+import os
+import re
+import shutil
+import sqlite3
+import sys
+import tempfile
+import time
+
+TESTS_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(TESTS_DIR))
+
+from http_discovery import HttpListingDiscovery
+from listing_index import card_fingerprint, page_fingerprint
+from scraped_id_store import ScrapedIdStore
+
+FIXTURE = os.path.join(TESTS_DIR, 'fixtures', 'portal_resultats.html')
+MIN_DATE = '2026-02-01'
+
+
+def read_cards(html):
+    centris_ids, cards = HttpListingDiscovery.parse(html)
+    return cards
+
+
+def read_page(html):
+    centris_ids, cards = HttpListingDiscovery.parse(html)
+    return page_fingerprint(centris_ids, cards)
+
+
+def check(label, condition, details=''):
+    print(f"{'[OK]' if condition else '[ERREUR]'} {label}" + (f" ({details})" if details else ''))
+    return condition
+
+
+def main():
+    print("=" * 80)
+    print("TEST DE LA DÉTECTION DES ANNONCES MODIFIÉES")
+    print("=" * 80)
+
+    results = []
+    workdir = tempfile.mkdtemp(prefix='change_detection_')
+    try:
+        with open(FIXTURE, encoding='utf-8') as f:
+            html = f.read()
+        cards = read_cards(html)
+        db = os.path.join(workdir, 'scraped_ids.db')
+
+        # 1. Annonces scrapées avant la détection : empreinte initiale, aucun rescraping
+        store = ScrapedIdStore(db)
+        for centris_id in cards:
+            store[centris_id] = '2026-02-10T08:00:00'
+        changed, updated = store.find_changed(cards, MIN_DATE)
+        results.append(check("Première empreinte sans rescraping", changed == [] and sorted(updated) == sorted(cards)))
+        store.set_fingerprints(updated)
+        results.append(check("Page inchangée : rien à rescraper", store.find_changed(cards, MIN_DATE) == ([], {})))
+
+        # 2. Nouveau prix et nouveau statut sur la 1re carte, nouveau prix sur une annonce antérieure à MIN_DATE
+        modified = (html.replace('649 000 $', '629 000 $')
+                        .replace('<span class="badge">Nouvelle annonce</span>', '<span class="badge">Nouveau prix</span>')
+                        .replace('489 900 $', '474 900 $'))
+        new_cards = read_cards(modified)
+        changed, updated = store.find_changed(new_cards, MIN_DATE)
+        results.append(check("Seule l'annonce modifiée est rescrapée", changed == ['12345678'], str(changed)))
+        results.append(check("Annonce hors du filtre de date : empreinte mise à jour sans rescraping",
+                             list(updated) == ['34567890']))
+
+        # 3. Après le rescraping, l'empreinte enregistrée est celle de la nouvelle carte
+        store.set_fingerprints(updated)
+        store.mark('12345678', '2026-02-11T09:00:00', card_fingerprint(new_cards['12345678']))
+        store['23456789'] = '2026-02-11T09:05:00'
+        reopened = ScrapedIdStore(db)
+        results.append(check("Empreintes conservées après redémarrage",
+                             reopened.find_changed(new_cards, MIN_DATE) == ([], {})
+                             and reopened['12345678'] == '2026-02-11T09:00:00'))
+
+        # 4. Carte mal lue (sans prix) : pas de comparaison
+        broken = dict(new_cards['23456789'], prix=None)
+        results.append(check("Carte sans prix ignorée",
+                             card_fingerprint(broken) is None
+                             and reopened.find_changed({'23456789': broken}, MIN_DATE) == ([], {})))
+
+        # 5. Base créée avant l'ajout des empreintes : colonne ajoutée à l'ouverture
+        old_db = os.path.join(workdir, 'ancienne.db')
+        with sqlite3.connect(old_db) as conn:
+            conn.execute("CREATE TABLE scraped_ids (centris_id TEXT PRIMARY KEY, scraped_at TEXT)")
+            conn.execute("INSERT INTO scraped_ids VALUES ('12345678', '2026-01-05T10:00:00')")
+        migrated = ScrapedIdStore(old_db)
+        changed, updated = migrated.find_changed(cards, MIN_DATE)
+        results.append(check("Ancienne base mise à niveau", len(migrated) == 1 and list(updated) == ['12345678']))
+
+        # 6. Empreinte de toute la page : ordre et date d'envoi indifférents, sensible au prix, au statut et aux annonces
+        rows = re.findall(r'<tr><td>.*?</td></tr>\n', html, re.S)
+        reordered = html.replace(''.join(rows), ''.join(reversed(rows)))
+        reference = read_page(html)
+        results.append(check("Empreinte de page indépendante de l'ordre", read_page(reordered) == reference))
+        results.append(check("Empreinte de page modifiée par un prix, un statut ou une annonce retirée",
+                             len({reference, read_page(html.replace('649 000 $', '629 000 $')),
+                                  read_page(html.replace('Nouveau prix', 'Vendu')),
+                                  read_page(html.replace(rows[2], ''))}) == 4))
+        dates = re.findall(r'\d{4}-\d{2}-\d{2}', html)
+        redated = html.replace(dates[0], '2026-01-01')
+        results.append(check("Empreinte de page indépendante de la date d'envoi",
+                             read_page(redated) == reference and read_cards(redated) != cards,
+                             f"{len(dates)} date(s) dans la page"))
+
+        # 7. Empreinte du dernier cycle terminé conservée dans la base
+        reopened.set_meta('page_fingerprint', reference)
+        results.append(check("Empreinte de page relue après redémarrage",
+                             ScrapedIdStore(db).get_meta('page_fingerprint') == reference))
+        reopened.set_meta('page_fingerprint', None)
+        results.append(check("Empreinte de page effacée", reopened.get_meta('page_fingerprint') is None))
+        reopened.set_meta('page_fingerprint', reference)
+        reopened.clear()
+        results.append(check("Empreinte de page oubliée à la remise à zéro (reset_scraping.py)",
+                             ScrapedIdStore(db).get_meta('page_fingerprint') is None and len(ScrapedIdStore(db)) == 0))
+
+        # 8. Comparaison de 5000 cartes
+        big = ScrapedIdStore(os.path.join(workdir, 'gros.db'))
+        template = cards['23456789']
+        big_cards = {str(40000000 + i): dict(template, numero_centris=str(40000000 + i), prix=str(300000 + i))
+                     for i in range(5000)}
+        for centris_id, card in big_cards.items():
+            big.mark(centris_id, '2026-02-01T00:00:00', card_fingerprint(card))
+        big_cards['40000010'] = dict(big_cards['40000010'], prix='1')
+        start = time.time()
+        changed, updated = big.find_changed(big_cards, MIN_DATE)
+        diff_ms = (time.time() - start) * 1000
+        results.append(check("5000 cartes comparées", changed == ['40000010'] and not updated,
+                             f"{diff_ms:.1f} ms"))
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    print("=" * 80)
+    print(f"{sum(results)}/{len(results)} vérifications réussies")
+    return all(results)
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
@@ -0,0 +1,137 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Test des durées des étapes agrégées par cycle (cycle_metrics.py)
+
+Un cycle est simulé avec des durées connues par annonce. Vérifie les
+percentiles, les agrégats par étape avec l'annonce la plus lente, la mesure
+des blocs (y compris en cas d'erreur), le fichier Prometheus (format texte,
+écriture atomique) et le journal JSONL relu sur une fenêtre de plusieurs cycles.
+
+Usage:
+    python tests/test_cycle_metrics.py
+"""
+
+import os
+import re
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from cycle_metrics import CycleMetrics, STAGES, load_window, percentile, stage_timer
+from cycle_stats_log import CycleStatsLog
+
+# Ligne d'échantillon du format texte Prometheus : nom{étiquettes} valeur
+SAMPLE_RE = re.compile(r'^[a-zA-Z_:][a-zA-Z0-9_:]*(\{[a-zA-Z_][a-zA-Z0-9_]*="[^"]*"(,[a-zA-Z_][a-zA-Z0-9_]*="[^"]*")*\})? '
+                       r'-?[0-9.e+-]+$')
+
+
+def simulated_cycle():
+    """20 annonces : panneau 1 à 20 s (l'annonce 20000019 la plus lente), photos 2 s, écriture 0,05 s"""
+    metrics = CycleMetrics()
+    metrics.extend([('driver_start', 4.0, None), ('page_load', 6.5, None), ('scroll', 8.0, None)])
+    for i in range(20):
+        centris_id = str(20000000 + i)
+        metrics.record_times({'panel_wait': float(i + 1), 'photos': 2.0}, centris_id)
+        metrics.record('local_write', 0.05, centris_id)
+    return metrics
+
+
+def check(label, condition, details=''):
+    print(f"{'[OK]' if condition else '[ERREUR]'} {label}" + (f" ({details})" if details else ''))
+    return condition
+
+
+def main():
+    print("=" * 80)
+    print("TEST DES DURÉES DES ÉTAPES PAR CYCLE")
+    print("=" * 80)
+
+    results = []
+    workdir = tempfile.mkdtemp(prefix='cycle_metrics_')
+    try:
+        # 1. Percentiles par interpolation linéaire
+        values = list(range(1, 101))
+        results.append(check("Percentiles p50 / p95",
+                             percentile(values, 0.5) == 50.5 and abs(percentile(values, 0.95) - 95.05) < 1e-9
+                             and percentile([3.0], 0.95) == 3.0))
+
+        # 2. Agrégats par étape, dans l'ordre du traitement, avec l'annonce la plus lente
+        metrics = simulated_cycle()
+        summary = metrics.summary()
+        panel = summary['panel_wait']
+        results.append(check("Agrégats du panneau (p50, p95, max et annonce la plus lente)",
+                             panel['count'] == 20 and panel['p50_s'] == 10.5 and panel['p95_s'] == 19.05
+                             and panel['max_s'] == 20.0 and panel['max_centris_id'] == '20000019'
+                             and panel['total_s'] == 210.0, str(panel)))
+        results.append(check("Étapes dans l'ordre du traitement, découverte sans numéro Centris",
+                             list(summary) == [s for s in STAGES if s in summary]
+                             and summary['scroll']['max_centris_id'] is None))
+        results.append(check("Étape la plus coûteuse en tête du log",
+                             metrics.format_summary()[0].startswith('panel_wait: 20 mesure(s), 210.0s')))
+
+        # 3. Mesure des blocs : durées cumulées par annonce, bloc en erreur mesuré quand même
+        times = {}
+        with stage_timer(times, 'detail_extraction'):
+            time.sleep(0.01)
+        with stage_timer(times, 'detail_extraction'):
+            time.sleep(0.01)
+        block = CycleMetrics()
+        try:
+            with block.span('api_send', '12345678'):
+                raise RuntimeError("API indisponible")
+        except RuntimeError:
+            pass
+        results.append(check("Blocs mesurés et cumulés, y compris en cas d'erreur",
+                             times['detail_extraction'] >= 0.02 and block.spans[0][0] == 'api_send'
+                             and block.spans[0][2] == '12345678', f"{times['detail_extraction']:.3f}s"))
+
+        # 4. Fichier Prometheus : format texte valide, écrit sans fichier temporaire résiduel
+        prom = os.path.join(workdir, 'cycle_metrics.prom')
+        metrics.write_prometheus(prom, duration_s=312.4, listings=20)
+        with open(prom, encoding='utf-8') as f:
+            lines = f.read().splitlines()
+        samples = [line for line in lines if not line.startswith('#')]
+        types = [line.split()[2] for line in lines if line.startswith('# TYPE')]
+        results.append(check("Fichier Prometheus au format texte",
+                             all(SAMPLE_RE.match(line) for line in samples) and len(types) == len(set(types))
+                             and 'centris_scraper_stage_duration_seconds{stage="panel_wait",quantile="0.95"} 19.05'
+                             in samples and 'centris_scraper_cycle_duration_seconds 312.4' in samples
+                             and not os.path.exists(prom + '.tmp'),
+                             f"{len(samples)} échantillons"))
+
+        # 5. Journal JSONL : agrégats et durées détaillées, relus sur plusieurs cycles
+        log = CycleStatsLog(os.path.join(workdir, 'cycle_metrics.jsonl'))
+        log.append(metrics.to_record(duration_s=312.4, listings=20))
+        log.append(simulated_cycle().to_record(duration_s=298.0, listings=20))
+        last = log.recent(1)[0]
+        window, cycles = load_window(log)
+        merged = window.summary()
+        results.append(check("Journal JSONL relu sur deux cycles",
+                             last['stages']['panel_wait']['p95_s'] == 19.05 and len(last['spans']) == 63
+                             and cycles == 2 and merged['panel_wait']['count'] == 40
+                             and merged['panel_wait']['max_centris_id'] == '20000019'))
+
+        # 6. Coût de la mesure négligeable devant un cycle
+        big = CycleMetrics()
+        start = time.perf_counter()
+        for i in range(10000):
+            with big.span(STAGES[i % len(STAGES)], str(i)):
+                pass
+        big.summary()
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        results.append(check("10 000 mesures enregistrées et agrégées rapidement", elapsed_ms < 500,
+                             f"{elapsed_ms:.0f} ms"))
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    print("=" * 80)
+    print(f"{sum(results)}/{len(results)} vérifications réussies")
+    return all(results)
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
@@ -0,0 +1,136 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Test du journal des statistiques de cycle (cycle_stats_log.py)
+
+Ajout d'une ligne par cycle, rotation par taille, vue des 100 derniers cycles,
+agrégats sur une fenêtre de temps et import de l'ancien monitoring_stats.json.
+
+Usage:
+    python tests/test_cycle_stats_log.py
+"""
+
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from cycle_stats_log import CycleStatsLog
+
+START = datetime(2026, 2, 1, 0, 0, 0)
+
+
+def make_cycle(hour, new_listings=3, errors=0, duration_s=120.0):
+    """Statistiques d'un cycle horaire (format de run_monitoring_cycle)"""
+    return {
+        'timestamp': (START + timedelta(hours=hour)).isoformat(),
+        'total_listings': 250,
+        'new_listings': new_listings,
+        'scraped_successfully': new_listings - errors,
+        'sent_to_api': new_listings - errors,
+        'errors': errors,
+        'duration_s': duration_s,
+        'session': {'driver_starts': 1, 'page_loads': 1, 'time_saved_s': 12.5},
+        'discovery': 'http',
+        'api_pending': 0
+    }
+
+
+def check(label, condition, details=''):
+    print(f"{'[OK]' if condition else '[ERREUR]'} {label}" + (f" ({details})" if details else ''))
+    return condition
+
+
+def main():
+    print("=" * 80)
+    print("TEST DU JOURNAL DES STATISTIQUES DE CYCLE")
+    print("=" * 80)
+
+    results = []
+    workdir = tempfile.mkdtemp(prefix='cycle_stats_')
+    try:
+        path = os.path.join(workdir, 'monitoring_stats.jsonl')
+
+        # 1. Une ligne par cycle, rotation au-delà de max_bytes
+        line_size = len(json.dumps(make_cycle(0), separators=(',', ':')).encode('utf-8')) + 1
+        log = CycleStatsLog(path, max_bytes=line_size * 100, backup_count=3)
+        cycles = [make_cycle(h, new_listings=h % 5, errors=1 if h % 10 == 0 else 0, duration_s=100 + h % 3 * 10)
+                  for h in range(350)]
+        for cycle in cycles:
+            log.append(cycle)
+        files = log.files()
+        results.append(check("Rotation par taille",
+                             [os.path.basename(f) for f in files]
+                             == ['monitoring_stats.jsonl.3', 'monitoring_stats.jsonl.2',
+                                 'monitoring_stats.jsonl.1', 'monitoring_stats.jsonl']
+                             and all(os.path.getsize(f) <= line_size * 100 for f in files)))
+        results.append(check("Historique conservé au-delà de 100 cycles",
+                             len(list(log.iter_entries())) == 350, f"{len(list(log.iter_entries()))} cycles"))
+
+        # 2. Vue des 100 derniers cycles (ancien monitoring_stats.json), à cheval sur deux fichiers
+        recent = log.recent(100)
+        results.append(check("100 derniers cycles", recent == cycles[-100:]))
+        results.append(check("Moins de cycles que demandé", log.recent(1000) == cycles))
+
+        # 3. Agrégats sur une fenêtre de 24 heures
+        since = START + timedelta(hours=300)
+        window = [c for c in cycles if c['timestamp'] >= since.isoformat()
+                  and c['timestamp'] <= (since + timedelta(hours=24)).isoformat()]
+        summary = log.aggregate(since=since, until=since + timedelta(hours=24))
+        expected_listings = sum(c['scraped_successfully'] for c in window)
+        expected_errors = sum(c['errors'] for c in window)
+        results.append(check("Annonces et erreurs par heure",
+                             summary['cycles'] == 25 and summary['listings'] == expected_listings
+                             and summary['listings_per_hour'] == round(expected_listings / 24, 2)
+                             and summary['errors_per_hour'] == round(expected_errors / 24, 2), str(summary)))
+        results.append(check("Durée moyenne d'un cycle",
+                             summary['mean_cycle_s'] == round(sum(c['duration_s'] for c in window) / len(window), 1)))
+
+        # 4. Fichiers archivés hors de la fenêtre non lus
+        opened = []
+        original = CycleStatsLog._iter_file
+        CycleStatsLog._iter_file = staticmethod(lambda p: (opened.append(os.path.basename(p)), original(p))[1])
+        try:
+            log.aggregate(since=START + timedelta(hours=340))
+        finally:
+            CycleStatsLog._iter_file = staticmethod(original)
+        results.append(check("Seuls les fichiers de la fenêtre sont lus", opened == ['monitoring_stats.jsonl'],
+                             ', '.join(opened)))
+
+        # 5. Ligne tronquée (arrêt pendant une écriture) ignorée
+        with open(path, 'a', encoding='utf-8') as f:
+            f.write('{"timestamp": "2026-02')
+        results.append(check("Ligne tronquée ignorée", log.recent(1) == cycles[-1:]))
+
+        # 6. Import de l'ancien monitoring_stats.json au premier lancement
+        legacy = os.path.join(workdir, 'monitoring_stats.json')
+        with open(legacy, 'w', encoding='utf-8') as f:
+            json.dump(cycles[:100], f, indent=2)
+        imported = CycleStatsLog(os.path.join(workdir, 'nouveau.jsonl'), legacy_json=legacy)
+        CycleStatsLog(os.path.join(workdir, 'nouveau.jsonl'), legacy_json=legacy)
+        results.append(check("Import de monitoring_stats.json (une seule fois)", imported.recent(1000) == cycles[:100]))
+
+        # 7. Coût d'un ajout indépendant de la taille de l'historique
+        big = CycleStatsLog(os.path.join(workdir, 'gros.jsonl'), max_bytes=50 * 1024 * 1024)
+        for h in range(5000):
+            big.append(make_cycle(h))
+        start = time.time()
+        for h in range(5000, 5100):
+            big.append(make_cycle(h))
+        append_ms = (time.time() - start) / 100 * 1000
+        results.append(check("Ajout en temps constant", append_ms < 5, f"{append_ms:.2f} ms par cycle"))
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    print("=" * 80)
+    print(f"{sum(results)}/{len(results)} vérifications réussies")
+    return all(results)
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
@@ -0,0 +1,123 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Test du repli de la découverte HTTP sur le navigateur (scraper_monitor.get_all_listing_ids)
+
+Le portail est remplacé par un serveur HTTP local qui sert une page tronquée
+(premier lot d'annonces seulement) puis la page complète de tests/fixtures/ ;
+le navigateur par un faux driver qui renvoie la page complète. Vérifie que,
+sans référence du navigateur, la page tronquée n'est pas prise pour la liste
+complète, et que la référence est conservée d'un lancement à l'autre.
+
+Nécessite Selenium installé (import des modules du scraper), pas de navigateur.
+
+Usage:
+    python tests/test_discovery_fallback.py
+"""
+
+import os
+import re
+import shutil
+import sys
+import tempfile
+import threading
+from functools import partial
+from http.server import HTTPServer, SimpleHTTPRequestHandler
+
+TESTS_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(TESTS_DIR))
+
+from scraper_monitor import CentrisMonitor
+
+FIXTURE = os.path.join(TESTS_DIR, 'fixtures', 'portal_resultats.html')
+MIN_DATE = '2026-01-01'
+
+
+class QuietHandler(SimpleHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+
+class FakeDriver:
+    """Page chargée par le navigateur : liste complète"""
+
+    def __init__(self, page_source):
+        self.page_source = page_source
+
+
+def check(label, condition, details=''):
+    print(f"{'[OK]' if condition else '[ERREUR]'} {label}" + (f" ({details})" if details else ''))
+    return condition
+
+
+def new_monitor(url, full_html, stops):
+    """Moniteur en mode HTTP dont la session renvoie la liste complète (conditions d'arrêt relevées)"""
+    monitor = CentrisMonitor(url, api_endpoint=None, min_date=MIN_DATE, discovery_mode='http')
+
+    def prepare_discovery(stop=None):
+        stops.append(stop)
+        monitor.session.last_scroll_complete = True
+        return FakeDriver(full_html)
+    monitor.session.prepare_discovery = prepare_discovery
+    return monitor
+
+
+def main():
+    print("=" * 80)
+    print("TEST DU REPLI DE LA DÉCOUVERTE HTTP SUR LE NAVIGATEUR")
+    print("=" * 80)
+
+    results = []
+    workdir = tempfile.mkdtemp(prefix='discovery_fallback_')
+    cwd = os.getcwd()
+    server = HTTPServer(('127.0.0.1', 0), partial(QuietHandler, directory=workdir))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base_url = f"http://127.0.0.1:{server.server_address[1]}"
+    try:
+        os.chdir(workdir)
+        with open(FIXTURE, encoding='utf-8') as f:
+            full_html = f.read()
+        rows = re.findall(r'<tr><td>.*?</td></tr>\n', full_html, re.S)
+        with open('portal.html', 'w', encoding='utf-8') as f:
+            f.write(full_html.replace(''.join(rows), rows[0]))
+        url = f"{base_url}/portal.html"
+
+        # 1. Premier lancement, page tronquée : repli sur le navigateur, liste chargée jusqu'en bas
+        stops = []
+        monitor = new_monitor(url, full_html, stops)
+        records = monitor.get_all_listing_ids()
+        results.append(check("Page tronquée sans référence : repli sur le navigateur",
+                             monitor.last_discovery_mode == 'selenium' and len(records) == 3,
+                             f"{monitor.last_discovery_mode}, {len(records)} annonce(s)"))
+        results.append(check("Défilement complet pour établir la référence",
+                             stops == [None] and monitor.http_discovery.reference_count == 3))
+
+        # 2. Nouveau lancement : référence relue, la page tronquée reste incomplète
+        stops = []
+        monitor = new_monitor(url, full_html, stops)
+        records = monitor.get_all_listing_ids()
+        results.append(check("Référence conservée entre deux lancements",
+                             monitor.http_discovery.reference_count == 3
+                             and monitor.last_discovery_mode == 'selenium' and len(stops) == 1
+                             and stops[0] is not None,
+                             f"référence {monitor.http_discovery.reference_count}"))
+
+        # 3. Page complète servie : découverte HTTP retenue, navigateur non utilisé
+        with open('portal.html', 'w', encoding='utf-8') as f:
+            f.write(full_html)
+        stops = []
+        records = monitor.get_all_listing_ids()
+        results.append(check("Page complète découverte par HTTP",
+                             monitor.last_discovery_mode == 'http' and len(records) == 3 and stops == []))
+    finally:
+        os.chdir(cwd)
+        server.shutdown()
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    print("=" * 80)
+    print(f"{sum(results)}/{len(results)} vérifications réussies")
+    return all(results)
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
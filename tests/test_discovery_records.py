@@ -0,0 +1,90 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Test des annonces découvertes avec leur carte et du filtre de date en bloc
+
+Les cartes sont lues dans tests/fixtures/portal_resultats.html. Vérifie les
+champs des ListingRecord et le marquage en une transaction des annonces
+antérieures à la date minimale (sans navigateur), y compris après une
+réinitialisation avec des centaines d'anciennes annonces.
+
+Usage:
+    python tests/test_discovery_records.py
+"""
+
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+TESTS_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(TESTS_DIR))
+
+from http_discovery import HttpListingDiscovery
+from listing_index import ListingRecord, card_fingerprint, listing_records
+from scraped_id_store import ScrapedIdStore
+
+FIXTURE = os.path.join(TESTS_DIR, 'fixtures', 'portal_resultats.html')
+MIN_DATE = '2026-02-01'
+
+
+def check(label, condition, details=''):
+    print(f"{'[OK]' if condition else '[ERREUR]'} {label}" + (f" ({details})" if details else ''))
+    return condition
+
+
+def main():
+    print("=" * 80)
+    print("TEST DES ANNONCES DÉCOUVERTES ET DU FILTRE DE DATE")
+    print("=" * 80)
+
+    results = []
+    workdir = tempfile.mkdtemp(prefix='discovery_records_')
+    try:
+        with open(FIXTURE, encoding='utf-8') as f:
+            centris_ids, cards = HttpListingDiscovery.parse(f.read())
+
+        # 1. Champs de la carte lus dans la même passe que les numéros
+        records = listing_records(centris_ids, cards)
+        first = records[0]
+        results.append(check("Annonces dans l'ordre de la page avec date, prix et statut",
+                             [r.centris_id for r in records] == centris_ids
+                             and (first.centris_id, first.date_envoi, first.prix, first.statut)
+                             == ('12345678', '2026-02-10', '649000', 'Nouvelle annonce'), repr(first)))
+        results.append(check("Carte sans date jamais écartée",
+                             not ListingRecord('11111111').is_before(MIN_DATE)
+                             and not first.is_before(None) and records[2].is_before(MIN_DATE)))
+
+        # 2. Annonce antérieure à MIN_DATE marquée en bloc, avec l'empreinte de sa carte
+        store = ScrapedIdStore(os.path.join(workdir, 'scraped_ids.db'))
+        marked = store.mark_before(records, MIN_DATE)
+        results.append(check("Seule l'annonce antérieure au filtre est marquée",
+                             marked == ['34567890'] and '34567890' in store and '12345678' not in store
+                             and store.fingerprint('34567890') == card_fingerprint(cards['34567890'])))
+        results.append(check("Annonce déjà marquée ignorée au cycle suivant", store.mark_before(records, MIN_DATE) == []))
+
+        # 3. Après une réinitialisation : 600 anciennes annonces écartées en une transaction
+        template = cards['34567890']
+        old_records = [ListingRecord(str(50000000 + i), dict(template, date_envoi=f"2025-{1 + i % 12:02d}-15"))
+                       for i in range(600)] + records
+        reset = ScrapedIdStore(os.path.join(workdir, 'reinitialise.db'))
+        start = time.time()
+        marked = reset.mark_before(old_records, MIN_DATE)
+        bulk_ms = (time.time() - start) * 1000
+        reopened = ScrapedIdStore(os.path.join(workdir, 'reinitialise.db'))
+        results.append(check("Anciennes annonces écartées sans scraping",
+                             len(marked) == 601 and len(reopened) == 601
+                             and [r.centris_id for r in old_records if r.centris_id not in reopened]
+                             == ['12345678', '23456789'],
+                             f"{len(marked)} annonces en {bulk_ms:.1f} ms"))
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    print("=" * 80)
+    print(f"{sum(results)}/{len(results)} vérifications réussies")
+    return all(results)
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
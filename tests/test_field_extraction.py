@@ -0,0 +1,109 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Test de non-régression du moteur d'extraction des champs (field_extraction.py)
+
+Le panneau de détail sauvegardé dans tests/fixtures/panel_detail.html est
+extrait par les trois scrapers de détail ; les dictionnaires obtenus doivent
+être identiques à ceux produits par l'ancienne extraction (regex en ligne),
+enregistrés dans tests/fixtures/panel_detail.expected.json.
+
+Usage:
+    python tests/test_field_extraction.py
+"""
+
+import io
+import os
+import sys
+import json
+import contextlib
+from bs4 import BeautifulSoup
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from field_extraction import ExtractionContext, FieldExtractor, PanelSections, ALL_EXTRACTORS, field_cost_report
+from scraper_detail_complete import CentrisDetailScraperComplete
+from scraper_detail_functional import CentrisDetailScraperFunctional
+from scraper_detail_page import CentrisDetailScraper
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures')
+
+# Instances créées sans __init__ : aucun navigateur n'est lancé
+SCRAPERS = {
+    'complet': CentrisDetailScraperComplete,
+    'fonctionnel': CentrisDetailScraperFunctional,
+    'page': CentrisDetailScraper,
+}
+
+
+def check(label, condition, details=''):
+    print(f"{'[OK]' if condition else '[ERREUR]'} {label}" + (f" ({details})" if details else ''))
+    return condition
+
+
+def first_difference(expected, actual, path=''):
+    """Premier chemin où les deux structures diffèrent"""
+    if isinstance(expected, dict) and isinstance(actual, dict):
+        for key in expected.keys() | actual.keys():
+            diff = first_difference(expected.get(key), actual.get(key), f"{path}.{key}")
+            if diff:
+                return diff
+        return None
+    return None if expected == actual else f"{path}: {expected!r} != {actual!r}"
+
+
+def main():
+    print("=" * 80)
+    print("TEST DU MOTEUR D'EXTRACTION DES CHAMPS")
+    print("=" * 80)
+
+    with open(os.path.join(FIXTURES_DIR, 'panel_detail.html'), encoding='utf-8') as f:
+        html = f.read()
+    with open(os.path.join(FIXTURES_DIR, 'panel_detail.expected.json'), encoding='utf-8') as f:
+        expected = json.load(f)
+
+    results = []
+
+    # 1. Mêmes dictionnaires (valeurs et ordre des clés) que l'ancienne extraction
+    for name, scraper_class in SCRAPERS.items():
+        scraper = scraper_class.__new__(scraper_class)
+        with contextlib.redirect_stdout(io.StringIO()):
+            data = scraper.extract_info_from_html(html)
+        same = json.dumps(data, ensure_ascii=False) == json.dumps(expected[name], ensure_ascii=False)
+        results.append(check(f"Scraper {name}: dictionnaire identique", same,
+                             first_difference(expected[name], data) or ('ordre des clés' if not same else '')))
+
+    # 2. Le préfiltrage par ancres ne change aucun résultat
+    page_text = BeautifulSoup(html, 'html.parser').get_text()
+    for name, extractor in ALL_EXTRACTORS.items():
+        quiet = FieldExtractor(extractor.specs, verbose=False)
+        with_prefilter, without_prefilter = {}, {}
+        for target in (with_prefilter, without_prefilter):
+            for spec in extractor.specs:
+                if '.' in spec.name:
+                    target.setdefault(spec.name.split('.')[0], {})
+        quiet.extract(page_text, with_prefilter)
+        quiet.extract(page_text, without_prefilter, ExtractionContext(page_text, prefilter=False))
+        results.append(check(f"Table {name}: préfiltrage sans effet sur les valeurs",
+                             with_prefilter == without_prefilter))
+
+    # 3. Découpage du panneau en sections
+    sections = PanelSections(page_text)
+    expected_sections = ['financier', 'caracteristiques', 'inclusions', 'remarques', 'addenda', 'source']
+    results.append(check("Sections du panneau trouvées", all(name in sections for name in expected_sections),
+                         ', '.join(name for name in expected_sections if name in sections)))
+    results.append(check("Section financière sans les remarques ni l'addenda",
+                         'Total' in sections.get('financier') and 'Addenda' not in sections.get('financier')))
+
+    # 4. Coût mesuré par champ
+    report = field_cost_report(top=5)
+    results.append(check("Rapport de coût par champ", len(report) == 5 and all('total_ms' in r for r in report),
+                         ', '.join(f"{r['table']}.{r['field']} {r['total_ms']} ms" for r in report)))
+
+    print("=" * 80)
+    print(f"{sum(results)}/{len(results)} vérifications réussies")
+    return all(results)
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
@@ -0,0 +1,101 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Test de la découverte HTTP des annonces (http_discovery.py)
+
+Les pages du portail sauvegardées dans tests/fixtures/ sont servies par un
+serveur HTTP local qui remplace le portail Matrix.
+
+Usage:
+    python tests/test_http_discovery.py
+"""
+
+import os
+import sys
+import threading
+from http.server import HTTPServer, SimpleHTTPRequestHandler
+from functools import partial
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from http_discovery import HttpListingDiscovery
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures')
+
+
+class QuietHandler(SimpleHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+
+def start_portal_stub():
+    """Démarre le serveur local (port libre choisi par le système)"""
+    handler = partial(QuietHandler, directory=FIXTURES_DIR)
+    server = HTTPServer(('127.0.0.1', 0), handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+
+def check(label, condition, details=''):
+    print(f"{'[OK]' if condition else '[ERREUR]'} {label}" + (f" ({details})" if details else ''))
+    return condition
+
+
+def main():
+    print("=" * 80)
+    print("TEST DE LA DÉCOUVERTE HTTP")
+    print("=" * 80)
+
+    server, base_url = start_portal_stub()
+    results = []
+    try:
+        # 1. Sans référence du navigateur, aucune page n'est jugée complète (premier lot chargé ?)
+        discovery = HttpListingDiscovery(f"{base_url}/portal_resultats.html", retries=0)
+        result = discovery.discover()
+        results.append(check("Page sans référence jugée incomplète", not result.complete, result.reason))
+
+        # 2. Page complète : numéros Centris et infos des cartes
+        discovery.reference_count = 3
+        result = discovery.discover()
+        results.append(check("Page complète jugée complète", result.complete, result.reason))
+        results.append(check("Numéros Centris dans l'ordre de la page",
+                             result.centris_ids == ['12345678', '23456789', '34567890'],
+                             ', '.join(result.centris_ids)))
+        card = result.cards.get('12345678', {})
+        results.append(check("Infos de la carte extraites",
+                             card.get('prix') == '649000'
+                             and card.get('adresse') == '1209-1213 1re Avenue'
+                             and card.get('date_envoi') == '2026-02-10'
+                             and card.get('statut') == 'Nouvelle annonce',
+                             str(card)))
+        results.append(check("Carte de Lévis extraite",
+                             result.cards.get('34567890', {}).get('ville') == 'Lévis'))
+
+        # 3. Moins d'annonces que la dernière découverte par le navigateur
+        discovery.reference_count = 10
+        result = discovery.discover()
+        results.append(check("Résultat partiel jugé incomplet", not result.complete, result.reason))
+        discovery.close()
+
+        # 4. Page dont les annonces sont chargées par JavaScript
+        discovery = HttpListingDiscovery(f"{base_url}/portal_incomplet.html", retries=0)
+        result = discovery.discover()
+        results.append(check("Page sans annonces jugée incomplète", not result.complete, result.reason))
+        discovery.close()
+
+        # 5. Page introuvable
+        discovery = HttpListingDiscovery(f"{base_url}/absente.html", retries=0)
+        result = discovery.discover()
+        results.append(check("Erreur HTTP jugée incomplète", not result.complete, result.reason))
+        discovery.close()
+    finally:
+        server.shutdown()
+
+    print("=" * 80)
+    print(f"{sum(results)}/{len(results)} vérifications réussies")
+    return all(results)
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
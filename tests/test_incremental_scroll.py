@@ -0,0 +1,114 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Test de l'arrêt anticipé du défilement pendant la découverte (listing_index.py)
+
+Un faux driver sert une liste de 120 annonces, de la plus récente à la plus
+ancienne, chargée par lots de 10 cartes à chaque défilement (cartes construites
+sur le modèle de tests/fixtures/portal_resultats.html). Vérifie l'arrêt dès
+qu'une série de cartes déjà scrapées ou trop anciennes est chargée, le
+défilement complet quand de nouvelles annonces continuent d'apparaître et la
+désactivation de l'arrêt anticipé.
+
+Usage:
+    python tests/test_incremental_scroll.py
+"""
+
+import os
+import re
+import sys
+
+TESTS_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(TESTS_DIR))
+
+from listing_index import DiscoveryStop, incremental_scroll
+
+FIXTURE = os.path.join(TESTS_DIR, 'fixtures', 'portal_resultats.html')
+BATCH = 10
+LISTINGS = 120
+MIN_DATE = '2026-01-01'
+
+
+class FakeDriver:
+    """Page de résultats qui charge BATCH cartes de plus à chaque défilement"""
+
+    def __init__(self, template, dates):
+        self.template = template
+        self.dates = dates
+        self.loaded = BATCH
+
+    def execute_script(self, script):
+        if script.startswith('window.scrollTo'):
+            self.loaded = min(self.loaded + BATCH, len(self.dates))
+            return None
+        return self.loaded * 150
+
+    @property
+    def page_source(self):
+        rows = ''.join(self.template.replace('12345678', listing_id(i)).replace('2026-02-10', self.dates[i])
+                       for i in range(self.loaded))
+        return f'<table class="d-listing"><tbody>{rows}</tbody></table>'
+
+
+def listing_id(index):
+    return str(20000000 + index)
+
+
+def check(label, condition, details=''):
+    print(f"{'[OK]' if condition else '[ERREUR]'} {label}" + (f" ({details})" if details else ''))
+    return condition
+
+
+def main():
+    print("=" * 80)
+    print("TEST DE L'ARRÊT ANTICIPÉ DU DÉFILEMENT")
+    print("=" * 80)
+
+    results = []
+    with open(FIXTURE, encoding='utf-8') as f:
+        template = re.findall(r'<tr><td>.*?</td></tr>\n', f.read(), re.S)[0]
+    # Une annonce par jour en remontant depuis le 10 février 2026
+    dates = [f"2026-02-{10 - i:02d}" if i < 10 else f"2026-01-{max(1, 40 - i):02d}" if i < 40 else "2025-12-15"
+             for i in range(LISTINGS)]
+
+    # 1. Cycle courant : 5 nouvelles annonces en haut, tout le reste déjà scrapé
+    known = {listing_id(i) for i in range(5, LISTINGS)}
+    driver = FakeDriver(template, dates)
+    scrolls, reason = incremental_scroll(driver, max_scrolls=20, pause=0, stop=DiscoveryStop(known, MIN_DATE, run=20))
+    full = FakeDriver(template, dates)
+    full_scrolls, full_reason = incremental_scroll(full, max_scrolls=20, pause=0)
+    results.append(check("Arrêt dès que les 20 dernières cartes sont déjà scrapées",
+                         reason is not None and driver.loaded == 30 and scrolls == 2,
+                         f"{scrolls} défilement(s) contre {full_scrolls}, {driver.loaded} cartes chargées"))
+    results.append(check("Sans condition d'arrêt : liste chargée jusqu'en bas",
+                         full_reason is None and full.loaded == LISTINGS and full_scrolls == LISTINGS // BATCH))
+
+    # 2. Après une réinitialisation : rien n'est scrapé, arrêt sur les annonces antérieures à MIN_DATE
+    driver = FakeDriver(template, dates)
+    scrolls, reason = incremental_scroll(driver, max_scrolls=20, pause=0, stop=DiscoveryStop(set(), MIN_DATE, run=20))
+    results.append(check("Arrêt sur une série d'annonces antérieures à la date minimale",
+                         reason is not None and MIN_DATE in reason and driver.loaded == 60,
+                         f"{scrolls} défilement(s), {driver.loaded} cartes chargées"))
+
+    # 3. Nouvelles annonces jusqu'en bas : défilement complet
+    driver = FakeDriver(template, dates)
+    scrolls, reason = incremental_scroll(driver, max_scrolls=20, pause=0, stop=DiscoveryStop(set(), None, run=20))
+    results.append(check("Défilement complet quand chaque lot apporte des annonces à scraper",
+                         reason is None and driver.loaded == LISTINGS and scrolls == full_scrolls))
+
+    # 4. run = 0 désactive l'arrêt ; moins de run cartes chargées : on continue
+    driver = FakeDriver(template, dates)
+    scrolls, reason = incremental_scroll(driver, max_scrolls=20, pause=0, stop=DiscoveryStop(known, MIN_DATE, run=0))
+    stop = DiscoveryStop(known, MIN_DATE, run=20)
+    cards = [(listing_id(i), {'date_envoi': dates[i]}) for i in range(100, 110)]
+    results.append(check("Arrêt anticipé désactivé (run = 0) ou trop peu de cartes chargées",
+                         reason is None and driver.loaded == LISTINGS and stop.check_cards(cards) is None
+                         and stop.check_cards(cards * 2) is not None))
+
+    print("=" * 80)
+    print(f"{sum(results)}/{len(results)} vérifications réussies")
+    return all(results)
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
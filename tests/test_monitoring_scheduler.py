@@ -0,0 +1,178 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Test de la planification adaptative des cycles (monitoring_scheduler.py)
+
+Un historique de quatre semaines est simulé (annonces nombreuses en semaine
+de 9 h à 17 h, rares la nuit et le week-end). Vérifie les taux appris, le
+respect des bornes et du nombre de cycles par semaine, la baisse du délai de
+détection sur une semaine simulée, l'alignement des créneaux sur l'horloge et
+le verrou entre processus.
+
+Usage:
+    python tests/test_monitoring_scheduler.py
+"""
+
+import os
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+from datetime import datetime, timedelta
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT_DIR)
+
+from monitoring_scheduler import AdaptiveScheduler, CycleLock, week_hour
+
+START = datetime(2026, 1, 5, 0, 0, 0)  # lundi
+
+
+def arrival_rate(moment):
+    """Nouvelles annonces par heure selon le moment de la semaine"""
+    if moment.weekday() < 5 and 9 <= moment.hour < 17:
+        return 3.0
+    if moment.weekday() < 5 and 17 <= moment.hour < 22:
+        return 0.5
+    if moment.weekday() >= 5 and 10 <= moment.hour < 18:
+        return 0.3
+    return 0.02
+
+
+def simulate_arrivals(start, weeks, seed):
+    """Instants d'arrivée des annonces (processus de Poisson par tranches de 6 minutes)"""
+    rng = random.Random(seed)
+    arrivals = []
+    moment = start
+    while moment < start + timedelta(weeks=weeks):
+        if rng.random() < arrival_rate(moment) / 10:
+            arrivals.append(moment + timedelta(seconds=rng.uniform(0, 360)))
+        moment += timedelta(minutes=6)
+    return arrivals
+
+
+def history(arrivals, cycle_times):
+    """Statistiques de cycle (format de CycleStatsLog) pour des cycles aux instants donnés"""
+    entries = []
+    index = 0
+    for moment in cycle_times:
+        new_listings = 0
+        while index < len(arrivals) and arrivals[index] <= moment:
+            new_listings += 1
+            index += 1
+        entries.append({'timestamp': moment.isoformat(), 'new_listings': new_listings, 'errors': 0})
+    return entries
+
+
+def detection_delay(arrivals, cycle_times):
+    """Délai moyen (minutes) entre l'arrivée d'une annonce et le premier cycle qui la voit"""
+    delays = []
+    index = 0
+    for arrival in arrivals:
+        while index < len(cycle_times) and cycle_times[index] < arrival:
+            index += 1
+        if index < len(cycle_times):
+            delays.append((cycle_times[index] - arrival).total_seconds() / 60)
+    return sum(delays) / len(delays)
+
+
+def check(label, condition, details=''):
+    print(f"{'[OK]' if condition else '[ERREUR]'} {label}" + (f" ({details})" if details else ''))
+    return condition
+
+
+def main():
+    print("=" * 80)
+    print("TEST DE LA PLANIFICATION ADAPTATIVE")
+    print("=" * 80)
+
+    results = []
+    workdir = tempfile.mkdtemp(prefix='scheduler_')
+    try:
+        # 1. Apprentissage sur quatre semaines de cycles horaires
+        past = simulate_arrivals(START, 4, seed=1)
+        hourly = [START + timedelta(hours=h) for h in range(1, 4 * 168 + 1)]
+        entries = history(past, hourly)
+        scheduler = AdaptiveScheduler(base_minutes=60, min_minutes=15, max_minutes=180, jitter_s=0)
+        intervals = scheduler.learn(entries)
+        tuesday_10h = week_hour(datetime(2026, 2, 3, 10, 30))
+        tuesday_3h = week_hour(datetime(2026, 2, 3, 3, 30))
+        results.append(check("Taux appris plus élevés aux heures actives",
+                             scheduler.rates[tuesday_10h] > 10 * scheduler.rates[tuesday_3h],
+                             f"{scheduler.rates[tuesday_10h]:.2f}/h à 10 h, {scheduler.rates[tuesday_3h]:.3f}/h à 3 h"))
+        results.append(check("Intervalle court en journée, long la nuit, bornes respectées",
+                             intervals[tuesday_10h] <= 30 and intervals[tuesday_3h] > 120
+                             and all(15 <= i <= 180 for i in intervals),
+                             f"{intervals[tuesday_10h]:.0f} min à 10 h, {intervals[tuesday_3h]:.0f} min à 3 h"))
+        results.append(check("Pas plus de cycles par semaine qu'à intervalle fixe",
+                             160 < scheduler.cycles_per_week() <= 168, f"{scheduler.cycles_per_week():.1f}"))
+
+        # 2. Semaine suivante simulée : cycles sur les créneaux planifiés contre cycles horaires
+        week_start = START + timedelta(weeks=4)
+        future = simulate_arrivals(week_start, 1, seed=2)
+        planned = []
+        moment = week_start
+        while moment < week_start + timedelta(weeks=1):
+            moment = scheduler.next_run(moment)
+            planned.append(moment)
+        fixed = [week_start + timedelta(hours=h) for h in range(1, 169)]
+        adaptive_delay = detection_delay(future, planned)
+        fixed_delay = detection_delay(future, fixed)
+        results.append(check("Délai de détection réduit sans cycle supplémentaire",
+                             adaptive_delay < 0.6 * fixed_delay and len(planned) <= len(fixed) + 2,
+                             f"{adaptive_delay:.1f} min contre {fixed_delay:.1f} min, "
+                             f"{len(planned)} cycles contre {len(fixed)}"))
+
+        # 3. Arrêt du service : les annonces accumulées pendant l'arrêt ne faussent pas les taux
+        restarted = entries[:100] + [dict(entries[100], timestamp=(hourly[99] + timedelta(days=2)).isoformat(),
+                                          new_listings=250)] + \
+                    [dict(e, timestamp=(datetime.fromisoformat(e['timestamp']) + timedelta(days=2)).isoformat())
+                     for e in entries[101:]]
+        with_gap = AdaptiveScheduler(base_minutes=60, min_minutes=15, max_minutes=180)
+        with_gap.learn(restarted)
+        results.append(check("Écart de plus de 12 h ignoré",
+                             max(with_gap.rates) < max(scheduler.rates) * 1.5,
+                             f"taux maximal {max(with_gap.rates):.2f}/h"))
+
+        # 4. Sans historique ou sans adaptation : intervalle fixe
+        empty = AdaptiveScheduler(base_minutes=60, min_minutes=15, max_minutes=180)
+        fixed_only = AdaptiveScheduler(base_minutes=60, min_minutes=15, max_minutes=180, adaptive=False)
+        results.append(check("Intervalle fixe sans historique ou sans adaptation",
+                             set(empty.learn([])) == {60.0} and set(fixed_only.learn(entries)) == {60.0}))
+
+        # 5. Créneaux alignés sur l'horloge (intervalles qui divisent l'heure ou la journée), gigue bornée, créneaux manqués non rattrapés
+        aligned = AdaptiveScheduler(base_minutes=15, jitter_s=0)
+        jittered = AdaptiveScheduler(base_minutes=15, jitter_s=60)
+        runs = [jittered.next_run(datetime(2026, 2, 3, 10, 7)) for _ in range(200)]
+        results.append(check("Prochain créneau aligné sur l'horloge",
+                             aligned.next_run(datetime(2026, 2, 3, 10, 7, 30)) == datetime(2026, 2, 3, 10, 15)
+                             and aligned.next_run(datetime(2026, 2, 3, 10, 15)) == datetime(2026, 2, 3, 10, 30)
+                             and aligned.next_run(datetime(2026, 2, 3, 23, 50)) == datetime(2026, 2, 4, 0, 0)))
+        results.append(check("Gigue comprise entre 0 et 60 secondes",
+                             all(datetime(2026, 2, 3, 10, 15) <= r <= datetime(2026, 2, 3, 10, 16) for r in runs)
+                             and len(set(runs)) > 1))
+
+        # 6. Verrou entre processus
+        lock_path = os.path.join(workdir, 'monitoring.lock')
+        probe = ("import sys; sys.path.insert(0, sys.argv[1]); from monitoring_scheduler import CycleLock; "
+                 "sys.exit(0 if CycleLock(sys.argv[2]).acquire() else 3)")
+        lock = CycleLock(lock_path)
+        acquired = lock.acquire()
+        busy = subprocess.run([sys.executable, '-c', probe, ROOT_DIR, lock_path], capture_output=True).returncode
+        holder = lock.holder()
+        lock.release()
+        free = subprocess.run([sys.executable, '-c', probe, ROOT_DIR, lock_path], capture_output=True).returncode
+        results.append(check("Cycle refusé à un second processus pendant le cycle en cours",
+                             acquired and busy == 3 and holder.startswith(str(os.getpid())), holder))
+        results.append(check("Verrou libéré à la fin du cycle", free == 0, f"code {free}"))
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    print("=" * 80)
+    print(f"{sum(results)}/{len(results)} vérifications réussies")
+    return all(results)
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
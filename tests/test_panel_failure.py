@@ -0,0 +1,131 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Test d'un panneau de détail qui ne s'ouvre pas, de la session jusqu'à la file de scraping
+
+Un faux scraper (aucun navigateur) lit les cartes de tests/fixtures/portal_resultats.html
+et échoue au clic sur l'annonce. Vérifie que le cycle de monitoring compte l'échec
+dans la file de scraping (nouvel essai, puis rejet) au lieu de marquer l'annonce
+comme scrapée avec les seules infos de la liste, et qu'une annonce rejetée ne
+empêche plus d'ignorer les cycles où la liste n'a pas changé.
+
+Nécessite Selenium installé (import des modules du scraper), pas de navigateur.
+
+Usage:
+    python tests/test_panel_failure.py
+"""
+
+import os
+import shutil
+import sys
+import tempfile
+
+TESTS_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(TESTS_DIR))
+
+from http_discovery import HttpListingDiscovery
+from listing_index import card_fingerprint, listing_records
+from page_snapshot import new_snapshot_stats
+from scraper_monitor import CentrisMonitor
+from scraper_with_list_info import CentrisScraperWithListInfo
+
+FIXTURE = os.path.join(TESTS_DIR, 'fixtures', 'portal_resultats.html')
+MIN_DATE = '2026-01-01'
+
+
+class PanelNeverOpens(CentrisScraperWithListInfo):
+    """Scraper sans navigateur : infos de la liste lues dans la fixture, clic toujours en échec"""
+
+    def __init__(self, cards):
+        self.cards = cards
+        self.clicks = 0
+        self.last_panel_ready_s = None
+        self.panel_close_stats = {'in_page': 0, 'reloads': 0}
+        self.snapshot_stats = new_snapshot_stats()
+
+    def extract_info_from_list_by_centris_id(self, centris_id):
+        return dict(self.cards[centris_id])
+
+    def click_on_property_by_centris_id(self, centris_id):
+        self.clicks += 1
+        return False
+
+
+def check(label, condition, details=''):
+    print(f"{'[OK]' if condition else '[ERREUR]'} {label}" + (f" ({details})" if details else ''))
+    return condition
+
+
+def main():
+    print("=" * 80)
+    print("TEST D'UN PANNEAU QUI NE S'OUVRE PAS")
+    print("=" * 80)
+
+    results = []
+    workdir = tempfile.mkdtemp(prefix='panel_failure_')
+    cwd = os.getcwd()
+    try:
+        os.chdir(workdir)
+        with open(FIXTURE, encoding='utf-8') as f:
+            centris_ids, cards = HttpListingDiscovery.parse(f.read())
+        target = '12345678'
+        monitor = CentrisMonitor('http://localhost/matrix', api_endpoint=None, min_date=MIN_DATE,
+                                 discovery_mode='selenium', max_attempts=2, retry_delay=0)
+        for centris_id in centris_ids:
+            if centris_id != target:
+                monitor.scraped_ids[centris_id] = '2026-02-01T00:00:00'
+        scraper = PanelNeverOpens(cards)
+        monitor.session.prepare_listing = lambda centris_id: scraper
+
+        def discover_page(stats):
+            monitor.last_listing_cards = cards
+            stats['total_listings'] = len(centris_ids)
+            if monitor.page_unchanged(centris_ids, cards):
+                return None
+            return listing_records(centris_ids, cards)
+        monitor.discover_page = discover_page
+
+        # 1. La session signale l'échec au lieu de renvoyer les infos de la liste
+        status, data = monitor.session.scrape_listing(target, MIN_DATE)
+        results.append(check("Clic en échec signalé par la session", status == 'failed' and data is None,
+                             f"statut {status}"))
+
+        # 2. Premier cycle : échec compté dans la file, annonce non marquée comme scrapée
+        stats = monitor.run_monitoring_cycle()
+        jobs = {job['centris_id']: job for job in monitor.scrape_queue.jobs()}
+        results.append(check("Échec compté dans la file de scraping",
+                             stats['errors'] == 1 and stats['scraped_successfully'] == 0
+                             and jobs.get(target, {}).get('attempts') == 1,
+                             f"{jobs.get(target, {}).get('attempts')} échec(s)"))
+        results.append(check("Annonce non marquée comme scrapée", target not in monitor.scraped_ids
+                             and not os.path.exists(f"property_{target}.json")))
+
+        # 3. Deuxième cycle : nouvel essai, puis rejet après max_attempts
+        monitor.run_monitoring_cycle()
+        results.append(check("Rejet après échecs répétés",
+                             scraper.clicks == 3 and monitor.scrape_queue.is_dead(target),
+                             f"{scraper.clicks} clic(s)"))
+
+        # 4. Nouveau prix d'une annonce scrapée, rejetée après échecs : plus en attente,
+        #    le cycle suivant sur la même liste est ignoré
+        changed = '23456789'
+        previous = card_fingerprint(cards[changed])
+        cards[changed] = dict(cards[changed], prix='599000')
+        for _ in range(2):
+            monitor.run_monitoring_cycle()
+        stats = monitor.run_monitoring_cycle()
+        results.append(check("Annonce modifiée rejetée : liste inchangée ignorée au cycle suivant",
+                             monitor.scraped_ids.fingerprint(changed) == previous
+                             and monitor.scrape_queue.is_dead(changed) and stats.get('skipped'),
+                             f"{monitor.scrape_queue.dead_count()} rejet(s)"))
+    finally:
+        os.chdir(cwd)
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    print("=" * 80)
+    print(f"{sum(results)}/{len(results)} vérifications réussies")
+    return all(results)
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
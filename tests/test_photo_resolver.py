@@ -0,0 +1,165 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Test de la résolution HTTP des photos de galerie (photo_resolver.py) et de la
+lecture de toute la galerie dans les vignettes du carrousel
+
+La page de galerie sauvegardée (debug_gallery_html.txt) est servie par un
+serveur HTTP local qui remplace www.centris.ca : chaque lien ...&seq=N
+renvoie la page avec une photo principale propre à N, avec un délai qui
+diminue avec N pour que les réponses arrivent dans le désordre.
+
+Usage:
+    python tests/test_photo_resolver.py
+"""
+
+import os
+import sys
+import threading
+import time
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlparse, parse_qs
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT_DIR)
+
+from page_snapshot import PageSnapshot, new_snapshot_stats
+from photo_resolver import GalleryPhotoResolver, extract_gallery_photo_urls, extract_high_res_url
+
+GALLERY_FILE = os.path.join(ROOT_DIR, 'debug_gallery_html.txt')
+FULL_IMG_ID = 'ADDD250DE3F1394DDDDDDD1DDF'
+NB_PHOTOS = 12
+
+
+def photo_url(seq):
+    return (f"https://mspublic.centris.ca/media.ashx?id={FULL_IMG_ID[:-4]}{seq:04d}"
+            f"&t=pi&sm=m&w=1260&h=1024")
+
+
+class GalleryHandler(BaseHTTPRequestHandler):
+    """Sert la galerie sauvegardée ; /absente -> 404, seq=vide -> page sans photo"""
+    gallery_html = ''
+    active = 0
+    max_active = 0
+    lock = threading.Lock()
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        cls = GalleryHandler
+        with cls.lock:
+            cls.active += 1
+            cls.max_active = max(cls.max_active, cls.active)
+        try:
+            url = urlparse(self.path)
+            seq = parse_qs(url.query).get('seq', [''])[0]
+            if not url.path.endswith('/photos'):
+                self.send_response(404)
+                self.end_headers()
+                return
+            if seq == 'vide':
+                body = '<html><body><p>Galerie indisponible</p></body></html>'
+            else:
+                seq = int(seq)
+                time.sleep(0.05 * (NB_PHOTOS - seq))
+                body = cls.gallery_html.replace(f"{FULL_IMG_ID}&amp;", f"{FULL_IMG_ID[:-4]}{seq:04d}&amp;")
+            data = body.encode('utf-8')
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/html; charset=utf-8')
+            self.send_header('Content-Length', str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+        finally:
+            with cls.lock:
+                cls.active -= 1
+
+
+def start_gallery_stub():
+    """Démarre le serveur local (port libre choisi par le système)"""
+    with open(GALLERY_FILE, encoding='utf-8') as f:
+        GalleryHandler.gallery_html = f.read()
+    server = ThreadingHTTPServer(('127.0.0.1', 0), GalleryHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+
+def check(label, condition, details=''):
+    print(f"{'[OK]' if condition else '[ERREUR]'} {label}" + (f" ({details})" if details else ''))
+    return condition
+
+
+def main():
+    print("=" * 80)
+    print("TEST DE LA RÉSOLUTION HTTP DES PHOTOS")
+    print("=" * 80)
+
+    results = []
+
+    # 1. Extraction depuis la page sauvegardée : img#fullImg, pas les vignettes
+    with open(GALLERY_FILE, encoding='utf-8') as f:
+        saved = f.read()
+    expected = f"https://mspublic.centris.ca/media.ashx?id={FULL_IMG_ID}&t=pi&sm=m&w=1260&h=1024"
+    results.append(check("Photo principale de la page sauvegardée",
+                         extract_high_res_url(saved) == expected, str(extract_high_res_url(saved))[:80]))
+
+    # 2. Galerie complète lue dans les vignettes du carrousel, en une seule analyse
+    stats = new_snapshot_stats()
+    gallery = PageSnapshot(saved, stats=stats)
+    photos = extract_gallery_photo_urls(gallery.soup)
+    thumb_ids = ['ADDD250DE3F1392DDDDDDDDDDF', 'ADDD250DE3F139CDDDDDDDDDDD']
+    results.append(check("Toutes les photos du carrousel, dans l'ordre",
+                         photos == [expected] + [expected.replace(FULL_IMG_ID, thumb_id) for thumb_id in thumb_ids],
+                         f"{len(photos)} photo(s)"))
+    results.append(check("Une seule analyse de la page", stats['parses'] == 1, f"{stats['parses']} analyse(s)"))
+
+    # La vignette sélectionnée reprend l'image affichée, les autres sont agrandies
+    moved = saved.replace('<li class="selected" ', '<li ', 1).replace(
+        f'<li style="margin-right: 3px; width: 104px;"><img src="https://mspublic.centris.ca/media.ashx?id={thumb_ids[0]}',
+        f'<li class="selected" style="margin-right: 3px; width: 104px;"><img src="https://mspublic.centris.ca/media.ashx?id={thumb_ids[0]}', 1)
+    photos = extract_gallery_photo_urls(PageSnapshot(moved).soup)
+    results.append(check("Vignette sélectionnée = image affichée",
+                         photos[:2] == [expected.replace(FULL_IMG_ID, 'ADDD250DE3F1394DDDDDDDDDDB'), expected],
+                         f"{len(photos)} photo(s)"))
+    results.append(check("Page sans carrousel",
+                         extract_gallery_photo_urls(PageSnapshot('<html><body><img src="x.png"></body></html>').soup) == []))
+
+    server, base_url = start_gallery_stub()
+    try:
+        gallery = f"{base_url}/fr/propriete/12345678/photos?etok=abc"
+        links = [f"{gallery}&seq={seq}" for seq in range(NB_PHOTOS)]
+
+        # 3. Ordre conservé malgré des réponses dans le désordre, concurrence bornée
+        resolver = GalleryPhotoResolver(max_workers=4, retries=0)
+        start = time.time()
+        resolved = resolver.resolve(links)
+        duration = time.time() - start
+        results.append(check("Photos dans l'ordre des liens",
+                             resolved == [photo_url(seq) for seq in range(NB_PHOTOS)]))
+        results.append(check("Au plus 4 requêtes simultanées",
+                             1 < GalleryHandler.max_active <= 4, f"max {GalleryHandler.max_active}"))
+        sequential = sum(0.05 * (NB_PHOTOS - seq) for seq in range(NB_PHOTOS))
+        results.append(check("Plus rapide que des requêtes successives",
+                             duration < sequential, f"{duration:.2f}s contre {sequential:.2f}s"))
+
+        # 4. Liens non résolus : None à leur place (repli navigateur par l'appelant)
+        mixed = [links[0], f"{gallery}&seq=vide", f"{base_url}/absente?seq=1", links[2]]
+        resolved = resolver.resolve(mixed)
+        results.append(check("Liens non résolus laissés au navigateur",
+                             resolved == [photo_url(0), None, None, photo_url(2)]))
+        results.append(check("Compteurs du résolveur",
+                             resolver.stats['resolved'] == NB_PHOTOS + 2 and resolver.stats['unresolved'] == 2,
+                             str(resolver.stats)))
+        results.append(check("Aucun lien", resolver.resolve([]) == []))
+        resolver.close()
+    finally:
+        server.shutdown()
+
+    print("=" * 80)
+    print(f"{sum(results)}/{len(results)} vérifications réussies")
+    return all(results)
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
@@ -4,26 +4,27 @@
 Script de test pour analyser les 5 dernières propriétés
 """
 
-import json
-from pathlib import Path
+import os
+import sys
 from collections import defaultdict
 
-def charger_propriete(fichier):
-    """Charge un fichier JSON de propriété"""
-    with open(fichier, 'r', encoding='utf-8') as f:
-        return json.load(f)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-def analyser_proprietes():
+from property_store import PropertyStore
+
+try:
+    from config_api import PROPERTY_DB
+except ImportError:
+    PROPERTY_DB = 'properties.db'
+
+def analyser_proprietes(db_file=PROPERTY_DB):
     """Analyse les 5 dernières propriétés"""
     
-    # Liste des 5 derniers fichiers
-    fichiers = [
-        'property_21796796.json',
-        'property_21008469.json',
-        'property_19312888.json',
-        'property_12053552.json',
-        'property_12273486.json'
-    ]
+    # Importer les fichiers property_*.json récents, puis lire les 5 dernières annonces de la base
+    store = PropertyStore(db_file)
+    import_result = store.import_json_files()
+    for fichier, erreur in import_result['errors']:
+        print(f"[ERREUR] Erreur lors du chargement de {fichier}: {erreur}")
     
     print("=" * 80)
     print("ANALYSE DES 5 DERNIÈRES PROPRIÉTÉS")
@@ -31,13 +32,10 @@ def analyser_proprietes():
     print()
     
     proprietes = []
-    for fichier in fichiers:
-        try:
-            prop = charger_propriete(fichier)
-            proprietes.append((fichier, prop))
-            print(f"[OK] {fichier} charge avec succes")
-        except Exception as e:
-            print(f"[ERREUR] Erreur lors du chargement de {fichier}: {e}")
+    for prop in store.latest(5):
+        fichier = f"property_{prop.get('numero_centris')}.json"
+        proprietes.append((fichier, prop))
+        print(f"[OK] {fichier} charge avec succes")
     
     print()
     print("-" * 80)
@@ -0,0 +1,179 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Test de la base locale des annonces (property_store.py)
+
+Les annonces sont construites à partir de tests/fixtures/panel_detail.expected.json.
+Vérifie l'aller-retour des données, la compression des sections, les filtres
+indexés, l'import des property_*.json, et un comptage sur tout le corpus
+comparé au parcours des fichiers.
+
+Usage:
+    python tests/test_property_store.py
+"""
+
+import glob
+import json
+import os
+import shutil
+import sqlite3
+import sys
+import tempfile
+import time
+
+TESTS_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(TESTS_DIR))
+
+from property_store import PropertyStore
+from validation_corrections import valider_donnees_financieres
+
+FIXTURE = os.path.join(TESTS_DIR, 'fixtures', 'panel_detail.expected.json')
+VILLES = ('Québec', 'Lévis', 'Montréal', 'Sherbrooke')
+TYPES = ('Triplex', 'Duplex', 'Quintuplex')
+
+
+def make_listings(count, first_id=20000000):
+    """Annonces réalistes avec numéro, ville, type et date d'envoi variés"""
+    with open(FIXTURE, encoding='utf-8') as f:
+        template = json.load(f)['complet']
+    template['photo_urls'] = [f"https://mspublic.centris.ca/media.ashx?id=ADDD{i:04d}&t=pi&sm=m&w=1260&h=1024"
+                              for i in range(template['nb_photos'])]
+    listings = []
+    for i in range(count):
+        listing = dict(template)
+        listing['numero_centris'] = str(first_id + i)
+        listing['ville'] = VILLES[i % len(VILLES)]
+        listing['type_propriete'] = TYPES[i % len(TYPES)]
+        listing['date_envoi'] = f"2026-02-{1 + i % 28:02d}"
+        listings.append(listing)
+    return listings
+
+
+def check(label, condition, details=''):
+    print(f"{'[OK]' if condition else '[ERREUR]'} {label}" + (f" ({details})" if details else ''))
+    return condition
+
+
+def main():
+    print("=" * 80)
+    print("TEST DE LA BASE DES ANNONCES")
+    print("=" * 80)
+
+    results = []
+    workdir = tempfile.mkdtemp(prefix='property_store_')
+    try:
+        db = os.path.join(workdir, 'properties.db')
+        store = PropertyStore(db)
+        listings = make_listings(2000)
+
+        # 1. Aller-retour : annonce identique, ordre des clés conservé
+        store.save_many(listings)
+        loaded = store.get('20000005')
+        results.append(check("Annonce relue identique", loaded == listings[5]
+                             and list(loaded) == list(listings[5])))
+        results.append(check("Annonce absente", store.get('99999999') is None and '99999999' not in store))
+
+        # 2. Sections volumineuses compressées
+        with sqlite3.connect(db) as conn:
+            core_len, sections_len = conn.execute(
+                "SELECT LENGTH(core), LENGTH(sections) FROM properties WHERE centris_id = '20000005'").fetchone()
+        pretty_len = len(json.dumps(listings[5], indent=2, ensure_ascii=False).encode('utf-8'))
+        results.append(check("Sections compressées", core_len + sections_len < pretty_len / 2,
+                             f"{core_len + sections_len} octets contre {pretty_len} en JSON indenté"))
+
+        # 3. Filtres indexés
+        quebec = store.query(full=False, ville='Québec', type_propriete='Triplex')
+        expected = [l['numero_centris'] for l in listings if l['ville'] == 'Québec' and l['type_propriete'] == 'Triplex']
+        results.append(check("Filtre ville + type", [p['numero_centris'] for p in quebec] == expected,
+                             f"{len(quebec)} annonce(s)"))
+        results.append(check("Filtre sur la date d'envoi",
+                             store.count(date_from='2026-02-01', date_to='2026-02-07')
+                             == sum(1 for l in listings if l['date_envoi'] <= '2026-02-07')))
+        with sqlite3.connect(db) as conn:
+            plan = ' '.join(str(row) for row in conn.execute(
+                "EXPLAIN QUERY PLAN SELECT core FROM properties WHERE date_envoi >= ?", ('2026-02-10',)))
+        results.append(check("Index utilisé pour la date d'envoi", 'properties_date_envoi' in plan, plan))
+
+        # 4. Import des fichiers property_*.json (doublon et fichier illisible signalés)
+        files_dir = os.path.join(workdir, 'fichiers')
+        os.makedirs(files_dir)
+        for listing in listings:
+            with open(os.path.join(files_dir, f"property_{listing['numero_centris']}.json"), 'w', encoding='utf-8') as f:
+                json.dump(listing, f, indent=2, ensure_ascii=False)
+        shutil.copy(os.path.join(files_dir, 'property_20000000.json'), os.path.join(files_dir, 'property_30000000.json'))
+        with open(os.path.join(files_dir, 'property_30000001.json'), 'w', encoding='utf-8') as f:
+            f.write('{"numero_centris": ')
+        with open(os.path.join(files_dir, 'property_with_list_info.json'), 'w', encoding='utf-8') as f:
+            json.dump(listings[0], f)
+        imported_store = PropertyStore(os.path.join(workdir, 'import.db'))
+        pattern = os.path.join(files_dir, 'property_*.json')
+        result = imported_store.import_json_files(pattern)
+        results.append(check("Import des fichiers existants",
+                             result['imported'] == 2000 and imported_store.count() == 2000
+                             and imported_store.get('20000150') == listings[150],
+                             f"{result['imported']} importé(s), {len(result['errors'])} erreur(s)"))
+        results.append(check("Doublon et fichier illisible signalés",
+                             result['duplicates'] == {'20000000': ['property_20000000.json', 'property_30000000.json']}
+                             and [os.path.basename(p) for p, _ in result['errors']] == ['property_30000001.json']))
+        again = imported_store.import_json_files(pattern)
+        results.append(check("Fichiers inchangés ignorés au nouvel import",
+                             again['imported'] == 0 and again['unchanged'] == 2000,
+                             f"{again['imported']} réimporté(s), {again['unchanged']} ignoré(s)"))
+
+        # 4b. Fichier nommé d'après un autre numéro : le plus récent l'emporte, l'annonce en base n'est pas écrasée
+        renamed_dir = os.path.join(workdir, 'renommes')
+        os.makedirs(renamed_dir)
+        recent, stale = dict(listings[0], prix=500000), dict(listings[0], prix=400000)
+        for name, listing, age in (('property_20000000.json', recent, 100), ('property_29999999.json', stale, 200)):
+            path = os.path.join(renamed_dir, name)
+            with open(path, 'w', encoding='utf-8') as f:
+                json.dump(listing, f)
+            os.utime(path, (time.time() - age, time.time() - age))
+        renamed_store = PropertyStore(os.path.join(workdir, 'renommes.db'))
+        renamed_pattern = os.path.join(renamed_dir, 'property_*.json')
+        first = renamed_store.import_json_files(renamed_pattern)
+        second = renamed_store.import_json_files(renamed_pattern)
+        results.append(check("Fichier le plus récent retenu par numéro contenu",
+                             first['imported'] == 1 and renamed_store.get('20000000')['prix'] == 500000
+                             and second['imported'] == 0 and second['unchanged'] == 1,
+                             f"prix {renamed_store.get('20000000')['prix']}, "
+                             f"{second['imported']} réimporté(s) au second import"))
+        renamed_store.save(dict(listings[0], prix=600000))
+        os.utime(os.path.join(renamed_dir, 'property_20000000.json'), (time.time() - 10, time.time() - 10))
+        newer = renamed_store.import_json_files(renamed_pattern)
+        results.append(check("Annonce plus récente que le fichier conservée",
+                             newer['imported'] == 0 and renamed_store.get('20000000')['prix'] == 600000,
+                             f"prix {renamed_store.get('20000000')['prix']}"))
+
+        # 5. Questions sur tout le corpus : base vs parcours des fichiers
+        start = time.time()
+        from_files = []
+        for path in glob.glob(os.path.join(files_dir, 'property_2*.json')):
+            with open(path, encoding='utf-8') as f:
+                from_files.append(json.load(f))
+        files_count = sum(1 for p in from_files if p['ville'] == 'Québec' and p['type_propriete'] == 'Triplex')
+        files_s = time.time() - start
+        start = time.time()
+        store_count = store.count(ville='Québec', type_propriete='Triplex')
+        store_s = time.time() - start
+        results.append(check("Comptage indexé sans parcourir les fichiers",
+                             store_count == files_count and store_s * 10 < files_s,
+                             f"{store_s * 1000:.1f} ms contre {files_s * 1000:.0f} ms pour {len(from_files)} fichiers"))
+
+        start = time.time()
+        from_store = [valider_donnees_financieres(data)[0] for data in store.query()]
+        store_s = time.time() - start
+        results.append(check("Validation financière complète depuis la base",
+                             from_store == [valider_donnees_financieres(p)[0] for p in
+                                            sorted(from_files, key=lambda p: p['numero_centris'])],
+                             f"{len(from_store)} annonces en {store_s * 1000:.0f} ms"))
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    print("=" * 80)
+    print(f"{sum(results)}/{len(results)} vérifications réussies")
+    return all(results)
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
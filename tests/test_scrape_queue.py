@@ -0,0 +1,113 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Test de la file des annonces à scraper (scrape_queue.py)
+
+Les cartes sont lues dans tests/fixtures/portal_resultats.html. Vérifie l'ordre
+de priorité (date d'envoi, statut), la limite par cycle, les nouvelles
+tentatives espacées, le passage dans les rejets et la persistance de la file.
+
+Usage:
+    python tests/test_scrape_queue.py
+"""
+
+import os
+import shutil
+import sys
+import tempfile
+
+TESTS_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(TESTS_DIR))
+
+from http_discovery import HttpListingDiscovery
+from scrape_queue import ScrapeQueue
+
+FIXTURE = os.path.join(TESTS_DIR, 'fixtures', 'portal_resultats.html')
+HOUR = 3600
+
+
+def check(label, condition, details=''):
+    print(f"{'[OK]' if condition else '[ERREUR]'} {label}" + (f" ({details})" if details else ''))
+    return condition
+
+
+def main():
+    print("=" * 80)
+    print("TEST DE LA FILE DE SCRAPING")
+    print("=" * 80)
+
+    results = []
+    workdir = tempfile.mkdtemp(prefix='scrape_queue_')
+    try:
+        with open(FIXTURE, encoding='utf-8') as f:
+            centris_ids, cards = HttpListingDiscovery.parse(f.read())
+        # 12345678 : 2026-02-10 « Nouvelle annonce » ; 23456789 : 2026-02-08 « Nouveau prix » ; 34567890 : 2026-01-30
+        cards['45678901'] = dict(cards['34567890'], date_envoi='2026-02-10', statut=None)
+        cards['56789012'] = dict(cards['34567890'], date_envoi='2026-02-09', statut='Nouveau prix')
+        page = ['34567890', '23456789', '45678901', '12345678', '56789012']
+        db = os.path.join(workdir, 'scrape_queue.db')
+        queue = ScrapeQueue(db, max_attempts=3, base_delay=HOUR, max_delay=6 * HOUR)
+        now = 1_000_000.0
+
+        # 1. Ordre de priorité : date d'envoi récente, puis statut ; la limite prend les premières
+        first_seen = queue.push_many([(cid, cards[cid], 'new') for cid in page], now=now)
+        results.append(check("Annonces les plus intéressantes d'abord",
+                             queue.take(now=now) == ['12345678', '45678901', '56789012', '23456789', '34567890'],
+                             ', '.join(queue.take(now=now))))
+        results.append(check("Limite par cycle sur l'ordre de priorité",
+                             queue.take(limit=2, now=now) == ['12345678', '45678901'] and first_seen == page))
+
+        # 2. Échecs : nouvel essai différé, délai doublé, puis rejet
+        queue.failed('12345678', 'panneau non ouvert', now=now)
+        results.append(check("Annonce en échec différée d'une heure",
+                             '12345678' not in queue.take(now=now + HOUR - 1)
+                             and queue.take(now=now + HOUR)[0] == '12345678'))
+        queue.failed('12345678', 'panneau non ouvert', now=now + HOUR)
+        results.append(check("Délai doublé au 2e échec",
+                             '12345678' not in queue.take(now=now + 3 * HOUR - 1)
+                             and '12345678' in queue.take(now=now + 3 * HOUR)))
+        again = queue.push_many([('12345678', cards['12345678'], 'new')], now=now + 3 * HOUR)
+        dead = queue.failed('12345678', 'Chrome indisponible', now=now + 3 * HOUR)
+        results.append(check("Rejet après 3 échecs (essais conservés d'un cycle à l'autre)",
+                             again == [] and dead and queue.is_dead('12345678')
+                             and '12345678' not in queue.take(now=now + 100 * HOUR)
+                             and queue.dead_count() == 1 and queue.pending_count() == 4))
+
+        # 3. Annonce scrapée retirée ; échec d'une annonce absente sans effet
+        queue.done('45678901')
+        results.append(check("Annonce scrapée retirée de la file",
+                             '45678901' not in queue.take(now=now) and not queue.failed('45678901', now=now)))
+
+        # 4. Annonces disparues de la page retirées, rejets conservés, file relue après redémarrage
+        queue.prune(['12345678', '23456789', '56789012'])
+        reopened = ScrapeQueue(db, max_attempts=3, base_delay=HOUR)
+        results.append(check("Annonces disparues retirées, rejets conservés, file persistante",
+                             reopened.take(now=now) == ['56789012', '23456789']
+                             and reopened.dead_ids() == {'12345678'}))
+
+        # 5. Rejet remis dans la file à la main
+        results.append(check("Rejet remis dans la file",
+                             reopened.retry('12345678') and not reopened.is_dead('12345678')
+                             and reopened.take()[0] == '12345678'))
+
+        # 6. Annonce toujours en échec sur 48 cycles horaires : quelques essais au lieu de 48
+        stubborn = ScrapeQueue(os.path.join(workdir, 'obstinee.db'), max_attempts=5, base_delay=1800)
+        attempts = 0
+        for cycle in range(48):
+            moment = now + cycle * HOUR
+            stubborn.push_many([('99999999', cards['34567890'], 'new')], now=moment)
+            for centris_id in stubborn.take(now=moment):
+                attempts += 1
+                stubborn.failed(centris_id, 'panneau non ouvert', now=moment)
+        results.append(check("Annonce défaillante abandonnée", attempts == 5 and stubborn.is_dead('99999999'),
+                             f"{attempts} essais sur 48 cycles"))
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    print("=" * 80)
+    print(f"{sum(results)}/{len(results)} vérifications réussies")
+    return all(results)
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
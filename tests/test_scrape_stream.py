@@ -0,0 +1,116 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Test des résultats de scraping au fil de l'eau (scrape_stream.py)
+
+Le scraping est simulé par une fonction et une horloge factice. Vérifie que
+rien n'est scrapé avant la demande du consommateur (contre-pression), que les
+erreurs n'interrompent pas le flux, l'annulation, la pause entre annonces qui
+absorbe le temps du consommateur et la mémoire constante sur une longue liste.
+
+Usage:
+    python tests/test_scrape_stream.py
+"""
+
+import os
+import sys
+import threading
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from scrape_stream import new_stream_stats, stream_listings
+
+
+class FakeClock:
+    """Horloge factice : sleep() et le travail simulé avancent le temps"""
+
+    def __init__(self):
+        self.now = 0.0
+        self.slept = 0.0
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.slept += seconds
+        self.now += seconds
+
+
+def check(label, condition, details=''):
+    print(f"{'[OK]' if condition else '[ERREUR]'} {label}" + (f" ({details})" if details else ''))
+    return condition
+
+
+def main():
+    print("=" * 80)
+    print("TEST DU SCRAPING AU FIL DE L'EAU")
+    print("=" * 80)
+
+    results = []
+    ids = [str(10000000 + i) for i in range(100)]
+
+    # 1. Contre-pression : seules les annonces demandées sont scrapées
+    scraped = []
+    stream = stream_listings(ids, lambda cid: scraped.append(cid) or {'numero_centris': cid})
+    first = [next(stream) for _ in range(2)]
+    results.append(check("Annonce suivante scrapée seulement à la demande",
+                         scraped == ids[:2] and first == [(cid, {'numero_centris': cid}) for cid in ids[:2]]))
+    stream.close()
+    results.append(check("Générateur fermé : aucune autre annonce scrapée", scraped == ids[:2] and list(stream) == []))
+
+    # 2. Une erreur de scraping donne None sans interrompre le flux
+    def flaky(cid):
+        if cid == ids[1]:
+            raise RuntimeError("panneau non ouvert")
+        return {'numero_centris': cid}
+    stats = new_stream_stats()
+    out = list(stream_listings(ids[:3], flaky, stats=stats))
+    results.append(check("Erreur isolée, flux poursuivi",
+                         [r is None for _, r in out] == [False, True, False]
+                         and stats['listings'] == 3 and stats['errors'] == 1))
+
+    # 3. Annulation vérifiée avant chaque annonce
+    cancel = threading.Event()
+    stats = new_stream_stats()
+    done = []
+    for cid, _ in stream_listings(ids, lambda cid: cid, cancel=cancel, stats=stats):
+        done.append(cid)
+        if len(done) == 3:
+            cancel.set()
+    results.append(check("Arrêt demandé : l'annonce en cours se termine, aucune autre n'est ouverte",
+                         done == ids[:3] and stats['cancelled']))
+
+    # 4. Pause de 5 s entre annonces : le temps du consommateur est déduit de la pause
+    clock = FakeClock()
+    stats = new_stream_stats()
+
+    def scrape(cid):
+        clock.now += 20.0
+        return cid
+    for cid, _ in stream_listings(ids[:10], scrape, delay=5.0, stats=stats, sleep=clock.sleep, clock=clock):
+        clock.now += 3.0  # sauvegarde + dépôt dans la file d'envoi API
+    sequential = 10 * 20.0 + 10 * 3.0 + 9 * 5.0
+    results.append(check("Traitement du consommateur recouvert par la pause",
+                         clock.slept == 9 * 2.0 and stats['pause_saved_s'] == 9 * 3.0
+                         and stats['consumer_s'] == 10 * 3.0,
+                         f"{clock.now:.0f}s contre {sequential:.0f}s en boucle séquentielle"))
+
+    # 5. Mémoire constante : 400 résultats de 256 Ko consommés un à un
+    tracemalloc.start()
+    total = 0
+    for cid, record in stream_listings((str(i) for i in range(400)), lambda cid: {'html': 'x' * 262144}):
+        total += len(record['html'])
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    results.append(check("Pic mémoire indépendant du nombre d'annonces",
+                         total == 400 * 262144 and peak < 4 * 262144,
+                         f"pic {peak / 1024:.0f} Ko pour {total / 1048576:.0f} Mo traités"))
+
+    print("=" * 80)
+    print(f"{sum(results)}/{len(results)} vérifications réussies")
+    return all(results)
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
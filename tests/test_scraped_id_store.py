@@ -0,0 +1,112 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Test de la mémoire des annonces déjà scrapées (scraped_id_store.py)
+
+Import de l'ancien scraped_properties.json, interface dict utilisée par le
+moniteur, persistance après redémarrage et coût d'un ajout comparé à la
+réécriture complète du fichier JSON.
+
+Usage:
+    python tests/test_scraped_id_store.py
+"""
+
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from scraped_id_store import ScrapedIdStore
+
+
+def check(label, condition, details=''):
+    print(f"{'[OK]' if condition else '[ERREUR]'} {label}" + (f" ({details})" if details else ''))
+    return condition
+
+
+def main():
+    print("=" * 80)
+    print("TEST DE LA MÉMOIRE DES ANNONCES SCRAPÉES")
+    print("=" * 80)
+
+    results = []
+    workdir = tempfile.mkdtemp(prefix='scraped_ids_')
+    try:
+        legacy = os.path.join(workdir, 'scraped_properties.json')
+        db = os.path.join(workdir, 'scraped_ids.db')
+
+        # 1. Import de l'ancien JSON (dict) au premier lancement
+        with open(legacy, 'w', encoding='utf-8') as f:
+            json.dump({'21609160': '2026-02-10T08:00:00', '12345678': ''}, f, indent=2)
+        store = ScrapedIdStore(db, legacy_json=legacy)
+        results.append(check("Import de scraped_properties.json",
+                             len(store) == 2 and store['21609160'] == '2026-02-10T08:00:00'))
+        results.append(check("Ancien fichier conservé", os.path.exists(legacy)))
+
+        # 2. Interface dict utilisée par identify_new_listings et le marquage des annonces
+        store['99999999'] = '2026-02-11T09:30:00'
+        current_ids = ['21609160', '99999999', '55555555']
+        new_ids = [centris_id for centris_id in current_ids if centris_id not in store]
+        results.append(check("Appartenance et ajout", new_ids == ['55555555'] and len(store) == 3))
+        del store['12345678']
+        results.append(check("Suppression", '12345678' not in store and sorted(store) == ['21609160', '99999999']))
+
+        # 3. Redémarrage : données relues depuis la base, ancien JSON non réimporté
+        reopened = ScrapedIdStore(db, legacy_json=legacy)
+        results.append(check("Persistance après redémarrage",
+                             dict(reopened) == {'21609160': '2026-02-10T08:00:00', '99999999': '2026-02-11T09:30:00'}))
+        reopened.clear()
+        results.append(check("Base vidée sans réimport du JSON", len(ScrapedIdStore(db, legacy_json=legacy)) == 0))
+
+        # 4. Ancien format liste
+        list_legacy = os.path.join(workdir, 'liste.json')
+        with open(list_legacy, 'w', encoding='utf-8') as f:
+            json.dump([11111111, '22222222'], f)
+        from_list = ScrapedIdStore(os.path.join(workdir, 'liste.db'), legacy_json=list_legacy)
+        results.append(check("Import de l'ancien format liste", sorted(from_list) == ['11111111', '22222222']))
+
+        # 5. Export au format de scraped_properties.json (sauvegardes)
+        backup = from_list.export_json(os.path.join(workdir, 'backup.json'))
+        with open(backup, encoding='utf-8') as f:
+            results.append(check("Export JSON", json.load(f) == {'11111111': '', '22222222': ''}))
+
+        # 6. Coût d'un ajout avec 20 000 annonces déjà connues
+        known = {str(30000000 + i): '2026-01-01T00:00:00' for i in range(20000)}
+        big_legacy = os.path.join(workdir, 'gros.json')
+        with open(big_legacy, 'w', encoding='utf-8') as f:
+            json.dump(known, f, indent=2)
+        start = time.time()
+        big = ScrapedIdStore(os.path.join(workdir, 'gros.db'), legacy_json=big_legacy)
+        ScrapedIdStore(os.path.join(workdir, 'gros.db'), legacy_json=big_legacy)
+        open_s = (time.time() - start) / 2
+
+        additions = 50
+        start = time.time()
+        for i in range(additions):
+            known[str(40000000 + i)] = '2026-02-01T00:00:00'
+            with open(big_legacy, 'w', encoding='utf-8') as f:
+                json.dump(known, f, indent=2, ensure_ascii=False)
+        json_ms = (time.time() - start) / additions * 1000
+        start = time.time()
+        for i in range(additions):
+            big[str(40000000 + i)] = '2026-02-01T00:00:00'
+        store_ms = (time.time() - start) / additions * 1000
+        results.append(check("Ajout plus rapide que la réécriture du JSON", store_ms * 3 < json_ms,
+                             f"{store_ms:.2f} ms contre {json_ms:.2f} ms par annonce, "
+                             f"ouverture en {open_s * 1000:.0f} ms"))
+        results.append(check("Ajouts présents après redémarrage",
+                             len(ScrapedIdStore(os.path.join(workdir, 'gros.db'))) == 20000 + additions))
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    print("=" * 80)
+    print(f"{sum(results)}/{len(results)} vérifications réussies")
+    return all(results)
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
@@ -4,9 +4,14 @@
 Script de validation des corrections apportées au scraper
 """
 
-import json
 import re
-from pathlib import Path
+
+from property_store import PropertyStore
+
+try:
+    from config_api import PROPERTY_DB
+except ImportError:
+    PROPERTY_DB = 'properties.db'
 
 def valider_donnees_financieres(property_data):
     """
@@ -64,116 +69,99 @@ def valider_donnees_financieres(property_data):
     return est_valide, messages
 
 
-def valider_unicite_annonces():
+def valider_unicite_annonces(store, doublons):
     """
     Vérifie qu'il n'y a pas de duplications d'annonces
     
+    Args:
+        store: PropertyStore (une ligne par numéro Centris)
+        doublons: {numero_centris: [fichiers]} relevés à l'import des property_*.json
+    
     Returns:
         tuple: (est_valide, messages)
     """
     messages = []
     est_valide = True
     
-    # Trouver tous les fichiers property_*.json
-    fichiers_json = list(Path('.').glob('property_*.json'))
-    
-    if not fichiers_json:
-        return True, ["Aucun fichier property_*.json trouve"]
-    
-    messages.append(f"[INFO] {len(fichiers_json)} fichiers property_*.json trouves")
-    
-    # Grouper par numéro Centris
-    annonces_par_centris = {}
-    
-    for fichier in fichiers_json:
-        try:
-            with open(fichier, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-                numero_centris = data.get('numero_centris')
-                
-                if numero_centris:
-                    if numero_centris not in annonces_par_centris:
-                        annonces_par_centris[numero_centris] = []
-                    annonces_par_centris[numero_centris].append(fichier.name)
-        except Exception as e:
-            messages.append(f"[WARNING] Erreur lecture {fichier.name}: {e}")
+    total = store.count()
+    if not total:
+        return True, [f"Aucune annonce dans {store.path}"]
     
-    # Vérifier les duplications
-    duplications = {k: v for k, v in annonces_par_centris.items() if len(v) > 1}
+    messages.append(f"[INFO] {total} annonces dans {store.path}")
     
-    if duplications:
-        messages.append(f"\n[ERREUR] {len(duplications)} duplication(s) detectee(s):")
-        for numero, fichiers in duplications.items():
+    if doublons:
+        messages.append(f"\n[ERREUR] {len(doublons)} duplication(s) detectee(s):")
+        for numero, fichiers in doublons.items():
             messages.append(f"  Numero Centris {numero} ({len(fichiers)} fichiers):")
             for f in fichiers:
                 messages.append(f"    - {f}")
         est_valide = False
     else:
         messages.append(f"[OK] Aucune duplication detectee")
-        messages.append(f"  {len(annonces_par_centris)} annonces uniques")
+        messages.append(f"  {total} annonces uniques")
     
     return est_valide, messages
 
 
-def rapport_validation():
+def rapport_validation(db_file=PROPERTY_DB):
     """
     Génère un rapport de validation complet
+    
+    Les fichiers property_*.json présents sont d'abord importés dans la base
+    (fichiers déjà importés et inchangés ignorés), puis la validation porte sur la base.
     """
     print("=" * 80)
     print("RAPPORT DE VALIDATION DES CORRECTIONS")
     print("=" * 80)
     print()
     
+    store = PropertyStore(db_file)
+    import_result = store.import_json_files()
+    for fichier, erreur in import_result['errors']:
+        print(f"[WARNING] Erreur lecture {fichier}: {erreur}")
+    
     # Test 1: Vérifier les duplications
     print("TEST 1: VERIFICATION UNICITE DES ANNONCES")
     print("-" * 80)
-    est_valide_unicite, messages_unicite = valider_unicite_annonces()
+    est_valide_unicite, messages_unicite = valider_unicite_annonces(store, import_result['duplicates'])
     for msg in messages_unicite:
         print(msg)
     print()
     
-    # Test 2: Vérifier la cohérence financière de chaque fichier
+    # Test 2: Vérifier la cohérence financière de chaque annonce
     print("TEST 2: VERIFICATION COHERENCE FINANCIERE")
     print("-" * 80)
     
-    fichiers_json = list(Path('.').glob('property_*.json'))
-    total_fichiers = len(fichiers_json)
-    fichiers_valides = 0
-    fichiers_invalides = 0
-    
-    for fichier in fichiers_json:
-        try:
-            with open(fichier, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-            
-            numero_centris = data.get('numero_centris', 'N/A')
-            print(f"\nValidation de {fichier.name} (No Centris: {numero_centris}):")
-            
-            est_valide, messages = valider_donnees_financieres(data)
-            
-            for msg in messages:
-                print(f"  {msg}")
-            
-            if est_valide:
-                fichiers_valides += 1
-            else:
-                fichiers_invalides += 1
-                
-        except Exception as e:
-            print(f"  [ERREUR] Impossible de valider {fichier.name}: {e}")
-            fichiers_invalides += 1
+    annonces = store.query()
+    total_annonces = len(annonces)
+    annonces_valides = 0
+    annonces_invalides = len(import_result['errors'])
+    
+    for data in annonces:
+        numero_centris = data.get('numero_centris', 'N/A')
+        print(f"\nValidation de l'annonce {numero_centris}:")
+        
+        est_valide, messages = valider_donnees_financieres(data)
+        
+        for msg in messages:
+            print(f"  {msg}")
+        
+        if est_valide:
+            annonces_valides += 1
+        else:
+            annonces_invalides += 1
     
     # Résumé final
     print()
     print("=" * 80)
     print("RESUME FINAL")
     print("=" * 80)
-    print(f"Total fichiers analyses: {total_fichiers}")
-    print(f"Fichiers valides: {fichiers_valides}")
-    print(f"Fichiers avec erreurs: {fichiers_invalides}")
+    print(f"Total annonces analysees: {total_annonces}")
+    print(f"Annonces valides: {annonces_valides}")
+    print(f"Annonces avec erreurs: {annonces_invalides}")
     print()
     
-    if est_valide_unicite and fichiers_invalides == 0:
+    if est_valide_unicite and annonces_invalides == 0:
         print("[OK] TOUTES LES VALIDATIONS REUSSIES!")
     else:
         print("[ATTENTION] CERTAINES VALIDATIONS ONT ECHOUE")
@@ -181,7 +169,7 @@ def rapport_validation():
         print("ACTIONS RECOMMANDEES:")
         if not est_valide_unicite:
             print("  1. Supprimer les fichiers dupliques")
-        if fichiers_invalides > 0:
+        if annonces_invalides > 0:
             print("  2. Re-scraper les proprietes avec des donnees financieres incorrectes")
     
     print("=" * 80)